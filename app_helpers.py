@@ -0,0 +1,247 @@
+"""
+App helpers module untuk sistem absensi
+Decorators, caches and request helpers shared by the route blueprints
+"""
+
+import os
+import json
+import hashlib
+
+from flask import current_app, g, jsonify, make_response, redirect, request, session, url_for
+
+from cache import get_cache
+from compression import compress, brotli
+from db import get_db_connection, get_read_connection, get_replica, replica_max_staleness
+from lazy_imports import lazy
+
+
+Image = lazy('PIL.Image')
+ImageOps = lazy('PIL.ImageOps')
+
+# Allowed file extensions
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+# Photo capture parameters advertised to the attendance page (see /api/capture_params)
+CAPTURE_MAX_DIMENSION = int(os.environ.get('CAPTURE_MAX_DIMENSION', 640))
+CAPTURE_QUALITY = float(os.environ.get('CAPTURE_QUALITY', 0.75))
+CAPTURE_MIME_TYPE = os.environ.get('CAPTURE_MIME_TYPE', 'image/jpeg')
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def normalize_photo(path):
+    """Downscale photos from clients without the capture pipeline, so face encoding gets consistent sizes"""
+    try:
+        with Image.open(path) as image:
+            if max(image.size) <= CAPTURE_MAX_DIMENSION:
+                return
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail((CAPTURE_MAX_DIMENSION, CAPTURE_MAX_DIMENSION))
+        image.save(path, 'JPEG', quality=int(CAPTURE_QUALITY * 100))
+    except OSError as e:
+        print(f"Warning: could not normalize photo {path}: {str(e)}")
+
+
+def get_active_coordinates():
+    """Get active coordinates, cached across workers until a coordinate changes"""
+    def load():
+        conn = get_db_connection()
+        rows = conn.execute('SELECT * FROM coordinates WHERE active = TRUE').fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    return get_cache().get_or_set('coordinates', 'active', load, ttl=300)
+
+
+def load_user_context(user_id):
+    """Load identity and face state for a user in a single query"""
+    conn = get_db_connection()
+    row = conn.execute('''
+        SELECT
+            u.id, u.username, u.full_name, u.email, u.role, u.active,
+            u.created_at, u.updated_at,
+            (SELECT COUNT(*) FROM face_data f WHERE f.user_id = u.id AND f.active = TRUE) as face_count
+        FROM users u
+        WHERE u.id = ?
+    ''', (user_id,)).fetchone()
+    conn.close()
+
+    if not row:
+        return None
+    context = dict(row)
+    context['face_enabled'] = context.pop('face_count') > 0
+    return context
+
+
+def get_user_context():
+    """Get the logged-in user's identity and face state, loaded at most once per request
+
+    Backed by a short-TTL cache entry, so a typical page view does no
+    users/face_data queries; invalidated by profile, face and role changes.
+    """
+    if 'user_context' not in g:
+        user_id = session.get('user_id')
+        g.user_context = None
+        if user_id is not None:
+            g.user_context = get_cache().get_or_set(
+                'user_context', user_id, lambda: load_user_context(user_id), ttl=30
+            )
+    return g.user_context
+
+
+def invalidate_user_caches(user_id=None):
+    """Invalidate cached data after a user or face data change"""
+    cache = get_cache()
+    if user_id is not None:
+        cache.delete_ns('faces', user_id)
+        cache.delete_ns('user_context', user_id)
+    else:
+        cache.invalidate('faces')
+        cache.invalidate('user_context')
+    g.pop('user_context', None)
+    cache.invalidate('users')
+    cache.invalidate('reports')
+
+
+def login_required(f):
+    """Decorator to require login for routes"""
+    from functools import wraps
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return redirect(url_for('main.login'))
+        if get_user_context() is None:
+            # User was deleted while logged in
+            session.clear()
+            return redirect(url_for('main.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def cached_response(namespace, ttl=60, per_user=False):
+    """Decorator to cache a route's successful response in the shared cache"""
+    from functools import wraps
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = request.full_path
+            if per_user:
+                key = f"{session.get('user_id')}:{key}"
+
+            cache = get_cache()
+            cached = cache.get_ns(namespace, key)
+            if cached is not None:
+                body, mimetype, headers = cached
+                return current_app.response_class(body, mimetype=mimetype, headers=headers)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.direct_passthrough = False
+                headers = [(k, v) for k, v in response.headers.items()
+                           if k.lower() in ('content-disposition', 'cache-control')]
+                cache.set_ns(namespace, key, (response.get_data(), response.mimetype, headers), ttl)
+            return response
+        return decorated_function
+    return decorator
+
+
+def get_idempotency_key():
+    """Client-supplied key identifying one punch across retries"""
+    key = request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+    return key[:128] if key else None
+
+
+def punch_key(action, key=None):
+    """Journal idempotency key for this punch, derived from the client's key"""
+    key = key or get_idempotency_key()
+    if key is None:
+        return None
+    return hashlib.sha1(f"{session['user_id']}:{action}:{key}".encode()).hexdigest()
+
+
+def idempotent(ttl=600):
+    """Decorator replaying the stored response when a request is retried with the same Idempotency-Key
+
+    Runs before the view, so a retried upload never reaches face verification
+    twice. Only successful responses are stored; failures can be retried.
+    """
+    from functools import wraps
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = get_idempotency_key()
+            if key is None:
+                return f(*args, **kwargs)
+
+            cache = get_cache()
+            cache_key = f"{session.get('user_id')}:{request.path}:{key}"
+            stored = cache.get_ns('idempotency', cache_key)
+            if stored is not None:
+                response = current_app.response_class(stored, mimetype='application/json')
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+
+            lock_key = f"idempotency-lock:{cache_key}"
+            if not cache.add(lock_key, True, ttl=60):
+                return jsonify({'success': False, 'message': 'Permintaan yang sama sedang diproses, mohon tunggu'}), 409
+
+            try:
+                response = make_response(f(*args, **kwargs))
+                result = response.get_json(silent=True)
+                if response.status_code == 200 and result and result.get('success'):
+                    cache.set_ns('idempotency', cache_key, response.get_data(), ttl)
+            finally:
+                cache.delete(lock_key)
+            return response
+        return decorated_function
+    return decorator
+
+
+def read_connection():
+    """Connection for report reads: replica, or primary if this user just wrote"""
+    user_id = session.get('user_id')
+    recent_write = user_id is not None and get_cache().get(f"recent_write:{user_id}")
+    return get_read_connection(use_primary=bool(recent_write))
+
+
+def read_calendar(reader, *args):
+    """Calendar reads go to the primary, which materializes stale months on demand"""
+    conn = get_db_connection()
+    try:
+        return reader(conn, *args)
+    finally:
+        conn.close()
+
+
+def remember_recent_write(response):
+    """Pin a user's reads to the primary until the replica has caught up"""
+    if (request.method in ('POST', 'PUT', 'DELETE')
+            and response.status_code < 400
+            and 'user_id' in session
+            and get_replica() is not None):
+        get_cache().set(f"recent_write:{session['user_id']}", True, ttl=replica_max_staleness())
+    return response
+
+
+def get_geofence_asset():
+    """Get the geofence JSON payload, its version hash and compressed variants"""
+    def build():
+        fences = [{
+            'id': coord['id'],
+            'name': coord['name'],
+            'lat': coord['latitude'],
+            'lon': coord['longitude'],
+            'radius': coord['radius']
+        } for coord in get_active_coordinates()]
+        body = json.dumps(fences, separators=(',', ':')).encode('utf-8')
+        asset = {
+            'version': hashlib.sha256(body).hexdigest()[:16],
+            'identity': body,
+            'gzip': compress(body, 'gzip')
+        }
+        if brotli is not None:
+            asset['br'] = compress(body, 'br')
+        return asset
+    return get_cache().get_or_set('coordinates', 'geofence_asset', build, ttl=300)
+
@@ -0,0 +1,501 @@
+"""
+Attendance routes module untuk sistem absensi
+Attendance page, clock in/out, capture parameters and offline punch sync
+"""
+
+import os
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, make_response, render_template, request, session
+
+import attendance_stats
+import geofence
+import geofence_analytics
+import liveness
+import metrics
+import punch_sync
+from app_helpers import (
+    CAPTURE_MAX_DIMENSION, CAPTURE_MIME_TYPE, CAPTURE_QUALITY, allowed_file,
+    get_geofence_asset, get_user_context, idempotent, login_required,
+    normalize_photo, punch_key,
+)
+from cache import get_cache
+from db import get_db_connection
+from face_verification import FACE_RECOGNITION_AVAILABLE, verify_face_for_attendance, verify_faces_for_attendance
+from punch_journal import get_punch_journal
+
+
+bp = Blueprint('attendance', __name__)
+
+
+@bp.route('/absensi')
+@login_required
+def absensi():
+    """Attendance page"""
+    conn = get_db_connection()
+    
+    # Open session (may have started yesterday), else today's attendance
+    attendance = attendance_stats.current_state(conn, session['user_id'], datetime.now())
+    
+    conn.close()
+    
+    # Face recognition state comes from the cached user context
+    face_enabled = get_user_context()['face_enabled']
+    
+    # Geofences are loaded by the page from a versioned, long-cached JSON asset
+    response = make_response(render_template('absensi.html', 
+                         attendance=attendance, 
+                         geofence_version=get_geofence_asset()['version'],
+                         face_enabled=face_enabled,
+                         face_recognition_available=FACE_RECOGNITION_AVAILABLE))
+    
+    # Repeat visits with unchanged state get a 304 instead of the full page
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@bp.route('/absen_masuk', methods=['POST'])
+@login_required
+@idempotent()
+def absen_masuk():
+    """Clock in endpoint with flexible face verification"""
+    try:
+        try:
+            latitude, longitude, accuracy = geofence.parse_location(
+                request.form.get('latitude'), request.form.get('longitude'), request.form.get('accuracy'))
+        except geofence.LocationError as e:
+            return jsonify({'success': False, 'message': str(e)})
+        
+        conn = get_db_connection()
+        punch_at = datetime.now()
+        today = punch_at.strftime("%Y-%m-%d")
+        now = punch_at.strftime("%H:%M:%S")
+
+        # Validasi lokasi
+        with metrics.span('geofence'):
+            location = geofence.get_fences().locate(latitude, longitude, accuracy)
+
+        if not location['inside']:
+            if location['reason'] == 'outside':
+                geofence_analytics.record_rejections(
+                    conn, session['user_id'], [('check_in', latitude, longitude, punch_at)])
+            conn.close()
+            return jsonify({'success': False, 'message': geofence.outside_message(location)})
+
+        # Cek sesi kerja yang masih terbuka (termasuk yang masih di journal)
+        journal = get_punch_journal()
+        if journal.is_pending(session['user_id'], 'check_in') or journal.is_pending(session['user_id'], 'check_out'):
+            conn.close()
+            return jsonify({'success': False, 'message': 'Absen sebelumnya masih diproses, silakan coba lagi sebentar.'})
+
+        with metrics.span('db'):
+            already_open = attendance_stats.open_session(conn, session['user_id'], punch_at)
+        if already_open:
+            conn.close()
+            return jsonify({'success': False, 'message': 'Anda sudah absen masuk! Silakan absen keluar terlebih dahulu.'})
+
+        # Face recognition - ADMIN EXCEPTION & FLEXIBLE FOR USERS
+        user_context = get_user_context()
+        user_role = user_context['role'] or 'user'
+        
+        if user_role == 'admin':
+            # Admin doesn't need face verification
+            face_enabled = False
+            face_verified = True
+            face_message = "Admin - face verification bypassed"
+        else:
+            # Check if user has face data
+            face_enabled = user_context['face_enabled']
+            
+            face_verified = False
+            face_message = ""
+        
+        photo_path = None
+        photo_hash = None
+
+        if 'photo' in request.files and request.files['photo'].filename != '':
+            file = request.files['photo']
+            if file and allowed_file(file.filename):
+                filename = f"{session['user_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+                photo_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+                with metrics.span('save'):
+                    file.save(photo_path)
+                    normalize_photo(photo_path)
+                
+                # Replayed photos and failed liveness challenges are rejected before dlib runs
+                if face_enabled and user_role != 'admin':
+                    with metrics.span('liveness'):
+                        photo_hash, liveness_error = liveness.screen_photo(
+                            photo_path, session['user_id'], request.files.getlist('challenge_frame'),
+                            challenge=bool(liveness.LIVENESS_CHALLENGE))
+                    if liveness_error:
+                        os.remove(photo_path)
+                        conn.close()
+                        return jsonify({'success': False, 'message': liveness_error})
+                
+                if face_enabled and FACE_RECOGNITION_AVAILABLE and user_role != 'admin':
+                    face_verified, face_message = verify_face_for_attendance(photo_path, session['user_id'])
+                    if not face_verified:
+                        if os.path.exists(photo_path):
+                            os.remove(photo_path)
+                        conn.close()
+                        return jsonify({'success': False, 'message': f'{face_message}'})
+                else:
+                    face_verified = True
+                    if user_role == 'admin':
+                        face_message = "Admin - photo saved without face verification"
+                    elif not face_enabled:
+                        face_message = "Photo saved - face recognition not setup"
+                    else:
+                        face_message = "Face recognition disabled or not available"
+        elif face_enabled and user_role != 'admin':
+            # Only require photo if user has face data setup
+            conn.close()
+            return jsonify({'success': False, 'message': 'Foto wajah diperlukan untuk verifikasi identitas'})
+        elif not face_enabled and user_role != 'admin':
+            # User doesn't have face data setup - allow but warn
+            face_verified = True
+            face_message = "Absen berhasil - setup face recognition di profil untuk keamanan"
+        else:
+            # Admin case
+            face_verified = True
+            face_message = "Admin access"
+        
+        conn.close()
+
+        # Journaled durably; the drainer writes attendance and the log entry
+        with metrics.span('journal'):
+            journal.submit({
+                'key': punch_key('check_in'),
+                'action': 'check_in',
+                'user_id': session['user_id'],
+                'date': today,
+                'time': now,
+                'timestamp': punch_at.strftime(attendance_stats.TIMESTAMP_FORMAT),
+                'latitude': latitude,
+                'longitude': longitude,
+                'photo_path': photo_path
+            })
+        if photo_hash is not None:
+            liveness.remember_photo(session['user_id'], photo_hash)
+        
+        success_message = 'Absen masuk berhasil!'
+        if face_message:
+            success_message += f' {face_message}'
+        
+        return jsonify({'success': True, 'message': success_message})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+
+
+@bp.route('/absen_keluar', methods=['POST'])
+@login_required  
+@idempotent()
+def absen_keluar():
+    """Clock out endpoint with flexible face verification"""
+    try:
+        try:
+            latitude, longitude, accuracy = geofence.parse_location(
+                request.form.get('latitude'), request.form.get('longitude'), request.form.get('accuracy'))
+        except geofence.LocationError as e:
+            return jsonify({'success': False, 'message': str(e)})
+
+        conn = get_db_connection()
+        punch_at = datetime.now()
+        today = punch_at.strftime("%Y-%m-%d")
+        now = punch_at.strftime("%H:%M:%S")
+
+        # Cek sesi kerja yang terbuka, juga shift malam yang dimulai kemarin (termasuk yang masih di journal)
+        journal = get_punch_journal()
+        if journal.is_pending(session['user_id'], 'check_out'):
+            conn.close()
+            return jsonify({'success': False, 'message': 'Anda sudah absen keluar!'})
+
+        with metrics.span('db'):
+            checked_in = (journal.is_pending(session['user_id'], 'check_in')
+                          or attendance_stats.open_session(conn, session['user_id'], punch_at))
+        if not checked_in:
+            conn.close()
+            return jsonify({'success': False, 'message': 'Anda belum absen masuk!'})
+
+        # Validasi lokasi
+        with metrics.span('geofence'):
+            location = geofence.get_fences().locate(latitude, longitude, accuracy)
+
+        if not location['inside']:
+            if location['reason'] == 'outside':
+                geofence_analytics.record_rejections(
+                    conn, session['user_id'], [('check_out', latitude, longitude, punch_at)])
+            conn.close()
+            return jsonify({'success': False, 'message': geofence.outside_message(location)})
+
+        # Face recognition - ADMIN EXCEPTION & FLEXIBLE FOR USERS
+        user_context = get_user_context()
+        user_role = user_context['role'] or 'user'
+        
+        if user_role == 'admin':
+            # Admin doesn't need face verification
+            face_enabled = False
+            face_verified = True
+            face_message = "Admin - face verification bypassed"
+        else:
+            # Check if user has face data
+            face_enabled = user_context['face_enabled']
+            
+            face_verified = False
+            face_message = ""
+        
+        photo_path = None
+        photo_hash = None
+
+        if 'photo' in request.files and request.files['photo'].filename != '':
+            file = request.files['photo']
+            if file and allowed_file(file.filename):
+                filename = f"{session['user_id']}_keluar_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+                photo_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+                with metrics.span('save'):
+                    file.save(photo_path)
+                    normalize_photo(photo_path)
+                
+                # Replayed photos and failed liveness challenges are rejected before dlib runs
+                if face_enabled and user_role != 'admin':
+                    with metrics.span('liveness'):
+                        photo_hash, liveness_error = liveness.screen_photo(
+                            photo_path, session['user_id'], request.files.getlist('challenge_frame'),
+                            challenge=bool(liveness.LIVENESS_CHALLENGE))
+                    if liveness_error:
+                        os.remove(photo_path)
+                        conn.close()
+                        return jsonify({'success': False, 'message': liveness_error})
+                
+                if face_enabled and FACE_RECOGNITION_AVAILABLE and user_role != 'admin':
+                    face_verified, face_message = verify_face_for_attendance(photo_path, session['user_id'])
+                    if not face_verified:
+                        if os.path.exists(photo_path):
+                            os.remove(photo_path)
+                        conn.close()
+                        return jsonify({'success': False, 'message': f'{face_message}'})
+                else:
+                    face_verified = True
+                    if user_role == 'admin':
+                        face_message = "Admin - photo saved without face verification"
+                    elif not face_enabled:
+                        face_message = "Photo saved - face recognition not setup"
+                    else:
+                        face_message = "Face recognition disabled or not available"
+        elif face_enabled and user_role != 'admin':
+            # Only require photo if user has face data setup
+            conn.close()
+            return jsonify({'success': False, 'message': 'Foto wajah diperlukan untuk verifikasi identitas'})
+        elif not face_enabled and user_role != 'admin':
+            # User doesn't have face data setup - allow but warn
+            face_verified = True
+            face_message = "Absen berhasil - setup face recognition di profil untuk keamanan"
+        else:
+            # Admin case
+            face_verified = True
+            face_message = "Admin access"
+
+        conn.close()
+
+        # Journaled durably; the drainer updates attendance and writes the log entry
+        with metrics.span('journal'):
+            journal.submit({
+                'key': punch_key('check_out'),
+                'action': 'check_out',
+                'user_id': session['user_id'],
+                'date': today,
+                'time': now,
+                'timestamp': punch_at.strftime(attendance_stats.TIMESTAMP_FORMAT),
+                'latitude': latitude,
+                'longitude': longitude,
+                'photo_path': photo_path
+            })
+        if photo_hash is not None:
+            liveness.remember_photo(session['user_id'], photo_hash)
+
+        success_message = 'Absen keluar berhasil!'
+        if face_message:
+            success_message += f' {face_message}'
+
+        return jsonify({'success': True, 'message': success_message})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+
+
+@bp.route('/api/capture_params', methods=['GET'])
+@login_required
+def api_capture_params():
+    """Preferred photo size and encoding for the attendance page"""
+    user_context = get_user_context()
+    face_check = bool(user_context['face_enabled']) and (user_context['role'] or 'user') != 'admin'
+    return jsonify({
+        'success': True,
+        'max_dimension': CAPTURE_MAX_DIMENSION,
+        'mime_type': CAPTURE_MIME_TYPE,
+        'quality': CAPTURE_QUALITY,
+        # Only users verified by face need one in the photo before upload
+        'face_check': face_check,
+        # Frames to send with the photo as challenge_frame ('' when not required)
+        'challenge': liveness.LIVENESS_CHALLENGE if face_check else '',
+        'challenge_frames': liveness.CHALLENGE_FRAMES,
+        'challenge_interval_ms': liveness.CHALLENGE_INTERVAL_MS,
+        'challenge_max_dimension': liveness.CHALLENGE_MAX_DIMENSION,
+    })
+
+
+@bp.route('/api/attendance/status', methods=['GET'])
+@login_required
+def api_attendance_status():
+    """Current attendance state and punches still being applied, for clients polling after a punch"""
+    try:
+        conn = get_db_connection()
+        attendance = attendance_stats.current_state(conn, session['user_id'], datetime.now())
+        conn.close()
+
+        journal = get_punch_journal()
+        return jsonify({
+            'success': True,
+            'attendance': attendance,
+            'pending': {action: journal.is_pending(session['user_id'], action)
+                        for action in punch_sync.ACTIONS},
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/api/attendance/sync', methods=['POST'])
+@login_required
+def api_sync_attendance():
+    """Apply punches queued offline on the attendance page, with a result per punch
+
+    Geofence and face checks run over the whole batch at once, face checks
+    only for punches that passed the order checks. Punches that were already
+    synced (same idempotency key) return their stored result.
+    """
+    try:
+        items = punch_sync.parse_batch(request.form.get('punches'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        user_id = session['user_id']
+        cache = get_cache()
+        results = {}
+        for item in items:
+            if item['error'] is None:
+                stored = cache.get_ns('idempotency', f"{user_id}:sync:{item['key']}")
+                # The online attempt that was queued may have reached the server after all
+                online_path = '/absen_masuk' if item['action'] == 'check_in' else '/absen_keluar'
+                if stored is None and cache.get_ns('idempotency', f"{user_id}:{online_path}:{item['key']}") is not None:
+                    stored = {'id': item['id'], 'success': True, 'message': 'Absen sudah tercatat'}
+                if stored is not None:
+                    results[item['id']] = dict(stored, replayed=True)
+        new_items = [item for item in items if item['id'] not in results]
+        
+        journal = get_punch_journal()
+        if new_items and (journal.is_pending(user_id, 'check_in') or journal.is_pending(user_id, 'check_out')):
+            return jsonify({'success': False, 'message': 'Absen sebelumnya masih diproses, silakan coba lagi sebentar.'}), 409
+        
+        # Validasi lokasi untuk semua absen sekaligus
+        rejected = punch_sync.check_geofences(new_items, geofence.get_fences())
+        if rejected:
+            conn = get_db_connection()
+            geofence_analytics.record_rejections(conn, user_id, [
+                (item['action'], item['latitude'], item['longitude'], item['captured_at']) for item in rejected])
+            conn.close()
+        
+        # Urutan masuk/keluar dicek terhadap sesi kerja yang sudah ada, before
+        # any photo is saved or encoded for a punch that would be rejected anyway
+        conn = get_db_connection()
+        try:
+            valid = [item for item in new_items if item['error'] is None]
+            current = attendance_stats.open_session(conn, user_id, valid[0]['captured_at']) if valid else None
+            last_punch = attendance_stats.last_punch(conn, user_id)
+        finally:
+            conn.close()
+        open_since = datetime.strptime(str(current['start_ts'])[:19], attendance_stats.TIMESTAMP_FORMAT) if current else None
+        now = datetime.now()
+        punch_sync.check_sequence(new_items, now, last_punch, open_since)
+        
+        # Foto dan verifikasi wajah - ADMIN EXCEPTION & FLEXIBLE FOR USERS
+        user_context = get_user_context()
+        user_role = user_context['role'] or 'user'
+        face_required = user_context['face_enabled'] and user_role != 'admin'
+        for item in new_items:
+            item['photo_path'] = None
+            photo = request.files.get(f"photo_{item['id']}")
+            if item['error'] is not None:
+                continue
+            if photo and photo.filename and allowed_file(photo.filename):
+                suffix = '_keluar' if item['action'] == 'check_out' else ''
+                filename = f"{user_id}{suffix}_{item['captured_at'].strftime('%Y%m%d_%H%M%S')}.jpg"
+                item['photo_path'] = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+                photo.save(item['photo_path'])
+                normalize_photo(item['photo_path'])
+            elif face_required:
+                item['error'] = 'Foto wajah diperlukan untuk verifikasi identitas'
+        
+        # Replays, also within the batch, are rejected before face verification
+        if face_required:
+            with_photo = [item for item in new_items if item['error'] is None and item['photo_path']]
+            screened = liveness.screen_photos([item['photo_path'] for item in with_photo], user_id)
+            for item, (photo_hash, liveness_error) in zip(with_photo, screened):
+                item['photo_hash'] = photo_hash
+                if liveness_error:
+                    item['error'] = liveness_error
+            if liveness.LIVENESS_CHALLENGE:
+                for item in with_photo:
+                    if item['error'] is None and item['photo_hash'] is not None:
+                        item['error'] = liveness.check_challenge(
+                            item['photo_hash'], request.files.getlist(f"challenge_{item['id']}"))
+        
+        if face_required:
+            to_verify = [item for item in new_items if item['error'] is None]
+            verified = verify_faces_for_attendance([item['photo_path'] for item in to_verify], user_id)
+            for item, (face_verified, face_message) in zip(to_verify, verified):
+                if not face_verified:
+                    item['error'] = face_message
+        
+        # A punch rejected by face checks no longer opens or closes a session
+        punch_sync.check_sequence(new_items, now, last_punch, open_since)
+        
+        for item in new_items:
+            label = 'masuk' if item['action'] == 'check_in' else 'keluar'
+            if item['error'] is not None:
+                if item.get('photo_path') and os.path.exists(item['photo_path']):
+                    os.remove(item['photo_path'])
+                results[item['id']] = {'id': item['id'], 'success': False, 'message': item['error']}
+                continue
+            
+            # Journaled in capture order; the drainer writes attendance and the log entries
+            journal.submit({
+                'key': punch_key(item['action'], item['key']),
+                'action': item['action'],
+                'user_id': user_id,
+                'date': item['captured_at'].strftime('%Y-%m-%d'),
+                'time': item['captured_at'].strftime('%H:%M:%S'),
+                'timestamp': item['captured_at'].strftime(attendance_stats.TIMESTAMP_FORMAT),
+                'latitude': item['latitude'],
+                'longitude': item['longitude'],
+                'photo_path': item['photo_path']
+            })
+            if item.get('photo_hash') is not None:
+                liveness.remember_photo(user_id, item['photo_hash'])
+            results[item['id']] = {'id': item['id'], 'success': True, 'message': f'Absen {label} berhasil disinkronkan!'}
+            cache.set_ns('idempotency', f"{user_id}:sync:{item['key']}", results[item['id']],
+                         ttl=punch_sync.MAX_OFFLINE_HOURS * 3600)
+        
+        ordered = [results[item['id']] for item in items if item['id'] in results]
+        synced = len([r for r in ordered if r['success']])
+        return jsonify({
+            'success': True,
+            'message': f'{synced} dari {len(ordered)} absen berhasil disinkronkan',
+            'results': ordered
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
@@ -0,0 +1,340 @@
+"""
+Attendance stats module untuk sistem absensi
+Interval storage for work sessions and the shared aggregation used by reports
+"""
+
+import os
+from datetime import datetime, timedelta
+
+
+# A session still open after this many hours was never clocked out
+MAX_SHIFT_HOURS = float(os.environ.get('MAX_SHIFT_HOURS', 20))
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def ensure_schema(conn):
+    """Create work_sessions and daily_work_totals, backfilling from attendance once
+
+    work_sessions holds one row per clock-in/clock-out interval, so split
+    shifts and shifts crossing midnight are stored as they happened.
+    daily_work_totals is maintained incrementally as sessions open and close
+    and is what the reports aggregate over.
+    """
+    id_column = conn.dialect.id_column
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS work_sessions (
+            id {id_column},
+            user_id INTEGER NOT NULL,
+            work_date DATE NOT NULL,
+            start_ts TIMESTAMP NOT NULL,
+            end_ts TIMESTAMP,
+            duration_minutes INTEGER,
+            status VARCHAR(20) NOT NULL DEFAULT 'open',
+            latitude_in DOUBLE PRECISION,
+            longitude_in DOUBLE PRECISION,
+            latitude_out DOUBLE PRECISION,
+            longitude_out DOUBLE PRECISION,
+            photo_path_in TEXT,
+            photo_path_out TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_work_sessions_user_start ON work_sessions (user_id, start_ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_work_sessions_work_date ON work_sessions (work_date)')
+    # At most one open session per user, enforced by the database
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_work_sessions_open ON work_sessions (user_id) WHERE status = 'open'")
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS daily_work_totals (
+            id {id_column},
+            user_id INTEGER NOT NULL,
+            work_date DATE NOT NULL,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            closed_count INTEGER NOT NULL DEFAULT 0,
+            total_minutes INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (user_id, work_date)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_daily_work_totals_date ON daily_work_totals (work_date)')
+    conn.commit()
+
+    if conn.execute('SELECT 1 FROM work_sessions LIMIT 1').fetchone() is None:
+        backfill_from_attendance(conn)
+
+
+def _timestamp(date_str, time_str):
+    return datetime.strptime(f"{date_str} {str(time_str)[:8]}", TIMESTAMP_FORMAT)
+
+
+def backfill_from_attendance(conn):
+    """Turn legacy one-row-per-day attendance into sessions and daily totals"""
+    rows = conn.execute('''
+        SELECT user_id, date, time_in, time_out, latitude, longitude,
+               latitude_out, longitude_out, photo_path, photo_path_out
+        FROM attendance
+        WHERE time_in IS NOT NULL
+        ORDER BY user_id, date DESC
+    ''').fetchall()
+    if not rows:
+        return
+
+    open_since = datetime.now() - timedelta(hours=MAX_SHIFT_HOURS)
+    sessions = []
+    totals = []
+    latest_seen = set()
+    for row in rows:
+        start = _timestamp(row['date'], row['time_in'])
+        # Only a user's most recent day can still be in progress
+        may_be_open = row['user_id'] not in latest_seen and start >= open_since
+        latest_seen.add(row['user_id'])
+        end = None
+        duration = None
+        if row['time_out']:
+            end = _timestamp(row['date'], row['time_out'])
+            if end < start:
+                # Clock-out after midnight belongs to the shift that started the day before
+                end += timedelta(days=1)
+            duration = int((end - start).total_seconds() // 60)
+        sessions.append((
+            row['user_id'], row['date'], start.strftime(TIMESTAMP_FORMAT),
+            end.strftime(TIMESTAMP_FORMAT) if end else None, duration,
+            'closed' if end else ('open' if may_be_open else 'abandoned'),
+            row['latitude'], row['longitude'], row['latitude_out'], row['longitude_out'],
+            row['photo_path'], row['photo_path_out']
+        ))
+        totals.append((row['user_id'], row['date'], 1, 1 if end else 0, duration or 0))
+
+    conn.executemany('''
+        INSERT INTO work_sessions (user_id, work_date, start_ts, end_ts, duration_minutes, status,
+                                   latitude_in, longitude_in, latitude_out, longitude_out,
+                                   photo_path_in, photo_path_out)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', sessions)
+    conn.executemany('''
+        INSERT INTO daily_work_totals (user_id, work_date, session_count, closed_count, total_minutes)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, work_date) DO NOTHING
+    ''', totals)
+    conn.commit()
+    print(f"Backfilled {len(sessions)} work sessions from attendance")
+
+
+# -- punches ------------------------------------------------------------------
+
+def open_session(conn, user_id, at):
+    """The user's open session if it started within MAX_SHIFT_HOURS of at, else None"""
+    since = (at - timedelta(hours=MAX_SHIFT_HOURS)).strftime(TIMESTAMP_FORMAT)
+    return conn.execute('''
+        SELECT id, work_date, start_ts
+        FROM work_sessions
+        WHERE user_id = ? AND status = 'open' AND start_ts >= ?
+        ORDER BY start_ts DESC
+        LIMIT 1
+    ''', (user_id, since)).fetchone()
+
+
+def last_punch(conn, user_id):
+    """Time of the user's latest clock-in or clock-out, or None"""
+    row = conn.execute(
+        'SELECT MAX(start_ts) as last_start, MAX(end_ts) as last_end FROM work_sessions WHERE user_id = ?',
+        (user_id,)
+    ).fetchone()
+    stamps = [str(stamp)[:19] for stamp in (row['last_start'], row['last_end']) if stamp]
+    if not stamps:
+        return None
+    return datetime.strptime(max(stamps), TIMESTAMP_FORMAT)
+
+
+def record_check_in(conn, user_id, at, latitude, longitude, photo_path, unique_attendance=True):
+    """Open a session; returns False if the user already has one open"""
+    since = (at - timedelta(hours=MAX_SHIFT_HOURS)).strftime(TIMESTAMP_FORMAT)
+    stale = conn.execute('''
+        SELECT id, work_date FROM work_sessions
+        WHERE user_id = ? AND status = 'open' AND start_ts < ?
+    ''', (user_id, since)).fetchall()
+    for row in stale:
+        conn.execute("UPDATE work_sessions SET status = 'abandoned' WHERE id = ?", (row['id'],))
+
+    work_date = at.strftime('%Y-%m-%d')
+    cursor = conn.execute('''
+        INSERT INTO work_sessions (user_id, work_date, start_ts, status, latitude_in, longitude_in, photo_path_in)
+        VALUES (?, ?, ?, 'open', ?, ?, ?)
+        ON CONFLICT (user_id) WHERE status = 'open' DO NOTHING
+    ''', (user_id, work_date, at.strftime(TIMESTAMP_FORMAT), latitude, longitude, photo_path))
+    if cursor.rowcount == 0:
+        return False
+
+    conn.execute('''
+        INSERT INTO daily_work_totals (user_id, work_date, session_count, closed_count, total_minutes)
+        VALUES (?, ?, 1, 0, 0)
+        ON CONFLICT (user_id, work_date) DO UPDATE SET session_count = daily_work_totals.session_count + 1
+    ''', (user_id, work_date))
+
+    # attendance keeps one row per day (first clock-in) for the dashboard pages
+    time_in = at.strftime('%H:%M:%S')
+    if unique_attendance:
+        conn.execute(
+            '''INSERT INTO attendance (user_id, date, time_in, latitude, longitude, photo_path)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (user_id, date) DO NOTHING''',
+            (user_id, work_date, time_in, latitude, longitude, photo_path)
+        )
+    elif not conn.execute('SELECT id FROM attendance WHERE user_id = ? AND date = ?',
+                          (user_id, work_date)).fetchone():
+        conn.execute(
+            '''INSERT INTO attendance (user_id, date, time_in, latitude, longitude, photo_path)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (user_id, work_date, time_in, latitude, longitude, photo_path)
+        )
+    return True
+
+
+def record_check_out(conn, user_id, at, latitude, longitude, photo_path):
+    """Close the open session, even if it started the day before
+
+    Returns the closed session's work_date and duration_minutes, or None
+    when there is no open session to close.
+    """
+    current = open_session(conn, user_id, at)
+    if current is None:
+        return None
+
+    start = datetime.strptime(str(current['start_ts'])[:19], TIMESTAMP_FORMAT)
+    duration = max(int((at - start).total_seconds() // 60), 0)
+    conn.execute('''
+        UPDATE work_sessions
+        SET end_ts = ?, duration_minutes = ?, status = 'closed',
+            latitude_out = ?, longitude_out = ?, photo_path_out = ?
+        WHERE id = ?
+    ''', (at.strftime(TIMESTAMP_FORMAT), duration, latitude, longitude, photo_path, current['id']))
+
+    # Totals are updated incrementally; reports never re-sum the intervals
+    conn.execute('''
+        UPDATE daily_work_totals
+        SET closed_count = closed_count + 1, total_minutes = total_minutes + ?
+        WHERE user_id = ? AND work_date = ?
+    ''', (duration, user_id, current['work_date']))
+    conn.execute(
+        'UPDATE attendance SET time_out = ?, latitude_out = ?, longitude_out = ?, photo_path_out = ? WHERE user_id = ? AND date = ?',
+        (at.strftime('%H:%M:%S'), latitude, longitude, photo_path, user_id, current['work_date'])
+    )
+    return {'work_date': current['work_date'], 'duration_minutes': duration}
+
+
+def current_state(conn, user_id, at):
+    """Attendance shown on the dashboard pages: the open session, else today's summary"""
+    current = open_session(conn, user_id, at)
+    if current is not None:
+        return {'time_in': str(current['start_ts'])[11:19], 'time_out': None, 'open': True}
+
+    today = conn.execute(
+        'SELECT time_in, time_out FROM attendance WHERE user_id = ? AND date = ?',
+        (user_id, at.strftime('%Y-%m-%d'))
+    ).fetchone()
+    if today is None:
+        return None
+    return {'time_in': today['time_in'], 'time_out': today['time_out'], 'open': False}
+
+
+# -- aggregation ------------------------------------------------------------
+
+def _status(session_count, closed_count):
+    if not session_count:
+        return 'absent'
+    return 'complete' if closed_count >= session_count else 'incomplete'
+
+
+def _day(row):
+    minutes = row['total_minutes'] if row['closed_count'] else None
+    return {
+        'date': row['date'],
+        'time_in': row['time_in'],
+        'time_out': row['time_out'],
+        'status': _status(row['session_count'], row['closed_count']),
+        'sessions': row['session_count'] or 0,
+        'work_minutes': minutes,
+        'work_hours': round(minutes / 60, 1) if minutes else None,
+        'has_photo': bool(row['photo_path'])
+    }
+
+
+def user_days(conn, user_id, first_day, last_day):
+    """One entry per day the user worked between first_day and last_day, newest first"""
+    rows = conn.execute('''
+        SELECT t.work_date as date, a.time_in, a.time_out, a.photo_path,
+               t.session_count, t.closed_count, t.total_minutes
+        FROM daily_work_totals t
+        LEFT JOIN attendance a ON a.user_id = t.user_id AND a.date = t.work_date
+        WHERE t.user_id = ? AND t.work_date BETWEEN ? AND ?
+        ORDER BY t.work_date DESC
+    ''', (user_id, first_day, last_day)).fetchall()
+    return [_day(row) for row in rows]
+
+
+def day_attendance(conn, date_str, include_absent=False):
+    """Every user's attendance on one day, present users first by clock-in time
+
+    With include_absent, active users without a session are listed too.
+    """
+    join = 'LEFT JOIN' if include_absent else 'JOIN'
+    rows = conn.execute(f'''
+        SELECT u.id as user_id, u.username, u.full_name, u.email,
+               a.id, ? as date, a.time_in, a.time_out, a.latitude, a.longitude, a.photo_path,
+               t.session_count, t.closed_count, t.total_minutes
+        FROM users u
+        {join} daily_work_totals t ON t.user_id = u.id AND t.work_date = ?
+        LEFT JOIN attendance a ON a.user_id = u.id AND a.date = ?
+        WHERE u.active = TRUE OR t.id IS NOT NULL
+        ORDER BY
+            CASE WHEN t.id IS NOT NULL THEN 0 ELSE 1 END,
+            a.time_in ASC,
+            u.full_name ASC
+    ''', (date_str, date_str, date_str)).fetchall()
+
+    result = []
+    for row in rows:
+        entry = _day(row)
+        entry.update({
+            'id': row['id'],
+            'user_id': row['user_id'],
+            'username': row['username'],
+            'full_name': row['full_name'],
+            'email': row['email'],
+            'latitude': row['latitude'],
+            'longitude': row['longitude']
+        })
+        result.append(entry)
+    return result
+
+
+def daily_presence(conn, first_day, last_day):
+    """{date: (present users, users with every session closed)} for a date range"""
+    rows = conn.execute('''
+        SELECT t.work_date,
+               COUNT(*) as total_present,
+               SUM(CASE WHEN t.closed_count >= t.session_count THEN 1 ELSE 0 END) as complete_count
+        FROM daily_work_totals t
+        JOIN users u ON u.id = t.user_id
+        WHERE t.work_date BETWEEN ? AND ?
+        GROUP BY t.work_date
+    ''', (first_day, last_day)).fetchall()
+    return {str(row['work_date']): (row['total_present'], row['complete_count']) for row in rows}
+
+
+def period_totals(conn, first_day, last_day):
+    """Per active user totals over a date range (present/complete days, minutes)"""
+    rows = conn.execute('''
+        SELECT u.id as user_id, u.full_name, u.username,
+               COUNT(t.id) as present_days,
+               COALESCE(SUM(CASE WHEN t.closed_count >= t.session_count THEN 1 ELSE 0 END), 0) as complete_days,
+               COALESCE(SUM(t.session_count), 0) as sessions,
+               COALESCE(SUM(t.total_minutes), 0) as total_minutes,
+               MIN(t.work_date) as first_day,
+               MAX(t.work_date) as last_day
+        FROM users u
+        LEFT JOIN daily_work_totals t ON t.user_id = u.id AND t.work_date BETWEEN ? AND ?
+        WHERE u.active = TRUE
+        GROUP BY u.id, u.full_name, u.username
+        ORDER BY u.full_name
+    ''', (first_day, last_day)).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,424 @@
+"""
+Benchmark module untuk sistem absensi
+Load test for the punch and dashboard hot paths on a synthetic dataset
+
+Usage:
+    python benchmark.py                         # Flask test client, in-process
+    python benchmark.py --gunicorn --workers 4  # local gunicorn, concurrent clients
+    python benchmark.py --cold                  # invalidate report caches before each request
+
+Each run appends throughput and p50/p95/p99 latency per route to the
+history file and flags routes whose p95 regressed against recent runs
+with the same parameters.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+import http.cookiejar
+from io import BytesIO
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ADMIN_PASSWORD = 'hjtq2$ut%y@7'
+USER_PASSWORD = 'benchmark'
+OFFICE = (-6.2088, 106.8456)
+
+REPORT_ROUTES = [
+    '/api/attendance/monthly',
+    '/api/attendance/daily',
+    '/api/attendance/weekly',
+    '/api/users/list',
+    '/api/export/attendance/daily',
+    '/api/export/attendance/monthly',
+    '/api/export/users',
+]
+
+
+# -- synthetic dataset ----------------------------------------------------------
+
+def generate_dataset(workdir, users, days, geofences, seed=42):
+    """Create database.db in workdir with users, attendance history, geofences and face encodings"""
+    from werkzeug.security import generate_password_hash
+    sys.path.insert(0, REPO_DIR)
+    from init_db import init_database
+
+    rng = random.Random(seed)
+    db_path = os.path.join(workdir, 'database.db')
+    init_database(db_path)
+    conn = sqlite3.connect(db_path)
+
+    # One cheap hash for every synthetic user keeps logins out of the measurements
+    password = generate_password_hash(USER_PASSWORD, method='pbkdf2:sha256:1000')
+    conn.executemany(
+        'INSERT INTO users (username, full_name, email, password, role) VALUES (?, ?, ?, ?, ?)',
+        [(f'bench{i:05d}', f'Karyawan {i}', f'bench{i:05d}@example.com', password, 'user')
+         for i in range(users)]
+    )
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE username LIKE 'bench%'")]
+
+    # The first fence covers the office; the rest are scattered around the city
+    fences = [('Kantor Pusat', OFFICE[0], OFFICE[1], 150)]
+    for i in range(1, geofences):
+        fences.append((f'Cabang {i}', OFFICE[0] + rng.uniform(-0.2, 0.2),
+                       OFFICE[1] + rng.uniform(-0.2, 0.2), rng.choice([50, 100, 200])))
+    conn.executemany(
+        'INSERT INTO coordinates (name, latitude, longitude, radius, active) VALUES (?, ?, ?, ?, 1)', fences
+    )
+
+    # Stub 128-d encodings: face_enabled users exercise the photo path end to end
+    conn.executemany(
+        'INSERT INTO face_data (user_id, face_encoding, active) VALUES (?, ?, 1)',
+        [(user_id, json.dumps([rng.uniform(-0.3, 0.3) for _ in range(128)])) for user_id in user_ids]
+    )
+
+    # Weekday attendance before today; work sessions are backfilled from it when the app starts
+    rows = []
+    today = datetime.now().date()
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for user_id in user_ids:
+            if rng.random() < 0.08:
+                continue
+            time_in = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randint(450, 525))
+            time_out = time_in + timedelta(minutes=rng.randint(480, 600))
+            rows.append((user_id, day.isoformat(), time_in.strftime('%H:%M:%S'), time_out.strftime('%H:%M:%S'),
+                         OFFICE[0], OFFICE[1], OFFICE[0], OFFICE[1]))
+    conn.executemany('''
+        INSERT INTO attendance (user_id, date, time_in, time_out, latitude, longitude, latitude_out, longitude_out)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    conn.close()
+    return [f'bench{i:05d}' for i in range(users)]
+
+
+def sample_photo(variant=0):
+    """A small JPEG like the ones the capture pipeline uploads
+
+    Each variant is a different picture, so punches with REPLAY_CHECK on are
+    not rejected as replays of each other.
+    """
+    import random
+    from PIL import Image, ImageDraw
+    rng = random.Random(variant)
+    image = Image.new('RGB', (640, 480), (200, 170, 150))
+    draw = ImageDraw.Draw(image)
+    for _ in range(6):
+        x, y = rng.randrange(0, 560), rng.randrange(0, 400)
+        draw.rectangle([x, y, x + rng.randrange(40, 160), y + rng.randrange(40, 160)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=75)
+    return buffer.getvalue()
+
+
+# -- drivers --------------------------------------------------------------------
+
+class TestClientDriver:
+    """Requests through the Flask test client, in this process"""
+
+    concurrency = 1
+
+    def __init__(self):
+        sys.path.insert(0, REPO_DIR)
+        import app as app_module
+        self.app = app_module.app
+        self.app.config['TESTING'] = True
+
+    def login(self, username, password):
+        client = self.app.test_client()
+        client.post('/login', data={'username': username, 'password': password})
+        return client
+
+    def request(self, client, method, path, fields=None, files=None):
+        data = dict(fields or {})
+        for name, (filename, content) in (files or {}).items():
+            data[name] = (BytesIO(content), filename)
+        response = client.open(path, method=method, data=data or None)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class GunicornDriver:
+    """Requests over HTTP to a local gunicorn running the app"""
+
+    def __init__(self, workdir, workers, concurrency, env):
+        self.concurrency = concurrency
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        self.base = f'http://127.0.0.1:{self.port}'
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(workers),
+             '--bind', f'127.0.0.1:{self.port}', '--chdir', workdir, '--pythonpath', REPO_DIR,
+             '--log-level', 'warning'],
+            env=env
+        )
+        deadline = time.time() + 60
+        while True:
+            try:
+                urllib.request.urlopen(self.base + '/login', timeout=2)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if time.time() > deadline or self.process.poll() is not None:
+                    self.close()
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+
+    def login(self, username, password):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        body = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+        opener.open(self.base + '/login', body, timeout=30).read()
+        return opener
+
+    def request(self, opener, method, path, fields=None, files=None):
+        body, headers = None, {}
+        if files:
+            body, headers['Content-Type'] = encode_multipart(fields or {}, files)
+        elif fields:
+            body = urllib.parse.urlencode(fields).encode()
+        request = urllib.request.Request(self.base + path, data=body, headers=headers, method=method)
+        try:
+            with opener.open(request, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    body = BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                   f'Content-Type: image/jpeg\r\n\r\n'.encode())
+        body.write(content)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+# -- measurement ----------------------------------------------------------------
+
+def succeeded(status, body):
+    if status >= 400:
+        return False
+    try:
+        result = json.loads(body)
+    except ValueError:
+        # Excel exports and HTML pages
+        return True
+    return not isinstance(result, dict) or result.get('success', True) is not False
+
+
+def run_phase(driver, tasks, before_each=None):
+    """Run (session, method, path, fields, files) tasks; returns latencies in ms, errors and wall time"""
+    def timed(task):
+        if before_each:
+            before_each()
+        started = time.perf_counter()
+        status, body = driver.request(*task)
+        return (time.perf_counter() - started) * 1000, succeeded(status, body)
+
+    started = time.perf_counter()
+    if driver.concurrency > 1:
+        with ThreadPoolExecutor(driver.concurrency) as pool:
+            outcomes = list(pool.map(timed, tasks))
+    else:
+        outcomes = [timed(task) for task in tasks]
+    wall = time.perf_counter() - started
+    return [latency for latency, _ in outcomes], sum(1 for _, ok in outcomes if not ok), wall
+
+
+def summarize(latencies, errors, wall):
+    values = np.array(latencies)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0, 0, 0)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput': round(len(values) / wall, 1) if wall > 0 else 0,
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+    }
+
+
+def run_benchmark(args, workdir):
+    usernames = generate_dataset(workdir, args.users, args.days, args.geofences)
+
+    env = dict(os.environ, PUNCH_JOURNAL_DIR=os.path.join(workdir, 'journal'))
+    # Always the synthetic SQLite database in workdir
+    for name in ('DATABASE_URL', 'DATABASE_REPLICA_URL'):
+        env.pop(name, None)
+        os.environ.pop(name, None)
+    if args.cold:
+        # A cache file in workdir shared with the workers lets this process invalidate their report caches
+        env['CACHE_URL'] = 'sqlite:///cache.db'
+    os.environ.update(env)
+    os.chdir(workdir)
+
+    print(f"Starting {'gunicorn' if args.gunicorn else 'Flask test client'}...")
+    driver = (GunicornDriver(workdir, args.workers, args.concurrency, env) if args.gunicorn
+              else TestClientDriver())
+    before_each = None
+    if args.cold:
+        sys.path.insert(0, REPO_DIR)
+        from cache import create_cache
+        shared_cache = create_cache(env['CACHE_URL'])
+
+        def invalidate_caches():
+            shared_cache.invalidate('reports')
+            shared_cache.invalidate('users')
+        before_each = invalidate_caches
+
+    results = {}
+    try:
+        # Punches: each synthetic user clocks in, then every user clocks out
+        punchers = usernames[:args.requests]
+        sessions = [driver.login(username, USER_PASSWORD) for username in punchers]
+        location = {'latitude': OFFICE[0], 'longitude': OFFICE[1]}
+        for phase, (path, filename) in enumerate((('/absen_masuk', 'absen_masuk.jpg'),
+                                                  ('/absen_keluar', 'absen_keluar.jpg'))):
+            # A fresh photo per punch, as from a camera
+            tasks = [(client, 'POST', path, location,
+                      {'photo': (filename, sample_photo(phase * len(sessions) + index))})
+                     for index, client in enumerate(sessions)]
+            results[path] = summarize(*run_phase(driver, tasks))
+            print(f"  {path:<34} done")
+
+        # Dashboard and exports as admin
+        admin = driver.login('admin', ADMIN_PASSWORD)
+        for path in REPORT_ROUTES:
+            tasks = [(admin, 'GET', path, None, None)] * args.report_requests
+            results[path] = summarize(*run_phase(driver, tasks, before_each))
+            print(f"  {path:<34} done")
+    finally:
+        driver.close()
+    return results
+
+
+# -- history ----------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def find_regressions(history, params, results, tolerance, window=5):
+    """Routes whose p95 exceeds the median p95 of recent comparable runs by more than tolerance"""
+    previous = [run for run in history if run['params'] == params][-window:]
+    regressions = []
+    for route, current in results.items():
+        baseline = [run['results'][route]['p95_ms'] for run in previous if route in run['results']]
+        if not baseline:
+            continue
+        reference = float(np.median(baseline))
+        # Sub-millisecond differences are noise
+        if current['p95_ms'] > reference * (1 + tolerance) and current['p95_ms'] - reference > 1:
+            regressions.append((route, reference, current['p95_ms']))
+    return regressions
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_results(results):
+    print(f"\n{'Route':<34} {'Req':>5} {'Err':>4} {'Req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, r in results.items():
+        print(f"{route:<34} {r['requests']:>5} {r['errors']:>4} {r['throughput']:>8} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the punch and dashboard routes')
+    parser.add_argument('--users', type=int, default=200, help='synthetic users')
+    parser.add_argument('--days', type=int, default=60, help='days of attendance history')
+    parser.add_argument('--geofences', type=int, default=10, help='active geofences')
+    parser.add_argument('--requests', type=int, default=100, help='punches per punch route (at most --users)')
+    parser.add_argument('--report-requests', type=int, default=50, help='requests per dashboard route')
+    parser.add_argument('--gunicorn', action='store_true', help='run against a local gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients against gunicorn')
+    parser.add_argument('--cold', action='store_true', help='invalidate report caches before each request')
+    parser.add_argument('--history', default=os.path.join(REPO_DIR, 'benchmark_history.jsonl'),
+                        help='JSON lines file with previous runs')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 increase (0.2 = 20%%)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit 1 when a route regressed')
+    args = parser.parse_args()
+    args.requests = min(args.requests, args.users)
+
+    params = {
+        'mode': 'gunicorn' if args.gunicorn else 'test_client',
+        'users': args.users, 'days': args.days, 'geofences': args.geofences,
+        'requests': args.requests, 'report_requests': args.report_requests, 'cold': args.cold,
+    }
+    if args.gunicorn:
+        params.update(workers=args.workers, concurrency=args.concurrency)
+
+    history_path = os.path.abspath(args.history)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='absensi-bench-') as workdir:
+        try:
+            results = run_benchmark(args, workdir)
+        finally:
+            os.chdir(cwd)
+
+    print_results(results)
+    history = load_history(history_path)
+    regressions = find_regressions(history, params, results, args.tolerance)
+
+    with open(history_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'params': params,
+            'results': results,
+        }) + '\n')
+    print(f"\nResults appended to {history_path}")
+
+    if regressions:
+        print("\n⚠️  p95 regressions against recent runs:")
+        for route, reference, current in regressions:
+            print(f"  {route}: {reference:.1f} ms -> {current:.1f} ms")
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("✅ No p95 regressions against recent runs")
+
+
+if __name__ == '__main__':
+    main()
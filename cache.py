@@ -0,0 +1,435 @@
+"""
+Cache module untuk sistem absensi
+Shared cache backends so every gunicorn worker sees the same cached data
+"""
+
+import os
+import time
+import pickle
+import socket
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from cooperative import run_io
+from db import ConnectionPool, sqlite_path
+
+
+class CacheBackend:
+    """Base cache backend
+
+    Subclasses implement the primitives (get/set/delete/incr/clear and
+    publish). Namespaced helpers are built on top of them: every namespace
+    has a version counter stored in the backend itself, so invalidating a
+    namespace from one worker makes every other worker miss on its next read.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    # Primitives
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def incr(self, key):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl=None):
+        """Set key only if it is absent; returns True if this call set it"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        """Deliver an invalidation message to local subscribers"""
+        for callback in list(self._subscribers.get(channel, [])):
+            try:
+                callback(channel, message)
+            except Exception as e:
+                print(f"Cache subscriber error on {channel}: {str(e)}")
+
+    def subscribe(self, channel, callback):
+        """Register callback(channel, message) for invalidation messages"""
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    # Namespaced helpers
+    def namespace_version(self, namespace):
+        version = self.get(f"ns:{namespace}")
+        return version if version is not None else 0
+
+    def _ns_key(self, namespace, key):
+        return f"{namespace}:{self.namespace_version(namespace)}:{key}"
+
+    def get_ns(self, namespace, key):
+        return self.get(self._ns_key(namespace, key))
+
+    def set_ns(self, namespace, key, value, ttl=None):
+        self.set(self._ns_key(namespace, key), value, ttl)
+
+    def delete_ns(self, namespace, key):
+        self.delete(self._ns_key(namespace, key))
+        self.publish(namespace, key)
+
+    def get_or_set(self, namespace, key, loader, ttl=None):
+        """Return cached value or call loader() and cache its result"""
+        full_key = self._ns_key(namespace, key)
+        value = self.get(full_key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(full_key, value, ttl)
+        return value
+
+    def invalidate(self, namespace):
+        """Drop every key in a namespace and notify subscribers"""
+        self.incr(f"ns:{namespace}")
+        self.publish(namespace, '*')
+
+
+class LocalCache(CacheBackend):
+    """In-process LRU cache with per-key TTL
+
+    Namespace version counters are kept apart and never evicted: dropping one
+    would reset the namespace to version 0 and bring back entries that were
+    invalidated under it.
+    """
+
+    def __init__(self, max_entries=1024):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key):
+        return self._versions if key.startswith('ns:') else self._data
+
+    def _evict(self):
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            store = self._store(key)
+            item = store.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del store[key]
+                return None
+            if store is self._data:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            store = self._store(key)
+            store[key] = (value, expires_at)
+            if store is self._data:
+                self._data.move_to_end(key)
+                self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._store(key).pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            store = self._store(key)
+            value, expires_at = store.get(key, (0, None))
+            value += 1
+            store[key] = (value, expires_at)
+            return value
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            store = self._store(key)
+            item = store.get(key)
+            if item is not None and (item[1] is None or item[1] >= time.time()):
+                return False
+            store[key] = (value, time.time() + ttl if ttl else None)
+            if store is self._data:
+                self._data.move_to_end(key)
+                self._evict()
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._versions.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a SQLite file, shared by all workers on one host
+
+    Connections come from a pool shared by every thread and greenlet of the
+    worker (reset after a fork); under gevent each call runs on the I/O
+    thread pool so a busy database never blocks the event loop.
+    """
+
+    def __init__(self, path='cache.db', pool_size=10):
+        super().__init__()
+        self.path = path
+        self._pool = ConnectionPool(self._connect, max_size=pool_size)
+        self._run(lambda conn: conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB,
+                expires_at REAL
+            )
+        '''))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _run(self, fn):
+        """Call fn(connection) with a pooled connection and return its result"""
+        conn = self._pool.acquire()
+        try:
+            return run_io(fn, conn)
+        finally:
+            self._pool.release(conn)
+
+    def get(self, key):
+        row = self._run(lambda conn: conn.execute(
+            'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone())
+        if row is None:
+            return None
+        if row[1] is not None and row[1] < time.time():
+            self.delete(key)
+            return None
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        self._run(lambda conn: conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value), expires_at)
+        ))
+
+    def delete(self, key):
+        self._run(lambda conn: conn.execute('DELETE FROM cache WHERE key = ?', (key,)))
+
+    def incr(self, key):
+        def increment(conn):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+                value = (pickle.loads(row[0]) if row else 0) + 1
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, NULL)',
+                    (key, pickle.dumps(value))
+                )
+                conn.execute('COMMIT')
+                return value
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return self._run(increment)
+
+    def add(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        result = self._run(lambda conn: conn.execute('''
+            INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+            WHERE cache.expires_at IS NOT NULL AND cache.expires_at < ?
+        ''', (key, pickle.dumps(value), expires_at, time.time())))
+        return result.rowcount == 1
+
+    def clear(self):
+        self._run(lambda conn: conn.execute('DELETE FROM cache'))
+
+    def purge_expired(self):
+        """Remove expired rows (run occasionally, reads already skip them)"""
+        self._run(lambda conn: conn.execute(
+            'DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?', (time.time(),)
+        ))
+
+
+class RedisError(Exception):
+    pass
+
+
+class _RedisConnection:
+    """One socket to the cache server, pooled like a database connection"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = sock.makefile('rb')
+
+    def rollback(self):
+        # Nothing to undo between commands; ConnectionPool.release() calls this
+        pass
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RedisCache(CacheBackend):
+    """Cache on a Redis-protocol (RESP) server
+
+    Speaks RESP directly over a socket so there is no extra dependency;
+    any server that implements GET/SET/DEL/INCR/FLUSHDB/PUBLISH works,
+    including a local fake for testing. Sockets come from a pool shared by
+    every thread and greenlet of the worker (gevent patches the socket, so
+    waiting on the server yields).
+    """
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None, prefix='absensi:', pool_size=10):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self._pool = ConnectionPool(self._connect, max_size=pool_size)
+
+    def _connect(self):
+        conn = _RedisConnection(socket.create_connection((self.host, self.port), timeout=2))
+        try:
+            if self.password:
+                self._send(conn, 'AUTH', self.password)
+            if self.db:
+                self._send(conn, 'SELECT', self.db)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _command(self, *args):
+        conn = self._pool.acquire()
+        try:
+            reply = self._send(conn, *args)
+        except RedisError:
+            # An error reply leaves the connection usable
+            self._pool.release(conn)
+            raise
+        except Exception:
+            self._pool.discard(conn)
+            raise
+        self._pool.release(conn)
+        return reply
+
+    def _send(self, conn, *args):
+        payload = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            payload.append(f"${len(arg)}\r\n".encode() + arg + b"\r\n")
+        conn.sock.sendall(b''.join(payload))
+        return self._read_reply(conn.reader)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, data = line[:1], line[1:-2]
+        if kind == b'+':
+            return data.decode()
+        if kind == b'-':
+            raise RedisError(data.decode())
+        if kind == b':':
+            return int(data)
+        if kind == b'$':
+            length = int(data)
+            if length == -1:
+                return None
+            value = reader.read(length + 2)
+            return value[:-2]
+        if kind == b'*':
+            length = int(data)
+            if length == -1:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unknown reply type: {kind!r}")
+
+    def get(self, key):
+        value = self._command('GET', self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self._command('SET', self.prefix + key, pickle.dumps(value), 'PX', int(ttl * 1000))
+        else:
+            self._command('SET', self.prefix + key, pickle.dumps(value))
+
+    def delete(self, key):
+        self._command('DEL', self.prefix + key)
+
+    def incr(self, key):
+        return self._command('INCR', self.prefix + key)
+
+    def add(self, key, value, ttl=None):
+        args = ['SET', self.prefix + key, pickle.dumps(value), 'NX']
+        if ttl:
+            args += ['PX', int(ttl * 1000)]
+        return self._command(*args) is not None
+
+    def namespace_version(self, namespace):
+        # Counters are raw integers written by INCR, not pickled values
+        version = self._command('GET', self.prefix + f"ns:{namespace}")
+        return int(version) if version is not None else 0
+
+    def clear(self):
+        self._command('FLUSHDB')
+
+    def publish(self, channel, message):
+        super().publish(channel, message)
+        try:
+            self._command('PUBLISH', self.prefix + channel, message)
+        except (OSError, RedisError):
+            pass
+
+
+def create_cache(url=None):
+    """Create a cache backend from a URL
+
+    memory://            in-process LRU (default; gunicorn.conf.py switches
+                         servers with several workers to sqlite:///cache.db)
+    sqlite:///cache.db   SQLite file shared by workers on one host
+    redis://host:6379/0  Redis-protocol server shared by every host
+    """
+    url = url or os.environ.get('CACHE_URL', 'memory://')
+    parsed = urlparse(url)
+
+    if parsed.scheme == 'memory':
+        return LocalCache(int(os.environ.get('CACHE_MAX_ENTRIES', 1024)))
+    if parsed.scheme == 'sqlite':
+        return SQLiteCache(sqlite_path(url, 'cache.db'))
+    if parsed.scheme == 'redis':
+        return RedisCache(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip('/') or 0),
+            password=parsed.password
+        )
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Get the process-wide cache backend"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache()
+    return _cache
@@ -0,0 +1,83 @@
+"""
+Compression module untuk sistem absensi
+Negotiated gzip/brotli response compression with cached compressed variants
+"""
+
+import gzip
+import hashlib
+
+from flask import request
+
+from cache import LocalCache
+
+# Brotli is optional, gzip is used when it is not installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv',
+    'text/javascript', 'application/javascript', 'application/json',
+    'image/svg+xml'
+}
+
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def init_compression(app, min_size=1024, max_cached_variants=256):
+    """Compress responses above min_size for clients that accept gzip/brotli
+
+    Compressed bodies are cached by content hash, so unchanged pages, assets
+    and API payloads are compressed once per worker rather than on every request.
+    """
+    variants = LocalCache(max_entries=max_cached_variants)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        key = f"{encoding}:{hashlib.sha1(body).hexdigest()}"
+        compressed = variants.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            variants.set(key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed bytes differ, so a strong ETag becomes weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return variants
@@ -0,0 +1,70 @@
+"""
+Cooperative module untuk sistem absensi
+Gevent support so a punch worker can hold many slow uploads at once
+"""
+
+import os
+import sys
+
+from lazy_imports import available
+
+
+# OS threads per worker for CPU-bound face work (dlib) under gevent
+FACE_EXECUTOR_WORKERS = int(os.environ.get('FACE_EXECUTOR_WORKERS', os.cpu_count() or 2))
+# OS threads per worker for blocking I/O (SQLite statements, journal fsync); kept
+# apart from the face pool so a query never waits behind a face encoding
+IO_EXECUTOR_WORKERS = int(os.environ.get('IO_EXECUTOR_WORKERS', 4))
+
+# kind -> (ThreadPool, pid)
+_threadpools = {}
+
+
+def is_cooperative():
+    """True when gevent has monkey-patched this process (gunicorn -k gevent)"""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('socket')
+
+
+def get_threadpool(kind='face'):
+    """This worker's pool of real OS threads ('face' or 'io'), created on first use"""
+    entry = _threadpools.get(kind)
+    if entry is None or entry[1] != os.getpid():
+        from gevent.threadpool import ThreadPool
+        size = FACE_EXECUTOR_WORKERS if kind == 'face' else IO_EXECUTOR_WORKERS
+        entry = _threadpools[kind] = (ThreadPool(size), os.getpid())
+    return entry[0]
+
+
+def run_blocking(fn, *args, **kwargs):
+    """Run CPU-bound work off the event loop
+
+    Under gevent, fn runs on an OS thread while other greenlets keep reading
+    uploads and talking to the database; the calling greenlet waits
+    cooperatively. On sync workers fn simply runs inline.
+    """
+    if not is_cooperative():
+        return fn(*args, **kwargs)
+    return get_threadpool('face').apply(fn, args, kwargs)
+
+
+def run_io(fn, *args, **kwargs):
+    """run_blocking() for blocking I/O such as SQLite calls and fsync, on the 'io' pool"""
+    if not is_cooperative():
+        return fn(*args, **kwargs)
+    return get_threadpool('io').apply(fn, args, kwargs)
+
+
+def patch_database_driver():
+    """Make psycopg2 yield to other greenlets while waiting on PostgreSQL
+
+    SQLite has no cooperative driver; its calls go through run_io() instead.
+    """
+    if not is_cooperative() or not available('psycopg2'):
+        return False
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        print("Warning: psycogreen not installed, PostgreSQL queries will block gevent workers")
+        return False
+    patch_psycopg()
+    return True
@@ -0,0 +1,635 @@
+"""
+Database module untuk sistem absensi
+Pooled connections with SQLite and PostgreSQL drivers and dialect-aware SQL
+"""
+
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+from urllib.parse import urlparse
+
+from cooperative import run_io
+
+
+class SQLiteDialect:
+    """SQL fragments for SQLite"""
+
+    name = 'sqlite'
+    id_column = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+
+    def translate(self, sql):
+        return sql
+
+    def minutes_between(self, date_col, start_col, end_col):
+        """Whole minutes between two TIME columns on the same date"""
+        return (f"CAST((julianday({date_col} || ' ' || {end_col}) - "
+                f"julianday({date_col} || ' ' || {start_col})) * 24 * 60 AS INTEGER)")
+
+    def month_start(self):
+        """First day of the current month"""
+        return "date('now', 'start of month')"
+
+    def today(self):
+        return "date('now')"
+
+    def date_of(self, column):
+        return f"DATE({column})"
+
+    def in_current_month(self, column):
+        return f"strftime('%Y-%m', {column}) = strftime('%Y-%m', 'now')"
+
+    def format_decimal(self, expr, places=1):
+        return f"PRINTF('%.{places}f', {expr})"
+
+
+class PostgresDialect:
+    """SQL fragments for PostgreSQL"""
+
+    name = 'postgresql'
+    id_column = 'SERIAL PRIMARY KEY'
+
+    def translate(self, sql):
+        if sql.strip().upper() == 'BEGIN IMMEDIATE':
+            # psycopg2 opens a transaction implicitly
+            return None
+        return sql.replace('%', '%%').replace('?', '%s')
+
+    def minutes_between(self, date_col, start_col, end_col):
+        return (f"CAST(EXTRACT(EPOCH FROM ((CAST({date_col} AS DATE) + CAST({end_col} AS TIME)) - "
+                f"(CAST({date_col} AS DATE) + CAST({start_col} AS TIME)))) / 60 AS INTEGER)")
+
+    def month_start(self):
+        return "CAST(date_trunc('month', CURRENT_DATE) AS DATE)"
+
+    def today(self):
+        return "CURRENT_DATE"
+
+    def date_of(self, column):
+        return f"CAST({column} AS DATE)"
+
+    def in_current_month(self, column):
+        return f"date_trunc('month', {column}) = date_trunc('month', CURRENT_DATE)"
+
+    def format_decimal(self, expr, places=1):
+        return f"TO_CHAR({expr}, 'FM999999990.{'0' * places}')"
+
+
+class Row:
+    """Row supporting access by index and by column name, like sqlite3.Row
+
+    Values are normalized to what SQLite returns (floats, ISO date/time
+    strings) so callers behave the same on both backends.
+    """
+
+    __slots__ = ('_columns', '_values')
+
+    def __init__(self, columns, values):
+        self._columns = columns
+        self._values = tuple(_normalize(value) for value in values)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._values[key]
+        return self._values[self._columns.index(key)]
+
+    def keys(self):
+        return list(self._columns)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+def _normalize(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (date, dtime)):
+        return value.isoformat()
+    return value
+
+
+_INSERT = re.compile(r'^\s*INSERT\s+INTO\s', re.IGNORECASE)
+
+
+class PostgresCursor:
+    """DB-API cursor wrapper returning Row objects"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._inserted = False
+
+    def execute(self, sql, params=()):
+        self._inserted = _INSERT.match(sql) is not None
+        self._cursor.execute(sql, tuple(params))
+        return self
+
+    @property
+    def lastrowid(self):
+        """Id of the row just inserted, looked up only when a caller asks
+
+        Statements are sent unchanged, so inserts into tables keyed by
+        something other than a serial id (and ON CONFLICT DO NOTHING
+        inserts) work as written.
+        """
+        if not self._inserted or self._cursor.rowcount != 1:
+            return None
+        cursor = self._cursor.connection.cursor()
+        cursor.execute('SELECT lastval()')
+        return cursor.fetchone()[0]
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql, [tuple(params) for params in seq_of_params])
+        return self
+
+    def _columns(self):
+        return [column[0] for column in self._cursor.description]
+
+    def fetchone(self):
+        if self._cursor.description is None:
+            return None
+        row = self._cursor.fetchone()
+        return Row(self._columns(), row) if row is not None else None
+
+    def fetchall(self):
+        if self._cursor.description is None:
+            return []
+        columns = self._columns()
+        return [Row(columns, row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+
+class _NoopCursor:
+    rowcount = -1
+    lastrowid = None
+    description = None
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+# Called as hook(conn, sql, params, seconds, cursor) after every statement; a
+# hook may return a wrapped cursor. Statements are not timed at all while no
+# hook is registered
+_query_hooks = []
+
+
+def add_query_hook(hook):
+    """Observe every statement (metrics, profiling)"""
+    if hook not in _query_hooks:
+        _query_hooks.append(hook)
+
+
+class PooledConnection:
+    """Connection borrowed from a pool; close() returns it to the pool"""
+
+    def __init__(self, pool, raw, dialect):
+        self._pool = pool
+        self._raw = raw
+        self.dialect = dialect
+
+    def cursor(self):
+        return _ConnectionCursor(self)
+
+    def execute(self, sql, params=()):
+        if not _query_hooks:
+            return self._execute(sql, params)
+        started = time.perf_counter()
+        cursor = self._execute(sql, params)
+        return self._observe(sql, params, time.perf_counter() - started, cursor)
+
+    def executemany(self, sql, seq_of_params):
+        if not _query_hooks:
+            return self._executemany(sql, seq_of_params)
+        started = time.perf_counter()
+        cursor = self._executemany(sql, seq_of_params)
+        return self._observe(sql, seq_of_params, time.perf_counter() - started, cursor)
+
+    def _observe(self, sql, params, seconds, cursor):
+        for hook in _query_hooks:
+            cursor = hook(self, sql, params, seconds, cursor) or cursor
+        return cursor
+
+    def explain(self, sql, params=()):
+        """Query plan lines for a statement, without running it"""
+        translated = self.dialect.translate(sql)
+        if self.dialect.name == 'sqlite':
+            rows = self._raw.execute('EXPLAIN QUERY PLAN ' + translated, params).fetchall()
+            return [row[3] for row in rows]
+        cursor = self._raw.cursor()
+        cursor.execute('EXPLAIN ' + translated, params)
+        return [row[0] for row in cursor.fetchall()]
+
+    def _execute(self, sql, params):
+        translated = self.dialect.translate(sql)
+        if translated is None:
+            return _NoopCursor()
+        if self.dialect.name == 'sqlite':
+            # Under gevent a SQLite call (and its busy wait) runs on an OS thread
+            return run_io(self._raw.execute, translated, params)
+        return PostgresCursor(self._raw.cursor()).execute(translated, params)
+
+    def _executemany(self, sql, seq_of_params):
+        translated = self.dialect.translate(sql)
+        if self.dialect.name == 'sqlite':
+            return run_io(self._raw.executemany, translated, seq_of_params)
+        return PostgresCursor(self._raw.cursor()).executemany(translated, seq_of_params)
+
+    def commit(self):
+        if self.dialect.name == 'sqlite':
+            run_io(self._raw.commit)
+        else:
+            self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        if self._raw is not None:
+            self._pool.release(self._raw)
+            self._raw = None
+
+    def __del__(self):
+        # Error paths that never call close() must not leak pool slots
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        self.close()
+
+
+class _ConnectionCursor:
+    """Minimal conn.cursor() replacement used by older modules"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._result = None
+
+    def execute(self, sql, params=()):
+        self._result = self._conn.execute(sql, params)
+        return self
+
+    def fetchone(self):
+        return self._result.fetchone()
+
+    def fetchall(self):
+        return self._result.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._result.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._result.rowcount
+
+
+class ConnectionPool:
+    """Thread-safe pool of raw driver connections
+
+    Connections are created lazily up to max_size; callers beyond that wait
+    up to timeout seconds. The pool resets itself after a fork so gunicorn
+    workers never share a connection with the master process. Its queue and
+    lock are gevent-patched in gevent workers, so greenlets share the pool
+    and wait for a free connection cooperatively.
+    """
+
+    def __init__(self, factory, max_size=10, timeout=10):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self._pid != os.getpid():
+            self._reset()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError("Database connection pool exhausted")
+
+    def release(self, raw):
+        if self._pid != os.getpid():
+            return
+        try:
+            # Never hand out a connection with a half-finished transaction
+            raw.rollback()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            try:
+                raw.close()
+            except Exception:
+                pass
+            return
+        self._idle.put(raw)
+
+    def discard(self, raw):
+        """Close a broken connection instead of returning it, freeing its slot"""
+        if self._pid == os.getpid():
+            with self._lock:
+                self._created -= 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+class Database:
+    """Database selected from a URL, with its dialect and connection pool"""
+
+    def __init__(self, url, pool_size=10):
+        self.url = url
+        parsed = urlparse(url)
+
+        if parsed.scheme in ('postgres', 'postgresql'):
+            self.dialect = PostgresDialect()
+            self.path = None
+            self.pool = ConnectionPool(lambda: self._connect_postgres(parsed), max_size=pool_size)
+        elif parsed.scheme == 'sqlite':
+            self.dialect = SQLiteDialect()
+            self.path = sqlite_path(url, 'database.db')
+            self.pool = ConnectionPool(lambda: run_io(self._connect_sqlite), max_size=pool_size)
+        else:
+            raise ValueError(f"Unsupported database URL: {url}")
+
+    def _connect_sqlite(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed while a punch is being written
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=10000')
+        return conn
+
+    def _connect_postgres(self, parsed):
+        import psycopg2
+        return psycopg2.connect(
+            dbname=parsed.path[1:],
+            user=parsed.username,
+            password=parsed.password,
+            host=parsed.hostname,
+            port=parsed.port
+        )
+
+    def connect(self):
+        return PooledConnection(self.pool, self.pool.acquire(), self.dialect)
+
+
+class SQLiteSnapshotReplica:
+    """Read-only copy of the primary SQLite file, refreshed with the backup API
+
+    The snapshot is rebuilt when it is older than max_staleness seconds. Its
+    file mtime is the shared clock, so one worker refreshing serves them all.
+    """
+
+    def __init__(self, primary, path, max_staleness=30, pool_size=10):
+        self.primary = primary
+        self.path = path
+        self.max_staleness = max_staleness
+        self.pool_size = pool_size
+        self.dialect = primary.dialect
+        self._pool = None
+        self._pool_mtime = None
+        self._lock = threading.Lock()
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def refresh(self):
+        """Copy the primary into a temp file and swap it in atomically"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        source = sqlite3.connect(self.primary.path, timeout=10)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+            # Read-only WAL databases need a writable -shm file, so drop WAL
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_path, self.path)
+
+    def _connect_snapshot(self):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def connect(self):
+        mtime = self._mtime()
+        if mtime is None or time.time() - mtime > self.max_staleness:
+            with self._lock:
+                mtime = self._mtime()
+                if mtime is None or time.time() - mtime > self.max_staleness:
+                    try:
+                        run_io(self.refresh)
+                    except sqlite3.Error as e:
+                        print(f"Replica refresh failed, reading from primary: {str(e)}")
+                        return self.primary.connect()
+                    mtime = self._mtime()
+
+        with self._lock:
+            if self._pool is None or self._pool_mtime != mtime:
+                # Connections to the previous snapshot still see the old file;
+                # a fresh pool makes new reads open the new one
+                self._pool = ConnectionPool(self._connect_snapshot, max_size=self.pool_size)
+                self._pool_mtime = mtime
+            pool = self._pool
+        return PooledConnection(pool, pool.acquire(), self.dialect)
+
+
+class PostgresReplica:
+    """Streaming replica used for reads while its replay lag stays within bounds"""
+
+    LAG_QUERY = '''
+        SELECT CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    '''
+
+    def __init__(self, primary, url, max_staleness=30, pool_size=10, check_interval=5):
+        self.primary = primary
+        self.replica = Database(url, pool_size)
+        self.max_staleness = max_staleness
+        self.check_interval = check_interval
+        self.dialect = self.replica.dialect
+        self._lag = 0
+        self._checked_at = 0
+
+    def _current_lag(self):
+        now = time.time()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            conn = self.replica.connect()
+            try:
+                self._lag = conn.execute(self.LAG_QUERY).fetchone()[0] or 0
+            finally:
+                conn.close()
+        return self._lag
+
+    def connect(self):
+        try:
+            if self._current_lag() <= self.max_staleness:
+                return self.replica.connect()
+            print(f"Replica lag {self._lag:.0f}s exceeds bound, reading from primary")
+        except DatabaseError as e:
+            print(f"Replica unavailable, reading from primary: {str(e)}")
+        return self.primary.connect()
+
+
+def sqlite_path(url, default):
+    """File path of a sqlite:// URL
+
+    sqlite:///database.db is relative to the working directory and
+    sqlite:////var/lib/absensi/database.db absolute: only the slash that
+    separates the empty host from the path is dropped.
+    """
+    parsed = urlparse(url)
+    path = parsed.netloc + parsed.path
+    if path.startswith('/'):
+        path = path[1:]
+    return path or default
+
+
+def database_url():
+    """DATABASE_URL if it points at PostgreSQL or SQLite, else the local SQLite file"""
+    url = os.environ.get('DATABASE_URL', '')
+    if url.startswith(('postgres://', 'postgresql://', 'sqlite://')):
+        return url
+    return 'sqlite:///database.db'
+
+
+def _driver_errors():
+    errors = [sqlite3.Error]
+    try:
+        import psycopg2
+        errors.append(psycopg2.Error)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+# Catch DatabaseError to handle errors from either driver
+DatabaseError = _driver_errors()
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Get the process-wide Database"""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database(database_url(), int(os.environ.get('DATABASE_POOL_SIZE', 10)))
+    return _database
+
+
+def get_db_connection():
+    """Get a pooled database connection (close() returns it to the pool)"""
+    return get_database().connect()
+
+
+def get_dialect():
+    return get_database().dialect
+
+
+_replica = None
+
+
+def replica_max_staleness():
+    return float(os.environ.get('REPLICA_MAX_STALENESS', 30))
+
+
+def get_replica():
+    """Get the read replica configured by DATABASE_REPLICA_URL, or None
+
+    With a SQLite primary the replica URL names the snapshot file
+    (e.g. sqlite:///database.replica.db); with PostgreSQL it is the
+    connection URL of a streaming replica.
+    """
+    global _replica
+    url = os.environ.get('DATABASE_REPLICA_URL', '')
+    if not url:
+        return None
+    if _replica is None:
+        primary = get_database()
+        with _database_lock:
+            if _replica is None:
+                pool_size = int(os.environ.get('DATABASE_POOL_SIZE', 10))
+                if primary.dialect.name == 'sqlite':
+                    path = sqlite_path(url, 'database.replica.db')
+                    _replica = SQLiteSnapshotReplica(primary, path, replica_max_staleness(), pool_size)
+                else:
+                    _replica = PostgresReplica(primary, url, replica_max_staleness(), pool_size)
+    return _replica
+
+
+def get_read_connection(use_primary=False):
+    """Get a connection for report/dashboard reads
+
+    Goes to the replica when one is configured, unless use_primary is set
+    (read-your-writes), in which case it behaves like get_db_connection().
+    """
+    replica = None if use_primary else get_replica()
+    if replica is None:
+        return get_db_connection()
+    return replica.connect()
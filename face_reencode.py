@@ -0,0 +1,174 @@
+"""
+Face re-encode module untuk sistem absensi
+Rebuilds stored face encodings from the enrollment photos after a model change
+
+Usage:
+    python face_reencode.py                         # stale encodings, current settings
+    python face_reencode.py --model cnn --jitters 5 --workers 8
+    python face_reencode.py --all --dry-run         # encode everything, write nothing
+
+Photos are encoded on a process pool. New encodings go to a staging table
+first and replace the live ones in a single transaction at the end, so
+verification never sees a mix of old and new encodings; the 'faces' cache
+namespace is then invalidated. Photos that are missing or no longer show
+exactly one face keep their old encoding and are reported.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import get_cache
+from db import get_db_connection
+from face_verification import (
+    DETECTION_MODELS, FACE_DETECTION_MODEL, FACE_NUM_JITTERS, face_model_version,
+)
+
+
+def encode_photo(job):
+    """Worker: (face_data_id, photo_path, model, num_jitters) -> (face_data_id, encoding json, error)"""
+    face_data_id, photo_path, model, num_jitters = job
+    if not photo_path or not os.path.exists(photo_path):
+        return face_data_id, None, 'foto tidak ditemukan'
+    try:
+        import face_recognition
+        image = face_recognition.load_image_file(photo_path)
+        locations = face_recognition.face_locations(image, model=model)
+        if len(locations) != 1:
+            return face_data_id, None, f'{len(locations)} wajah terdeteksi'
+        encoding = face_recognition.face_encodings(image, locations, num_jitters=num_jitters)[0]
+        return face_data_id, json.dumps(encoding.tolist()), None
+    except Exception as e:
+        return face_data_id, None, str(e)
+
+
+def pending_jobs(conn, version, stale_only=True, include_inactive=False):
+    """face_data rows to encode: (id, photo_path)"""
+    sql = 'SELECT id, photo_path FROM face_data WHERE photo_path IS NOT NULL'
+    params = []
+    if not include_inactive:
+        sql += ' AND active = TRUE'
+    if stale_only:
+        sql += ' AND (face_encoding IS NULL OR model_version IS NULL OR model_version != ?)'
+        params.append(version)
+    return [(row[0], row[1]) for row in conn.execute(sql + ' ORDER BY id', params).fetchall()]
+
+
+def _stage(conn, run_id, version, batch):
+    conn.executemany('''
+        INSERT INTO face_encoding_staging (run_id, face_data_id, face_encoding, model_version)
+        VALUES (?, ?, ?, ?)
+    ''', [(run_id, face_data_id, encoding, version) for face_data_id, encoding in batch])
+    conn.commit()
+
+
+def _swap(conn, run_id):
+    """Replace live encodings with the staged ones in one transaction"""
+    conn.execute('''
+        UPDATE face_data SET
+            face_encoding = (SELECT s.face_encoding FROM face_encoding_staging s
+                             WHERE s.run_id = ? AND s.face_data_id = face_data.id),
+            model_version = (SELECT s.model_version FROM face_encoding_staging s
+                             WHERE s.run_id = ? AND s.face_data_id = face_data.id)
+        WHERE id IN (SELECT face_data_id FROM face_encoding_staging WHERE run_id = ?)
+    ''', (run_id, run_id, run_id))
+    conn.execute('DELETE FROM face_encoding_staging WHERE run_id = ?', (run_id,))
+    conn.commit()
+
+
+def reencode(model=None, num_jitters=None, workers=None, stale_only=True, include_inactive=False,
+             batch_size=200, dry_run=False, progress=None):
+    """Re-encode enrollment photos and swap the results in
+
+    progress(done, total, failed) is called after every batch. Returns a
+    summary dict with the failures per face_data id.
+    """
+    model = model or FACE_DETECTION_MODEL
+    num_jitters = num_jitters or FACE_NUM_JITTERS
+    if model not in DETECTION_MODELS:
+        raise ValueError(f'Model deteksi tidak dikenal: {model}')
+    version = face_model_version(model, num_jitters)
+    run_id = uuid.uuid4().hex
+    started = time.perf_counter()
+
+    conn = get_db_connection()
+    try:
+        jobs = pending_jobs(conn, version, stale_only, include_inactive)
+        summary = {'run_id': run_id, 'model_version': version, 'total': len(jobs), 'encoded': 0,
+                   'failed': {}, 'dry_run': dry_run}
+        if not jobs:
+            summary['seconds'] = round(time.perf_counter() - started, 3)
+            return summary
+
+        # spawn: dlib is not fork-safe, and the parent may hold DB and cache sockets
+        context = multiprocessing.get_context('spawn')
+        batch = []
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as executor:
+            work = [(face_data_id, photo_path, model, num_jitters) for face_data_id, photo_path in jobs]
+            for face_data_id, encoding, error in executor.map(encode_photo, work, chunksize=4):
+                done += 1
+                if error:
+                    summary['failed'][face_data_id] = error
+                    print(f"Re-encode face_data {face_data_id} gagal: {error}")
+                else:
+                    batch.append((face_data_id, encoding))
+                if len(batch) >= batch_size or done == len(jobs):
+                    if batch and not dry_run:
+                        _stage(conn, run_id, version, batch)
+                    summary['encoded'] += len(batch)
+                    batch = []
+                    if progress:
+                        progress(done, len(jobs), len(summary['failed']))
+
+        if not dry_run and summary['encoded']:
+            _swap(conn, run_id)
+            get_cache().invalidate('faces')
+        summary['seconds'] = round(time.perf_counter() - started, 3)
+        print(f"Re-encode {run_id}: {summary['encoded']}/{summary['total']} encodings "
+              f"({version}) in {summary['seconds']}s, {len(summary['failed'])} gagal")
+        return summary
+    except Exception:
+        conn.rollback()
+        conn.execute('DELETE FROM face_encoding_staging WHERE run_id = ?', (run_id,))
+        conn.commit()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-encode stored face samples from their enrollment photos')
+    parser.add_argument('--model', choices=DETECTION_MODELS, default=FACE_DETECTION_MODEL,
+                        help='face detector (default FACE_DETECTION_MODEL)')
+    parser.add_argument('--jitters', type=int, default=FACE_NUM_JITTERS,
+                        help='re-samples per encoding (default FACE_NUM_JITTERS)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='encoding processes')
+    parser.add_argument('--all', action='store_true', help='re-encode every sample, not only stale ones')
+    parser.add_argument('--include-inactive', action='store_true', help='also re-encode removed samples')
+    parser.add_argument('--batch-size', type=int, default=200, help='encodings staged per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='encode but do not write anything')
+    args = parser.parse_args()
+
+    if args.model != FACE_DETECTION_MODEL or args.jitters != FACE_NUM_JITTERS:
+        print(f"Catatan: set FACE_DETECTION_MODEL={args.model} FACE_NUM_JITTERS={args.jitters} "
+              f"untuk aplikasi, agar foto absensi di-encode dengan cara yang sama")
+
+    def progress(done, total, failed):
+        print(f"  {done}/{total} foto, {failed} gagal")
+
+    summary = reencode(args.model, args.jitters, args.workers, stale_only=not args.all,
+                       include_inactive=args.include_inactive, batch_size=args.batch_size,
+                       dry_run=args.dry_run, progress=progress)
+    if not summary['total']:
+        print(f"Tidak ada encoding yang perlu diperbarui ({summary['model_version']})")
+    sys.exit(1 if summary['failed'] and not summary['encoded'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Face routes module untuk sistem absensi
+Face setup and removal from the profile page, and the face verification API
+"""
+
+import os
+import threading
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, session
+from werkzeug.utils import secure_filename
+
+import metrics
+import face_reencode
+from app_helpers import allowed_file, invalidate_user_caches, login_required
+from cache import get_cache
+from db import get_db_connection
+from face_verification import (
+    FACE_MAX_SAMPLES, FACE_RECOGNITION_AVAILABLE, calibrate_threshold, encode_enrollment_photo,
+    face_model_version, get_match_threshold, get_stored_face_encodings, match_log_summary, samples_consistent,
+    save_enrollment_samples, stale_encoding_count,
+)
+from register_web import init_web_registration
+
+
+bp = Blueprint('face', __name__)
+
+
+class EnrollmentError(Exception):
+    """A face sample that cannot be enrolled; the message is shown to the user"""
+
+
+@bp.route('/setup_face', methods=['POST'])
+@login_required
+def setup_face():
+    """Enroll face samples for user; mode=add keeps the existing samples"""
+    if not FACE_RECOGNITION_AVAILABLE:
+        return jsonify({'success': False, 'message': 'Face recognition not available'})
+    
+    face_files = [f for f in request.files.getlist('face_image') if f.filename != '']
+    if not face_files:
+        return jsonify({'success': False, 'message': 'No face image provided'})
+    
+    if len(face_files) > FACE_MAX_SAMPLES:
+        return jsonify({'success': False, 'message': f'Maksimal {FACE_MAX_SAMPLES} foto wajah'})
+    
+    if not all(allowed_file(f.filename) for f in face_files):
+        return jsonify({'success': False, 'message': 'Invalid file format'})
+    
+    replace = request.form.get('mode', 'replace') != 'add'
+    saved_paths = []
+    enrolled = False
+    conn = None
+    try:
+        conn = get_db_connection()
+        user = conn.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],)).fetchone()
+        
+        # Create user-specific folder
+        user_folder = os.path.join(current_app.config['FACES_FOLDER'], f"{user['full_name']}_{user['id']}")
+        if not os.path.exists(user_folder):
+            os.makedirs(user_folder)
+        
+        # Save and encode every sample; one bad photo rejects the whole set
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        samples = []
+        for index, face_file in enumerate(face_files, start=1):
+            filename = secure_filename(f"{user['id']}_face_{stamp}_{index}.jpg")
+            image_path = os.path.join(user_folder, filename)
+            with metrics.span('save'):
+                face_file.save(image_path)
+            saved_paths.append(image_path)
+            
+            encoding, error = encode_enrollment_photo(image_path)
+            if encoding is None:
+                raise EnrollmentError(f'Foto {index}: {error}' if len(face_files) > 1 else error)
+            samples.append((encoding, image_path))
+        
+        encodings = [encoding for encoding, _ in samples]
+        if not replace:
+            encodings += get_stored_face_encodings(user['id']) or []
+        if not samples_consistent(encodings):
+            raise EnrollmentError('Foto wajah tidak konsisten, pastikan semua foto adalah wajah Anda')
+        
+        with metrics.span('db'):
+            save_enrollment_samples(conn, user['id'], samples, replace=replace)
+            conn.commit()
+        enrolled = True
+        invalidate_user_caches(session['user_id'])
+        
+        return jsonify({'success': True, 'message': 'Face recognition berhasil disetup!', 'samples': len(samples)})
+        
+    except EnrollmentError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+    finally:
+        if conn is not None:
+            conn.close()
+        # Photos of a failed enrollment are not referenced by any face_data row
+        if not enrolled:
+            for path in saved_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+@bp.route('/remove_face', methods=['POST'])
+@login_required
+def remove_face():
+    """Remove face recognition for user"""
+    try:
+        conn = get_db_connection()
+        
+        # Get face data to remove files
+        face_data = conn.execute(
+            'SELECT photo_path FROM face_data WHERE user_id = ? AND active = TRUE',
+            (session['user_id'],)
+        ).fetchall()
+        
+        # Remove face data from database
+        conn.execute('UPDATE face_data SET active = FALSE WHERE user_id = ?', (session['user_id'],))
+        conn.commit()
+        conn.close()
+        invalidate_user_caches(session['user_id'])
+        
+        # Remove physical files
+        for data in face_data:
+            if data['photo_path'] and os.path.exists(data['photo_path']):
+                try:
+                    os.remove(data['photo_path'])
+                except Exception:
+                    pass  # Continue even if file removal fails
+        
+        return jsonify({'success': True, 'message': 'Face recognition berhasil dihapus!'})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+
+
+@bp.route('/api/face/calibration', methods=['GET', 'POST'])
+@login_required
+def api_face_calibration():
+    """Match threshold and recent distance distributions; POST recalibrates (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        conn = get_db_connection()
+        if request.method == 'POST':
+            far_target = request.form.get('far_target', 0.001, type=float)
+            if not 0 < far_target < 0.1:
+                conn.close()
+                return jsonify({'success': False, 'message': 'far_target harus antara 0 dan 0.1'}), 400
+            try:
+                calibration = calibrate_threshold(conn, far_target)
+            except ValueError as e:
+                conn.close()
+                return jsonify({'success': False, 'message': str(e)}), 400
+            conn.close()
+            return jsonify({'success': True, 'message': 'Threshold berhasil dikalibrasi', 'calibration': calibration})
+        
+        summary = match_log_summary(conn, request.args.get('days', 30, type=int))
+        conn.close()
+        return jsonify({'success': True, 'threshold': get_match_threshold(), 'distances': summary})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+# A re-encode run holds this lock; it expires in case the worker dies mid-run
+REENCODE_LOCK_KEY = 'face-reencode-lock'
+REENCODE_LOCK_TTL = 6 * 3600
+
+
+def _run_reencode(options):
+    cache = get_cache()
+    
+    def progress(done, total, failed):
+        cache.set_ns('face_reencode', 'status', {'state': 'running', 'done': done, 'total': total,
+                                                 'failed': failed, 'options': options}, ttl=REENCODE_LOCK_TTL)
+    
+    try:
+        summary = face_reencode.reencode(**options, progress=progress)
+        summary['failed'] = {str(k): v for k, v in summary['failed'].items()}
+        status = {'state': 'finished', 'summary': summary, 'options': options}
+    except Exception as e:
+        print(f"Re-encode gagal: {str(e)}")
+        status = {'state': 'error', 'message': str(e), 'options': options}
+    status['finished_at'] = datetime.now().isoformat(timespec='seconds')
+    cache.set_ns('face_reencode', 'status', status, ttl=7 * 86400)
+    cache.delete(REENCODE_LOCK_KEY)
+
+
+@bp.route('/api/face/reencode', methods=['GET', 'POST'])
+@login_required
+def api_face_reencode():
+    """Re-encode stored face samples in the background; GET shows progress (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    cache = get_cache()
+    if request.method == 'POST':
+        if not FACE_RECOGNITION_AVAILABLE:
+            return jsonify({'success': False, 'message': 'Face recognition not available'}), 400
+        options = {
+            'model': request.form.get('model') or None,
+            'num_jitters': request.form.get('jitters', type=int),
+            'workers': request.form.get('workers', type=int),
+            'stale_only': request.form.get('all') not in ('1', 'true'),
+        }
+        if options['model'] and options['model'] not in face_reencode.DETECTION_MODELS:
+            return jsonify({'success': False, 'message': f"Model deteksi tidak dikenal: {options['model']}"}), 400
+        if not cache.add(REENCODE_LOCK_KEY, os.getpid(), ttl=REENCODE_LOCK_TTL):
+            return jsonify({'success': False, 'message': 'Re-encode sedang berjalan'}), 409
+        cache.set_ns('face_reencode', 'status', {'state': 'running', 'done': 0, 'total': None, 'failed': 0,
+                                                 'options': options}, ttl=REENCODE_LOCK_TTL)
+        threading.Thread(target=_run_reencode, args=(options,), name='face-reencode', daemon=True).start()
+        return jsonify({'success': True, 'message': 'Re-encode dimulai'}), 202
+    
+    try:
+        conn = get_db_connection()
+        stale = stale_encoding_count(conn)
+        conn.close()
+        return jsonify({
+            'success': True,
+            'model_version': face_model_version(),
+            'stale': stale,
+            'status': cache.get_ns('face_reencode', 'status'),
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+# Face verification API for the registration flow (register_web)
+init_web_registration(bp)
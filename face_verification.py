@@ -0,0 +1,519 @@
+"""
+Face verification module untuk sistem absensi
+Stored encodings, attendance face checks and face setup during registration
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+from importlib import metadata
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+import lazy_imports
+import metrics
+from app_helpers import invalidate_user_caches
+from cache import LocalCache, get_cache
+from cooperative import run_blocking
+from db import get_db_connection
+from lazy_imports import lazy
+
+
+np = lazy('numpy')
+
+# Face recognition imports (optional); the proxy only imports on first use
+FACE_RECOGNITION_AVAILABLE = lazy_imports.available('cv2', 'face_recognition')
+face_recognition = lazy('face_recognition')
+if FACE_RECOGNITION_AVAILABLE:
+    print("Face recognition libraries found (loaded on first use)")
+else:
+    print("Warning: Face recognition libraries not available in this environment")
+
+# Threshold for face matching (lower = more strict); default until an admin
+# calibrates one for this deployment (see calibrate_threshold)
+FACE_MATCH_THRESHOLD = float(os.environ.get('FACE_MATCH_THRESHOLD', 0.4))
+# Calibration never moves the threshold outside these bounds
+THRESHOLD_BOUNDS = (0.3, 0.6)
+# Enrollment photos kept per user; a probe matches on its closest sample
+FACE_MAX_SAMPLES = int(os.environ.get('FACE_MAX_SAMPLES', 5))
+
+# Detector ('hog' on CPU, 'cnn' is more accurate but needs a GPU to be fast) and
+# re-sampling count used for every encoding; face_reencode.py rewrites stored
+# encodings when these change
+FACE_DETECTION_MODEL = os.environ.get('FACE_DETECTION_MODEL', 'hog')
+FACE_NUM_JITTERS = int(os.environ.get('FACE_NUM_JITTERS', 1))
+DETECTION_MODELS = ('hog', 'cnn')
+# Enrollment photos further apart than this are probably not the same person
+SAMPLE_CONSISTENCY = 0.6
+HISTOGRAM_BINS = 20
+
+# Encodings of recent attendance photos by (user, photo content), so a punch
+# retried with the same photo skips decoding, detection and encoding. Kept per
+# worker in a small LRU; the match itself is redone against current samples.
+FACE_RESULT_TTL = int(os.environ.get('FACE_RESULT_TTL', 120))
+FACE_RESULT_CACHE_SIZE = int(os.environ.get('FACE_RESULT_CACHE_SIZE', 256))
+_probe_results = LocalCache(max_entries=FACE_RESULT_CACHE_SIZE)
+
+# Punches of a user whose face photos hold no usable encoding are rejected, not waved through
+NO_USABLE_ENCODING = 'Data wajah tidak dapat digunakan, silakan setup ulang wajah Anda.'
+
+
+def ensure_schema(conn):
+    """Create the match log and calibration tables"""
+    id_column = conn.dialect.id_column
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS face_match_log (
+            id {id_column},
+            user_id INTEGER NOT NULL,
+            distance REAL NOT NULL,
+            matched BOOLEAN NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_face_match_log_created ON face_match_log(created_at)')
+    columns = [column[0] for column in conn.execute('SELECT * FROM face_data LIMIT 0').description]
+    if 'model_version' not in columns:
+        conn.execute('ALTER TABLE face_data ADD COLUMN model_version VARCHAR(100)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS face_encoding_staging (
+            run_id VARCHAR(40) NOT NULL,
+            face_data_id INTEGER NOT NULL,
+            face_encoding TEXT NOT NULL,
+            model_version VARCHAR(100) NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS face_calibration (
+            id {id_column},
+            threshold REAL NOT NULL,
+            far_target REAL NOT NULL,
+            expected_frr REAL,
+            genuine_count INTEGER NOT NULL,
+            impostor_count INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def face_model_version(model=None, num_jitters=None):
+    """Identifies the settings an encoding was made with, stored per face_data row"""
+    try:
+        library = metadata.version('face_recognition')
+    except metadata.PackageNotFoundError:
+        library = 'unknown'
+    return f"face_recognition-{library}:{model or FACE_DETECTION_MODEL}:j{num_jitters or FACE_NUM_JITTERS}"
+
+
+def stale_encoding_count(conn, version=None):
+    """Active encodings made with other settings than the current ones"""
+    row = conn.execute('''
+        SELECT COUNT(*) FROM face_data
+        WHERE active = TRUE AND photo_path IS NOT NULL
+          AND (face_encoding IS NULL OR model_version IS NULL OR model_version != ?)
+    ''', (version or face_model_version(),)).fetchone()
+    return row[0]
+
+
+def get_stored_face_encodings(user_id):
+    """Get a user's active enrollment encodings, cached until face data changes
+
+    None when the user has no active face data; an empty list when face data
+    exists but none of it has an encoding (a photo without a usable face).
+    """
+    def load():
+        conn = get_db_connection()
+        rows = conn.execute(
+            'SELECT face_encoding FROM face_data WHERE user_id = ? AND active = TRUE',
+            (user_id,)
+        ).fetchall()
+        conn.close()
+        if not rows:
+            return None
+        return [json.loads(row[0]) for row in rows if row[0]]
+    return get_cache().get_or_set('faces', user_id, load, ttl=3600)
+
+
+def get_match_threshold():
+    """Latest calibrated threshold, else FACE_MATCH_THRESHOLD"""
+    def load():
+        conn = get_db_connection()
+        row = conn.execute('SELECT threshold FROM face_calibration ORDER BY id DESC LIMIT 1').fetchone()
+        conn.close()
+        return row[0] if row else FACE_MATCH_THRESHOLD
+    return get_cache().get_or_set('faces', 'threshold', load, ttl=300)
+
+
+def min_distances(samples, probes):
+    """Distance from each probe encoding to its closest enrollment sample, in one array operation"""
+    samples = np.asarray(samples, dtype=float)
+    probes = np.asarray(probes, dtype=float)
+    return np.linalg.norm(probes[:, None, :] - samples[None, :, :], axis=2).min(axis=1)
+
+
+def log_match(user_id, distance, matched):
+    """Record a verification distance for calibration and the distance histogram"""
+    if metrics.ENABLED:
+        metrics.FACE_DISTANCE.observe(distance, 'match' if matched else 'reject')
+    print(f"Face match user {user_id}: distance {distance:.3f} {'ok' if matched else 'rejected'}")
+    try:
+        conn = get_db_connection()
+        conn.execute('INSERT INTO face_match_log (user_id, distance, matched, created_at) VALUES (?, ?, ?, ?)',
+                     (user_id, distance, matched, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"Warning: could not log face match: {str(e)}")
+
+
+def encode_faces(image_path, model=None, num_jitters=None):
+    """Encodings of every face in a photo, with the configured detector"""
+    image = face_recognition.load_image_file(image_path)
+    face_locations = face_recognition.face_locations(image, model=model or FACE_DETECTION_MODEL)
+    return face_recognition.face_encodings(image, face_locations, num_jitters=num_jitters or FACE_NUM_JITTERS)
+
+
+def photo_digest(image_file):
+    """SHA-256 of the photo file, identifying a re-sent photo"""
+    digest = hashlib.sha256()
+    with open(image_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _detect_and_encode(image_file):
+    with metrics.span('decode'):
+        image = run_blocking(face_recognition.load_image_file, image_file)
+    with metrics.span('detect'):
+        face_locations = run_blocking(face_recognition.face_locations, image, model=FACE_DETECTION_MODEL)
+    
+    if not face_locations:
+        return None, "Wajah tidak terdeteksi."
+    if len(face_locations) > 1:
+        return None, "Terdeteksi lebih dari satu wajah!"
+    
+    with metrics.span('encode'):
+        face_encodings = run_blocking(face_recognition.face_encodings, image, face_locations,
+                                      num_jitters=FACE_NUM_JITTERS)
+    return face_encodings[0], None
+
+
+def encode_probe(image_file, user_id):
+    """(encoding, error message, cached) for an attendance photo
+
+    An identical photo of the same user within FACE_RESULT_TTL reuses the
+    earlier encoding, or the earlier detection failure.
+    """
+    key = f"{user_id}:{photo_digest(image_file)}"
+    cached = _probe_results.get(key)
+    if cached is not None:
+        return cached[0], cached[1], True
+    encoding, error = _detect_and_encode(image_file)
+    _probe_results.set(key, (encoding, error), ttl=FACE_RESULT_TTL)
+    return encoding, error, False
+
+
+def match_result(user_id, distance, threshold, log=True):
+    matched = distance < threshold
+    if log:
+        log_match(user_id, distance, matched)
+    if matched:
+        return True, f"Wajah terverifikasi! Akurasi: {(1 - distance) * 100:.1f}%"
+    return False, "Wajah tidak dikenali."
+
+
+def verify_face_for_attendance(image_file, user_id):
+    """Verify face for attendance against the user's closest enrollment sample"""
+    if not FACE_RECOGNITION_AVAILABLE:
+        return True, "Face recognition not available, skipping verification"
+    
+    try:
+        # Get stored enrollment samples (cached)
+        samples = get_stored_face_encodings(user_id)
+        
+        if samples is None:
+            # No face data stored, allow attendance but warn
+            return True, "No face data registered, attendance allowed"
+        if not samples:
+            return False, NO_USABLE_ENCODING
+        
+        # Process uploaded image, or reuse the encoding of the same photo sent moments ago
+        encoding, error, cached = encode_probe(image_file, user_id)
+        if error:
+            return False, error
+        
+        # Compare against every sample at once; a retry is not logged a second time
+        with metrics.span('compare'):
+            distance = float(min_distances(samples, [encoding])[0])
+        
+        return match_result(user_id, distance, get_match_threshold(), log=not cached)
+            
+    except Exception as e:
+        return False, f"Error verifying face: {str(e)}"
+
+def verify_faces_for_attendance(image_files, user_id):
+    """Verify a batch of photos of one user; distances are computed in one array operation"""
+    if not FACE_RECOGNITION_AVAILABLE:
+        return [(True, "Face recognition not available, skipping verification")] * len(image_files)
+    
+    samples = get_stored_face_encodings(user_id)
+    if samples is None:
+        return [(True, "No face data registered, attendance allowed")] * len(image_files)
+    if not samples:
+        return [(False, NO_USABLE_ENCODING)] * len(image_files)
+    
+    results = [None] * len(image_files)
+    encodings, positions, fresh = [], [], []
+    for i, image_file in enumerate(image_files):
+        try:
+            encoding, error, cached = encode_probe(image_file, user_id)
+        except Exception as e:
+            results[i] = (False, f"Error verifying face: {str(e)}")
+            continue
+        if error:
+            results[i] = (False, error)
+        else:
+            encodings.append(encoding)
+            positions.append(i)
+            fresh.append(not cached)
+    
+    if encodings:
+        threshold = get_match_threshold()
+        for i, distance, log in zip(positions, min_distances(samples, encodings), fresh):
+            results[i] = match_result(user_id, float(distance), threshold, log=log)
+    return results
+
+
+def process_face_registration(face_file, user_id, full_name):
+    """Process face image during registration - with enhanced error handling"""
+    try:
+        print(f"DEBUG: Starting face processing for user {user_id}")
+        
+        # Create user-specific folder
+        user_folder = os.path.join(current_app.config['FACES_FOLDER'], f"{full_name}_{user_id}")
+        if not os.path.exists(user_folder):
+            os.makedirs(user_folder)
+            print(f"DEBUG: Created folder: {user_folder}")
+        
+        # Save original image
+        filename = secure_filename(f"{user_id}_face.jpg")
+        image_path = os.path.join(user_folder, filename)
+        face_file.save(image_path)
+        print(f"DEBUG: Image saved to: {image_path}")
+        
+        # Always save to database first (even without encoding)
+        conn = get_db_connection()
+        cursor = conn.execute('''
+            INSERT INTO face_data (user_id, photo_path, active)
+            VALUES (?, ?, TRUE)
+        ''', (user_id, image_path))
+        face_data_id = cursor.lastrowid
+        print(f"DEBUG: Face data record created with ID: {face_data_id}")
+        
+        # Try face processing if available
+        if FACE_RECOGNITION_AVAILABLE:
+            try:
+                print("DEBUG: Attempting face recognition processing...")
+                face_encodings = run_blocking(encode_faces, image_path)
+                
+                if not face_encodings:
+                    print("DEBUG: No faces detected in image")
+                    conn.commit()
+                    conn.close()
+                    return True, "Foto wajah disimpan (wajah tidak terdeteksi untuk encoding)!"
+                
+                if len(face_encodings) > 1:
+                    print(f"DEBUG: Multiple faces detected: {len(face_encodings)}")
+                    conn.commit()
+                    conn.close()
+                    return True, "Foto wajah disimpan (multiple faces detected, no encoding)!"
+                
+                # Save encoding to database
+                face_encoding = face_encodings[0]
+                encoding_json = json.dumps(face_encoding.tolist())
+                
+                conn.execute('''
+                    UPDATE face_data SET face_encoding = ?, model_version = ? WHERE id = ?
+                ''', (encoding_json, face_model_version(), face_data_id))
+                
+                print("DEBUG: Face encoding saved successfully")
+                conn.commit()
+                conn.close()
+                invalidate_user_caches(user_id)
+                
+                return True, "Face recognition berhasil disetup dengan encoding!"
+                
+            except Exception as face_error:
+                print(f"DEBUG: Face recognition error: {str(face_error)}")
+                # Keep the photo record without encoding
+                conn.commit()
+                conn.close()
+                return True, f"Foto wajah disimpan (face processing error, bisa diproses nanti)!"
+        else:
+            print("DEBUG: Face recognition not available")
+            # Save without encoding
+            conn.commit()
+            conn.close()
+            
+            return True, "Foto wajah berhasil disimpan!"
+            
+    except Exception as e:
+        print(f"DEBUG: General error in face processing: {str(e)}")
+        # Try to clean up on error
+        try:
+            if 'image_path' in locals() and os.path.exists(image_path):
+                os.remove(image_path)
+                print("DEBUG: Cleaned up image file")
+            if 'user_folder' in locals() and os.path.exists(user_folder) and not os.listdir(user_folder):
+                os.rmdir(user_folder)
+                print("DEBUG: Cleaned up empty folder")
+            if 'conn' in locals():
+                conn.close()
+        except:
+            pass
+        return False, f"Error memproses foto wajah: {str(e)}"
+
+
+# -- enrollment -------------------------------------------------------------------
+
+def encode_enrollment_photo(image_path):
+    """(encoding, None) for a photo with exactly one face, else (None, message)"""
+    with metrics.span('decode'):
+        image = run_blocking(face_recognition.load_image_file, image_path)
+    with metrics.span('detect'):
+        face_locations = run_blocking(face_recognition.face_locations, image, model=FACE_DETECTION_MODEL)
+    if not face_locations:
+        return None, 'Tidak ada wajah terdeteksi dalam gambar'
+    if len(face_locations) > 1:
+        return None, 'Terdeteksi lebih dari satu wajah. Gunakan foto dengan satu wajah saja'
+    with metrics.span('encode'):
+        return run_blocking(face_recognition.face_encodings, image, face_locations,
+                            num_jitters=FACE_NUM_JITTERS)[0], None
+
+
+def samples_consistent(encodings):
+    """True if every pair of samples is close enough to be the same person"""
+    encodings = np.asarray(encodings, dtype=float)
+    if len(encodings) < 2:
+        return True
+    distances = np.linalg.norm(encodings[:, None, :] - encodings[None, :, :], axis=2)
+    return bool(distances.max() <= SAMPLE_CONSISTENCY)
+
+
+def save_enrollment_samples(conn, user_id, samples, replace=True):
+    """Store (encoding, photo_path) samples, keeping the newest FACE_MAX_SAMPLES active"""
+    if replace:
+        conn.execute('UPDATE face_data SET active = FALSE WHERE user_id = ?', (user_id,))
+    version = face_model_version()
+    conn.executemany('''
+        INSERT INTO face_data (user_id, face_encoding, photo_path, active, model_version)
+        VALUES (?, ?, ?, TRUE, ?)
+    ''', [(user_id, json.dumps(encoding.tolist()), photo_path, version) for encoding, photo_path in samples])
+    stale = conn.execute(
+        'SELECT id FROM face_data WHERE user_id = ? AND active = TRUE ORDER BY id DESC', (user_id,)
+    ).fetchall()[FACE_MAX_SAMPLES:]
+    if stale:
+        conn.executemany('UPDATE face_data SET active = FALSE WHERE id = ?', [(row['id'],) for row in stale])
+
+
+# -- calibration ------------------------------------------------------------------
+
+def distance_samples(encodings, user_ids, chunk_size=512):
+    """Genuine and impostor distances between enrollment samples
+
+    Genuine: each sample against the closest other sample of its own user.
+    Impostor: each sample against the closest sample of every other user,
+    which is what a stranger's photo faces at punch time. Computed in row
+    blocks so memory stays bounded with thousands of samples.
+    """
+    user_ids = np.asarray(user_ids)
+    order = np.argsort(user_ids, kind='stable')
+    encodings = np.asarray(encodings, dtype=float)[order]
+    user_ids = user_ids[order]
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    users = user_ids[starts]
+    squared = (encodings ** 2).sum(axis=1)
+
+    genuine, impostor = [], []
+    for begin in range(0, len(encodings), chunk_size):
+        block = slice(begin, begin + chunk_size)
+        distances = np.sqrt(np.maximum(
+            squared[block, None] + squared[None, :] - 2 * encodings[block] @ encodings.T, 0))
+        rows = np.arange(distances.shape[0])
+        distances[rows, rows + begin] = np.inf
+        per_user = np.minimum.reduceat(distances, starts, axis=1)
+        own = user_ids[block, None] == users[None, :]
+        genuine.append(per_user[own])
+        impostor.append(per_user[~own])
+    genuine = np.concatenate(genuine)
+    return genuine[np.isfinite(genuine)], np.concatenate(impostor)
+
+
+def calibrate_threshold(conn, far_target=0.001):
+    """Pick the threshold admitting far_target of impostor attempts and store it
+
+    Raises ValueError when there are too few enrolled users to calibrate.
+    """
+    rows = conn.execute(
+        'SELECT user_id, face_encoding FROM face_data WHERE active = TRUE AND face_encoding IS NOT NULL'
+    ).fetchall()
+    rows = [row for row in rows if row['face_encoding']]
+    if len({row['user_id'] for row in rows}) < 2:
+        raise ValueError('Kalibrasi butuh data wajah dari minimal 2 pengguna')
+
+    genuine, impostor = distance_samples([json.loads(row['face_encoding']) for row in rows],
+                                         [row['user_id'] for row in rows])
+    threshold = float(np.clip(np.quantile(impostor, far_target), *THRESHOLD_BOUNDS))
+    expected_frr = float((genuine >= threshold).mean()) if len(genuine) else None
+
+    conn.execute('''
+        INSERT INTO face_calibration (threshold, far_target, expected_frr, genuine_count, impostor_count)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (threshold, far_target, expected_frr, len(genuine), len(impostor)))
+    conn.commit()
+    get_cache().delete_ns('faces', 'threshold')
+
+    return {
+        'threshold': round(threshold, 4),
+        'far_target': far_target,
+        'expected_frr': None if expected_frr is None else round(expected_frr, 4),
+        'genuine_count': int(len(genuine)),
+        'impostor_count': int(len(impostor)),
+        'genuine_percentiles': _percentiles(genuine),
+        'impostor_percentiles': _percentiles(impostor),
+    }
+
+
+def _percentiles(values):
+    if not len(values):
+        return {}
+    points = np.percentile(values, [1, 5, 50, 95, 99])
+    return {f'p{p}': round(float(v), 4) for p, v in zip((1, 5, 50, 95, 99), points)}
+
+
+def match_log_summary(conn, days=30):
+    """Distance histograms of recent verifications and attempts per successful punch"""
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    rows = conn.execute(
+        'SELECT distance, matched FROM face_match_log WHERE created_at >= ?', (since,)
+    ).fetchall()
+    distances = np.array([row['distance'] for row in rows], dtype=float)
+    matched = np.array([bool(row['matched']) for row in rows], dtype=bool)
+    edges = np.linspace(0, 1, HISTOGRAM_BINS + 1)
+    accepted = int(matched.sum())
+
+    return {
+        'days': days,
+        'attempts': len(rows),
+        'accepted': accepted,
+        'rejected': len(rows) - accepted,
+        'attempts_per_success': round(len(rows) / accepted, 2) if accepted else None,
+        'bins': [round(float(edge), 2) for edge in edges],
+        'accepted_histogram': np.histogram(distances[matched], bins=edges)[0].tolist(),
+        'rejected_histogram': np.histogram(distances[~matched], bins=edges)[0].tolist(),
+        'accepted_percentiles': _percentiles(distances[matched]),
+        'rejected_percentiles': _percentiles(distances[~matched]),
+    }
@@ -0,0 +1,184 @@
+"""
+Geofence module untuk sistem absensi
+Accuracy-aware location checks against the active fences, for single punches and batches
+"""
+
+import math
+import os
+
+from app_helpers import get_active_coordinates
+from lazy_imports import lazy
+
+
+np = lazy('numpy')
+
+EARTH_RADIUS = 6371000  # meter
+# Reported GPS accuracy counted in the user's favour, at most this many meters
+MAX_ACCURACY_CREDIT = float(os.environ.get('GEOFENCE_MAX_ACCURACY_CREDIT', 50))
+# Fixes less accurate than this are rejected instead of being checked
+MAX_ACCURACY = float(os.environ.get('GEOFENCE_MAX_ACCURACY', 500))
+
+_fences = None
+
+
+class LocationError(ValueError):
+    """Missing or unusable coordinates; the message is shown to the user"""
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Hitung jarak antara dua titik koordinat (meter)
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+
+    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
+    return EARTH_RADIUS * (2 * math.atan2(math.sqrt(a), math.sqrt(1-a)))
+
+
+def _number(value):
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise LocationError('Lokasi tidak valid, aktifkan GPS dan coba lagi')
+    if not math.isfinite(number):
+        raise LocationError('Lokasi tidak valid, aktifkan GPS dan coba lagi')
+    return number
+
+
+def parse_location(latitude, longitude, accuracy=None):
+    """(latitude, longitude, accuracy) from form values; raises LocationError
+
+    Missing coordinates are an error rather than (0, 0). Accuracy is optional
+    (older clients do not send it) and counts as 0.
+    """
+    latitude, longitude, accuracy = _number(latitude), _number(longitude), _number(accuracy)
+    if latitude is None or longitude is None:
+        raise LocationError('Lokasi tidak ditemukan, aktifkan GPS dan coba lagi')
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise LocationError('Lokasi tidak valid, aktifkan GPS dan coba lagi')
+    if accuracy is not None and accuracy < 0:
+        raise LocationError('Lokasi tidak valid, aktifkan GPS dan coba lagi')
+    return latitude, longitude, accuracy or 0.0
+
+
+class Fences:
+    """Active fences with their per-fence trigonometric terms computed once"""
+
+    def __init__(self, coordinates):
+        self.coordinates = list(coordinates)
+        self.key = fence_key(self.coordinates)
+        latitudes = [float(c['latitude']) for c in self.coordinates]
+        longitudes = [float(c['longitude']) for c in self.coordinates]
+        self.radii = [float(c['radius']) for c in self.coordinates]
+        # (lat, lon, cos lat) in radians per fence, for the scalar path
+        self._terms = [(math.radians(lat), math.radians(lon), math.cos(math.radians(lat)))
+                       for lat, lon in zip(latitudes, longitudes)]
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    def arrays(self):
+        """(lat, lon, cos lat, radius) arrays for the batch path; numpy only loads when a batch needs it"""
+        if self._arrays is None:
+            terms = np.asarray(self._terms, dtype=float).reshape(-1, 3)
+            self._arrays = (terms[:, 0], terms[:, 1], terms[:, 2], np.asarray(self.radii, dtype=float))
+        return self._arrays
+
+    def distances(self, latitudes, longitudes):
+        """Haversine distance matrix (points x fences) in meters"""
+        fence_lat, fence_lon, fence_cos_lat, _ = self.arrays()
+        lat = np.radians(np.asarray(latitudes, dtype=float))[:, None]
+        lon = np.radians(np.asarray(longitudes, dtype=float))[:, None]
+        a = (np.sin((fence_lat[None, :] - lat) / 2) ** 2
+             + np.cos(lat) * fence_cos_lat[None, :] * np.sin((fence_lon[None, :] - lon) / 2) ** 2)
+        return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    def locate(self, latitude, longitude, accuracy=0.0):
+        """Check one point; the result names the matched fence, or else the nearest one
+
+        A point counts as inside when it is within the radius plus its
+        reported accuracy (capped at MAX_ACCURACY_CREDIT).
+        """
+        if accuracy > MAX_ACCURACY:
+            return self.describe(False, -1, None, accuracy)
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        cos_lat = math.cos(lat)
+        credit = min(accuracy, MAX_ACCURACY_CREDIT)
+        best, best_margin, best_distance = None, None, None
+        for index, (fence_lat, fence_lon, fence_cos_lat) in enumerate(self._terms):
+            a = (math.sin((fence_lat - lat) / 2) ** 2
+                 + cos_lat * fence_cos_lat * math.sin((fence_lon - lon) / 2) ** 2)
+            distance = EARTH_RADIUS * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+            margin = distance - self.radii[index] - credit
+            if best_margin is None or margin < best_margin:
+                best, best_margin, best_distance = index, margin, distance
+        if best is None:
+            return self.describe(False, -1, None, accuracy)
+        return self.describe(best_margin <= 0, best, best_distance, accuracy)
+
+    def locate_many(self, latitudes, longitudes, accuracies=None):
+        """Check many points at once; arrays of inside, fence index and distance in meters
+
+        The fence index is the matched fence for points inside and the
+        nearest fence edge otherwise, -1 when there are no fences. Points
+        less accurate than MAX_ACCURACY are never inside.
+        """
+        count = len(latitudes)
+        if not count or not self.coordinates:
+            return np.zeros(count, dtype=bool), np.full(count, -1), np.full(count, np.nan)
+        accuracies = np.zeros(count) if accuracies is None else np.nan_to_num(np.asarray(accuracies, dtype=float))
+        distances = self.distances(latitudes, longitudes)
+        margins = distances - self.arrays()[3][None, :] - np.minimum(accuracies, MAX_ACCURACY_CREDIT)[:, None]
+        nearest = margins.argmin(axis=1)
+        rows = np.arange(count)
+        inside = (margins[rows, nearest] <= 0) & (accuracies <= MAX_ACCURACY)
+        return inside, nearest, distances[rows, nearest]
+
+    def describe(self, inside, index, distance, accuracy):
+        """Result dict of locate(), also for one row of locate_many()"""
+        if inside:
+            reason = None
+        elif accuracy > MAX_ACCURACY:
+            reason = 'accuracy'
+        elif index < 0:
+            reason = 'no_fences'
+        else:
+            reason = 'outside'
+        return {
+            'inside': bool(inside),
+            'fence': self.coordinates[index] if index >= 0 and reason != 'accuracy' else None,
+            'distance': round(distance, 1) if distance is not None and reason != 'accuracy' else None,
+            'accuracy': accuracy,
+            'reason': reason,
+        }
+
+
+def fence_key(coordinates):
+    return tuple((c['id'], c['latitude'], c['longitude'], c['radius']) for c in coordinates)
+
+
+def get_fences():
+    """Fences for the active coordinates, rebuilt only when the coordinates change"""
+    global _fences
+    coordinates = get_active_coordinates()
+    fences = _fences
+    if fences is None or fences.key != fence_key(coordinates):
+        fences = _fences = Fences(coordinates)
+    return fences
+
+
+def outside_message(result):
+    """User-facing message for a point that is not inside any fence"""
+    if result['reason'] == 'accuracy':
+        return f"Akurasi GPS terlalu rendah (±{result['accuracy']:.0f}m), coba lagi di tempat terbuka"
+    if result['fence'] is None:
+        return 'Anda berada di luar area absensi!'
+    distance = result['distance']
+    distance_text = f'{distance / 1000:.1f}km' if distance >= 1000 else f'{distance:.0f}m'
+    return (f"Anda berada di luar area absensi! Jarak ke {result['fence']['name']}: "
+            f"{distance_text} (maksimal {result['fence']['radius']:.0f}m)")
@@ -0,0 +1,309 @@
+"""
+Geofence analytics module untuk sistem absensi
+Per-fence punch location histograms, near-miss rates and radius suggestions
+"""
+
+import os
+import json
+import math
+from datetime import date, datetime, timedelta
+
+import geofence
+from lazy_imports import lazy
+
+
+np = lazy('numpy')
+
+# Heatmap cells (meters) and the half-width of the grid around each fence
+CELL_SIZE = 10
+GRID_EXTENT = int(os.environ.get('GEOFENCE_GRID_EXTENT', 500))
+# Distance histogram bins; punches further than GRID_EXTENT * 2 from every fence count as 'far'
+DISTANCE_BIN = 5
+MAX_DISTANCE = GRID_EXTENT * 2
+DISTANCE_BINS = MAX_DISTANCE // DISTANCE_BIN
+# Rejected punches at most this far outside the radius are near misses
+NEAR_MISS_MARGIN = float(os.environ.get('GEOFENCE_NEAR_MISS_MARGIN', 50))
+# Near-miss rate above which a larger radius is suggested
+NEAR_MISS_TARGET = 0.05
+MIN_SAMPLES = 20
+# Largest radius the coordinate forms accept
+MAX_RADIUS = 1000
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+
+# attendance_logs.message of punches rejected for being outside every fence
+REJECTED_MESSAGE = 'outside_geofence'
+
+
+def ensure_schema(conn):
+    """Create the per-day, per-fence histogram table and the rejection message column"""
+    columns = [column[0] for column in conn.execute('SELECT * FROM attendance_logs LIMIT 0').description]
+    if 'message' not in columns:
+        conn.execute('ALTER TABLE attendance_logs ADD COLUMN message TEXT')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS geofence_daily_stats (
+            day DATE NOT NULL,
+            coordinate_id INTEGER NOT NULL,
+            center VARCHAR(64) NOT NULL,
+            accepted INTEGER NOT NULL,
+            rejected INTEGER NOT NULL,
+            far INTEGER NOT NULL,
+            accepted_distances TEXT NOT NULL,
+            rejected_distances TEXT NOT NULL,
+            cells TEXT NOT NULL,
+            computed_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (day, coordinate_id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_attendance_logs_created_at ON attendance_logs (created_at)')
+    conn.commit()
+
+
+def record_rejections(conn, user_id, rejections):
+    """Log punches rejected by the geofence, for the near-miss statistics
+
+    rejections: [(action, latitude, longitude, at)]. Fixes rejected for poor
+    accuracy are not passed in; their position says little.
+    """
+    try:
+        conn.executemany('''
+            INSERT INTO attendance_logs (user_id, action, latitude, longitude, success, message, created_at)
+            VALUES (?, ?, ?, ?, FALSE, ?, ?)
+        ''', [(user_id, action, latitude, longitude, REJECTED_MESSAGE, at.strftime('%Y-%m-%d %H:%M:%S'))
+              for action, latitude, longitude, at in rejections])
+        conn.commit()
+    except Exception as e:
+        print(f"Warning: could not log geofence rejection: {str(e)}")
+
+
+def fence_center(coord):
+    return f"{float(coord['latitude']):.6f},{float(coord['longitude']):.6f}"
+
+
+def offsets(latitudes, longitudes, coord):
+    """Meters north and east of a fence center (equirectangular, exact enough within a few km)"""
+    scale = math.pi / 180 * geofence.EARTH_RADIUS
+    lat0, lon0 = float(coord['latitude']), float(coord['longitude'])
+    north = (latitudes - lat0) * scale
+    east = (longitudes - lon0) * scale * math.cos(math.radians(lat0))
+    return north, east
+
+
+def _punch_locations(conn, start, end):
+    """{day: (accepted [(lat, lon)], rejected [(lat, lon)])} for days in [start, end)
+
+    Accepted points are every check-in and check-out of every work session,
+    so days with several sessions count all their punches.
+    """
+    days = {}
+    rows = conn.execute('''
+        SELECT work_date, latitude_in, longitude_in, latitude_out, longitude_out FROM work_sessions
+        WHERE work_date >= ? AND work_date < ?
+    ''', (start.isoformat(), end.isoformat())).fetchall()
+    for row in rows:
+        accepted = days.setdefault(str(row['work_date'])[:10], ([], []))[0]
+        if row['latitude_in'] is not None and row['longitude_in'] is not None:
+            accepted.append((row['latitude_in'], row['longitude_in']))
+        if row['latitude_out'] is not None and row['longitude_out'] is not None:
+            accepted.append((row['latitude_out'], row['longitude_out']))
+
+    rows = conn.execute('''
+        SELECT created_at, latitude, longitude FROM attendance_logs
+        WHERE success = FALSE AND message = ? AND created_at >= ? AND created_at < ?
+          AND latitude IS NOT NULL AND longitude IS NOT NULL
+    ''', (REJECTED_MESSAGE, start.isoformat(), end.isoformat())).fetchall()
+    for row in rows:
+        days.setdefault(str(row['created_at'])[:10], ([], []))[1].append((row['latitude'], row['longitude']))
+    return days
+
+
+def _histograms(fences, accepted, rejected):
+    """Per-fence histograms of one day's punches, each punch counted at its nearest fence center"""
+    stats = [{'accepted': 0, 'rejected': 0, 'far': 0,
+              'accepted_distances': np.zeros(DISTANCE_BINS, dtype=np.int64),
+              'rejected_distances': np.zeros(DISTANCE_BINS, dtype=np.int64),
+              'cells': {}} for _ in range(len(fences))]
+    cells_per_side = 2 * GRID_EXTENT // CELL_SIZE
+    for kind, points in (('accepted', accepted), ('rejected', rejected)):
+        if not points or not len(fences):
+            continue
+        points = np.asarray(points, dtype=float)
+        distances = fences.distances(points[:, 0], points[:, 1])
+        nearest = distances.argmin(axis=1)
+        nearest_distance = distances[np.arange(len(points)), nearest]
+        for index, coord in enumerate(fences.coordinates):
+            mine = nearest == index
+            close = mine & (nearest_distance < MAX_DISTANCE)
+            stats[index][kind] += int(close.sum())
+            stats[index]['far'] += int((mine & ~close).sum())
+            bins = (nearest_distance[close] // DISTANCE_BIN).astype(np.int64)
+            stats[index][f'{kind}_distances'] += np.bincount(bins, minlength=DISTANCE_BINS)[:DISTANCE_BINS]
+
+            north, east = offsets(points[close, 0], points[close, 1], coord)
+            grid, _, _ = np.histogram2d(north, east, bins=cells_per_side,
+                                        range=[[-GRID_EXTENT, GRID_EXTENT], [-GRID_EXTENT, GRID_EXTENT]])
+            cells = stats[index]['cells']
+            for row, col in zip(*np.nonzero(grid)):
+                cell = cells.setdefault(f'{row},{col}', [0, 0])
+                cell[0 if kind == 'accepted' else 1] += int(grid[row, col])
+    return stats
+
+
+def refresh_days(conn, fences, days):
+    """Recompute and store the histograms of the given days"""
+    if not days:
+        return
+    start, end = min(days), max(days) + timedelta(days=1)
+    locations = _punch_locations(conn, start, end)
+    computed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = []
+    for day in days:
+        accepted, rejected = locations.get(day.isoformat(), ([], []))
+        for coord, stats in zip(fences.coordinates, _histograms(fences, accepted, rejected)):
+            rows.append((day.isoformat(), coord['id'], fence_center(coord), stats['accepted'], stats['rejected'],
+                         stats['far'], json.dumps(stats['accepted_distances'].tolist()),
+                         json.dumps(stats['rejected_distances'].tolist()), json.dumps(stats['cells']),
+                         computed_at))
+    placeholders = ', '.join('?' * len(days))
+    conn.execute(f'DELETE FROM geofence_daily_stats WHERE day IN ({placeholders})',
+                 [day.isoformat() for day in days])
+    conn.executemany('''
+        INSERT INTO geofence_daily_stats (day, coordinate_id, center, accepted, rejected, far,
+                                          accepted_distances, rejected_distances, cells, computed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+
+def stale_days(conn, fences, start, end):
+    """Days in [start, end) without complete stats for the current fences
+
+    A day is complete once it was computed after it ended, for every active
+    fence at its current center; radius changes need no recompute.
+    """
+    expected = {(coord['id'], fence_center(coord)) for coord in fences.coordinates}
+    stored = {}
+    rows = conn.execute('''
+        SELECT day, coordinate_id, center, computed_at FROM geofence_daily_stats WHERE day >= ? AND day < ?
+    ''', (start.isoformat(), end.isoformat())).fetchall()
+    for row in rows:
+        day = str(row['day'])[:10]
+        final = str(row['computed_at'])[:10] > day
+        stored.setdefault(day, set()).add((row['coordinate_id'], row['center']) if final else None)
+
+    days = []
+    day = start
+    while day < end:
+        if not expected <= stored.get(day.isoformat(), set()):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _percentile(counts, fraction):
+    """Upper edge (meters) of the distance bin holding the given fraction of punches"""
+    total = counts.sum()
+    if not total:
+        return None
+    index = int(np.searchsorted(np.cumsum(counts), fraction * total))
+    return (index + 1) * DISTANCE_BIN
+
+
+def _round_up(meters, step=10):
+    return int(math.ceil(meters / step) * step)
+
+
+def suggest_radius(radius, accepted_distances, rejected_distances):
+    """(suggested radius, reason) from the distance histograms and the current radius"""
+    near_limit = min(int((radius + NEAR_MISS_MARGIN) // DISTANCE_BIN) + 1, DISTANCE_BINS)
+    near_misses = np.zeros(DISTANCE_BINS, dtype=np.int64)
+    near_misses[:near_limit] = rejected_distances[:near_limit]
+    accepted = int(accepted_distances.sum())
+    near_miss_count = int(near_misses.sum())
+    if accepted + near_miss_count < MIN_SAMPLES:
+        return None, 'Data belum cukup untuk saran radius'
+
+    if near_miss_count / (accepted + near_miss_count) > NEAR_MISS_TARGET:
+        # Cover 95% of genuine attempts, never more than the near-miss band
+        p95 = _percentile(accepted_distances + near_misses, 0.95)
+        suggested = min(_round_up(max(p95, radius)), _round_up(radius + NEAR_MISS_MARGIN), MAX_RADIUS)
+        return suggested, 'Banyak absen ditolak tepat di luar radius, pertimbangkan memperbesar radius'
+
+    p99 = _percentile(accepted_distances, 0.99)
+    if p99 is not None and p99 < radius * 0.6:
+        return max(_round_up(p99 * 1.25), 30), 'Hampir semua absen jauh di dalam radius, radius bisa diperkecil'
+    return int(radius), 'Radius sudah sesuai'
+
+
+def fence_report(coord, rows):
+    """Aggregate one fence's daily rows into rates, percentiles, suggestion and heatmap cells"""
+    accepted_distances = np.zeros(DISTANCE_BINS, dtype=np.int64)
+    rejected_distances = np.zeros(DISTANCE_BINS, dtype=np.int64)
+    cells = {}
+    accepted = rejected = far = 0
+    for row in rows:
+        accepted += row['accepted']
+        rejected += row['rejected']
+        far += row['far']
+        accepted_distances += np.asarray(json.loads(row['accepted_distances']), dtype=np.int64)
+        rejected_distances += np.asarray(json.loads(row['rejected_distances']), dtype=np.int64)
+        for key, (accepted_count, rejected_count) in json.loads(row['cells']).items():
+            cell = cells.setdefault(key, [0, 0])
+            cell[0] += accepted_count
+            cell[1] += rejected_count
+
+    radius = float(coord['radius'])
+    near_limit = min(int((radius + NEAR_MISS_MARGIN) // DISTANCE_BIN) + 1, DISTANCE_BINS)
+    near_misses = int(rejected_distances[:near_limit].sum())
+    suggested, reason = suggest_radius(radius, accepted_distances, rejected_distances)
+
+    # Cell indices back to the latitude/longitude of their centers
+    lat0, lon0 = float(coord['latitude']), float(coord['longitude'])
+    scale = math.pi / 180 * geofence.EARTH_RADIUS
+    heatmap = []
+    for key, (accepted_count, rejected_count) in cells.items():
+        row, col = (int(part) for part in key.split(','))
+        north = -GRID_EXTENT + (row + 0.5) * CELL_SIZE
+        east = -GRID_EXTENT + (col + 0.5) * CELL_SIZE
+        heatmap.append([round(lat0 + north / scale, 7),
+                        round(lon0 + east / (scale * math.cos(math.radians(lat0))), 7),
+                        accepted_count, rejected_count])
+
+    return {
+        'id': coord['id'],
+        'name': coord['name'],
+        'radius': coord['radius'],
+        'accepted': accepted,
+        'rejected': rejected,
+        'near_misses': near_misses,
+        'near_miss_rate': round(near_misses / (accepted + near_misses), 4) if accepted + near_misses else 0.0,
+        'far': far,
+        'distance_p50': _percentile(accepted_distances, 0.5),
+        'distance_p95': _percentile(accepted_distances, 0.95),
+        'distance_p99': _percentile(accepted_distances, 0.99),
+        'suggested_radius': suggested,
+        'suggestion': reason,
+        'heatmap': heatmap,
+    }
+
+
+def geofence_report(conn, fences, days=DEFAULT_DAYS, today=None):
+    """Analytics for the last `days` days up to today, computing only days not stored yet"""
+    today = today or date.today()
+    start, end = today - timedelta(days=days - 1), today + timedelta(days=1)
+    missing = stale_days(conn, fences, start, end)
+    refresh_days(conn, fences, missing)
+
+    rows = conn.execute('SELECT * FROM geofence_daily_stats WHERE day >= ? AND day < ?',
+                        (start.isoformat(), end.isoformat())).fetchall()
+    by_fence = {}
+    for row in rows:
+        by_fence.setdefault(row['coordinate_id'], []).append(row)
+    return {
+        'start': start.isoformat(),
+        'end': today.isoformat(),
+        'days_computed': len(missing),
+        'cell_size': CELL_SIZE,
+        'near_miss_margin': NEAR_MISS_MARGIN,
+        'fences': [fence_report(coord, by_fence.get(coord['id'], [])) for coord in fences.coordinates],
+    }
@@ -0,0 +1,336 @@
+"""
+Geofence routes module untuk sistem absensi
+Geofence JSON asset and the admin pages for attendance coordinates
+"""
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+
+import geofence
+from app_helpers import get_geofence_asset, login_required
+from geofence_analytics import DEFAULT_DAYS, MAX_DAYS, geofence_report
+from cache import get_cache
+from compression import choose_encoding
+from db import get_db_connection
+
+
+bp = Blueprint('geofence', __name__)
+
+
+@bp.route('/api/geofences.json')
+@login_required
+def api_geofences():
+    """Active geofences as a versioned JSON asset (id, name, lat, lon, radius)"""
+    asset = get_geofence_asset()
+    
+    if request.if_none_match.contains(asset['version']):
+        response = current_app.response_class(status=304)
+    else:
+        # Precompressed variants, so the compression hook leaves this alone
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding and encoding not in asset:
+            # Asset was built by a worker without brotli
+            encoding = 'gzip' if request.accept_encodings['gzip'] else None
+        response = current_app.response_class(asset[encoding or 'identity'], mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(asset['version'])
+    response.vary.add('Accept-Encoding')
+    if request.args.get('v') == asset['version']:
+        # Versioned URL: content never changes, a new version gets a new URL
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@bp.route('/add_coordinate', methods=['POST'])
+@login_required
+def add_coordinate():
+    """Add new coordinate"""
+    if session.get('username') != 'admin':
+        flash('Access denied. Admin only.', 'error')
+        return redirect(url_for('main.index'))
+    
+    try:
+        name = request.form['name']
+        latitude = float(request.form['latitude'])
+        longitude = float(request.form['longitude'])
+        radius = int(request.form.get('radius', 100))
+        
+        conn = get_db_connection()
+        conn.execute(
+            'INSERT INTO coordinates (name, latitude, longitude, radius, active) VALUES (?, ?, ?, ?, TRUE)',
+            (name, latitude, longitude, radius)
+        )
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('coordinates')
+        
+        flash('Koordinat berhasil ditambahkan!', 'success')
+    except Exception as e:
+        flash(f'Error: {str(e)}', 'error')
+    
+    return redirect(url_for('geofence.set_coordinat'))
+
+
+@bp.route('/delete_coordinate', methods=['POST'])
+@login_required
+def delete_coordinate():
+    """Delete coordinate with enhanced error handling"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        coordinate_id = request.form.get('id')
+        print(f"ðŸ” DEBUG: Attempting to delete coordinate ID: {coordinate_id}")
+        
+        if not coordinate_id:
+            return jsonify({'success': False, 'message': 'ID koordinat tidak ditemukan'}), 400
+        
+        try:
+            coordinate_id = int(coordinate_id)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'ID koordinat tidak valid'}), 400
+            
+        conn = get_db_connection()
+        
+        # Check if coordinate exists
+        coordinate = conn.execute('SELECT * FROM coordinates WHERE id = ?', (coordinate_id,)).fetchone()
+        if not coordinate:
+            conn.close()
+            return jsonify({'success': False, 'message': 'Koordinat tidak ditemukan'}), 404
+        
+        coordinate_name = coordinate['name']
+        print(f"âœ… DEBUG: Found coordinate: {coordinate_name}")
+        
+        # Delete the coordinate with explicit transaction
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Perform deletion
+            cursor = conn.execute('DELETE FROM coordinates WHERE id = ?', (coordinate_id,))
+            deleted_rows = cursor.rowcount
+            
+            if deleted_rows > 0:
+                # Force commit
+                conn.commit()
+                get_cache().invalidate('coordinates')
+                print(f"ðŸ’¾ DEBUG: Successfully deleted {deleted_rows} row(s)")
+                
+                # Double-check deletion was successful
+                check = conn.execute('SELECT COUNT(*) as count FROM coordinates WHERE id = ?', (coordinate_id,)).fetchone()
+                
+                if check['count'] == 0:
+                    conn.close()
+                    return jsonify({
+                        'success': True,
+                        'message': f'Koordinat "{coordinate_name}" berhasil dihapus!',
+                        'deleted_id': coordinate_id,
+                        'reload_required': True
+                    })
+                else:
+                    conn.rollback()
+                    conn.close()
+                    return jsonify({'success': False, 'message': 'Gagal menghapus - data masih ada'}), 500
+            else:
+                conn.rollback()
+                conn.close()
+                return jsonify({'success': False, 'message': 'Tidak ada data yang dihapus'}), 500
+                
+        except Exception as transaction_error:
+            conn.rollback()
+            conn.close()
+            print(f"ðŸ’¥ DEBUG: Transaction error: {str(transaction_error)}")
+            raise transaction_error
+            
+    except Exception as e:
+        print(f"ðŸ’¥ DEBUG: Exception occurred: {str(e)}")
+        print(f"ðŸ“‹ DEBUG: Exception type: {type(e).__name__}")
+        import traceback
+        print(f"ðŸ”¥ DEBUG: Traceback: {traceback.format_exc()}")
+        
+        if 'conn' in locals():
+            try:
+                conn.rollback()
+                conn.close()
+            except:
+                pass
+                
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+# Tambahkan juga route untuk refresh data koordinat
+@bp.route('/api/coordinates/list', methods=['GET'])
+@login_required
+def api_coordinates_list():
+    """API to get fresh coordinates list"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    try:
+        conn = get_db_connection()
+        coordinates = conn.execute('SELECT * FROM coordinates ORDER BY id DESC').fetchall()
+        conn.close()
+        
+        # Convert to list of dicts
+        coordinates_list = [dict(coord) for coord in coordinates]
+        
+        return jsonify({
+            'success': True,
+            'coordinates': coordinates_list,
+            'count': len(coordinates_list)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/coordinates/analytics', methods=['GET'])
+@login_required
+def api_coordinates_analytics():
+    """Punch heatmap, near-miss rate and radius suggestion per active fence (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    days = request.args.get('days', DEFAULT_DAYS, type=int)
+    if not 1 <= days <= MAX_DAYS:
+        return jsonify({'success': False, 'message': f'days harus antara 1 dan {MAX_DAYS}'}), 400
+    
+    try:
+        conn = get_db_connection()
+        try:
+            report = geofence_report(conn, geofence.get_fences(), days)
+        finally:
+            conn.close()
+        return jsonify(dict(report, success=True))
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+# Update route set_coordinat untuk force refresh
+@bp.route('/set_coordinat')
+@login_required
+def set_coordinat():
+    """Coordinate settings page (admin only)"""
+    if session.get('username') != 'admin':
+        flash('Access denied. Admin only.', 'error')
+        return redirect(url_for('main.index'))
+    
+    # Force fresh data from database
+    conn = get_db_connection()
+    try:
+        # Use fresh connection and explicit query
+        coordinates_raw = conn.execute('SELECT * FROM coordinates ORDER BY id DESC').fetchall()
+        # Convert Row objects to dict for JSON serialization
+        coordinates = []
+        for row in coordinates_raw:
+            coord_dict = {
+                'id': row['id'],
+                'name': row['name'],
+                'latitude': row['latitude'],
+                'longitude': row['longitude'],
+                'radius': row['radius'],
+                'active': row['active']
+            }
+            coordinates.append(coord_dict)
+            
+        print(f"ðŸ” DEBUG: Loaded {len(coordinates)} coordinates from database")
+        
+    except Exception as e:
+        print(f"ðŸ’¥ DEBUG: Error loading coordinates: {e}")
+        coordinates = []
+    finally:
+        conn.close()
+    
+    return render_template('set_coordinat.html', coordinates=coordinates)
+
+
+@bp.route('/toggle_coordinate_status', methods=['POST'])
+@login_required
+def toggle_coordinate_status():
+    """Toggle coordinate active status"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        coordinate_id = request.form.get('id')
+        
+        if not coordinate_id:
+            return jsonify({'success': False, 'message': 'ID koordinat tidak ditemukan'}), 400
+        
+        conn = get_db_connection()
+        
+        # Get current status
+        coordinate = conn.execute('SELECT * FROM coordinates WHERE id = ?', (coordinate_id,)).fetchone()
+        if not coordinate:
+            conn.close()
+            return jsonify({'success': False, 'message': 'Koordinat tidak ditemukan'}), 404
+        
+        # Toggle status
+        new_status = not coordinate['active']
+        conn.execute('UPDATE coordinates SET active = ? WHERE id = ?', (new_status, coordinate_id))
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('coordinates')
+        
+        status_text = 'diaktifkan' if new_status else 'dinonaktifkan'
+        
+        return jsonify({
+            'success': True,
+            'message': f'Koordinat "{coordinate["name"]}" berhasil {status_text}!',
+            'new_status': new_status
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/update_coordinate', methods=['POST'])
+@login_required
+def update_coordinate():
+    """Update coordinate"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        coordinate_id = request.form.get('id')
+        name = request.form.get('name')
+        latitude = float(request.form.get('latitude'))
+        longitude = float(request.form.get('longitude'))
+        radius = int(request.form.get('radius', 100))
+        
+        if not all([coordinate_id, name]):
+            return jsonify({'success': False, 'message': 'Data tidak lengkap'}), 400
+        
+        conn = get_db_connection()
+        
+        # Check if coordinate exists
+        coordinate = conn.execute('SELECT * FROM coordinates WHERE id = ?', (coordinate_id,)).fetchone()
+        if not coordinate:
+            conn.close()
+            return jsonify({'success': False, 'message': 'Koordinat tidak ditemukan'}), 404
+        
+        # Update coordinate
+        conn.execute(
+            '''UPDATE coordinates 
+               SET name = ?, latitude = ?, longitude = ?, radius = ?
+               WHERE id = ?''',
+            (name, latitude, longitude, radius, coordinate_id)
+        )
+        
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('coordinates')
+        
+        return jsonify({
+            'success': True,
+            'message': f'Koordinat "{name}" berhasil diperbarui!'
+        })
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': 'Format data tidak valid'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
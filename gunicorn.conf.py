@@ -0,0 +1,83 @@
+"""
+Gunicorn configuration untuk sistem absensi
+Optional app preloading so workers share heavy libraries copy-on-write
+"""
+
+import gc
+import os
+import time
+
+
+# 'gevent' lets one worker hold many slow uploads at once; use it for the
+# APP_PROFILE=punch pool. Face encoding then runs on an OS thread pool
+# (FACE_EXECUTOR_WORKERS), SQLite calls and journal fsyncs on a second one
+# (IO_EXECUTOR_WORKERS), and psycopg2 is patched to yield (cooperative.py).
+# Database and cache connections are pooled per worker, shared by all greenlets.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# GUNICORN_PRELOAD=1 imports the app once in the master and forks workers from it
+preload_app = os.environ.get('GUNICORN_PRELOAD', '').lower() in ('1', 'true', 'yes')
+if preload_app and worker_class == 'gevent':
+    # Locks created before gevent patches the worker would block the event loop
+    print("GUNICORN_PRELOAD ignored for gevent workers")
+    preload_app = False
+
+# Libraries imported in the master before forking when preloading, by default
+# the APP_PROFILE's list in app.PROFILES; face_recognition pulls in dlib and its
+# model files, which then stay shared between workers
+PRELOAD_MODULES = os.environ.get('PRELOAD_MODULES', '')
+
+_master_started = time.perf_counter()
+
+# Cache used when several workers run and CACHE_URL is not set
+MULTI_WORKER_CACHE_URL = 'sqlite:///cache.db'
+
+
+def on_starting(server):
+    # Idempotency locks, pending punches, session revocations and
+    # read-your-writes markers live in the cache; with a per-process memory
+    # cache the other workers never see them
+    if server.cfg.workers <= 1:
+        return
+    cache_url = os.environ.get('CACHE_URL')
+    if not cache_url:
+        os.environ['CACHE_URL'] = MULTI_WORKER_CACHE_URL
+        print(f"{server.cfg.workers} workers without CACHE_URL: using {MULTI_WORKER_CACHE_URL}")
+    elif cache_url.startswith('memory:'):
+        print(f"WARNING: CACHE_URL={cache_url} is private to each of the {server.cfg.workers} workers; "
+              "duplicate punches and revoked sessions are not seen across workers. "
+              "Use sqlite:///cache.db or redis://")
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import lazy_imports
+    from app import get_profile
+
+    names = PRELOAD_MODULES.split(',') if PRELOAD_MODULES else get_profile()['preload']
+    with lazy_imports.timed('preload modules'):
+        lazy_imports.preload(names)
+    # Keep the garbage collector from touching (and so copying) the master's
+    # objects in every worker
+    gc.freeze()
+    lazy_imports.record('master ready', time.perf_counter() - _master_started)
+    lazy_imports.report_startup('Gunicorn master')
+
+
+def post_fork(server, worker):
+    # The DB pool, punch journal and cache clients notice the new pid and
+    # open their own connections on first use
+    worker._absensi_forked = time.perf_counter()
+
+
+def post_worker_init(worker):
+    import cooperative
+
+    if cooperative.patch_database_driver():
+        print(f"Worker {worker.pid}: psycopg2 patched for gevent")
+    started = getattr(worker, '_absensi_forked', None)
+    if started is not None:
+        print(f"Worker {worker.pid} ready in {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({worker_class}, {'preloaded' if preload_app else 'app imported in worker'})")
@@ -2,11 +2,11 @@ import sqlite3
 import os
 from werkzeug.security import generate_password_hash
 
-def init_database():
+def init_database(db_path='database.db'):
     """Initialize database with tables and admin user"""
     
     # Create database connection
-    conn = sqlite3.connect('database.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     print("Creating database tables...")
@@ -57,6 +57,7 @@ def init_database():
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_user_date ON attendance (user_id, date)')
     
     # Create attendance_logs table
     cursor.execute('''
@@ -86,6 +87,29 @@ def init_database():
         )
     ''')
     
+    # Create sessions table (server-side sessions, see session_store.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            data TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_seen REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id)')
+
+    # Create applied_punches table (idempotency keys of journaled punches, see punch_journal.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS applied_punches (
+            idempotency_key TEXT PRIMARY KEY,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
     # Create default admin user
     admin_password = generate_password_hash('hjtq2$ut%y@7')
     cursor.execute('''
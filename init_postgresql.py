@@ -99,10 +99,34 @@ def init_postgresql_database():
                 latitude DECIMAL(10, 8),
                 longitude DECIMAL(11, 8),
                 success BOOLEAN DEFAULT TRUE,
+                message TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Create sessions table (server-side sessions, see session_store.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                id VARCHAR(64) PRIMARY KEY,
+                user_id INTEGER,
+                data TEXT NOT NULL,
+                created_at DOUBLE PRECISION NOT NULL,
+                last_seen DOUBLE PRECISION NOT NULL,
+                expires_at DOUBLE PRECISION NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)')
+        
+        # Create applied_punches table (idempotency keys of journaled punches, see punch_journal.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS applied_punches (
+                idempotency_key VARCHAR(64) PRIMARY KEY,
+                user_id INTEGER,
+                action VARCHAR(20) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # Create indexes for better performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_user_date ON attendance(user_id, date)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_face_data_user ON face_data(user_id, active)')
@@ -0,0 +1,101 @@
+"""
+Lazy imports module untuk sistem absensi
+Deferred loading of heavy libraries and startup timing per component
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+
+
+# component -> seconds spent loading it, in the order they happened
+STARTUP_TIMINGS = {}
+
+_modules = {}
+_import_lock = threading.RLock()
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    elapsed = time.perf_counter() - started
+                    record(f'import {self._name}', elapsed)
+                    print(f"Loaded {self._name} in {elapsed * 1000:.0f} ms")
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy(name):
+    """Shared proxy for a module; `np = lazy('numpy')` costs nothing until np is used"""
+    with _import_lock:
+        if name not in _modules:
+            _modules[name] = LazyModule(name)
+        return _modules[name]
+
+
+def available(*names):
+    """True if every module is installed, checked without importing it"""
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except (ImportError, ValueError):
+            return False
+    return True
+
+
+def preload(names):
+    """Import modules now, e.g. in the gunicorn master before workers fork"""
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if not available(name.split('.')[0]):
+            print(f"Preload skipped, {name} is not installed")
+            continue
+        try:
+            lazy(name).load()
+        except Exception as e:
+            print(f"Preload of {name} failed: {str(e)}")
+
+
+def record(component, seconds):
+    STARTUP_TIMINGS[component] = STARTUP_TIMINGS.get(component, 0) + seconds
+
+
+@contextmanager
+def timed(component):
+    """Record how long a startup step takes"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(component, time.perf_counter() - started)
+
+
+def report_startup(title='Startup'):
+    lines = [f"  {component:<28} {seconds * 1000:>8.1f} ms" for component, seconds in STARTUP_TIMINGS.items()]
+    print(f"{title} timings:\n" + '\n'.join(lines))
@@ -0,0 +1,176 @@
+"""
+Liveness module untuk sistem absensi
+Perceptual hashes of punch photos to reject replays before face encoding, and optional challenge frames
+"""
+
+import os
+import time
+
+from PIL import Image
+
+from cache import get_cache
+from cooperative import run_blocking
+from lazy_imports import available, lazy
+
+np = lazy('numpy')
+face_recognition = lazy('face_recognition')
+
+
+# Opt-in, and only for face-verified users: a fixed kiosk or webcam photographs
+# the same background every day, so genuine punches can hash close together
+REPLAY_CHECK = os.environ.get('REPLAY_CHECK', '').lower() in ('1', 'true', 'yes')
+# Differing bits (of 64) up to which a photo counts as a copy of an earlier one;
+# re-encoded and resized copies stay within 0-2 bits, the same person shot
+# again at the same spot usually lands at 4 or more
+REPLAY_MAX_DISTANCE = int(os.environ.get('REPLAY_MAX_DISTANCE', 2))
+REPLAY_WINDOW_DAYS = int(os.environ.get('REPLAY_WINDOW_DAYS', 30))
+# Hashes kept per user; two punches a day fill a month
+REPLAY_MAX_HASHES = int(os.environ.get('REPLAY_MAX_HASHES', 60))
+
+# '' (off), 'motion' or 'blink': face-verified users also send a short burst of
+# frames that must show movement (and for 'blink', eyes closing and opening)
+LIVENESS_CHALLENGE = os.environ.get('LIVENESS_CHALLENGE', '').lower()
+CHALLENGE_FRAMES = int(os.environ.get('CHALLENGE_FRAMES', 4))
+CHALLENGE_INTERVAL_MS = 250
+CHALLENGE_MAX_DIMENSION = 320
+# Mean grey-level change between consecutive 32x32 frames; a replayed still stays near 0
+MOTION_MIN_DIFF = float(os.environ.get('MOTION_MIN_DIFF', 1.5))
+# Frames must show the same scene as the punch photo
+CHALLENGE_MAX_DISTANCE = 20
+# Eye aspect ratio below which an eye counts as closed, and above which as open
+EYE_CLOSED_RATIO = 0.2
+EYE_OPEN_RATIO = 0.25
+
+
+def grey_thumbnail(source, size):
+    """Greyscale pixels of a photo (path or file object) scaled to size=(width, height)"""
+    with Image.open(source) as image:
+        # JPEG decodes straight to a reduced scale, far cheaper than a full decode
+        image.draft('L', (size[0] * 8, size[1] * 8))
+        return np.asarray(image.convert('L').resize(size, Image.BILINEAR), dtype=np.int16)
+
+
+def photo_hash(source):
+    """64-bit difference hash: one bit per horizontally adjacent pixel pair of a 9x8 thumbnail"""
+    pixels = grey_thumbnail(source, (9, 8))
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hash_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def recent_hashes(user_id):
+    """[(hash, punched_at)] of the user's accepted punch photos inside the window"""
+    cutoff = time.time() - REPLAY_WINDOW_DAYS * 86400
+    entries = get_cache().get_ns('photo_hashes', user_id) or []
+    return [(value, at) for value, at in entries if at >= cutoff]
+
+
+def remember_photo(user_id, value):
+    """Add an accepted punch photo to the user's recent-hash index"""
+    entries = recent_hashes(user_id) + [(value, time.time())]
+    get_cache().set_ns('photo_hashes', user_id, entries[-REPLAY_MAX_HASHES:], ttl=REPLAY_WINDOW_DAYS * 86400)
+
+
+def find_replay(value, known):
+    """Closest earlier photo within REPLAY_MAX_DISTANCE bits, or None"""
+    matches = [(hash_distance(value, other), at) for other, at in known]
+    matches = [match for match in matches if match[0] <= REPLAY_MAX_DISTANCE]
+    return min(matches) if matches else None
+
+
+def replay_message(user_id, match):
+    distance, at = match
+    print(f"Replay rejected user {user_id}: photo {distance} bits from one used "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(at))}")
+    return 'Foto ini sudah pernah digunakan untuk absen. Ambil foto baru dari kamera.'
+
+
+def eye_aspect_ratio(eye):
+    """Eye height over width from the six dlib eye landmarks; drops sharply in a blink"""
+    eye = np.asarray(eye, dtype=float)
+    height = np.linalg.norm(eye[1] - eye[5]) + np.linalg.norm(eye[2] - eye[4])
+    return height / (2 * np.linalg.norm(eye[0] - eye[3]))
+
+
+def _eye_ratios(frames):
+    ratios = []
+    for frame in frames:
+        frame.seek(0)
+        landmarks = face_recognition.face_landmarks(face_recognition.load_image_file(frame))
+        if len(landmarks) == 1:
+            ratios.append((eye_aspect_ratio(landmarks[0]['left_eye']) +
+                           eye_aspect_ratio(landmarks[0]['right_eye'])) / 2)
+    return ratios
+
+
+def check_challenge(value, frames):
+    """Error message if the challenge frames do not show a live person, else None"""
+    if len(frames) < CHALLENGE_FRAMES:
+        return 'Verifikasi liveness diperlukan, aktifkan kamera dan ulangi absen'
+
+    thumbnails = []
+    for frame in frames:
+        frame.seek(0)
+        if hash_distance(value, photo_hash(frame)) > CHALLENGE_MAX_DISTANCE:
+            return 'Frame liveness tidak sesuai dengan foto absen'
+        frame.seek(0)
+        thumbnails.append(grey_thumbnail(frame, (32, 32)))
+    motion = max(float(np.abs(a - b).mean()) for a, b in zip(thumbnails, thumbnails[1:]))
+    if motion < MOTION_MIN_DIFF:
+        return 'Tidak ada gerakan terdeteksi, gunakan kamera secara langsung'
+
+    if LIVENESS_CHALLENGE == 'blink' and available('face_recognition'):
+        ratios = run_blocking(_eye_ratios, frames)
+        if not ratios or min(ratios) > EYE_CLOSED_RATIO or max(ratios) < EYE_OPEN_RATIO:
+            return 'Kedipan mata tidak terdeteksi, ulangi sambil berkedip'
+    return None
+
+
+def _hash(photo_path):
+    try:
+        return photo_hash(photo_path)
+    except Exception as e:
+        print(f"Warning: could not hash photo {photo_path}: {str(e)}")
+        return None
+
+
+def screen_photo(photo_path, user_id, frames=(), challenge=False):
+    """Cheap checks before face verification; returns (photo hash, error message or None)
+
+    The hash is remembered with remember_photo() only once the punch is
+    accepted, so retries after a failed punch are not taken for replays.
+    """
+    if not REPLAY_CHECK and not challenge:
+        return None, None
+    value = _hash(photo_path)
+    if value is None:
+        return None, None
+
+    if REPLAY_CHECK:
+        match = find_replay(value, recent_hashes(user_id))
+        if match is not None:
+            return value, replay_message(user_id, match)
+    if challenge:
+        return value, check_challenge(value, frames)
+    return value, None
+
+
+def screen_photos(photo_paths, user_id):
+    """Replay check for a batch of photos, also against each other; [(hash, error)] per photo"""
+    if not REPLAY_CHECK:
+        return [(None, None)] * len(photo_paths)
+    known = recent_hashes(user_id)
+    results = []
+    for photo_path in photo_paths:
+        value, error = _hash(photo_path), None
+        if value is not None:
+            match = find_replay(value, known)
+            if match is not None:
+                error = replay_message(user_id, match)
+            else:
+                known.append((value, time.time()))
+        results.append((value, error))
+    return results
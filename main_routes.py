@@ -0,0 +1,396 @@
+"""
+Main routes module untuk sistem absensi
+Login, registration, dashboard and profile pages served by every profile
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, session, url_for
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import attendance_stats
+from app_helpers import allowed_file, get_user_context, invalidate_user_caches, login_required
+from cache import get_cache
+from db import get_db_connection
+from face_verification import FACE_RECOGNITION_AVAILABLE, process_face_registration
+
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/debug/set_admin/admin')
+def set_admin_role(username):
+    """Debug route to set admin role - REMOVE IN PRODUCTION!"""
+    try:
+        conn = get_db_connection()
+        result = conn.execute(
+            'UPDATE users SET role = ? WHERE username = ?',
+            ('admin', username)
+        )
+        conn.commit()
+        
+        if result.rowcount > 0:
+            conn.close()
+            return f"User {username} has been set as admin"
+        else:
+            conn.close()
+            return f"User {username} not found"
+            
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@bp.route('/profil', methods=['GET', 'POST'])
+@login_required
+def profil():
+    """User profile management"""
+    user = get_user_context()
+    
+    if request.method == 'POST':
+        conn = get_db_connection()
+        full_name = request.form['full_name']
+        email = request.form['email']
+        password = request.form['password']
+
+        if password:  # update dengan password
+            hashed_pw = generate_password_hash(password)
+            conn.execute("""
+                UPDATE users SET full_name=?, email=?, password=?, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+            """, (full_name, email, hashed_pw, session['user_id']))
+        else:  # update tanpa password
+            conn.execute("""
+                UPDATE users SET full_name=?, email=?, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+            """, (full_name, email, session['user_id']))
+        
+        # Update session data
+        session['full_name'] = full_name
+        
+        conn.commit()
+        conn.close()
+        invalidate_user_caches(session['user_id'])
+        flash("Profil berhasil diperbarui!", "success")
+        return redirect(url_for('main.profil'))
+
+    # Convert user to dict and parse created_at if it exists
+    user_dict = dict(user) if user else {}
+    if user_dict.get('created_at'):
+        try:
+            # Try to parse the datetime string
+            user_dict['created_at'] = datetime.fromisoformat(user_dict['created_at'].replace('Z', '+00:00'))
+        except:
+            # If parsing fails, set to None
+            user_dict['created_at'] = None
+
+    return render_template('profil.html', 
+                         user=user_dict, 
+                         face_data=user_dict.get('face_enabled', False),
+                         face_recognition_available=FACE_RECOGNITION_AVAILABLE)
+
+
+@bp.route('/logout')
+def logout():
+    """Logout"""
+    session.clear()
+    flash('Anda telah logout.', 'info')
+    return redirect(url_for('main.login'))
+
+
+@bp.app_errorhandler(404)
+def page_not_found(e):
+    return render_template('404.html'), 404
+
+
+@bp.app_errorhandler(500)
+def internal_server_error(e):
+    return render_template('500.html'), 500
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    """User registration page with FLEXIBLE face recognition setup"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        full_name = request.form.get('full_name')
+        email = request.form.get('email', '')
+        password = request.form.get('password')
+        confirm_password = request.form.get('confirm_password')
+        
+        # Basic validation
+        if not all([username, full_name, password, confirm_password]):
+            flash('Semua field wajib harus diisi!', 'error')
+            return render_template('register.html')
+        
+        if len(username) < 3:
+            flash('Username minimal 3 karakter!', 'error')
+            return render_template('register.html')
+        
+        if len(password) < 6:
+            flash('Password minimal 6 karakter!', 'error')
+            return render_template('register.html')
+        
+        if password != confirm_password:
+            flash('Password dan konfirmasi password tidak cocok!', 'error')
+            return render_template('register.html')
+        
+        # Check password strength
+        if not any(c.isalpha() for c in password) or not any(c.isdigit() for c in password):
+            flash('Password harus mengandung huruf dan angka!', 'error')
+            return render_template('register.html')
+        
+        # TEMPORARY: Make face image optional for testing
+        face_file = None
+        face_required = False  # Set to True when ready to enforce
+        
+        print(f"DEBUG: Received files: {list(request.files.keys())}")
+        
+        if 'face_image' in request.files and request.files['face_image'].filename != '':
+            face_file = request.files['face_image']
+            print(f"DEBUG: Face file received: {face_file.filename}, size: {face_file.content_length}")
+            
+            if not allowed_file(face_file.filename):
+                flash('Format file foto tidak valid! Gunakan JPG, PNG, atau JPEG.', 'error')
+                return render_template('register.html')
+        elif face_required:
+            flash('Foto wajah WAJIB diupload untuk registrasi!', 'error')
+            return render_template('register.html')
+        else:
+            print("DEBUG: No face file provided, but not required")
+        
+        conn = get_db_connection()
+        
+        # Check if username exists
+        existing_user = conn.execute(
+            'SELECT id FROM users WHERE username = ?', (username,)
+        ).fetchone()
+        
+        if existing_user:
+            conn.close()
+            flash('Username sudah digunakan!', 'error')
+            return render_template('register.html')
+        
+        try:
+            # Hash password
+            hashed_password = generate_password_hash(password)
+            
+            # Insert new user
+            cursor = conn.execute('''
+                INSERT INTO users (username, full_name, email, password, role, active)
+                VALUES (?, ?, ?, ?, 'user', TRUE)
+            ''', (username, full_name, email, hashed_password))
+            
+            user_id = cursor.lastrowid
+            conn.commit()
+            invalidate_user_caches(user_id)
+            
+            print(f"DEBUG: User created with ID: {user_id}")
+            
+            # Process face image if provided
+            face_message = ""
+            if face_file:
+                print("DEBUG: Processing face file...")
+                face_setup_success, face_message = process_face_registration(face_file, user_id, full_name)
+                
+                if face_setup_success:
+                    face_message = f"Registrasi berhasil! {face_message}"
+                else:
+                    # Log the error but don't fail registration
+                    print(f"DEBUG: Face processing failed: {face_message}")
+                    face_message = "Registrasi berhasil! (Face recognition setup gagal, bisa disetup nanti)"
+            else:
+                face_message = "Registrasi berhasil! Face recognition dapat disetup nanti di profil."
+            
+            conn.close()
+            
+            print(f"DEBUG: Registration successful: {face_message}")
+            
+            # Success message
+            flash(face_message, 'success')
+            return redirect(url_for('main.login'))
+            
+        except Exception as e:
+            print(f"DEBUG: Registration error: {str(e)}")
+            # Cleanup on error
+            try:
+                if 'user_id' in locals():
+                    conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
+                    conn.commit()
+            except:
+                pass
+            conn.close()
+            flash(f'Error saat registrasi: {str(e)}', 'error')
+            return render_template('register.html')
+    
+    return render_template('register.html')
+
+
+@bp.route('/debug/test_registration')
+def debug_test_registration():
+    """Debug route to test registration without frontend"""
+    return '''
+    <form action="/register" method="post" enctype="multipart/form-data">
+        Username: <input type="text" name="username" value="testuser"><br>
+        Full Name: <input type="text" name="full_name" value="Test User"><br>
+        Email: <input type="email" name="email" value="test@test.com"><br>
+        Password: <input type="password" name="password" value="test123"><br>
+        Confirm Password: <input type="password" name="confirm_password" value="test123"><br>
+        Face Image: <input type="file" name="face_image"><br>
+        <input type="submit" value="Register">
+    </form>
+    '''
+
+
+# API untuk check username availability
+@bp.route('/api/check_username', methods=['POST'])
+def api_check_username():
+    """API to check username availability"""
+    try:
+        data = request.get_json()
+        username = data.get('username', '').strip()
+        
+        if not username:
+            return jsonify({'available': False, 'message': 'Username tidak boleh kosong'})
+        
+        if len(username) < 3:
+            return jsonify({'available': False, 'message': 'Username minimal 3 karakter'})
+        
+        conn = get_db_connection()
+        existing = conn.execute(
+            'SELECT id FROM users WHERE username = ?', (username,)
+        ).fetchone()
+        conn.close()
+        
+        if existing:
+            return jsonify({'available': False, 'message': 'Username sudah digunakan'})
+        else:
+            return jsonify({'available': True, 'message': 'Username tersedia'})
+    
+    except Exception as e:
+        return jsonify({'available': False, 'message': 'Error checking username'})
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    """Login page with flexible face data requirements"""
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        conn = get_db_connection()
+        user = conn.execute(
+            'SELECT * FROM users WHERE username = ? AND active = TRUE', (username,)
+        ).fetchone()
+        
+        if user and check_password_hash(user['password'], password):
+            # ADMIN EXCEPTION: Admin users don't need face data
+            if user['role'] == 'admin':
+                # Clear any existing session first
+                session.clear()
+                
+                # Set session data for admin
+                session['user_id'] = user['id']
+                session['username'] = user['username']
+                session['full_name'] = user['full_name']
+                session['role'] = user['role']
+                
+                conn.close()
+                flash('Login admin berhasil!', 'success')
+                return redirect(url_for('main.index'))
+            
+            # For non-admin users, check face data but allow login
+            face_data = conn.execute(
+                'SELECT COUNT(*) as count FROM face_data WHERE user_id = ? AND active = TRUE',
+                (user['id'],)
+            ).fetchone()
+            
+            # Clear any existing session first
+            session.clear()
+            
+            # Set new session data
+            session['user_id'] = user['id']
+            session['username'] = user['username']
+            session['full_name'] = user['full_name']
+            session['role'] = user['role'] if 'role' in user.keys() else 'user'
+            
+            # Set face status in session for later use
+            session['has_face_data'] = face_data['count'] > 0
+            
+            conn.close()
+            
+            # Prime the user context cache with what login already loaded
+            user_context = {key: user[key] for key in user.keys() if key != 'password'}
+            user_context['face_enabled'] = session['has_face_data']
+            get_cache().set_ns('user_context', user['id'], user_context, ttl=30)
+            
+            if face_data['count'] == 0:
+                # Allow login but show warning about face setup
+                flash('Login berhasil! Namun face recognition belum disetup. Silakan setup di menu profil untuk keamanan absensi.', 'warning')
+            else:
+                flash('Login berhasil!', 'success')
+                
+            return redirect(url_for('main.index'))
+        else:
+            conn.close()
+            flash('Username atau password salah, atau akun tidak aktif!', 'error')
+    
+    return render_template('login.html')
+
+
+@bp.route('/api/set_face_reminder', methods=['POST'])
+@login_required
+def api_set_face_reminder():
+    """API to set face recognition reminder for next login"""
+    try:
+
+        return jsonify({
+            'success': True,
+            'message': 'Reminder set for next login'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        })
+
+
+@bp.route('/')
+def index():
+    """Main dashboard page"""
+    if 'user_id' not in session:
+        return redirect(url_for('main.login'))
+    
+    user = get_user_context()
+    if user is None:
+        session.clear()
+        return redirect(url_for('main.login'))
+    
+    conn = get_db_connection()
+    
+    # Open session (may have started yesterday), else today's attendance
+    attendance = attendance_stats.current_state(conn, session['user_id'], datetime.now())
+    
+    # Get attendance statistics
+    stats = conn.execute(
+        '''SELECT 
+           COUNT(*) as total_days,
+           SUM(CASE WHEN time_in IS NOT NULL THEN 1 ELSE 0 END) as present_days
+           FROM attendance WHERE user_id = ?''',
+        (session['user_id'],)
+    ).fetchone()
+    
+    # Face recognition state comes from the cached user context
+    face_enabled = user['face_enabled']
+    
+    # Check if should show face setup reminder
+    show_face_reminder = session.pop('show_face_reminder_on_dashboard', False) and not face_enabled
+    
+    conn.close()
+    
+    return render_template('index.html', 
+                         user=user, 
+                         attendance=attendance, 
+                         stats=stats,
+                         face_enabled=face_enabled,
+                         show_face_reminder=show_face_reminder,
+                         face_recognition_available=FACE_RECOGNITION_AVAILABLE)
@@ -0,0 +1,243 @@
+"""
+Metrics module untuk sistem absensi
+Request latency, hot-path spans and DB query histograms exposed in Prometheus text format
+"""
+
+import os
+import glob
+import json
+import time
+import bisect
+import threading
+
+from flask import g, has_request_context, request, Response
+
+from db import add_query_hook
+
+
+# Off by default; when disabled span() returns a shared no-op and no hooks are installed
+ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+# Directory where gunicorn workers publish their metrics for /metrics to merge
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+DUMP_INTERVAL = 5
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+DISTANCE_BUCKETS = (0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.7)
+
+
+class Histogram:
+    """Thread-safe histogram with fixed buckets, one series per label combination"""
+
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), list(counts), total, count]
+                    for labels, (counts, total, count) in self._series.items()]
+
+
+_registry = []
+
+REQUEST_DURATION = Histogram(
+    'absensi_http_request_duration_seconds', 'Request latency by route', ('method', 'route', 'status'))
+STAGE_DURATION = Histogram(
+    'absensi_stage_duration_seconds', 'Time spent in stages of the punch and face setup paths', ('route', 'stage'))
+QUERY_DURATION = Histogram(
+    'absensi_db_query_duration_seconds', 'Database statement latency by route', ('route',), QUERY_BUCKETS)
+QUERIES_PER_REQUEST = Histogram(
+    'absensi_db_queries_per_request', 'Database statements executed per request', ('route',), COUNT_BUCKETS)
+FACE_DISTANCE = Histogram(
+    'absensi_face_match_distance', 'Distance of attendance photos to the closest enrollment sample', ('result',),
+    DISTANCE_BUCKETS)
+
+
+# -- spans ------------------------------------------------------------------------
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_DURATION.observe(time.perf_counter() - self.started, _route(), self.stage)
+        return False
+
+
+def span(stage):
+    """Time a stage of a hot path: `with metrics.span('encode'): ...`"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+def _route():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+# -- request and query hooks ----------------------------------------------------------
+
+def _record_query(conn, sql, params, seconds, cursor):
+    QUERY_DURATION.observe(seconds, _route())
+    if has_request_context():
+        g._metrics_queries = g.get('_metrics_queries', 0) + 1
+
+
+def init_metrics(app):
+    """Time every request and count its queries, and serve /metrics
+
+    Call before other after_request hooks (compression) so their time is
+    included. Without METRICS_ENABLED nothing is registered except a /metrics
+    route answering 404.
+    """
+    if ENABLED:
+        add_query_hook(_record_query)
+        last_dump = [0.0]
+
+        @app.before_request
+        def start_request_timer():
+            g._metrics_started = time.perf_counter()
+            g._metrics_queries = 0
+
+        @app.after_request
+        def record_request(response):
+            started = g.get('_metrics_started')
+            if started is not None:
+                route = request.endpoint or 'unmatched'
+                REQUEST_DURATION.observe(time.perf_counter() - started,
+                                         request.method, route, str(response.status_code))
+                QUERIES_PER_REQUEST.observe(g.get('_metrics_queries', 0), route)
+            if METRICS_DIR and time.time() - last_dump[0] > DUMP_INTERVAL:
+                last_dump[0] = time.time()
+                dump_worker_metrics()
+            return response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if not ENABLED:
+            return Response('metrics disabled\n', status=404, mimetype='text/plain')
+        if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+            return Response('unauthorized\n', status=401, mimetype='text/plain')
+        return Response(render(collect()), mimetype='text/plain; version=0.0.4')
+
+
+# -- export -----------------------------------------------------------------------
+
+def dump_worker_metrics():
+    """Publish this worker's series so whichever worker serves /metrics can merge them"""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f'metrics-{os.getpid()}.json')
+    data = {histogram.name: histogram.snapshot() for histogram in _registry}
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def collect():
+    """{name: {labels: [counts, sum, count]}} for this worker plus the others in METRICS_DIR"""
+    merged = {histogram.name: {} for histogram in _registry}
+    sources = [{histogram.name: histogram.snapshot() for histogram in _registry}]
+
+    if METRICS_DIR:
+        for path in glob.glob(os.path.join(METRICS_DIR, 'metrics-*.json')):
+            pid = int(os.path.basename(path)[8:-5])
+            if pid == os.getpid():
+                continue
+            if not _pid_alive(pid):
+                # Exited worker; Prometheus treats the drop as a counter reset. Another
+                # worker serving /metrics at the same moment may have removed it already
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    sources.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+    for source in sources:
+        for name, series in source.items():
+            target = merged.setdefault(name, {})
+            for labels, counts, total, count in series:
+                key = tuple(labels)
+                if key not in target:
+                    target[key] = [[0] * len(counts), 0.0, 0]
+                entry = target[key]
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(merged):
+    """Prometheus text exposition format"""
+    lines = []
+    for histogram in _registry:
+        lines.append(f'# HELP {histogram.name} {histogram.help_text}')
+        lines.append(f'# TYPE {histogram.name} histogram')
+        for labels, (counts, total, count) in sorted(merged.get(histogram.name, {}).items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(histogram.labels, labels))
+            prefix = label_text + ',' if label_text else ''
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{histogram.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{histogram.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{histogram.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{histogram.name}_count{{{label_text}}} {count}')
+    return '\n'.join(lines) + '\n'
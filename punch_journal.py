@@ -0,0 +1,388 @@
+"""
+Punch journal module untuk sistem absensi
+Durable write-ahead journal for clock-in/out, applied to the database in the background
+"""
+
+import os
+import glob
+import json
+import time
+import uuid
+import fcntl
+import threading
+from collections import deque
+from datetime import datetime
+
+import attendance_stats
+import work_calendar
+from cache import get_cache
+from cooperative import run_io
+from db import get_db_connection, DatabaseError
+
+
+# First key of the PostgreSQL advisory locks that serialize one user's punches
+PUNCH_LOCK_CLASS = 7301
+
+
+class PunchNotReady(Exception):
+    """Check-out whose check-in has not reached the database yet"""
+
+
+def punch_time(record):
+    """When the punch happened (journals written before timestamps only have date and time)"""
+    stamp = record.get('timestamp') or f"{record['date']} {record['time']}"
+    return datetime.strptime(stamp, attendance_stats.TIMESTAMP_FORMAT)
+
+
+def is_transient(error):
+    """Lock contention and lost connections are worth retrying"""
+    if isinstance(error, PunchNotReady):
+        return True
+    name = type(error).__name__
+    return name in ('OperationalError', 'InterfaceError', 'SerializationFailure', 'DeadlockDetected')
+
+
+def ensure_table(conn):
+    """Create applied_punches, the work session tables and the one-attendance-row-per-day constraint
+
+    Returns False if existing duplicate attendance rows prevent the unique
+    index, in which case check-ins fall back to check-then-insert.
+    """
+    attendance_stats.ensure_schema(conn)
+    work_calendar.ensure_schema(conn)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS applied_punches (
+            idempotency_key TEXT PRIMARY KEY,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    if conn.dialect.name == 'postgresql':
+        # init_postgresql.py declares UNIQUE(user_id, date)
+        return True
+    try:
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_user_date ON attendance (user_id, date)')
+        conn.commit()
+        return True
+    except DatabaseError as e:
+        conn.rollback()
+        print(f"Warning: duplicate attendance rows, UNIQUE(user_id, date) not enforced: {str(e)}")
+        return False
+
+
+def begin_punch(conn, user_id):
+    """Serialize punch writes: the SQLite write lock, or a per-user advisory lock on PostgreSQL
+
+    BEGIN IMMEDIATE is a no-op on PostgreSQL, so two workers could otherwise
+    both see no open session and check the same user in twice.
+    """
+    if conn.dialect.name == 'postgresql':
+        conn.execute('SELECT pg_advisory_xact_lock(?, ?)', (PUNCH_LOCK_CLASS, user_id))
+    else:
+        conn.execute('BEGIN IMMEDIATE')
+
+
+def apply_punch(conn, record, unique_attendance=True):
+    """Write one punch to work_sessions, attendance and attendance_logs
+
+    Runs inside the caller's transaction. Returns False when the idempotency
+    key was already applied, so replaying the journal is always safe.
+    """
+    applied = conn.execute(
+        'SELECT 1 FROM applied_punches WHERE idempotency_key = ?', (record['key'],)
+    ).fetchone()
+    if applied:
+        return False
+
+    user_id = record['user_id']
+    at = punch_time(record)
+    if record['action'] == 'check_in':
+        # False means a session is already open (a duplicate punch); it is still logged
+        attendance_stats.record_check_in(conn, user_id, at, record['latitude'], record['longitude'],
+                                         record['photo_path'], unique_attendance)
+        work_calendar.mark_day_dirty(conn, user_id, at.strftime('%Y-%m-%d'))
+    else:
+        closed = attendance_stats.record_check_out(conn, user_id, at, record['latitude'],
+                                                   record['longitude'], record['photo_path'])
+        if closed is None:
+            raise PunchNotReady(f"No open session yet for user {user_id} at {at}")
+        work_calendar.mark_day_dirty(conn, user_id, closed['work_date'])
+
+    conn.execute(
+        '''INSERT INTO attendance_logs (user_id, action, latitude, longitude, success)
+           VALUES (?, ?, ?, ?, ?)''',
+        (user_id, record['action'], record['latitude'], record['longitude'], True)
+    )
+    conn.execute(
+        'INSERT INTO applied_punches (idempotency_key, user_id, action) VALUES (?, ?, ?)',
+        (record['key'], user_id, record['action'])
+    )
+    return True
+
+
+class PunchJournal:
+    """Append-only punch log with group fsync and a background drainer
+
+    - submit() returns once the punch is on disk; concurrent submits share
+      one fsync, so acknowledging a punch never waits on database locks
+    - the drainer applies punches in order with exponential backoff on lock
+      contention; punches that keep failing go to punches-failed.log
+    - each worker owns punches-<pid>.log under an exclusive flock; journals
+      left behind by dead workers are replayed on startup
+    - without a directory, submit() applies the punch synchronously
+    """
+
+    def __init__(self, directory=None, connect=get_db_connection,
+                 max_attempts=20, retry_delay=0.05, max_retry_delay=2.0):
+        self.directory = directory
+        self.connect = connect
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._queue = deque()
+        self._outstanding = 0
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._file = None
+        self._stopped = False
+        self._table_ready = False
+        self._unique_attendance = True
+
+        if directory:
+            self._open()
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"punches-{os.getpid()}.log")
+        while True:
+            self._file = open(self.path, 'a+', encoding='utf-8')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            # Between open and flock a starting worker may have taken the new
+            # file for an orphan and removed it; never write to an unlinked inode
+            if self._is_linked(self.path, self._file):
+                break
+            self._file.close()
+
+        # A previous process with the same pid may have left punches behind
+        self._file.seek(0)
+        for record in self._parse(self._file.read()):
+            self._queue.append(record)
+            self._outstanding += 1
+
+        self._orphans = self._claim_orphans()
+        self._thread = threading.Thread(target=self._run, name='punch-drainer', daemon=True)
+        self._thread.start()
+
+    def _claim_orphans(self):
+        """Lock journals of workers that are gone; live workers hold theirs"""
+        orphans = []
+        for path in glob.glob(os.path.join(self.directory, 'punches-*.log')):
+            if path == self.path or path.endswith('punches-failed.log'):
+                continue
+            try:
+                f = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                continue
+            # Already replayed and removed by another worker while we waited
+            if not self._is_linked(path, f):
+                f.close()
+                continue
+            orphans.append((path, f))
+        return orphans
+
+    @staticmethod
+    def _is_linked(path, f):
+        """True if path still names the file f has open"""
+        try:
+            return os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _parse(content):
+        records = []
+        for line in content.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Torn final line from a crash mid-write; it was never acknowledged
+                continue
+        return records
+
+    # -- write side --------------------------------------------------------
+
+    def submit(self, record):
+        """Durably record a punch and return its idempotency key"""
+        record = dict(record, key=record.get('key') or uuid.uuid4().hex)
+
+        if self._file is None:
+            self._apply_now(record)
+            return record['key']
+
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._write_lock:
+            self._file.write(line)
+            self._file.flush()
+            self._written += 1
+            self._outstanding += 1
+            seq = self._written
+        self._sync(seq)
+
+        self._mark_pending(record)
+        with self._wakeup:
+            self._queue.append(record)
+            self._wakeup.notify()
+        return record['key']
+
+    def _sync(self, seq):
+        """Group commit: one fsync covers every line written before it started"""
+        with self._sync_lock:
+            if self._synced >= seq:
+                return
+            with self._write_lock:
+                target = self._written
+            # Under gevent the fsync runs on an OS thread; other greenlets keep serving
+            run_io(os.fsync, self._file.fileno())
+            self._synced = target
+
+    def _apply_now(self, record):
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            begin_punch(conn, record['user_id'])
+            apply_punch(conn, record, self._unique_attendance)
+            conn.commit()
+        finally:
+            conn.close()
+        get_cache().invalidate('reports')
+
+    def _ensure_table(self, conn):
+        if not self._table_ready:
+            self._unique_attendance = ensure_table(conn)
+            self._table_ready = True
+
+    # -- pending punches, visible to every worker through the shared cache --
+
+    def _mark_pending(self, record):
+        key = f"{record['user_id']}:{record['action']}"
+        get_cache().set_ns('pending_punches', key, record['key'], ttl=3600)
+
+    def _clear_pending(self, record):
+        key = f"{record['user_id']}:{record['action']}"
+        get_cache().delete_ns('pending_punches', key)
+
+    def is_pending(self, user_id, action):
+        """True if a punch of this kind is journaled but not yet in the database"""
+        return get_cache().get_ns('pending_punches', f"{user_id}:{action}") is not None
+
+    # -- drainer -------------------------------------------------------------
+
+    def _run(self):
+        for path, f in self._orphans:
+            records = self._parse(f.read())
+            print(f"Replaying {len(records)} punches from {os.path.basename(path)}")
+            for record in records:
+                self._apply_with_retry(record)
+            os.remove(path)
+            f.close()
+        self._orphans = []
+
+        while True:
+            with self._wakeup:
+                while not self._queue and not self._stopped:
+                    self._wakeup.wait()
+                if not self._queue:
+                    return
+                record = self._queue[0]
+
+            self._apply_with_retry(record)
+
+            with self._wakeup:
+                self._queue.popleft()
+            if self._applied_one():
+                get_cache().invalidate('reports')
+
+    def _apply_with_retry(self, record):
+        for attempt in range(1, self.max_attempts + 1):
+            conn = None
+            try:
+                conn = self.connect()
+                self._ensure_table(conn)
+                begin_punch(conn, record['user_id'])
+                apply_punch(conn, record, self._unique_attendance)
+                conn.commit()
+                self._clear_pending(record)
+                return True
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_attempts:
+                    print(f"Error applying punch {record['key']}: {str(e)}")
+                    self._dead_letter(record, e)
+                    self._clear_pending(record)
+                    return False
+                time.sleep(min(self.retry_delay * 2 ** (attempt - 1), self.max_retry_delay))
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _dead_letter(self, record, error):
+        with open(os.path.join(self.directory, 'punches-failed.log'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(dict(record, error=str(error)), separators=(',', ':')) + '\n')
+            f.flush()
+            run_io(os.fsync, f.fileno())
+
+    def _applied_one(self):
+        """Count a punch as done; drop the journal once everything in it is applied"""
+        with self._write_lock:
+            self._outstanding -= 1
+            if self._outstanding:
+                return False
+            self._file.truncate(0)
+            self._file.flush()
+            run_io(os.fsync, self._file.fileno())
+            return True
+
+    def close(self, timeout=5):
+        """Give the drainer a moment to finish; anything left is replayed later"""
+        if self._file is None:
+            return
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+
+
+_journal = None
+_journal_pid = None
+_journal_lock = threading.Lock()
+
+
+def get_punch_journal():
+    """Get this worker's punch journal (PUNCH_JOURNAL_DIR, empty to disable)"""
+    global _journal, _journal_pid
+    if _journal is None or _journal_pid != os.getpid():
+        with _journal_lock:
+            if _journal is None or _journal_pid != os.getpid():
+                _journal = PunchJournal(os.environ.get('PUNCH_JOURNAL_DIR', 'journal'))
+                _journal_pid = os.getpid()
+    return _journal
+
+
+def close_punch_journal():
+    """Close this process's journal at exit without creating one
+
+    Under a preloaded gunicorn master the journal is only ever opened by the
+    workers, so the master must not start a writer thread just to close it.
+    """
+    if _journal is not None and _journal_pid == os.getpid():
+        _journal.close()
@@ -0,0 +1,104 @@
+"""
+Punch sync module untuk sistem absensi
+Validation of punches queued offline on the attendance page and uploaded in batches
+"""
+
+import os
+import json
+from datetime import datetime, timedelta
+
+import attendance_stats
+import geofence
+
+
+MAX_BATCH_SIZE = int(os.environ.get('PUNCH_SYNC_MAX_BATCH', 50))
+MAX_OFFLINE_HOURS = int(os.environ.get('PUNCH_SYNC_MAX_AGE_HOURS', 72))
+CLOCK_SKEW = timedelta(minutes=5)
+
+ACTIONS = ('check_in', 'check_out')
+
+
+def parse_batch(raw):
+    """Parse the punches field of a sync request into items sorted by capture time
+
+    Raises ValueError with a user-facing message when the batch is malformed.
+    """
+    try:
+        punches = json.loads(raw or '[]')
+    except ValueError:
+        raise ValueError('Format data sinkronisasi tidak valid')
+    if not isinstance(punches, list) or not punches:
+        raise ValueError('Tidak ada data absen untuk disinkronkan')
+    if len(punches) > MAX_BATCH_SIZE:
+        raise ValueError(f'Maksimal {MAX_BATCH_SIZE} absen per sinkronisasi')
+
+    items = []
+    for punch in punches:
+        if not isinstance(punch, dict):
+            raise ValueError('Format data sinkronisasi tidak valid')
+        item = {'id': str(punch.get('id', ''))[:64], 'error': None}
+        try:
+            item['action'] = punch['action']
+            item['captured_at'] = datetime.strptime(punch['captured_at'], attendance_stats.TIMESTAMP_FORMAT)
+            item['latitude'], item['longitude'], item['accuracy'] = geofence.parse_location(
+                punch['latitude'], punch['longitude'], punch.get('accuracy'))
+            item['key'] = str(punch['idempotency_key'])[:128]
+            if item['action'] not in ACTIONS or not item['id'] or not item['key']:
+                raise ValueError
+        except (KeyError, TypeError, ValueError):
+            item['error'] = 'Data absen tidak lengkap atau tidak valid'
+        items.append(item)
+
+    return sorted(items, key=lambda item: item.get('captured_at') or datetime.min)
+
+
+def check_geofences(items, fences):
+    """Flag every item outside all active fences, in one array operation
+
+    Returns the items rejected for their position (not for poor accuracy).
+    """
+    pending = [item for item in items if item['error'] is None]
+    if not pending:
+        return []
+    inside, nearest, distances = fences.locate_many([item['latitude'] for item in pending],
+                                                    [item['longitude'] for item in pending],
+                                                    [item['accuracy'] for item in pending])
+    rejected = []
+    for item, in_area, index, distance in zip(pending, inside, nearest, distances):
+        if not in_area:
+            result = fences.describe(False, int(index), float(distance), item['accuracy'])
+            item['error'] = geofence.outside_message(result)
+            if result['reason'] == 'outside':
+                rejected.append(item)
+    return rejected
+
+
+def check_sequence(items, now, last_punch, open_since):
+    """Check capture times and the masuk/keluar order of a user's queued punches
+
+    last_punch is the user's latest punch already in the database and
+    open_since the start of the session open before the first item (or
+    None); offline punches must come after both and alternate check-in and
+    check-out within MAX_SHIFT_HOURS.
+    """
+    oldest = now - timedelta(hours=MAX_OFFLINE_HOURS)
+    max_shift = timedelta(hours=attendance_stats.MAX_SHIFT_HOURS)
+    for item in items:
+        if item['error'] is not None:
+            continue
+        at = item['captured_at']
+        if at > now + CLOCK_SKEW:
+            item['error'] = 'Waktu absen berada di masa depan, periksa jam perangkat'
+        elif at < oldest:
+            item['error'] = f'Absen offline lebih dari {MAX_OFFLINE_HOURS} jam tidak dapat disinkronkan'
+        elif last_punch is not None and at <= last_punch:
+            item['error'] = 'Waktu absen lebih awal dari absen terakhir'
+        else:
+            is_open = open_since is not None and at - open_since <= max_shift
+            if item['action'] == 'check_in' and is_open:
+                item['error'] = 'Anda sudah absen masuk! Silakan absen keluar terlebih dahulu.'
+            elif item['action'] == 'check_out' and not is_open:
+                item['error'] = 'Anda belum absen masuk!'
+            else:
+                open_since = at if item['action'] == 'check_in' else None
+                last_punch = at
@@ -0,0 +1,185 @@
+"""
+Query profiler module untuk sistem absensi
+Slow-query log with query plans and per-request SQL profiles for admins
+"""
+
+import os
+import threading
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import g, has_request_context, jsonify, request, session
+
+from db import DatabaseError, add_query_hook
+
+
+ENABLED = os.environ.get('QUERY_PROFILER', '').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+# The same statement this many times in one request is reported as a likely N+1
+REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
+
+_lock = threading.Lock()
+_slow_queries = deque(maxlen=200)
+_requests = deque(maxlen=50)
+_statements = {}
+_plans = {}
+MAX_PLANS = 500
+
+
+class ProfiledCursor:
+    """Cursor wrapper counting the rows the caller actually fetches"""
+
+    def __init__(self, cursor, record):
+        self._cursor = cursor
+        self._record = record
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._record['rows'] += 1
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._record['rows'] += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._record['rows'] += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def normalize(sql):
+    return ' '.join(sql.split())
+
+
+def param_shape(params):
+    """Types of the bound parameters, never their values"""
+    if not params:
+        return '()'
+    if isinstance(params, dict):
+        return '{' + ', '.join(sorted(params)) + '}'
+    if not isinstance(params, (list, tuple)):
+        return type(params).__name__
+    if isinstance(params[0], (list, tuple)):
+        return f'{len(params)} x {param_shape(params[0])}'
+    return '(' + ', '.join(type(param).__name__ for param in params) + ')'
+
+
+def query_plan(conn, sql, params):
+    """Plan of a slow SELECT, captured once per statement text"""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    key = normalize(sql)
+    if key in _plans:
+        return _plans[key]
+    try:
+        plan = conn.explain(sql, params)
+    except DatabaseError as e:
+        plan = [f'EXPLAIN failed: {str(e)}']
+    with _lock:
+        if len(_plans) >= MAX_PLANS:
+            _plans.pop(next(iter(_plans)))
+        _plans[key] = plan
+    return plan
+
+
+def _profile_query(conn, sql, params, seconds, cursor):
+    statement = normalize(sql)
+    elapsed_ms = seconds * 1000
+    route = (request.endpoint or 'unmatched') if has_request_context() else 'background'
+    record = {
+        'sql': statement,
+        'params': param_shape(params),
+        'rows': 0,
+        'ms': round(elapsed_ms, 3),
+        'route': route,
+    }
+
+    with _lock:
+        stats = _statements.get(statement)
+        if stats is None:
+            stats = _statements[statement] = {'sql': statement, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                              'routes': set()}
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        stats['routes'].add(route)
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        record['at'] = datetime.now().isoformat(timespec='seconds')
+        record['plan'] = query_plan(conn, sql, params)
+        print(f"SLOW QUERY {elapsed_ms:.1f}ms [{route}] {statement[:200]}")
+        with _lock:
+            _slow_queries.append(record)
+
+    if has_request_context():
+        g.setdefault('_query_profile', []).append(record)
+    return ProfiledCursor(cursor, record)
+
+
+def init_query_profiler(app):
+    """Profile every statement when QUERY_PROFILER is set; admins read the results at /api/debug/queries"""
+    if ENABLED:
+        add_query_hook(_profile_query)
+
+        @app.after_request
+        def finish_query_profile(response):
+            records = g.pop('_query_profile', None)
+            if not records:
+                return response
+            counts = Counter(record['sql'] for record in records)
+            repeated = [{'sql': sql, 'count': count} for sql, count in counts.most_common()
+                        if count >= REPEAT_THRESHOLD]
+            if repeated:
+                print(f"REPEATED QUERIES {request.method} {request.path}: "
+                      f"{repeated[0]['count']}x {repeated[0]['sql'][:120]}")
+            with _lock:
+                _requests.append({
+                    'at': datetime.now().isoformat(timespec='seconds'),
+                    'method': request.method,
+                    'path': request.path,
+                    'endpoint': request.endpoint,
+                    'status': response.status_code,
+                    'queries': len(records),
+                    'total_ms': round(sum(record['ms'] for record in records), 3),
+                    'repeated': repeated,
+                    'statements': records[:100],
+                })
+            return response
+
+    @app.route('/api/debug/queries', methods=['GET', 'DELETE'])
+    def api_debug_queries():
+        """Slow queries, top statements and recent request profiles of this worker (admin only)"""
+        if session.get('username') != 'admin':
+            return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+
+        if request.method == 'DELETE':
+            with _lock:
+                _slow_queries.clear()
+                _requests.clear()
+                _statements.clear()
+                _plans.clear()
+            return jsonify({'success': True, 'message': 'Profil query berhasil direset'})
+
+        limit = request.args.get('limit', 50, type=int)
+        with _lock:
+            top = sorted(_statements.values(), key=lambda s: s['total_ms'], reverse=True)[:limit]
+            top = [dict(s, total_ms=round(s['total_ms'], 3), max_ms=round(s['max_ms'], 3),
+                        avg_ms=round(s['total_ms'] / s['count'], 3), routes=sorted(s['routes']))
+                   for s in top]
+            slow = list(reversed(_slow_queries))[:limit]
+            recent = list(reversed(_requests))[:limit]
+        return jsonify({
+            'success': True,
+            'enabled': ENABLED,
+            'pid': os.getpid(),
+            'slow_query_ms': SLOW_QUERY_MS,
+            'slow_queries': slow,
+            'top_statements': top,
+            'requests': recent,
+        })
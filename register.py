@@ -3,20 +3,18 @@ Registration module untuk sistem absensi
 Handles user registration logic and validation
 """
 
-import sqlite3
 import re
 from werkzeug.security import generate_password_hash
 from datetime import datetime
+from db import get_database, DatabaseError
 
 class UserRegistration:
-    def __init__(self, db_path='database.db'):
-        self.db_path = db_path
+    def __init__(self, database=None):
+        self.database = database or get_database()
     
     def get_db_connection(self):
         """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return self.database.connect()
     
     def validate_username(self, username):
         """Validate username format and uniqueness"""
@@ -142,7 +140,7 @@ class UserRegistration:
             
             return True, f"User berhasil didaftarkan dengan ID: {user_id}"
             
-        except sqlite3.Error as e:
+        except DatabaseError as e:
             return False, f"Database error: {str(e)}"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -156,18 +154,20 @@ class UserRegistration:
             total_users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
             
             # Active users
-            active_users = conn.execute('SELECT COUNT(*) FROM users WHERE active = 1').fetchone()[0]
+            active_users = conn.execute('SELECT COUNT(*) FROM users WHERE active = TRUE').fetchone()[0]
+            
+            dialect = self.database.dialect
             
             # Users registered today
-            today_users = conn.execute('''
+            today_users = conn.execute(f'''
                 SELECT COUNT(*) FROM users 
-                WHERE DATE(created_at) = DATE('now')
+                WHERE {dialect.date_of('created_at')} = {dialect.today()}
             ''').fetchone()[0]
             
             # Users registered this month
-            month_users = conn.execute('''
+            month_users = conn.execute(f'''
                 SELECT COUNT(*) FROM users 
-                WHERE strftime('%Y-%m', created_at) = strftime('%Y-%m', 'now')
+                WHERE {dialect.in_current_month('created_at')}
             ''').fetchone()[0]
             
             conn.close()
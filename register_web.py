@@ -1,19 +1,22 @@
 from flask import request, render_template, redirect, url_for, flash, session, jsonify
 from werkzeug.utils import secure_filename
 import os
-import numpy as np
 import pickle
 import json
-import sqlite3
 from register import UserRegistration
+from db import get_db_connection
+from lazy_imports import lazy, available
+from face_verification import (
+    encode_faces, face_model_version, get_match_threshold, get_stored_face_encodings, min_distances,
+)
 
-# Coba import face recognition libs
-try:
-    import cv2
-    import face_recognition
-    FACE_RECOGNITION_AVAILABLE = True
-except ImportError:
-    FACE_RECOGNITION_AVAILABLE = False
+
+# Cek face recognition libs tanpa meng-import (dimuat saat pertama dipakai)
+FACE_RECOGNITION_AVAILABLE = available('cv2', 'face_recognition')
+if FACE_RECOGNITION_AVAILABLE:
+    cv2 = lazy('cv2')
+    face_recognition = lazy('face_recognition')
+else:
     print("⚠️ Face recognition libraries not available. Running without face recognition.")
 
 class WebRegistration:
@@ -49,8 +52,7 @@ class WebRegistration:
             image_file.save(image_path)
             
             # Process with face_recognition
-            image = face_recognition.load_image_file(image_path)
-            face_encodings = face_recognition.face_encodings(image)
+            face_encodings = encode_faces(image_path)
             
             if not face_encodings:
                 os.remove(image_path)  # Clean up
@@ -65,11 +67,11 @@ class WebRegistration:
             encoding_list = face_encoding.tolist()
             
             # Save encoding to database
-            conn = sqlite3.connect('database.db')
+            conn = get_db_connection()
             conn.execute('''
-                INSERT INTO face_data (user_id, face_encoding, photo_path, active)
-                VALUES (?, ?, ?, 1)
-            ''', (user_id, json.dumps(encoding_list), image_path))
+                INSERT INTO face_data (user_id, face_encoding, photo_path, active, model_version)
+                VALUES (?, ?, ?, TRUE, ?)
+            ''', (user_id, json.dumps(encoding_list), image_path, face_model_version()))
             conn.commit()
             conn.close()
             
@@ -83,78 +85,28 @@ class WebRegistration:
         except Exception as e:
             return False, f"Error processing face: {str(e)}"
     
-    def handle_registration(self):
-        """Handle web registration form submission"""
-        if request.method == 'POST':
-            username = request.form.get('username', '').strip()
-            password = request.form.get('password', '')
-            confirm_password = request.form.get('confirm_password', '')
-            full_name = request.form.get('full_name', '').strip()
-            email = request.form.get('email', '').strip() or None
-            
-            if password != confirm_password:
-                flash('Password dan konfirmasi password tidak cocok!', 'error')
-                return render_template('register.html')
-            
-            success, message = self.user_reg.register_user(username, password, full_name, email)
-            
-            if success:
-                conn = sqlite3.connect('database.db')
-                user = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()
-                user_id = user[0] if user else None
-                conn.close()
-                
-                face_success, face_message = True, ""
-                
-                if 'face_image' in request.files:
-                    face_file = request.files['face_image']
-                    if face_file and face_file.filename != '' and self.allowed_file(face_file.filename):
-                        face_success, face_message = self.process_face_image(face_file, user_id, full_name)
-                
-                if face_success:
-                    flash(f'{message} Face recognition aktif!', 'success')
-                else:
-                    flash(f'{message} Namun gagal setup face recognition: {face_message}', 'warning')
-                
-                return redirect(url_for('login'))
-            else:
-                flash(message, 'error')
-        
-        return render_template('register.html')
-    
     def verify_face(self, uploaded_image, user_id):
         """Verify face against stored encoding"""
         if not FACE_RECOGNITION_AVAILABLE:
             return False, "Face recognition not available in this environment"
         
         try:
-            conn = sqlite3.connect('database.db')
-            face_data = conn.execute(
-                'SELECT face_encoding FROM face_data WHERE user_id = ? AND active = 1',
-                (user_id,)
-            ).fetchone()
-            conn.close()
-            
-            if not face_data:
+            samples = get_stored_face_encodings(user_id)
+            if not samples:
                 return False, "Face data not found for user"
             
-            stored_encoding = np.array(json.loads(face_data[0]))
-            
-            image = face_recognition.load_image_file(uploaded_image)
-            face_encodings = face_recognition.face_encodings(image)
+            face_encodings = encode_faces(uploaded_image)
             
             if not face_encodings:
                 return False, "No face detected in uploaded image"
             
-            matches = face_recognition.compare_faces([stored_encoding], face_encodings[0])
-            face_distance = face_recognition.face_distance([stored_encoding], face_encodings[0])
+            # Closest enrollment sample against the deployment's calibrated threshold
+            distance = float(min_distances(samples, face_encodings[:1])[0])
             
-            threshold = 0.4
-            
-            if matches[0] and face_distance[0] < threshold:
-                return True, f"Face verified! Confidence: {(1-face_distance[0])*100:.1f}%"
+            if distance < get_match_threshold():
+                return True, f"Face verified! Confidence: {(1-distance)*100:.1f}%"
             else:
-                return False, f"Face not recognized. Distance: {face_distance[0]:.3f}"
+                return False, f"Face not recognized. Distance: {distance:.3f}"
                 
         except Exception as e:
             return False, f"Error verifying face: {str(e)}"
@@ -164,9 +116,9 @@ class WebRegistration:
         stats = self.user_reg.get_user_stats()
         if stats:
             try:
-                conn = sqlite3.connect('database.db')
+                conn = get_db_connection()
                 face_users = conn.execute(
-                    'SELECT COUNT(DISTINCT user_id) FROM face_data WHERE active = 1'
+                    'SELECT COUNT(DISTINCT user_id) FROM face_data WHERE active = TRUE'
                 ).fetchone()[0]
                 stats['face_registered'] = face_users
                 stats['face_percentage'] = (face_users / stats['total_users'] * 100) if stats['total_users'] > 0 else 0
@@ -177,19 +129,7 @@ class WebRegistration:
         return stats
     
     def setup_routes(self):
-        """Setup Flask routes for registration"""
-        
-        @self.app.route('/register', methods=['GET', 'POST'])
-        def register_user():
-            return self.handle_registration()
-        
-        @self.app.route('/api/check_username', methods=['POST'])
-        def check_username():
-            username = request.json.get('username', '').strip()
-            if not username:
-                return jsonify({'available': False, 'message': 'Username tidak boleh kosong'})
-            valid, message = self.user_reg.validate_username(username)
-            return jsonify({'available': valid, 'message': message})
+        """Setup face verification routes; /register and /api/check_username live in main_routes"""
         
         @self.app.route('/api/verify_face', methods=['POST'])
         def verify_face_api():
@@ -220,14 +160,14 @@ class WebRegistration:
         @self.app.route('/admin/registration_stats')
         def registration_stats():
             if 'user_id' not in session:
-                return redirect(url_for('login'))
+                return redirect(url_for('main.login'))
             if session.get('username') != 'admin':
                 flash('Access denied', 'error')
-                return redirect(url_for('index'))
+                return redirect(url_for('main.index'))
             stats = self.get_registration_stats()
             return render_template('admin/registration_stats.html', stats=stats)
 
-# Function to initialize web registration
+# Function to initialize web registration (app or blueprint)
 def init_web_registration(app):
     web_reg = WebRegistration(app)
     web_reg.setup_routes()
@@ -0,0 +1,756 @@
+"""
+Reports routes module untuk sistem absensi
+Attendance reports, work calendar administration and Excel exports
+"""
+
+from datetime import datetime
+from io import BytesIO
+
+from flask import Blueprint, jsonify, request, send_file, session
+
+import attendance_stats
+import work_calendar
+from app_helpers import cached_response, login_required, read_calendar, read_connection
+from cache import get_cache
+from db import get_db_connection
+from lazy_imports import lazy
+
+
+pd = lazy('pandas')
+
+bp = Blueprint('reports', __name__)
+
+
+@bp.route('/api/attendance/monthly', methods=['GET'])
+@login_required
+@cached_response('reports', ttl=60, per_user=True)
+def api_monthly_attendance():
+    """API to get monthly attendance data"""
+    try:
+        # Get month and year from query params, default to current month
+        from datetime import datetime, timedelta
+        import calendar
+        
+        month = request.args.get('month', datetime.now().month, type=int)
+        year = request.args.get('year', datetime.now().year, type=int)
+        
+        # Validate month and year
+        if month < 1 or month > 12:
+            month = datetime.now().month
+        if year < 2020 or year > 2030:
+            year = datetime.now().year
+            
+        # Get first and last day of the month
+        first_day = datetime(year, month, 1).strftime('%Y-%m-%d')
+        last_day = datetime(year, month, calendar.monthrange(year, month)[1]).strftime('%Y-%m-%d')
+        
+        conn = read_connection()
+        
+        # One entry per worked day; split and overnight shifts are summed per day
+        attendance_list = attendance_stats.user_days(conn, session['user_id'], first_day, last_day)
+        
+        # Expected workdays, lateness and overtime from the user's shift and holidays
+        calendar_days = read_calendar(work_calendar.user_month, session['user_id'], year, month)
+        for entry in attendance_list:
+            calendar_day = calendar_days.get(entry['date'], {})
+            entry['calendar_status'] = calendar_day.get('status')
+            entry['late_minutes'] = calendar_day.get('late_minutes', 0)
+            entry['overtime_minutes'] = calendar_day.get('overtime_minutes', 0)
+        month_summary = work_calendar.summarize(calendar_days)
+        
+        # Calculate statistics
+        total_days = len(attendance_list)
+        present_days = len([a for a in attendance_list if a['status'] in ['complete', 'incomplete']])
+        complete_days = len([a for a in attendance_list if a['status'] == 'complete'])
+        incomplete_days = len([a for a in attendance_list if a['status'] == 'incomplete'])
+        absent_days = total_days - present_days
+        
+        # Calculate total work hours
+        total_work_minutes = sum([a['work_minutes'] for a in attendance_list if a['work_minutes']])
+        total_work_hours = round(total_work_minutes / 60, 1) if total_work_minutes else 0
+        avg_work_hours = round(total_work_hours / complete_days, 1) if complete_days > 0 else 0
+        
+        # Attendance rate over scheduled workdays (weekends and holidays excluded)
+        working_days = month_summary['expected_days']
+        attendance_rate = round(min(present_days / working_days, 1) * 100, 1) if working_days > 0 else 0
+        
+        stats = {
+            'month': month,
+            'year': year,
+            'month_name': calendar.month_name[month],
+            'total_days': working_days,
+            'present_days': present_days,
+            'complete_days': complete_days,
+            'incomplete_days': incomplete_days,
+            'absent_days': month_summary['absent_days'],
+            'late_days': month_summary['late_days'],
+            'late_minutes': month_summary['late_minutes'],
+            'overtime_hours': round(month_summary['overtime_minutes'] / 60, 1),
+            'attendance_rate': attendance_rate,
+            'total_work_hours': total_work_hours,
+            'avg_work_hours': avg_work_hours
+        }
+        
+        conn.close()
+        
+        return jsonify({
+            'success': True,
+            'attendance': attendance_list,
+            'stats': stats
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/attendance/daily', methods=['GET'])
+@login_required
+@cached_response('reports', ttl=60)
+def api_daily_attendance():
+    """API to get daily attendance data"""
+    try:
+        # Get date from query params, default to today
+        from datetime import datetime
+        
+        date_param = request.args.get('date')
+        if date_param:
+            try:
+                # Validate date format
+                selected_date = datetime.strptime(date_param, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid date format. Use YYYY-MM-DD'
+                }), 400
+        else:
+            selected_date = datetime.now().date()
+        
+        date_str = selected_date.strftime('%Y-%m-%d')
+        
+        conn = read_connection()
+        
+        # Users present on the selected date, earliest clock-in first
+        attendance_list = attendance_stats.day_attendance(conn, date_str)
+        calendar_day = read_calendar(work_calendar.day, date_str)
+        for entry in attendance_list:
+            entry.pop('latitude', None)
+            entry.pop('longitude', None)
+            entry['late_minutes'] = calendar_day.get(entry['user_id'], {}).get('late_minutes', 0)
+            entry['overtime_minutes'] = calendar_day.get(entry['user_id'], {}).get('overtime_minutes', 0)
+        
+        # Calculate daily statistics
+        total_present = len(attendance_list)
+        complete_attendance = len([a for a in attendance_list if a['status'] == 'complete'])
+        incomplete_attendance = len([a for a in attendance_list if a['status'] == 'incomplete'])
+        
+        # Calculate total work hours for the day
+        total_work_minutes = sum([a['work_minutes'] for a in attendance_list if a['work_minutes']])
+        total_work_hours = round(total_work_minutes / 60, 1) if total_work_minutes else 0
+        avg_work_hours = round(total_work_hours / complete_attendance, 1) if complete_attendance > 0 else 0
+        
+        # Get total registered users for attendance rate calculation
+        total_users = conn.execute('SELECT COUNT(*) as count FROM users WHERE active = TRUE').fetchone()['count']
+        attendance_rate = round((total_present / total_users) * 100, 1) if total_users > 0 else 0
+        
+        daily_stats = {
+            'date': date_str,
+            'total_present': total_present,
+            'complete_attendance': complete_attendance,
+            'incomplete_attendance': incomplete_attendance,
+            'total_registered_users': total_users,
+            'attendance_rate': attendance_rate,
+            'expected_users': len([c for c in calendar_day.values() if c['expected_minutes'] > 0]),
+            'late_count': len([c for c in calendar_day.values() if c['status'] == 'late']),
+            'absent_count': len([c for c in calendar_day.values() if c['status'] == 'absent']),
+            'total_work_hours': total_work_hours,
+            'avg_work_hours': avg_work_hours
+        }
+        
+        conn.close()
+        
+        return jsonify({
+            'success': True,
+            'date': date_str,
+            'attendance': attendance_list,
+            'stats': daily_stats
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/attendance/weekly', methods=['GET'])
+@login_required
+@cached_response('reports', ttl=60)
+def api_weekly_attendance():
+    """API to get weekly attendance summary"""
+    try:
+        from datetime import datetime, timedelta
+        
+        # Get week start date (default to current week)
+        week_start_param = request.args.get('week_start')
+        if week_start_param:
+            try:
+                week_start = datetime.strptime(week_start_param, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid date format. Use YYYY-MM-DD'
+                }), 400
+        else:
+            today = datetime.now().date()
+            # Get Monday of current week
+            week_start = today - timedelta(days=today.weekday())
+        
+        # Calculate week end (Sunday)
+        week_end = week_start + timedelta(days=6)
+        
+        conn = read_connection()
+        
+        # Presence per day of the week in one query
+        presence = attendance_stats.daily_presence(conn, week_start.strftime('%Y-%m-%d'), week_end.strftime('%Y-%m-%d'))
+        total_users = conn.execute('SELECT COUNT(*) FROM users WHERE active = TRUE').fetchone()[0]
+        
+        weekly_data = []
+        current_date = week_start
+        
+        while current_date <= week_end:
+            date_str = current_date.strftime('%Y-%m-%d')
+            total_present, complete_count = presence.get(date_str, (0, 0))
+            
+            attendance_rate = round((total_present / total_users) * 100, 1) if total_users > 0 else 0
+            
+            weekly_data.append({
+                'date': date_str,
+                'day_name': current_date.strftime('%A'),
+                'total_present': total_present,
+                'complete_count': complete_count,
+                'incomplete_count': total_present - complete_count,
+                'total_users': total_users,
+                'attendance_rate': attendance_rate
+            })
+            
+            current_date += timedelta(days=1)
+        
+        # Calculate weekly summary
+        total_weekly_present = sum([day['total_present'] for day in weekly_data])
+        total_weekly_complete = sum([day['complete_count'] for day in weekly_data])
+        avg_daily_attendance = round(total_weekly_present / 7, 1)
+        avg_attendance_rate = round(sum([day['attendance_rate'] for day in weekly_data]) / 7, 1)
+        
+        weekly_summary = {
+            'week_start': week_start.strftime('%Y-%m-%d'),
+            'week_end': week_end.strftime('%Y-%m-%d'),
+            'total_weekly_present': total_weekly_present,
+            'total_weekly_complete': total_weekly_complete,
+            'avg_daily_attendance': avg_daily_attendance,
+            'avg_attendance_rate': avg_attendance_rate
+        }
+        
+        conn.close()
+        
+        return jsonify({
+            'success': True,
+            'weekly_data': weekly_data,
+            'summary': weekly_summary
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/shifts', methods=['GET', 'POST'])
+@login_required
+def api_shifts():
+    """List shift schedules, or create one (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        conn = get_db_connection()
+        if request.method == 'GET':
+            shifts = work_calendar.list_shifts(conn)
+            conn.close()
+            return jsonify({'success': True, 'shifts': shifts})
+        
+        data = request.get_json() or {}
+        if not data.get('name'):
+            conn.close()
+            return jsonify({'success': False, 'message': 'Nama shift harus diisi'}), 400
+        error = work_calendar.validate_shift(data)
+        if error:
+            conn.close()
+            return jsonify({'success': False, 'message': error}), 400
+        
+        shift_id = work_calendar.save_shift(conn, data)
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('reports')
+        
+        return jsonify({'success': True, 'message': 'Shift berhasil ditambahkan', 'shift_id': shift_id})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/api/shifts/<int:shift_id>', methods=['PUT'])
+@login_required
+def api_update_shift(shift_id):
+    """Update a shift schedule (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        data = request.get_json() or {}
+        error = None if data.get('name') else 'Nama shift harus diisi'
+        error = error or work_calendar.validate_shift(data)
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+        
+        conn = get_db_connection()
+        if not conn.execute('SELECT id FROM shift_schedules WHERE id = ?', (shift_id,)).fetchone():
+            conn.close()
+            return jsonify({'success': False, 'message': 'Shift tidak ditemukan'}), 404
+        work_calendar.save_shift(conn, data, shift_id)
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('reports')
+        
+        return jsonify({'success': True, 'message': 'Shift berhasil diupdate'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/api/users/<int:user_id>/shift', methods=['POST'])
+@login_required
+def api_assign_shift(user_id):
+    """Assign a shift schedule to a user (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        data = request.get_json() or {}
+        shift_id = data.get('shift_id')
+        
+        conn = get_db_connection()
+        if not conn.execute('SELECT id FROM users WHERE id = ?', (user_id,)).fetchone():
+            conn.close()
+            return jsonify({'success': False, 'message': 'User tidak ditemukan'}), 404
+        if not conn.execute('SELECT id FROM shift_schedules WHERE id = ?', (shift_id,)).fetchone():
+            conn.close()
+            return jsonify({'success': False, 'message': 'Shift tidak ditemukan'}), 404
+        work_calendar.assign_shift(conn, user_id, shift_id)
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('reports')
+        
+        return jsonify({'success': True, 'message': 'Shift user berhasil diatur'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/api/holidays', methods=['GET', 'POST'])
+@login_required
+def api_holidays():
+    """List holidays of a year, or add one (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        conn = get_db_connection()
+        if request.method == 'GET':
+            year = request.args.get('year', datetime.now().year, type=int)
+            holidays = work_calendar.list_holidays(conn, year)
+            conn.close()
+            return jsonify({'success': True, 'holidays': holidays})
+        
+        data = request.get_json() or {}
+        try:
+            holiday_date = datetime.strptime(data.get('date', ''), '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            conn.close()
+            return jsonify({'success': False, 'message': 'Format tanggal tidak valid (YYYY-MM-DD)'}), 400
+        if not data.get('name'):
+            conn.close()
+            return jsonify({'success': False, 'message': 'Nama hari libur harus diisi'}), 400
+        
+        work_calendar.add_holiday(conn, holiday_date, data['name'])
+        conn.commit()
+        conn.close()
+        get_cache().invalidate('reports')
+        
+        return jsonify({'success': True, 'message': 'Hari libur berhasil ditambahkan'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/api/holidays/<int:holiday_id>', methods=['DELETE'])
+@login_required
+def api_delete_holiday(holiday_id):
+    """Delete a holiday (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+    
+    try:
+        conn = get_db_connection()
+        deleted = work_calendar.delete_holiday(conn, holiday_id)
+        conn.commit()
+        conn.close()
+        if not deleted:
+            return jsonify({'success': False, 'message': 'Hari libur tidak ditemukan'}), 404
+        get_cache().invalidate('reports')
+        
+        return jsonify({'success': True, 'message': 'Hari libur berhasil dihapus'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+
+@bp.route('/api/export/users', methods=['GET'])
+@login_required
+@cached_response('reports', ttl=300)
+def export_users_excel():
+    """Export users data to Excel"""
+    try:
+        # Check if user has appropriate permissions (optional)
+        # if session.get('username') != 'admin':
+        #     return jsonify({'success': False, 'message': 'Access denied'}), 403
+        
+        conn = read_connection()
+        
+        # Get users data
+        users = conn.execute('''
+            SELECT 
+                u.id as "ID",
+                u.username as "Username",
+                u.full_name as "Nama Lengkap",
+                u.email as "Email",
+                u.role as "Role",
+                CASE WHEN u.active = TRUE THEN 'Aktif' ELSE 'Nonaktif' END as "Status",
+                CASE WHEN f.id IS NOT NULL THEN 'Ya' ELSE 'Tidak' END as "Face Recognition",
+                u.created_at as "Tanggal Daftar",
+                u.updated_at as "Terakhir Update",
+                a.last_attendance as "Terakhir Hadir",
+                COUNT(att.id) as "Total Kehadiran"
+            FROM users u
+            LEFT JOIN (
+                SELECT user_id, MAX(id) as id 
+                FROM face_data 
+                WHERE active = TRUE 
+                GROUP BY user_id
+            ) f ON u.id = f.user_id
+            LEFT JOIN (
+                SELECT user_id, MAX(date) as last_attendance
+                FROM attendance
+                WHERE time_in IS NOT NULL
+                GROUP BY user_id
+            ) a ON u.id = a.user_id
+            LEFT JOIN attendance att ON u.id = att.user_id AND att.time_in IS NOT NULL
+            GROUP BY u.id, u.username, u.full_name, u.email, u.role, u.active, 
+                     f.id, u.created_at, u.updated_at, a.last_attendance
+            ORDER BY u.full_name ASC
+        ''').fetchall()
+        
+        conn.close()
+        
+        # Convert to DataFrame
+        users_data = []
+        for user in users:
+            users_data.append(dict(user))
+        
+        df = pd.DataFrame(users_data)
+        
+        # Format dates
+        date_columns = ['Tanggal Daftar', 'Terakhir Update', 'Terakhir Hadir']
+        for col in date_columns:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M')
+        
+        # Create Excel file in memory
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='Data Pengguna', index=False)
+            
+            # Get the workbook and worksheet
+            workbook = writer.book
+            worksheet = writer.sheets['Data Pengguna']
+            
+            # Auto-adjust column widths
+            for column in worksheet.columns:
+                max_length = 0
+                column_letter = column[0].column_letter
+                for cell in column:
+                    try:
+                        if len(str(cell.value)) > max_length:
+                            max_length = len(str(cell.value))
+                    except:
+                        pass
+                adjusted_width = min(max_length + 2, 50)
+                worksheet.column_dimensions[column_letter].width = adjusted_width
+        
+        output.seek(0)
+        
+        # Generate filename
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f'data_pengguna_{timestamp}.xlsx'
+        
+        return send_file(
+            output,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting users data: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/export/attendance/daily', methods=['GET'])
+@login_required
+@cached_response('reports', ttl=300)
+def export_daily_attendance_excel():
+    """Export daily attendance to Excel"""
+    try:
+        # Get date parameter
+        date_param = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
+        
+        try:
+            selected_date = datetime.strptime(date_param, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid date format. Use YYYY-MM-DD'
+            }), 400
+        
+        conn = read_connection()
+        
+        # All active users for the date, present ones first
+        day = attendance_stats.day_attendance(conn, date_param, include_absent=True)
+        
+        conn.close()
+        
+        calendar_day = read_calendar(work_calendar.day, date_param)
+        
+        status_labels = {'complete': 'Lengkap', 'incomplete': 'Belum Keluar', 'absent': 'Tidak Hadir'}
+        attendance_list = []
+        for entry in day:
+            attendance_list.append({
+                'Nama Lengkap': entry['full_name'],
+                'Username': entry['username'],
+                'Email': entry['email'],
+                'Tanggal': entry['date'],
+                'Jam Masuk': entry['time_in'],
+                'Jam Keluar': entry['time_out'],
+                'Sesi': entry['sessions'],
+                'Status': status_labels[entry['status']],
+                'Durasi Kerja': f"{entry['work_minutes'] / 60:.1f} jam" if entry['work_minutes'] is not None else '-',
+                'Terlambat (menit)': calendar_day.get(entry['user_id'], {}).get('late_minutes', 0),
+                'Lembur (menit)': calendar_day.get(entry['user_id'], {}).get('overtime_minutes', 0),
+                'Ada Foto': 'Ya' if entry['has_photo'] else 'Tidak',
+                'Latitude': entry['latitude'],
+                'Longitude': entry['longitude']
+            })
+        
+        df = pd.DataFrame(attendance_list)
+        
+        # Create Excel file in memory
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            # Write main data
+            df.to_excel(writer, sheet_name='Kehadiran Harian', index=False)
+            
+            # Create summary sheet
+            summary_data = {
+                'Keterangan': [
+                    'Tanggal Laporan',
+                    'Total Karyawan Aktif',
+                    'Hadir',
+                    'Tidak Hadir',
+                    'Kehadiran Lengkap',
+                    'Belum Keluar',
+                    'Tingkat Kehadiran (%)'
+                ],
+                'Nilai': [
+                    selected_date.strftime('%d %B %Y'),
+                    len(df),
+                    len(df[df['Status'] != 'Tidak Hadir']),
+                    len(df[df['Status'] == 'Tidak Hadir']),
+                    len(df[df['Status'] == 'Lengkap']),
+                    len(df[df['Status'] == 'Belum Keluar']),
+                    f"{round((len(df[df['Status'] != 'Tidak Hadir']) / len(df)) * 100, 1)}%" if len(df) > 0 else "0%"
+                ]
+            }
+            
+            summary_df = pd.DataFrame(summary_data)
+            summary_df.to_excel(writer, sheet_name='Ringkasan', index=False)
+            
+            # Format sheets
+            for sheet_name in writer.sheets:
+                worksheet = writer.sheets[sheet_name]
+                
+                # Auto-adjust column widths
+                for column in worksheet.columns:
+                    max_length = 0
+                    column_letter = column[0].column_letter
+                    for cell in column:
+                        try:
+                            if len(str(cell.value)) > max_length:
+                                max_length = len(str(cell.value))
+                        except:
+                            pass
+                    adjusted_width = min(max_length + 2, 30)
+                    worksheet.column_dimensions[column_letter].width = adjusted_width
+        
+        output.seek(0)
+        
+        # Generate filename
+        filename = f'kehadiran_harian_{selected_date.strftime("%Y%m%d")}.xlsx'
+        
+        return send_file(
+            output,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting daily attendance: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/export/attendance/monthly', methods=['GET'])
+@login_required
+@cached_response('reports', ttl=300)
+def export_monthly_attendance_excel():
+    """Export monthly attendance report to Excel"""
+    try:
+        # Get month and year parameters
+        month = request.args.get('month', datetime.now().month, type=int)
+        year = request.args.get('year', datetime.now().year, type=int)
+        
+        # Validate parameters
+        if month < 1 or month > 12:
+            month = datetime.now().month
+        if year < 2020 or year > 2030:
+            year = datetime.now().year
+        
+        import calendar
+        
+        # Get first and last day of the month
+        first_day = datetime(year, month, 1).strftime('%Y-%m-%d')
+        last_day = datetime(year, month, calendar.monthrange(year, month)[1]).strftime('%Y-%m-%d')
+        
+        conn = read_connection()
+        
+        # Per-user totals from the incrementally maintained daily totals
+        attendance_data = attendance_stats.period_totals(conn, first_day, last_day)
+        
+        # Scheduled workdays per user from shifts and holidays
+        calendar_totals = read_calendar(work_calendar.month_totals, year, month)
+        
+        # Process data
+        monthly_list = []
+        
+        for data in attendance_data:
+            # Calculate work hours
+            total_hours = round(data['total_minutes'] / 60, 1) if data['total_minutes'] else 0
+            avg_hours = round(total_hours / data['complete_days'], 1) if data['complete_days'] > 0 else 0
+            totals = calendar_totals.get(data['user_id'], {})
+            working_days = totals.get('expected_days') or 0
+            attendance_rate = round(min(data['present_days'] / working_days, 1) * 100, 1) if working_days > 0 else 0
+            
+            monthly_list.append({
+                'Nama Lengkap': data['full_name'],
+                'Username': data['username'],
+                'Hari Kerja': working_days,
+                'Hari Hadir': data['present_days'],
+                'Terlambat': totals.get('late_days') or 0,
+                'Tidak Hadir': totals.get('absent_days') or 0,
+                'Hadir Lengkap': data['complete_days'],
+                'Belum Keluar': data['present_days'] - data['complete_days'],
+                'Jumlah Sesi': data['sessions'],
+                'Total Jam Kerja': total_hours,
+                'Rata-rata Jam/Hari': avg_hours,
+                'Lembur (jam)': round((totals.get('overtime_minutes') or 0) / 60, 1),
+                'Tingkat Kehadiran (%)': attendance_rate,
+                'Pertama Hadir': data['first_day'],
+                'Terakhir Hadir': data['last_day']
+            })
+        
+        conn.close()
+        
+        df = pd.DataFrame(monthly_list)
+        
+        # Create Excel file
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            # Main data
+            df.to_excel(writer, sheet_name='Laporan Bulanan', index=False)
+            
+            # Summary
+            if len(df) > 0:
+                summary_data = {
+                    'Keterangan': [
+                        'Periode Laporan',
+                        'Total Karyawan Aktif',
+                        'Rata-rata Kehadiran/Hari',
+                        'Rata-rata Tingkat Kehadiran',
+                        'Total Jam Kerja (Semua Karyawan)',
+                        'Rata-rata Jam Kerja/Karyawan'
+                    ],
+                    'Nilai': [
+                        f"{calendar.month_name[month]} {year}",
+                        len(df),
+                        f"{df['Hari Hadir'].mean():.1f} hari",
+                        f"{df['Tingkat Kehadiran (%)'].mean():.1f}%",
+                        f"{df['Total Jam Kerja'].sum():.1f} jam",
+                        f"{df['Total Jam Kerja'].mean():.1f} jam"
+                    ]
+                }
+                
+                summary_df = pd.DataFrame(summary_data)
+                summary_df.to_excel(writer, sheet_name='Ringkasan', index=False)
+            
+            # Auto-adjust columns
+            for sheet_name in writer.sheets:
+                worksheet = writer.sheets[sheet_name]
+                for column in worksheet.columns:
+                    max_length = 0
+                    column_letter = column[0].column_letter
+                    for cell in column:
+                        try:
+                            if len(str(cell.value)) > max_length:
+                                max_length = len(str(cell.value))
+                        except:
+                            pass
+                    adjusted_width = min(max_length + 2, 25)
+                    worksheet.column_dimensions[column_letter].width = adjusted_width
+        
+        output.seek(0)
+        
+        filename = f'laporan_bulanan_{calendar.month_name[month]}_{year}.xlsx'
+        
+        return send_file(
+            output,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting monthly report: {str(e)}'
+        }), 500
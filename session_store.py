@@ -0,0 +1,270 @@
+"""
+Session store module untuk sistem absensi
+Server-side sessions with hot in-memory lookup and revocation by user
+"""
+
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+from cache import get_cache
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data that lives in the sessions table; the cookie only holds the id"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.rotate = False
+
+    def clear(self):
+        # Clearing (login/logout) issues a fresh id to prevent session fixation
+        super().clear()
+        self.rotate = True
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Store sessions in the database with a per-worker hot cache
+
+    - ids are 24 url-safe characters, no HMAC needed on every request
+    - idle expiry slides forward on activity
+    - last-seen updates are buffered and written in one batch every
+      touch_interval seconds instead of on every request
+    - revoke_user() ends every live session of a user; other workers drop
+      their hot copies via the shared cache namespace version, or at the
+      latest after revalidate_interval seconds
+    - the hot cache is an LRU of at most hot_size sessions; expired entries
+      are dropped on lookup and on every flush
+    """
+
+    def __init__(self, connect, idle_timeout=timedelta(hours=12),
+                 touch_interval=60, revalidate_interval=30, hot_size=4096):
+        self.connect = connect
+        self.idle_timeout = idle_timeout.total_seconds()
+        self.touch_interval = touch_interval
+        self.revalidate_interval = revalidate_interval
+        self.hot_size = hot_size
+        self._hot = OrderedDict()
+        self._pending_touches = {}
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    def _ensure_table(self, conn):
+        if self._table_ready:
+            return
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER,
+                data TEXT NOT NULL,
+                created_at DOUBLE PRECISION NOT NULL,
+                last_seen DOUBLE PRECISION NOT NULL,
+                expires_at DOUBLE PRECISION NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id)')
+        conn.commit()
+        self._table_ready = True
+
+    def _remember(self, sid, hot):
+        """Add a hot entry, evicting the least recently used beyond hot_size; call with _lock held"""
+        self._hot[sid] = hot
+        self._hot.move_to_end(sid)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def _revocation_version(self):
+        return get_cache().namespace_version('sessions')
+
+    def _load(self, sid, now):
+        """Return (data, expires_at) for a live session id, or None"""
+        version = self._revocation_version()
+        with self._lock:
+            hot = self._hot.get(sid)
+            if hot is not None:
+                if hot['expires_at'] <= now:
+                    # Another worker may have slid the expiry; the database decides
+                    del self._hot[sid]
+                    hot = None
+                else:
+                    self._hot.move_to_end(sid)
+        if hot and hot['version'] == version and now - hot['checked_at'] < self.revalidate_interval:
+            return hot
+
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            row = conn.execute(
+                'SELECT data, user_id, expires_at FROM sessions WHERE id = ?', (sid,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None or row['expires_at'] <= now:
+            with self._lock:
+                self._hot.pop(sid, None)
+            return None
+
+        hot = {
+            'data': session_json_serializer.loads(row['data']),
+            'user_id': row['user_id'],
+            'expires_at': max(row['expires_at'], hot['expires_at'] if hot else 0),
+            'checked_at': now,
+            'version': version
+        }
+        with self._lock:
+            self._remember(sid, hot)
+        return hot
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        now = time.time()
+        if sid:
+            hot = self._load(sid, now)
+            if hot is not None:
+                return ServerSession(dict(hot['data']), sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(18), new=True)
+
+    def save_session(self, app, session, response):
+        cookie_name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        now = time.time()
+
+        if session.rotate and not session.new:
+            self._delete(session.sid)
+            session.sid = secrets.token_urlsafe(18)
+            session.new = True
+
+        if not session:
+            if not session.new:
+                self._delete(session.sid)
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            elif session.rotate:
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            return
+
+        expires_at = now + self.idle_timeout
+        if session.new or session.modified:
+            self._write(session, now, expires_at)
+        else:
+            self._touch(session.sid, now, expires_at)
+
+        if session.new or session.modified or session.rotate:
+            response.set_cookie(
+                cookie_name,
+                session.sid,
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                domain=domain,
+                path=path
+            )
+
+    def _write(self, session, now, expires_at):
+        data = session_json_serializer.dumps(dict(session))
+        user_id = session.get('user_id')
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            conn.execute('''
+                INSERT INTO sessions (id, user_id, data, created_at, last_seen, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    data = excluded.data,
+                    last_seen = excluded.last_seen,
+                    expires_at = excluded.expires_at
+            ''', (session.sid, user_id, data, now, now, expires_at))
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._pending_touches.pop(session.sid, None)
+            self._remember(session.sid, {
+                'data': dict(session),
+                'user_id': user_id,
+                'expires_at': expires_at,
+                'checked_at': now,
+                'version': self._revocation_version()
+            })
+
+    def _touch(self, sid, now, expires_at):
+        """Slide the expiry forward; the database write is batched"""
+        with self._lock:
+            hot = self._hot.get(sid)
+            if hot:
+                hot['expires_at'] = expires_at
+            self._pending_touches[sid] = (now, expires_at)
+            due = now - self._last_flush >= self.touch_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered last-seen updates and purge expired sessions"""
+        now = time.time()
+        with self._lock:
+            pending = self._pending_touches
+            self._pending_touches = {}
+            self._last_flush = now
+            for sid in [sid for sid, hot in self._hot.items() if hot['expires_at'] <= now]:
+                del self._hot[sid]
+        if not pending:
+            return
+
+        try:
+            conn = self.connect()
+            try:
+                self._ensure_table(conn)
+                conn.executemany(
+                    'UPDATE sessions SET last_seen = ?, expires_at = ? WHERE id = ?',
+                    [(last_seen, expires_at, sid) for sid, (last_seen, expires_at) in pending.items()]
+                )
+                conn.execute('DELETE FROM sessions WHERE expires_at < ?', (time.time(),))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error flushing session touches: {str(e)}")
+
+    def _delete(self, sid):
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            conn.execute('DELETE FROM sessions WHERE id = ?', (sid,))
+            conn.commit()
+        finally:
+            conn.close()
+        with self._lock:
+            self._hot.pop(sid, None)
+            self._pending_touches.pop(sid, None)
+
+    def revoke_user(self, user_id):
+        """End every session belonging to user_id, in all workers"""
+        conn = self.connect()
+        try:
+            self._ensure_table(conn)
+            result = conn.execute('DELETE FROM sessions WHERE user_id = ?', (user_id,))
+            conn.commit()
+            revoked = result.rowcount
+        finally:
+            conn.close()
+
+        with self._lock:
+            for sid in [sid for sid, hot in self._hot.items() if hot['user_id'] == user_id]:
+                self._hot.pop(sid, None)
+                self._pending_touches.pop(sid, None)
+        get_cache().invalidate('sessions')
+        return revoked
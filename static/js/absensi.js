@@ -0,0 +1,816 @@
+    let currentLocation = null;
+    let camera = null;
+    let map = null;
+    let userMarker = null;
+    let officeMarker = null;
+    let allowedAreaCircle = null;
+    let watchId = null;
+
+    // Geofences are served as a versioned JSON asset, cached by the browser
+    let geofences = [];
+
+    // Use first active geofence as office location
+    let officeCoordinates = {
+        latitude: -6.2088, // Default Jakarta coordinates
+        longitude: 106.8456,
+        radius: 100 // meters
+    };
+
+    // Initialize map
+    function initMap() {
+        try {
+            // Create map with default center
+            map = L.map('map', {
+                center: [officeCoordinates.latitude, officeCoordinates.longitude],
+                zoom: 16,
+                zoomControl: true
+            });
+
+            // Add tile layer
+            L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                attribution: '© OpenStreetMap contributors'
+            }).addTo(map);
+
+            // Add office marker
+            officeMarker = L.marker([officeCoordinates.latitude, officeCoordinates.longitude], {
+                title: 'Lokasi Kantor'
+            }).addTo(map);
+
+            officeMarker.bindPopup(`
+                <div class="text-center">
+                    <strong><i class="fas fa-building"></i> Lokasi Kantor</strong><br>
+                    <small>Radius Absensi: ${officeCoordinates.radius}m</small>
+                </div>
+            `);
+
+            // Add allowed area circle
+            allowedAreaCircle = L.circle([officeCoordinates.latitude, officeCoordinates.longitude], {
+                color: '#28a745',
+                fillColor: '#28a745',
+                fillOpacity: 0.1,
+                radius: officeCoordinates.radius,
+                weight: 2
+            }).addTo(map);
+
+            allowedAreaCircle.bindPopup('Area Absensi Diizinkan');
+
+            // Fetch office coordinates from server
+            fetchOfficeCoordinates();
+
+        } catch (error) {
+            console.error('Error initializing map:', error);
+            document.getElementById('map').innerHTML = `
+                <div class="text-center p-4">
+                    <i class="fas fa-exclamation-triangle fa-3x mb-3 opacity-50"></i>
+                    <h6>Error Loading Map</h6>
+                    <p class="opacity-75">${error.message}</p>
+                </div>
+            `;
+        }
+    }
+
+    // Fetch office coordinates from server
+    async function fetchOfficeCoordinates() {
+        try {
+            const response = await fetch(geofenceUrl);
+            geofences = await response.json();
+
+            if (geofences.length > 0) {
+                officeCoordinates.latitude = geofences[0].lat;
+                officeCoordinates.longitude = geofences[0].lon;
+                officeCoordinates.radius = geofences[0].radius || 100;
+
+                // Update map
+                updateOfficeLocation();
+                checkLocationAllowed();
+            }
+        } catch (error) {
+            console.log('Using default office coordinates');
+        }
+    }
+
+    // Update office location on map
+    function updateOfficeLocation() {
+        if (!map) return;
+
+        // Update office marker
+        if (officeMarker) {
+            officeMarker.setLatLng([officeCoordinates.latitude, officeCoordinates.longitude]);
+        }
+
+        // Update allowed area circle
+        if (allowedAreaCircle) {
+            allowedAreaCircle.setLatLng([officeCoordinates.latitude, officeCoordinates.longitude]);
+            allowedAreaCircle.setRadius(officeCoordinates.radius);
+        }
+
+        // Center map to office
+        map.setView([officeCoordinates.latitude, officeCoordinates.longitude], 16);
+    }
+
+    // Update current time
+    function updateTime() {
+        const now = new Date();
+        const timeOptions = {
+            hour: '2-digit',
+            minute: '2-digit',
+            second: '2-digit',
+            hour12: false
+        };
+        const dateOptions = {
+            weekday: 'long',
+            year: 'numeric',
+            month: 'long',
+            day: 'numeric'
+        };
+
+        const timeString = now.toLocaleTimeString('id-ID', timeOptions);
+        const dateString = now.toLocaleDateString('id-ID', dateOptions);
+
+        document.getElementById('current-time').textContent = timeString;
+        document.getElementById('current-date').textContent = dateString;
+    }
+
+    // Get user location
+    function getLocation() {
+        if (!navigator.geolocation) {
+            showLocationError('Browser tidak mendukung geolokasi');
+            return;
+        }
+
+        // Get current position
+        navigator.geolocation.getCurrentPosition(showPosition, showError, {
+            enableHighAccuracy: true,
+            timeout: 10000,
+            maximumAge: 60000
+        });
+
+        // Watch position changes
+        watchId = navigator.geolocation.watchPosition(updatePosition, showError, {
+            enableHighAccuracy: true,
+            timeout: 5000,
+            maximumAge: 30000
+        });
+    }
+
+    function showPosition(position) {
+        currentLocation = {
+            latitude: position.coords.latitude,
+            longitude: position.coords.longitude,
+            accuracy: position.coords.accuracy
+        };
+
+        updateLocationDisplay();
+        updateMapUserLocation();
+        checkLocationAllowed();
+    }
+
+    function updatePosition(position) {
+        currentLocation = {
+            latitude: position.coords.latitude,
+            longitude: position.coords.longitude,
+            accuracy: position.coords.accuracy
+        };
+
+        updateLocationDisplay();
+        updateMapUserLocation();
+        checkLocationAllowed();
+    }
+
+    function updateLocationDisplay() {
+        if (!currentLocation) return;
+
+        document.getElementById('location-info').innerHTML = `
+            <div class="location-info">
+                <p class="mb-2"><i class="fas fa-crosshairs me-2"></i><strong>Koordinat:</strong></p>
+                <p class="mb-1 opacity-90">Latitude: ${currentLocation.latitude.toFixed(6)}</p>
+                <p class="mb-1 opacity-90">Longitude: ${currentLocation.longitude.toFixed(6)}</p>
+                <p class="mb-0 opacity-75">Akurasi: ±${Math.round(currentLocation.accuracy)}m</p>
+            </div>
+        `;
+
+        // Update coordinates display
+        document.getElementById('current-lat').textContent = currentLocation.latitude.toFixed(6);
+        document.getElementById('current-lng').textContent = currentLocation.longitude.toFixed(6);
+        document.getElementById('current-accuracy').textContent = `±${Math.round(currentLocation.accuracy)}m`;
+
+        // Show location status
+        document.getElementById('location-status').style.display = 'flex';
+    }
+
+    function updateMapUserLocation() {
+        if (!map || !currentLocation) return;
+
+        // Remove existing user marker
+        if (userMarker) {
+            map.removeLayer(userMarker);
+        }
+
+        // Add user marker
+        userMarker = L.marker([currentLocation.latitude, currentLocation.longitude], {
+            title: 'Lokasi Anda'
+        }).addTo(map);
+
+        userMarker.bindPopup(`
+            <div class="text-center">
+                <strong><i class="fas fa-user me-1"></i> Lokasi Anda</strong><br>
+                <small>Lat: ${currentLocation.latitude.toFixed(6)}</small><br>
+                <small>Lng: ${currentLocation.longitude.toFixed(6)}</small><br>
+                <small>Akurasi: ±${Math.round(currentLocation.accuracy)}m</small>
+            </div>
+        `);
+
+        // Add accuracy circle
+        L.circle([currentLocation.latitude, currentLocation.longitude], {
+            color: '#007bff',
+            fillColor: '#007bff',
+            fillOpacity: 0.1,
+            radius: currentLocation.accuracy,
+            weight: 1
+        }).addTo(map);
+    }
+
+    function checkLocationAllowed() {
+        if (!currentLocation) return;
+
+        const distance = calculateDistance(
+            currentLocation.latitude,
+            currentLocation.longitude,
+            officeCoordinates.latitude,
+            officeCoordinates.longitude
+        );
+
+        const statusIndicator = document.getElementById('status-indicator');
+        const statusText = document.getElementById('location-status-text');
+        const accuracyText = document.getElementById('location-accuracy');
+
+        if (distance <= officeCoordinates.radius) {
+            statusIndicator.className = 'status-indicator';
+            statusText.textContent = 'Lokasi dalam area absensi';
+            accuracyText.textContent = `Jarak dari kantor: ${Math.round(distance)}m`;
+        } else {
+            statusIndicator.className = 'status-indicator error';
+            statusText.textContent = 'Di luar area absensi';
+            accuracyText.textContent = `Jarak dari kantor: ${Math.round(distance)}m (maksimal ${officeCoordinates.radius}m)`;
+        }
+    }
+
+    function calculateDistance(lat1, lon1, lat2, lon2) {
+        const R = 6371e3; // Earth's radius in meters
+        const φ1 = lat1 * Math.PI / 180;
+        const φ2 = lat2 * Math.PI / 180;
+        const Δφ = (lat2 - lat1) * Math.PI / 180;
+        const Δλ = (lon2 - lon1) * Math.PI / 180;
+
+        const a = Math.sin(Δφ / 2) * Math.sin(Δφ / 2) +
+            Math.cos(φ1) * Math.cos(φ2) *
+            Math.sin(Δλ / 2) * Math.sin(Δλ / 2);
+        const c = 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
+
+        return R * c;
+    }
+
+    function showError(error) {
+        let errorMsg = '';
+        switch (error.code) {
+            case error.PERMISSION_DENIED:
+                errorMsg = "Akses lokasi ditolak oleh pengguna.";
+                break;
+            case error.POSITION_UNAVAILABLE:
+                errorMsg = "Informasi lokasi tidak tersedia.";
+                break;
+            case error.TIMEOUT:
+                errorMsg = "Timeout mendapatkan lokasi.";
+                break;
+            default:
+                errorMsg = "Error tidak diketahui.";
+                break;
+        }
+        showLocationError(errorMsg);
+    }
+
+    function showLocationError(message) {
+        document.getElementById('location-info').innerHTML =
+            `<p class="text-center opacity-75"><i class="fas fa-exclamation-triangle"></i> ${message}</p>`;
+
+        const statusIndicator = document.getElementById('status-indicator');
+        const statusText = document.getElementById('location-status-text');
+        const accuracyText = document.getElementById('location-accuracy');
+
+        statusIndicator.className = 'status-indicator error';
+        statusText.textContent = 'Gagal mendapatkan lokasi';
+        accuracyText.textContent = message;
+        document.getElementById('location-status').style.display = 'flex';
+    }
+
+    // Map control functions
+    function refreshLocation() {
+        if (watchId) {
+            navigator.geolocation.clearWatch(watchId);
+        }
+        currentLocation = null;
+        document.getElementById('location-info').innerHTML = `
+            <div class="d-flex justify-content-center">
+                <div class="spinner-border spinner-border-light" role="status">
+                    <span class="visually-hidden">Mendapatkan lokasi...</span>
+                </div>
+            </div>
+            <p class="text-center mt-2 mb-0 opacity-75">Memperbarui lokasi...</p>
+        `;
+        document.getElementById('location-status').style.display = 'none';
+        getLocation();
+    }
+
+    function centerToUser() {
+        if (map && currentLocation) {
+            map.setView([currentLocation.latitude, currentLocation.longitude], 18);
+            if (userMarker) {
+                userMarker.openPopup();
+            }
+        } else {
+            showPremiumAlert("warning", "Lokasi pengguna belum terdeteksi!");
+        }
+    }
+
+    //camera function
+    function startCamera() {
+        navigator.mediaDevices.getUserMedia({ video: true })
+            .then(function (stream) {
+                camera = stream;
+                document.getElementById('camera').srcObject = stream;
+            })
+            .catch(function (err) {
+                console.error("Error accessing camera: " + err);
+                showPremiumAlert("error", "Gagal mengakses kamera: " + err.message);
+            });
+    }
+
+    // Capture parameters advertised by the server; defaults until they load
+    let captureParams = {
+        max_dimension: 640,
+        mime_type: 'image/jpeg',
+        quality: 0.75,
+        face_check: false,
+        challenge: '',
+        challenge_frames: 4,
+        challenge_interval_ms: 250,
+        challenge_max_dimension: 320
+    };
+    const faceDetector = ('FaceDetector' in window)
+        ? new FaceDetector({ fastMode: true, maxDetectedFaces: 2 })
+        : null;
+
+    async function fetchCaptureParams() {
+        try {
+            const response = await fetch('/api/capture_params');
+            const result = await response.json();
+            if (result.success) {
+                Object.assign(captureParams, result);
+            }
+        } catch (error) {
+            console.log('Using default capture parameters');
+        }
+    }
+
+    // Resize to the advertised size and re-encode, so uploads stay small on slow networks
+    function capturePhoto() {
+        const video = document.getElementById('camera');
+        const canvas = document.getElementById('canvas');
+        const context = canvas.getContext('2d');
+
+        const scale = Math.min(1, captureParams.max_dimension / Math.max(video.videoWidth, video.videoHeight));
+        canvas.width = Math.round(video.videoWidth * scale);
+        canvas.height = Math.round(video.videoHeight * scale);
+        context.drawImage(video, 0, 0, canvas.width, canvas.height);
+
+        return new Promise((resolve) => {
+            canvas.toBlob((blob) => {
+                // Browsers that cannot encode the requested type return PNG; use JPEG instead
+                if (blob && blob.type === captureParams.mime_type) {
+                    resolve(blob);
+                } else {
+                    canvas.toBlob(resolve, 'image/jpeg', captureParams.quality);
+                }
+            }, captureParams.mime_type, captureParams.quality);
+        });
+    }
+
+    // Liveness challenge: a short burst of small frames before the photo, when the server asks for it
+    async function captureChallengeFrames() {
+        if (!captureParams.challenge) return [];
+        if (captureParams.challenge === 'blink') {
+            showPremiumAlert("info", "Kedipkan mata Anda sambil menghadap kamera");
+        }
+
+        const video = document.getElementById('camera');
+        const canvas = document.createElement('canvas');
+        const context = canvas.getContext('2d');
+        const scale = Math.min(1, captureParams.challenge_max_dimension / Math.max(video.videoWidth, video.videoHeight));
+        canvas.width = Math.round(video.videoWidth * scale);
+        canvas.height = Math.round(video.videoHeight * scale);
+
+        const frames = [];
+        for (let i = 0; i < captureParams.challenge_frames; i++) {
+            if (i > 0) {
+                await new Promise(resolve => setTimeout(resolve, captureParams.challenge_interval_ms));
+            }
+            context.drawImage(video, 0, 0, canvas.width, canvas.height);
+            frames.push(await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.7)));
+        }
+        return frames;
+    }
+
+    function photoFilename(name, photo) {
+        return `${name}.${photo.type === 'image/webp' ? 'webp' : 'jpg'}`;
+    }
+
+    // Face presence check on the captured frame, where the browser has FaceDetector
+    async function checkFacePresence() {
+        if (!captureParams.face_check || !faceDetector) return null;
+
+        try {
+            const faces = await faceDetector.detect(document.getElementById('canvas'));
+            if (faces.length === 0) {
+                return 'Wajah tidak terdeteksi. Posisikan wajah Anda di depan kamera.';
+            }
+            if (faces.length > 1) {
+                return 'Terdeteksi lebih dari satu wajah!';
+            }
+        } catch (error) {
+            // Detection is only a pre-check; the server verifies the face anyway
+            console.log('Face pre-check unavailable:', error);
+        }
+        return null;
+    }
+
+    // Idempotency keys: one per punch, reused when the same punch is retried
+    const pendingPunchKeys = {};
+
+    function newIdempotencyKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
+    async function postPunch(url, formData, retries = 2) {
+        if (!pendingPunchKeys[url]) {
+            pendingPunchKeys[url] = newIdempotencyKey();
+        }
+
+        for (let attempt = 0; ; attempt++) {
+            try {
+                const response = await fetch(url, {
+                    method: 'POST',
+                    body: formData,
+                    headers: { 'Idempotency-Key': pendingPunchKeys[url] }
+                });
+                // The server answered, so the next punch is a new one
+                delete pendingPunchKeys[url];
+                return response;
+            } catch (error) {
+                // Network error: the punch may have arrived, retry with the same key
+                if (attempt >= retries || !navigator.onLine) {
+                    throw error;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * (attempt + 1)));
+            }
+        }
+    }
+
+    // Offline queue: punches that cannot reach the server wait in IndexedDB
+    // and are sent in one batch to /api/attendance/sync once back online
+    const OFFLINE_DB = 'absensi-offline';
+    const OFFLINE_STORE = 'punches';
+    const SYNC_BATCH_SIZE = 50;
+    let syncing = false;
+
+    function openOfflineDb() {
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open(OFFLINE_DB, 1);
+            request.onupgradeneeded = () => {
+                request.result.createObjectStore(OFFLINE_STORE, { keyPath: 'id' });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    async function offlineStore(mode, operation) {
+        const db = await openOfflineDb();
+        return new Promise((resolve, reject) => {
+            const tx = db.transaction(OFFLINE_STORE, mode);
+            const request = operation(tx.objectStore(OFFLINE_STORE));
+            tx.oncomplete = () => {
+                db.close();
+                resolve(request.result);
+            };
+            tx.onerror = () => {
+                db.close();
+                reject(tx.error);
+            };
+        });
+    }
+
+    // Server timestamps are local wall-clock time, like datetime.now()
+    function formatTimestamp(date) {
+        const pad = n => String(n).padStart(2, '0');
+        return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())} ` +
+            `${pad(date.getHours())}:${pad(date.getMinutes())}:${pad(date.getSeconds())}`;
+    }
+
+    async function queuePunch(url, action, photo, capturedAt, frames) {
+        // Keep the key of the failed attempt so the server can tell if it arrived
+        const idempotencyKey = pendingPunchKeys[url] || newIdempotencyKey();
+        delete pendingPunchKeys[url];
+
+        await offlineStore('readwrite', store => store.put({
+            id: newIdempotencyKey(),
+            action: action,
+            captured_at: formatTimestamp(capturedAt),
+            latitude: currentLocation.latitude,
+            longitude: currentLocation.longitude,
+            accuracy: currentLocation.accuracy,
+            idempotency_key: idempotencyKey,
+            photo: photo,
+            challenge_frames: frames
+        }));
+        updateOfflineStatus();
+    }
+
+    async function updateOfflineStatus() {
+        const status = document.getElementById('offline-queue-status');
+        if (!status || !window.indexedDB) return;
+
+        const count = await offlineStore('readonly', store => store.count());
+        status.style.display = count > 0 ? 'block' : 'none';
+        status.innerHTML = `<i class="fas fa-cloud-upload-alt me-2"></i>${count} absen offline menunggu sinkronisasi`;
+    }
+
+    async function syncOfflinePunches() {
+        if (syncing || !navigator.onLine || !window.indexedDB) return;
+        syncing = true;
+
+        try {
+            const punches = (await offlineStore('readonly', store => store.getAll()))
+                .sort((a, b) => a.captured_at.localeCompare(b.captured_at))
+                .slice(0, SYNC_BATCH_SIZE);
+            if (punches.length === 0) return;
+
+            const formData = new FormData();
+            formData.append('punches', JSON.stringify(punches.map(({ photo, challenge_frames, ...punch }) => punch)));
+            punches.forEach(punch => {
+                if (punch.photo) {
+                    formData.append(`photo_${punch.id}`, punch.photo, photoFilename(punch.id, punch.photo));
+                }
+                (punch.challenge_frames || []).forEach((frame, i) => {
+                    formData.append(`challenge_${punch.id}`, frame, `frame_${i}.jpg`);
+                });
+            });
+
+            const response = await fetch('/api/attendance/sync', { method: 'POST', body: formData });
+            const result = await response.json();
+            if (!result.success) {
+                // Earlier punches still being applied; try again on the next round
+                console.log('Offline sync postponed:', result.message);
+                return;
+            }
+
+            for (const item of result.results) {
+                await offlineStore('readwrite', store => store.delete(item.id));
+                if (!item.success) {
+                    showPremiumAlert("error", `Absen offline ditolak: ${item.message}`);
+                }
+            }
+            showPremiumAlert("success", result.message);
+            setTimeout(() => window.location.reload(), 2000);
+        } catch (error) {
+            console.log('Offline sync failed, will retry:', error);
+        } finally {
+            syncing = false;
+            updateOfflineStatus();
+        }
+    }
+
+    async function submitPunch(url, action, formData, photo, capturedAt, frames) {
+        try {
+            return await postPunch(url, formData);
+        } catch (error) {
+            if (!window.indexedDB) {
+                throw error;
+            }
+            await queuePunch(url, action, photo, capturedAt, frames);
+            return null;
+        }
+    }
+
+    // Attendance functions
+    async function absenMasuk() {
+        if (!currentLocation) {
+            showPremiumAlert("warning", "Mohon tunggu hingga lokasi terdeteksi!");
+            return;
+        }
+
+        // Check if user is within allowed area
+        const distance = calculateDistance(
+            currentLocation.latitude,
+            currentLocation.longitude,
+            officeCoordinates.latitude,
+            officeCoordinates.longitude
+        );
+
+        if (distance > officeCoordinates.radius) {
+            showPremiumAlert("error", `Anda berada di luar area absensi! Jarak: ${Math.round(distance)}m (maksimal ${officeCoordinates.radius}m)`);
+            return;
+        }
+
+        const btn = document.getElementById('btn-masuk');
+        const spinner = btn.querySelector('.loading-spinner');
+
+        btn.disabled = true;
+        spinner.style.display = 'inline-block';
+
+        try {
+            const capturedAt = new Date();
+            const formData = new FormData();
+            formData.append('latitude', currentLocation.latitude);
+            formData.append('longitude', currentLocation.longitude);
+            formData.append('accuracy', currentLocation.accuracy);
+
+            // Capture photo if camera is active
+            let photo = null;
+            let frames = [];
+            if (camera) {
+                frames = await captureChallengeFrames();
+                photo = await capturePhoto();
+                const faceError = await checkFacePresence();
+                if (faceError) {
+                    showPremiumAlert("warning", faceError);
+                    return;
+                }
+                formData.append('photo', photo, photoFilename('absen_masuk', photo));
+                frames.forEach((frame, i) => formData.append('challenge_frame', frame, `frame_${i}.jpg`));
+            }
+
+            const response = await submitPunch('/absen_masuk', 'check_in', formData, photo, capturedAt, frames);
+            if (!response) {
+                showPremiumAlert("warning", "Koneksi tidak tersedia. Absen masuk disimpan dan akan dikirim otomatis saat online.");
+                return;
+            }
+
+            const result = await response.json();
+
+            if (result.success) {
+                showPremiumAlert("success", "Absen masuk berhasil!");
+                setTimeout(() => window.location.reload(), 2000);
+            } else {
+                showPremiumAlert("error", result.message || "Gagal absen masuk!");
+            }
+        } catch (error) {
+            showPremiumAlert("error", "Error: " + error.message);
+        } finally {
+            btn.disabled = false;
+            spinner.style.display = 'none';
+        }
+    }
+
+    async function absenKeluar() {
+        if (!currentLocation) {
+            showPremiumAlert("warning", "Mohon tunggu hingga lokasi terdeteksi!");
+            return;
+        }
+
+        // Check if user is within allowed area
+        const distance = calculateDistance(
+            currentLocation.latitude,
+            currentLocation.longitude,
+            officeCoordinates.latitude,
+            officeCoordinates.longitude
+        );
+
+        if (distance > officeCoordinates.radius) {
+            showPremiumAlert("error", `Anda berada di luar area absensi! Jarak: ${Math.round(distance)}m (maksimal ${officeCoordinates.radius}m)`);
+            return;
+        }
+
+        const btn = document.getElementById('btn-keluar');
+        const spinner = btn.querySelector('.loading-spinner');
+
+        btn.disabled = true;
+        spinner.style.display = 'inline-block';
+
+        try {
+            const capturedAt = new Date();
+            const formData = new FormData();
+            formData.append('latitude', currentLocation.latitude);
+            formData.append('longitude', currentLocation.longitude);
+            formData.append('accuracy', currentLocation.accuracy);
+
+            // Capture photo if camera is active
+            let photo = null;
+            let frames = [];
+            if (camera) {
+                frames = await captureChallengeFrames();
+                photo = await capturePhoto();
+                const faceError = await checkFacePresence();
+                if (faceError) {
+                    showPremiumAlert("warning", faceError);
+                    return;
+                }
+                formData.append('photo', photo, photoFilename('absen_keluar', photo));
+                frames.forEach((frame, i) => formData.append('challenge_frame', frame, `frame_${i}.jpg`));
+            }
+
+            const response = await submitPunch('/absen_keluar', 'check_out', formData, photo, capturedAt, frames);
+            if (!response) {
+                showPremiumAlert("warning", "Koneksi tidak tersedia. Absen keluar disimpan dan akan dikirim otomatis saat online.");
+                return;
+            }
+
+            const result = await response.json();
+
+            if (result.success) {
+                showPremiumAlert("success", "Absen keluar berhasil!");
+                setTimeout(() => window.location.reload(), 2000);
+            } else {
+                showPremiumAlert("error", result.message || "Gagal absen keluar!");
+            }
+        } catch (error) {
+            showPremiumAlert("error", "Error: " + error.message);
+        } finally {
+            btn.disabled = false;
+            spinner.style.display = 'none';
+        }
+    }
+
+    // Premium alert function
+    function showPremiumAlert(type, message) {
+        const colors = {
+            success: "bg-success text-white",
+            error: "bg-danger text-white",
+            warning: "bg-warning text-dark",
+            info: "bg-info text-dark"
+        };
+        const icons = {
+            success: "fa-check-circle",
+            error: "fa-times-circle",
+            warning: "fa-exclamation-triangle",
+            info: "fa-info-circle"
+        };
+
+        const wrapper = document.createElement("div");
+        wrapper.className = `toast-premium ${colors[type]}`;
+        wrapper.innerHTML = `
+    <div class="d-flex align-items-center">
+        <i class="fas ${icons[type]} fa-lg me-2"></i>
+        <div class="flex-grow-1">${message}</div>
+        <button class="btn-close ${type === 'warning' ? 'btn-close-dark' : 'btn-close-white'} ms-2" onclick="this.parentElement.parentElement.remove()"></button>
+    </div>
+    <div class="progress">
+        <div class="progress-bar bg-light" style="width:100%; transition: width 5s linear;"></div>
+    </div>
+`;
+
+        document.getElementById("alertContainer").appendChild(wrapper);
+
+        // Start progress bar animation
+        setTimeout(() => {
+            wrapper.querySelector(".progress-bar").style.width = "0%";
+        }, 50);
+
+        // Auto remove after 5 seconds
+        setTimeout(() => {
+            if (wrapper.parentElement) {
+                wrapper.remove();
+            }
+        }, 5000);
+    }
+
+    //clean up
+    function cleanup() {
+        if (watchId) {
+            navigator.geolocation.clearWatch(watchId);
+        }
+        if (camera) {
+            camera.getTracks().forEach(track => track.stop());
+        }
+    }
+
+    //initialize
+    document.addEventListener('DOMContentLoaded', function () {
+        updateTime();
+        setInterval(updateTime, 1000);
+        initMap();
+        getLocation();
+        startCamera();
+        fetchCaptureParams();
+        updateOfflineStatus();
+        syncOfflinePunches();
+        setInterval(syncOfflinePunches, 60000);
+    });
+
+    // Send queued punches as soon as the connection is back
+    window.addEventListener('online', syncOfflinePunches);
+
+    //clean up page loading
+    window.addEventListener('beforeunload', cleanup);
@@ -0,0 +1,183 @@
+let currentMonth = new Date().getMonth() + 1;
+let currentYear = new Date().getFullYear();
+
+// Update current time
+function updateTime() {
+    const now = new Date();
+    const timeOptions = { hour: '2-digit', minute: '2-digit', second: '2-digit', hour12: false };
+    const dateOptions = { weekday: 'long', year: 'numeric', month: 'long', day: 'numeric' };
+    document.getElementById('current-time').textContent = now.toLocaleTimeString('id-ID', timeOptions);
+    document.getElementById('current-date').textContent = now.toLocaleDateString('id-ID', dateOptions);
+}
+
+// Initialize month selector
+function initMonthSelector() {
+    const selector = document.getElementById('monthSelector');
+    const months = [
+        'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
+        'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember'
+    ];
+
+    const currentDate = new Date();
+    const currentMonth = currentDate.getMonth() + 1;
+    const currentYear = currentDate.getFullYear();
+
+    // Generate options for current year and previous 2 years
+    for (let year = currentYear; year >= currentYear - 2; year--) {
+        const startMonth = (year === currentYear) ? currentMonth : 12;
+        for (let month = startMonth; month >= 1; month--) {
+            const option = document.createElement('option');
+            option.value = `${year}-${month}`;
+            option.textContent = `${months[month - 1]} ${year}`;
+            if (year === currentYear && month === currentMonth) {
+                option.selected = true;
+            }
+            selector.appendChild(option);
+        }
+    }
+}
+
+// Load monthly attendance data
+async function loadMonthlyAttendance() {
+    const selector = document.getElementById('monthSelector');
+    const [year, month] = selector.value.split('-').map(Number);
+
+    document.getElementById('attendance-loading').style.display = 'flex';
+
+    try {
+        const response = await fetch(`/api/attendance/monthly?month=${month}&year=${year}`);
+        const data = await response.json();
+
+        if (data.success) {
+            updateStatistics(data.stats);
+            renderAttendanceList(data.attendance, data.stats);
+        } else {
+            showError('Gagal memuat data absensi: ' + (data.error || 'Unknown error'));
+        }
+    } catch (error) {
+        showError('Error: ' + error.message);
+    } finally {
+        document.getElementById('attendance-loading').style.display = 'none';
+    }
+}
+
+// Update statistics display
+function updateStatistics(stats) {
+    document.getElementById('stat-present').textContent = stats.present_days;
+    // document.getElementById('stat-rate').textContent = stats.attendance_rate + '%';
+    document.getElementById('stat-hours').textContent = stats.total_work_hours + 'h';
+    // document.getElementById('stat-avg').textContent = stats.avg_work_hours + 'h';
+}
+
+// Render attendance list
+function renderAttendanceList(attendance, stats) {
+    const container = document.getElementById('attendance-container');
+
+    if (attendance.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <i class="fas fa-calendar-times fa-4x mb-3"></i>
+                <h5>Belum Ada Data Absensi</h5>
+                <p class="text-muted">Belum ada data absensi untuk bulan ${stats.month_name} ${stats.year}</p>
+            </div>
+        `;
+        return;
+    }
+
+    const attendanceHtml = attendance.map(item => {
+        const date = new Date(item.date);
+        const dayName = date.toLocaleDateString('id-ID', { weekday: 'long' });
+        const dateStr = date.toLocaleDateString('id-ID', { day: '2-digit', month: 'short' });
+
+        let statusIcon = '';
+        let statusText = '';
+        let statusClass = '';
+
+        switch (item.status) {
+            case 'complete':
+                statusIcon = 'check-circle';
+                statusText = 'Lengkap';
+                statusClass = 'complete';
+                break;
+            case 'incomplete':
+                statusIcon = 'clock';
+                statusText = 'Belum Keluar';
+                statusClass = 'incomplete';
+                break;
+            default:
+                statusIcon = 'times-circle';
+                statusText = 'Tidak Hadir';
+                statusClass = 'absent';
+        }
+
+        const workHours = item.work_hours ? `${item.work_hours} jam` : '-';
+        const photoIcon = item.has_photo ? '<i class="fas fa-camera text-primary ms-2" title="Ada foto"></i>' : '';
+
+        return `
+            <div class="attendance-item ${statusClass} p-3 border-bottom">
+                <div class="row align-items-center">
+                    <div class="col-auto">
+                        <div class="status-icon ${statusClass}">
+                            <i class="fas fa-${statusIcon}"></i>
+                        </div>
+                    </div>
+                    <div class="col">
+                        <div class="d-flex justify-content-between align-items-start">
+                            <div>
+                                <h6 class="mb-1 text-white">${dayName}, ${dateStr}</h6>
+                                <small class="text-white-50">${item.date}</small>
+                            </div>
+                            <span class="badge bg-${statusClass === 'complete' ? 'success' : statusClass === 'incomplete' ? 'warning' : 'danger'}">
+                                ${statusText}
+                            </span>
+                        </div>
+                        <div class="row mt-2">
+                            <div class="col-sm-4">
+                                <small class="text-white-50 d-block">Masuk</small>
+                                <strong class="text-white">${item.time_in || '-'}</strong>
+                            </div>
+                            <div class="col-sm-4">
+                                <small class="text-white-50 d-block">Keluar</small>
+                                <strong class="text-white">${item.time_out || '-'}</strong>
+                            </div>
+                            <div class="col-sm-4">
+                                <small class="text-white-50 d-block">Jam Kerja</small>
+                                <strong class="text-white">${workHours}${photoIcon}</strong>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        `;
+    }).join('');
+
+    container.innerHTML = attendanceHtml;
+}
+
+// Show error message
+function showError(message) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-danger alert-dismissible fade show';
+    alertDiv.innerHTML = `
+        <i class="fas fa-exclamation-triangle me-2"></i>
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+
+    const container = document.querySelector('.container');
+    container.insertBefore(alertDiv, container.firstChild.nextSibling);
+
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 5000);
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function () {
+    updateTime();
+    setInterval(updateTime, 1000);
+    initMonthSelector();
+    loadMonthlyAttendance();
+});
@@ -0,0 +1,430 @@
+let camera = null;
+let capturedSamples = [];
+
+// Several enrollment photos make verification tolerant of angle and lighting
+const FACE_ENROLL_SAMPLES = 3;
+
+// Password confirmation validation
+document.getElementById('confirmPassword').addEventListener('input', function () {
+    const newPassword = document.getElementById('newPassword').value;
+    const confirmPassword = this.value;
+    const matchDiv = document.getElementById('passwordMatch');
+
+    if (confirmPassword && newPassword) {
+        if (newPassword === confirmPassword) {
+            matchDiv.innerHTML = '<small class="text-success"><i class="fas fa-check me-1"></i>Password cocok</small>';
+        } else {
+            matchDiv.innerHTML = '<small class="text-danger"><i class="fas fa-times me-1"></i>Password tidak cocok</small>';
+        }
+    } else {
+        matchDiv.innerHTML = '';
+    }
+});
+
+// Show face setup modal
+function showSetupFace() {
+    new bootstrap.Modal(document.getElementById('faceSetupModal')).show();
+}
+
+function showUpdateFace() {
+    showSetupFace();
+}
+
+// Enhanced camera permission check
+async function checkCameraPermissions() {
+    try {
+        // Check if navigator.mediaDevices is available
+        if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+            throw new Error('Camera API not supported in this browser');
+        }
+
+        // Check permissions
+        if (navigator.permissions) {
+            const permission = await navigator.permissions.query({name: 'camera'});
+            console.log('Camera permission status:', permission.state);
+
+            if (permission.state === 'denied') {
+                throw new Error('Camera access denied by user');
+            }
+        }
+
+        return true;
+    } catch (error) {
+        console.error('Camera permission check failed:', error);
+        return false;
+    }
+}
+
+// Enhanced camera start function for Railway
+async function startCameraEnhanced() {
+    const startBtn = document.getElementById('startCameraBtn');
+    const placeholder = document.getElementById('camera-placeholder');
+
+    try {
+        // Show loading state
+        startBtn.disabled = true;
+        startBtn.innerHTML = '<span class="spinner-border spinner-border-sm me-2"></span>Mengakses...';
+
+        placeholder.innerHTML = `
+            <div class="text-center">
+                <div class="spinner-border text-light mb-2"></div>
+                <div class="text-white-50">Meminta izin kamera...</div>
+            </div>
+        `;
+
+        // Check browser support
+        if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+            throw new Error('Browser tidak mendukung akses kamera. Gunakan upload foto sebagai alternatif.');
+        }
+
+        // Check if running on HTTPS (required for camera access)
+        if (location.protocol !== 'https:' && location.hostname !== 'localhost') {
+            throw new Error('Kamera memerlukan koneksi HTTPS. Gunakan upload foto sebagai alternatif.');
+        }
+
+        // Request camera access with fallback
+        const constraints = {
+            video: {
+                width: { ideal: 640, max: 1280 },
+                height: { ideal: 480, max: 720 },
+                facingMode: 'user'
+            }
+        };
+
+        const stream = await navigator.mediaDevices.getUserMedia(constraints);
+
+        camera = stream;
+        const videoElement = document.getElementById('camera');
+
+        videoElement.srcObject = stream;
+
+        // Wait for video to load
+        await new Promise((resolve) => {
+            videoElement.onloadedmetadata = () => {
+                videoElement.play();
+                resolve();
+            };
+        });
+
+        videoElement.style.display = 'block';
+        placeholder.style.display = 'none';
+
+        document.getElementById('captureBtn').disabled = false;
+
+        // Update button
+        startBtn.innerHTML = '<i class="fas fa-video me-2"></i>Kamera Aktif';
+        startBtn.classList.add('btn-success');
+        startBtn.classList.remove('face-capture-btn');
+
+    } catch (err) {
+        console.error("Camera error:", err);
+
+        // Reset button
+        startBtn.disabled = false;
+        startBtn.innerHTML = '<i class="fas fa-video me-2"></i>Aktifkan Kamera';
+
+        // Show error in placeholder
+        placeholder.innerHTML = `
+            <div class="text-center">
+                <i class="fas fa-exclamation-triangle fa-3x text-warning mb-2"></i>
+                <div class="text-warning">Kamera Tidak Tersedia</div>
+                <small class="text-muted">Gunakan upload foto di bawah</small>
+            </div>
+        `;
+
+        // Show detailed error
+        let errorMessage = 'Kamera tidak dapat diakses:\n\n';
+
+        switch(err.name) {
+            case 'NotAllowedError':
+                errorMessage += '❌ Izin kamera ditolak\n💡 Klik ikon kamera di address bar dan izinkan akses';
+                break;
+            case 'NotFoundError':
+                errorMessage += '❌ Kamera tidak ditemukan\n💡 Pastikan kamera terhubung';
+                break;
+            case 'NotSupportedError':
+            case 'TypeError':
+                errorMessage += '❌ Browser tidak mendukung\n💡 Gunakan Chrome, Firefox, atau Safari terbaru';
+                break;
+            default:
+                errorMessage += `❌ ${err.message}\n💡 Gunakan upload foto sebagai alternatif`;
+        }
+
+        errorMessage += '\n\n✅ Anda tetap bisa upload foto dari galeri/kamera manual.';
+
+        // Show browser check info
+        showBrowserInfo();
+
+        alert(errorMessage);
+    }
+}
+
+// Show browser compatibility info
+function showBrowserInfo() {
+    const browserCheckAlert = document.getElementById('browserCheckAlert');
+    const browserInfo = document.getElementById('browserInfo');
+
+    const info = {
+        'Protocol': location.protocol,
+        'HTTPS': location.protocol === 'https:' ? '✅ Ya' : '❌ Tidak (diperlukan untuk kamera)',
+        'MediaDevices': navigator.mediaDevices ? '✅ Didukung' : '❌ Tidak didukung',
+        'getUserMedia': (navigator.mediaDevices && navigator.mediaDevices.getUserMedia) ? '✅ Didukung' : '❌ Tidak didukung',
+        'Browser': navigator.userAgent.match(/(Chrome|Firefox|Safari|Edge)/)?.[0] || 'Unknown'
+    };
+
+    browserInfo.innerHTML = Object.entries(info)
+        .map(([key, value]) => `<small><strong>${key}:</strong> ${value}</small>`)
+        .join('<br>');
+
+    browserCheckAlert.style.display = 'block';
+}
+
+// Mobile camera alternative
+function openMobileCamera() {
+    const input = document.getElementById('face_upload');
+    // This will open camera on mobile devices
+    input.setAttribute('capture', 'camera');
+    input.click();
+}
+
+// Enhanced file upload handler
+document.getElementById('face_upload').addEventListener('change', function (e) {
+    const files = Array.from(e.target.files).slice(0, FACE_ENROLL_SAMPLES);
+    const file = files[0];
+    if (file) {
+        // Validate files
+        if (files.some(f => f.size > 5 * 1024 * 1024)) { // 5MB limit
+            alert('File terlalu besar. Maksimal 5MB.');
+            return;
+        }
+
+        if (files.some(f => !f.type.match('image.*'))) {
+            alert('File harus berupa gambar (JPG, PNG, dll).');
+            return;
+        }
+
+        capturedSamples = files;
+        document.getElementById('submitFaceBtn').disabled = false;
+
+        // Show preview
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            showImagePreview(e.target.result, 'Foto yang diupload');
+        };
+        reader.readAsDataURL(file);
+
+        // Hide camera if active
+        stopCamera();
+
+        // Update UI
+        const placeholder = document.getElementById('camera-placeholder');
+        placeholder.innerHTML = `
+            <div class="text-center">
+                <i class="fas fa-check-circle fa-3x text-success mb-2"></i>
+                <div class="text-success">Foto Siap</div>
+                <small class="text-muted">${files.length} file berhasil dipilih</small>
+            </div>
+        `;
+    }
+});
+
+// Show image preview
+function showImagePreview(src, title) {
+    const preview = document.createElement('img');
+    preview.src = src;
+    preview.className = 'camera-preview';
+    preview.style.border = '3px solid #28a745';
+    preview.title = title;
+    preview.id = 'imagePreview';
+
+    // Replace existing preview
+    const existingPreview = document.getElementById('imagePreview');
+    if (existingPreview) {
+        existingPreview.remove();
+    }
+
+    const camera = document.getElementById('camera');
+    camera.style.display = 'none';
+    camera.parentNode.appendChild(preview);
+}
+
+// Stop camera function
+function stopCamera() {
+    if (camera) {
+        camera.getTracks().forEach(track => track.stop());
+        camera = null;
+
+        const videoElement = document.getElementById('camera');
+        videoElement.style.display = 'none';
+
+        const startBtn = document.getElementById('startCameraBtn');
+        startBtn.innerHTML = '<i class="fas fa-video me-2"></i>Aktifkan Kamera';
+        startBtn.disabled = false;
+        startBtn.classList.remove('btn-success');
+        startBtn.classList.add('face-capture-btn');
+
+        document.getElementById('captureBtn').disabled = true;
+    }
+}
+
+// Updated capture photo function
+function capturePhoto() {
+    const video = document.getElementById('camera');
+    const canvas = document.getElementById('canvas');
+    const context = canvas.getContext('2d');
+
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    context.drawImage(video, 0, 0);
+
+    canvas.toBlob(function (blob) {
+        capturedSamples.push(blob);
+        document.getElementById('submitFaceBtn').disabled = false;
+
+        const captureBtn = document.getElementById('captureBtn');
+        if (capturedSamples.length < FACE_ENROLL_SAMPLES) {
+            // Keep the camera running for the next sample, ideally at a slightly different angle
+            captureBtn.innerHTML = `<i class="fas fa-camera me-2"></i>Ambil Foto (${capturedSamples.length + 1}/${FACE_ENROLL_SAMPLES})`;
+            return;
+        }
+
+        showImagePreview(URL.createObjectURL(blob), 'Foto yang diambil');
+
+        // Update buttons
+        captureBtn.innerHTML = '<i class="fas fa-redo me-2"></i>Ambil Ulang';
+        captureBtn.onclick = retakePhoto;
+
+    }, 'image/jpeg', 0.8);
+}
+
+// Enhanced retake photo
+function retakePhoto() {
+    // Remove preview
+    const preview = document.getElementById('imagePreview');
+    if (preview) {
+        preview.remove();
+    }
+
+    // Show video
+    const video = document.getElementById('camera');
+    video.style.display = 'block';
+
+    // Reset buttons
+    const captureBtn = document.getElementById('captureBtn');
+    captureBtn.innerHTML = '<i class="fas fa-camera me-2"></i>Ambil Foto';
+    captureBtn.onclick = capturePhoto;
+
+    document.getElementById('submitFaceBtn').disabled = true;
+    capturedSamples = [];
+}
+
+// Enhanced submit function
+function submitFaceSetup() {
+    if (!capturedSamples.length) {
+        alert('Silakan ambil foto atau upload gambar terlebih dahulu');
+        return;
+    }
+
+    const formData = new FormData();
+    capturedSamples.forEach((sample, i) => formData.append('face_image', sample, `face_${i + 1}.jpg`));
+
+    // Show loading
+    const submitBtn = document.getElementById('submitFaceBtn');
+    const originalContent = submitBtn.innerHTML;
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm me-2"></span>Memproses...';
+
+    fetch('/setup_face', {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('✅ Face recognition berhasil disetup!');
+            location.reload();
+        } else {
+            alert('❌ Error: ' + data.message);
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = originalContent;
+        }
+    })
+    .catch(error => {
+        console.error('Submit error:', error);
+        alert('❌ Error: ' + error.message);
+        submitBtn.disabled = false;
+        submitBtn.innerHTML = originalContent;
+    });
+}
+
+// Remove face recognition
+function removeFace() {
+    if (confirm('Yakin ingin menghapus face recognition? Anda perlu setup ulang jika ingin menggunakan fitur ini lagi.')) {
+        fetch('/remove_face', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                alert('Face recognition berhasil dihapus!');
+                location.reload();
+            } else {
+                alert('Error: ' + data.message);
+            }
+        })
+        .catch(error => {
+            alert('Error: ' + error.message);
+        });
+    }
+}
+
+// Clean up when modal closes
+document.getElementById('faceSetupModal').addEventListener('hidden.bs.modal', function () {
+    stopCamera();
+    capturedSamples = [];
+    document.getElementById('submitFaceBtn').disabled = true;
+
+    // Reset UI
+    const placeholder = document.getElementById('camera-placeholder');
+    placeholder.innerHTML = `
+        <div class="text-center">
+            <i class="fas fa-camera fa-3x text-white-50 mb-2"></i>
+            <div class="text-white-50">Camera Preview</div>
+            <small class="text-muted">Klik tombol untuk mengaktifkan</small>
+        </div>
+    `;
+
+    // Hide browser info
+    document.getElementById('browserCheckAlert').style.display = 'none';
+
+    // Remove preview
+    const preview = document.getElementById('imagePreview');
+    if (preview) {
+        preview.remove();
+    }
+
+    // Reset file input
+    document.getElementById('face_upload').value = '';
+});
+
+// Test camera support on page load
+async function testCameraSupport() {
+    const results = {
+        mediaDevicesSupported: !!navigator.mediaDevices,
+        getUserMediaSupported: !!(navigator.mediaDevices && navigator.mediaDevices.getUserMedia),
+        isSecureContext: window.isSecureContext,
+        protocol: window.location.protocol,
+        userAgent: navigator.userAgent
+    };
+
+    console.log('Camera Support Test Results:', results);
+    return results;
+}
+
+// Call test on page load
+document.addEventListener('DOMContentLoaded', function() {
+    testCameraSupport();
+});
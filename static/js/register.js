@@ -0,0 +1,255 @@
+document.getElementById('username').addEventListener('blur', function () {
+    const username = this.value.trim();
+    const feedback = document.getElementById('username-feedback');
+
+    if (username.length < 3) {
+        feedback.innerHTML = '<small class="text-warning"><i class="fas fa-exclamation-triangle me-1"></i>Username minimal 3 karakter</small>';
+        return;
+    }
+
+    fetch('/api/check_username', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ username: username })
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.available) {
+                feedback.innerHTML = '<small class="text-success"><i class="fas fa-check me-1"></i>Username tersedia</small>';
+            } else {
+                feedback.innerHTML = `<small class="text-danger"><i class="fas fa-times me-1"></i>${data.message}</small>`;
+            }
+        })
+        .catch(error => {
+            feedback.innerHTML = '<small class="text-muted">Tidak dapat memeriksa username</small>';
+        });
+});
+
+// Password confirmation validation
+document.getElementById('confirm_password').addEventListener('input', function () {
+    const password = document.getElementById('password').value;
+    const confirmPassword = this.value;
+    const matchDiv = document.getElementById('password-match');
+
+    if (confirmPassword) {
+        if (password === confirmPassword) {
+            matchDiv.innerHTML = '<small class="text-success"><i class="fas fa-check me-1"></i>Password cocok</small>';
+        } else {
+            matchDiv.innerHTML = '<small class="text-danger"><i class="fas fa-times me-1"></i>Password tidak cocok</small>';
+        }
+    } else {
+        matchDiv.innerHTML = '';
+    }
+});
+
+// Face recognition variables
+let camera = null;
+let capturedImageBlob = null;
+
+// Camera functions
+function startCamera() {
+    navigator.mediaDevices.getUserMedia({ video: true })
+        .then(function (stream) {
+            camera = stream;
+            const videoElement = document.getElementById('camera');
+            const placeholder = document.getElementById('camera-placeholder');
+
+            videoElement.srcObject = stream;
+            videoElement.style.display = 'block';
+            placeholder.style.display = 'none';
+
+            document.getElementById('captureBtn').disabled = false;
+            console.log('Camera started successfully');
+        })
+        .catch(function (err) {
+            console.log("Error accessing camera: " + err);
+            alert("Error mengakses kamera. Silakan upload foto secara manual.");
+        });
+}
+
+function capturePhoto() {
+    const video = document.getElementById('camera');
+    const canvas = document.getElementById('canvas');
+    const context = canvas.getContext('2d');
+
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    context.drawImage(video, 0, 0);
+
+    canvas.toBlob(function (blob) {
+        capturedImageBlob = blob;
+
+        // Show captured image preview
+        const preview = document.createElement('img');
+        preview.src = URL.createObjectURL(blob);
+        preview.style.cssText = 'width: 100%; max-width: 250px; height: 180px; object-fit: cover; border-radius: 10px; border: 3px solid #28a745;';
+        preview.id = 'capturedPreview';
+
+        video.style.display = 'none';
+        video.parentNode.appendChild(preview);
+
+        // Update buttons
+        const captureBtn = document.getElementById('captureBtn');
+        captureBtn.innerHTML = '<i class="fas fa-redo me-1"></i>Ambil Ulang';
+        captureBtn.onclick = retakePhoto;
+
+        // Create file input with captured image
+        const dataTransfer = new DataTransfer();
+        const file = new File([blob], 'captured_face.jpg', { type: 'image/jpeg' });
+        dataTransfer.items.add(file);
+        document.getElementById('face_image').files = dataTransfer.files;
+
+        console.log('Photo captured and file input updated');
+    }, 'image/jpeg', 0.8);
+}
+
+function retakePhoto() {
+    // Remove preview image
+    const preview = document.getElementById('capturedPreview');
+    if (preview) {
+        preview.remove();
+    }
+
+    // Show video again
+    const video = document.getElementById('camera');
+    video.style.display = 'block';
+
+    // Reset buttons
+    const captureBtn = document.getElementById('captureBtn');
+    captureBtn.innerHTML = '<i class="fas fa-camera me-1"></i>Ambil Foto';
+    captureBtn.onclick = capturePhoto;
+
+    // Clear file input
+    document.getElementById('face_image').value = '';
+    capturedImageBlob = null;
+
+    console.log('Photo retaken, inputs cleared');
+}
+
+// Handle manual file upload
+document.getElementById('face_image').addEventListener('change', function (e) {
+    console.log('File input changed, files:', e.target.files.length);
+
+    if (e.target.files.length > 0) {
+        const file = e.target.files[0];
+        console.log('Selected file:', file.name, 'Size:', file.size, 'Type:', file.type);
+
+        // Basic file validation
+        if (!file.type.startsWith('image/')) {
+            alert("File yang dipilih bukan gambar yang valid.");
+            this.value = '';
+            return;
+        }
+
+        // File size validation (max 5MB)
+        if (file.size > 5 * 1024 * 1024) {
+            alert("Ukuran file terlalu besar. Maksimal 5MB.");
+            this.value = '';
+            return;
+        }
+
+        // Hide camera if active
+        if (camera) {
+            camera.getTracks().forEach(track => track.stop());
+            camera = null;
+            document.getElementById('camera').style.display = 'none';
+            document.getElementById('camera-placeholder').style.display = 'flex';
+        }
+
+        // Reset capture button
+        const captureBtn = document.getElementById('captureBtn');
+        captureBtn.innerHTML = '<i class="fas fa-camera me-1"></i>Ambil Foto';
+        captureBtn.onclick = capturePhoto;
+        captureBtn.disabled = true;
+
+        // Remove preview if exists
+        const preview = document.getElementById('capturedPreview');
+        if (preview) {
+            preview.remove();
+        }
+
+        console.log('File validation passed, ready for submission');
+
+        // Remove any error styling
+        this.classList.remove('is-invalid');
+
+        // Show success feedback
+        const successMsg = document.createElement('div');
+        successMsg.className = 'alert alert-success mt-2';
+        successMsg.innerHTML = `<i class="fas fa-check me-1"></i>File foto berhasil dipilih: ${file.name}`;
+        successMsg.style.fontSize = '0.875rem';
+
+        // Remove any existing success message
+        const existingMsg = this.parentNode.querySelector('.alert');
+        if (existingMsg) {
+            existingMsg.remove();
+        }
+
+        this.parentNode.appendChild(successMsg);
+
+        // Auto remove success message
+        setTimeout(() => {
+            if (successMsg) {
+                successMsg.remove();
+            }
+        }, 3000);
+    }
+});
+
+// SIMPLIFIED Form submission - TEMPORARILY REMOVE FACE VALIDATION
+document.getElementById('registerForm').addEventListener('submit', function (e) {
+    console.log('Form submission started');
+
+    const password = document.getElementById('password').value;
+    const confirmPassword = document.getElementById('confirm_password').value;
+    const faceInput = document.getElementById('face_image');
+
+    // Only check password match
+    if (password !== confirmPassword) {
+        e.preventDefault();
+        alert('Password dan konfirmasi password tidak cocok!');
+        console.log('Form blocked: Password mismatch');
+        return;
+    }
+
+    // DEBUG: Log face input status
+    console.log('Face input files count:', faceInput.files.length);
+    if (faceInput.files.length > 0) {
+        console.log('Face file:', faceInput.files[0].name, faceInput.files[0].size);
+    }
+
+    // TEMPORARY: Allow submission without face validation
+    console.log('TEMPORARY: Allowing submission without strict face validation');
+
+    // Show loading state
+    const submitBtn = this.querySelector('button[type="submit"]');
+    const originalText = submitBtn.innerHTML;
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Mendaftarkan...';
+
+    // Re-enable button after 15 seconds (fallback)
+    setTimeout(() => {
+        if (submitBtn.disabled) {
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = originalText;
+            console.log('Submit button re-enabled (timeout)');
+        }
+    }, 15000);
+
+    console.log('Form validation passed, submitting...');
+});
+
+// Stop camera when page unloads
+window.addEventListener('beforeunload', function () {
+    if (camera) {
+        camera.getTracks().forEach(track => track.stop());
+    }
+});
+
+// Debug: Log when page loads
+document.addEventListener('DOMContentLoaded', function () {
+    console.log('Registration page loaded');
+    console.log('Face input element:', document.getElementById('face_image'));
+});
@@ -0,0 +1,910 @@
+// Global variables
+let map;
+let currentLocationMarker;
+let coordinateMarkers = [];
+let addMarkerModeActive = false;
+let currentLocation = null;
+
+// Get coordinate data from Flask template
+
+// Initialize map
+function initMap() {
+    // Create map centered on Indonesia
+    map = L.map('map').setView([-2.5, 118], 5);
+
+    // Add tile layer
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        attribution: '© OpenStreetMap contributors',
+        maxZoom: 19
+    }).addTo(map);
+
+    // Add click event for adding markers
+    map.on('click', onMapClick);
+
+    // Load existing coordinates
+    loadCoordinateMarkers();
+}
+
+// Load coordinate markers on map
+function loadCoordinateMarkers() {
+    // Clear existing markers
+    coordinateMarkers.forEach(marker => {
+        map.removeLayer(marker);
+        if (marker.circle) {
+            map.removeLayer(marker.circle);
+        }
+    });
+    coordinateMarkers = [];
+
+    // Add markers for each coordinate
+    coordinates.forEach(coord => {
+        addCoordinateMarker(coord);
+    });
+
+    // Fit map to show all markers if there are any
+    if (coordinateMarkers.length > 0) {
+        fitAllMarkers();
+    }
+}
+
+// Add coordinate marker to map
+function addCoordinateMarker(coord) {
+    // Create custom marker
+    const markerElement = document.createElement('div');
+    markerElement.className = `custom-marker ${coord.active ? '' : 'inactive'}`;
+    markerElement.innerHTML = '<i class="fas fa-map-marker-alt text-white"></i>';
+
+    const marker = L.marker([coord.latitude, coord.longitude], {
+        icon: L.divIcon({
+            html: markerElement.outerHTML,
+            className: 'custom-div-icon',
+            iconSize: [30, 30],
+            iconAnchor: [15, 15]
+        })
+    }).addTo(map);
+
+    // Add circle to show radius
+    const circle = L.circle([coord.latitude, coord.longitude], {
+        color: coord.active ? '#11998e' : '#6c757d',
+        fillColor: coord.active ? '#38ef7d' : '#6c757d',
+        fillOpacity: 0.1,
+        radius: coord.radius
+    }).addTo(map);
+
+    // Create popup content
+    const popupContent = `
+        <div style="min-width: 200px;">
+            <h6 style="color: #38ef7d; margin-bottom: 10px;">
+                <i class="fas fa-map-marker-alt me-2"></i>${coord.name}
+            </h6>
+            <p style="margin-bottom: 5px;"><strong>Latitude:</strong> ${coord.latitude}</p>
+            <p style="margin-bottom: 5px;"><strong>Longitude:</strong> ${coord.longitude}</p>
+            <p style="margin-bottom: 10px;"><strong>Radius:</strong> ${coord.radius}m</p>
+            <p style="margin-bottom: 15px;">
+                <span class="badge ${coord.active ? 'bg-success' : 'bg-secondary'}">
+                    ${coord.active ? 'Aktif' : 'Nonaktif'}
+                </span>
+            </p>
+            <div class="d-flex gap-1">
+                <button class="btn btn-sm btn-primary" onclick="editCoordinate(${coord.id}, '${coord.name}', ${coord.latitude}, ${coord.longitude}, ${coord.radius})" style="border-radius: 8px;">
+                    <i class="fas fa-edit"></i>
+                </button>
+                <button class="btn btn-sm btn-${coord.active ? 'warning' : 'success'}" 
+                        onclick="toggleStatus(${coord.id}, ${coord.active})" style="border-radius: 8px;">
+                    <i class="fas fa-${coord.active ? 'pause' : 'play'}"></i>
+                </button>
+                <button class="btn btn-sm btn-danger" onclick="confirmDelete(${coord.id}, '${coord.name}')" style="border-radius: 8px;">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </div>
+        </div>
+    `;
+
+    marker.bindPopup(popupContent);
+
+    // Store reference
+    marker.coordinateId = coord.id;
+    marker.circle = circle;
+    coordinateMarkers.push(marker);
+
+    return marker;
+}
+
+// Handle map click for adding new markers
+function onMapClick(e) {
+    if (addMarkerModeActive) {
+        const lat = e.latlng.lat;
+        const lng = e.latlng.lng;
+
+        // Fill form with clicked coordinates
+        document.getElementById('latitude').value = lat.toFixed(6);
+        document.getElementById('longitude').value = lng.toFixed(6);
+
+        // Focus on name field
+        document.getElementById('name').focus();
+
+        // Exit add marker mode
+        addMarkerMode();
+
+        // Show success message
+        showToast('Koordinat dipilih dari peta! Silakan lengkapi form.', 'info');
+    }
+}
+
+// Get current location
+function getCurrentLocation() {
+    if (navigator.geolocation) {
+        navigator.geolocation.getCurrentPosition(showCurrentPosition, showLocationError, {
+            enableHighAccuracy: true,
+            timeout: 10000,
+            maximumAge: 60000
+        });
+    } else {
+        document.getElementById('current-location-info').innerHTML =
+            '<div class="alert alert-danger mb-0">Browser tidak mendukung geolokasi</div>';
+    }
+}
+
+function showCurrentPosition(position) {
+    currentLocation = {
+        latitude: position.coords.latitude,
+        longitude: position.coords.longitude,
+        accuracy: position.coords.accuracy
+    };
+
+    document.getElementById('current-location-info').innerHTML = `
+        <div class="row">
+            <div class="col-md-6">
+                <p class="mb-1"><strong>Latitude:</strong> ${position.coords.latitude.toFixed(6)}</p>
+                <p class="mb-0"><strong>Longitude:</strong> ${position.coords.longitude.toFixed(6)}</p>
+            </div>
+            <div class="col-md-6">
+                <p class="mb-1"><strong>Akurasi:</strong> ±${Math.round(position.coords.accuracy)}m</p>
+                <p class="mb-0"><strong>Status:</strong> <span class="badge bg-success">Terdeteksi</span></p>
+            </div>
+        </div>
+    `;
+
+    // Add current location marker to map
+    addCurrentLocationToMap();
+}
+
+function showLocationError(error) {
+    let errorMsg = '';
+    switch (error.code) {
+        case error.PERMISSION_DENIED:
+            errorMsg = "Akses lokasi ditolak oleh pengguna.";
+            break;
+        case error.POSITION_UNAVAILABLE:
+            errorMsg = "Informasi lokasi tidak tersedia.";
+            break;
+        case error.TIMEOUT:
+            errorMsg = "Timeout mendapatkan lokasi.";
+            break;
+        default:
+            errorMsg = "Error tidak diketahui.";
+            break;
+    }
+    document.getElementById('current-location-info').innerHTML =
+        `<div class="alert alert-danger mb-0">${errorMsg}</div>`;
+}
+
+// Add current location to map
+function addCurrentLocationToMap() {
+    if (!currentLocation) return;
+
+    // Remove existing current location marker
+    if (currentLocationMarker) {
+        map.removeLayer(currentLocationMarker);
+    }
+
+    // Create current location marker
+    const markerElement = document.createElement('div');
+    markerElement.className = 'current-location-marker';
+
+    currentLocationMarker = L.marker([currentLocation.latitude, currentLocation.longitude], {
+        icon: L.divIcon({
+            html: markerElement.outerHTML,
+            className: 'current-location-div-icon',
+            iconSize: [25, 25],
+            iconAnchor: [12.5, 12.5]
+        })
+    }).addTo(map);
+
+    // Add popup
+    currentLocationMarker.bindPopup(`
+        <div style="min-width: 200px;">
+            <h6 style="color: #667eea; margin-bottom: 10px;">
+                <i class="fas fa-crosshairs me-2"></i>Lokasi Anda
+            </h6>
+            <p style="margin-bottom: 5px;"><strong>Latitude:</strong> ${currentLocation.latitude.toFixed(6)}</p>
+            <p style="margin-bottom: 5px;"><strong>Longitude:</strong> ${currentLocation.longitude.toFixed(6)}</p>
+            <p style="margin-bottom: 10px;"><strong>Akurasi:</strong> ±${Math.round(currentLocation.accuracy)}m</p>
+            <button class="btn btn-sm btn-success" onclick="useCurrentLocation()" style="border-radius: 8px;">
+                <i class="fas fa-plus me-1"></i>Gunakan Lokasi
+            </button>
+        </div>
+    `);
+}
+
+// Show current location on map
+function showCurrentLocationOnMap() {
+    if (!currentLocation) {
+        showToast('Lokasi belum terdeteksi. Mohon tunggu sebentar.', 'warning');
+        return;
+    }
+
+    map.setView([currentLocation.latitude, currentLocation.longitude], 16);
+    if (currentLocationMarker) {
+        currentLocationMarker.openPopup();
+    }
+}
+
+// Use current location
+function useCurrentLocation() {
+    if (!currentLocation) {
+        showToast('Lokasi belum terdeteksi. Mohon tunggu sebentar.', 'warning');
+        return;
+    }
+
+    document.getElementById('latitude').value = currentLocation.latitude.toFixed(6);
+    document.getElementById('longitude').value = currentLocation.longitude.toFixed(6);
+    document.getElementById('name').focus();
+
+    showToast('Lokasi saat ini berhasil digunakan!', 'success');
+}
+
+// Clear form
+function clearForm() {
+    document.getElementById('name').value = '';
+    document.getElementById('latitude').value = '';
+    document.getElementById('longitude').value = '';
+    document.getElementById('radius').value = '100';
+}
+
+// Add marker mode toggle
+function addMarkerMode() {
+    addMarkerModeActive = !addMarkerModeActive;
+    const btn = document.getElementById('addMarkerBtn');
+
+    if (addMarkerModeActive) {
+        btn.className = 'btn btn-sm btn-warning';
+        btn.innerHTML = '<i class="fas fa-times me-1"></i>Cancel';
+        map.getContainer().style.cursor = 'crosshair';
+        showToast('Klik pada peta untuk memilih koordinat', 'info');
+    } else {
+        btn.className = 'btn btn-sm btn-light';
+        btn.innerHTML = '<i class="fas fa-plus me-1"></i>Add Point';
+        map.getContainer().style.cursor = '';
+    }
+}
+
+// Clear selection
+function clearSelection() {
+    clearForm();
+    if (addMarkerModeActive) {
+        addMarkerMode();
+    }
+}
+
+// Focus on specific coordinate on map
+function focusOnMap(coordinateId) {
+    const coord = coordinates.find(c => c.id === coordinateId);
+    if (coord) {
+        map.setView([coord.latitude, coord.longitude], 16);
+
+        // Find and open popup
+        const marker = coordinateMarkers.find(m => m.coordinateId === coordinateId);
+        if (marker) {
+            setTimeout(() => marker.openPopup(), 500);
+        }
+    }
+}
+
+// Fit all markers in view
+function fitAllMarkers() {
+    if (coordinateMarkers.length === 0) return;
+
+    const group = new L.featureGroup(coordinateMarkers);
+    if (currentLocationMarker) {
+        group.addLayer(currentLocationMarker);
+    }
+
+    map.fitBounds(group.getBounds().pad(0.1));
+}
+
+// Refresh map
+function refreshMap() {
+    loadCoordinateMarkers();
+    getCurrentLocation();
+    showToast('Peta berhasil di-refresh!', 'success');
+}
+
+// Edit coordinate
+function editCoordinate(id, name, lat, lng, radius) {
+    document.getElementById('edit-id').value = id;
+    document.getElementById('edit-name').value = name;
+    document.getElementById('edit-latitude').value = lat;
+    document.getElementById('edit-longitude').value = lng;
+    document.getElementById('edit-radius').value = radius;
+
+    new bootstrap.Modal(document.getElementById('editModal')).show();
+}
+
+// Handle edit form submission
+document.addEventListener('DOMContentLoaded', function () {
+    document.getElementById('editForm').addEventListener('submit', function (e) {
+        e.preventDefault();
+
+        if (!validateEditForm()) {
+            return;
+        }
+
+        showLoading();
+
+        const formData = new FormData();
+        formData.append('id', document.getElementById('edit-id').value);
+        formData.append('name', document.getElementById('edit-name').value);
+        formData.append('latitude', document.getElementById('edit-latitude').value);
+        formData.append('longitude', document.getElementById('edit-longitude').value);
+        formData.append('radius', document.getElementById('edit-radius').value);
+
+        fetch('/update_coordinate', {
+            method: 'POST',
+            body: formData
+        })
+            .then(response => response.json())
+            .then(data => {
+                hideLoading();
+                bootstrap.Modal.getInstance(document.getElementById('editModal')).hide();
+
+                if (data.success) {
+                    showSuccess('Koordinat Diperbarui', data.message);
+                    setTimeout(() => {
+                        window.location.reload();
+                    }, 2000);
+                } else {
+                    showError('Error', data.message || 'Gagal memperbarui koordinat');
+                }
+            })
+            .catch(error => {
+                hideLoading();
+                bootstrap.Modal.getInstance(document.getElementById('editModal')).hide();
+                showError('Error', 'Gagal menghubungi server');
+                console.error('Update error:', error);
+            });
+    });
+});
+
+// Toggle status
+function toggleStatus(id, currentStatus) {
+    const coord = coordinates.find(c => c.id === id);
+    if (!coord) return;
+
+    const action = currentStatus ? 'nonaktifkan' : 'aktifkan';
+    if (confirm(`Yakin ingin ${action} koordinat "${coord.name}"?`)) {
+        showLoading();
+
+        const formData = new FormData();
+        formData.append('id', id);
+
+        fetch('/toggle_coordinate_status', {
+            method: 'POST',
+            body: formData
+        })
+            .then(response => response.json())
+            .then(data => {
+                hideLoading();
+
+                if (data.success) {
+                    showSuccess('Status Diperbarui', data.message);
+                    setTimeout(() => {
+                        window.location.reload();
+                    }, 2000);
+                } else {
+                    showError('Error', data.message || 'Gagal mengubah status');
+                }
+            })
+            .catch(error => {
+                hideLoading();
+                showError('Error', 'Gagal menghubungi server');
+                console.error('Toggle status error:', error);
+            });
+    }
+}
+
+// Confirm delete
+function confirmDelete(id, name) {
+    document.getElementById('delete-coordinate-id').value = id;
+    document.getElementById('delete-location-name').textContent = name;
+    new bootstrap.Modal(document.getElementById('deleteModal')).show();
+}
+
+// Delete coordinate
+// Perbaikan JavaScript untuk set_coordinat.html
+
+// Delete coordinate function dengan handling yang lebih baik
+function deleteCoordinate() {
+    const coordinateId = document.getElementById('delete-coordinate-id').value;
+    const locationName = document.getElementById('delete-location-name').textContent;
+
+    if (!coordinateId) {
+        showError('Error', 'ID koordinat tidak valid');
+        return;
+    }
+
+    console.log('🔍 Deleting coordinate ID:', coordinateId);
+    showLoading();
+
+    const formData = new FormData();
+    formData.append('id', coordinateId);
+
+    fetch('/delete_coordinate', {
+        method: 'POST',
+        body: formData,
+        headers: {
+            'Cache-Control': 'no-cache'
+        }
+    })
+        .then(response => response.json())
+        .then(data => {
+            console.log('📥 Delete response:', data);
+            hideLoading();
+
+            // Close modal first
+            const modal = bootstrap.Modal.getInstance(document.getElementById('deleteModal'));
+            if (modal) modal.hide();
+
+            if (data.success) {
+                console.log('✅ Delete successful');
+                showSuccess('Koordinat Dihapus', data.message);
+
+                // Remove row from table immediately
+                const row = document.getElementById(`row-${coordinateId}`);
+                if (row) {
+                    row.style.transition = 'all 0.3s ease';
+                    row.style.opacity = '0';
+                    row.style.transform = 'translateX(-100%)';
+                    setTimeout(() => {
+                        row.remove();
+                        updateCoordinateCounter();
+                        checkEmptyState();
+                    }, 300);
+                }
+
+                // Remove marker from map
+                removeMarkerFromMap(coordinateId);
+
+                // Force reload after 1.5 seconds to ensure data consistency
+                setTimeout(() => {
+                    console.log('🔄 Force reloading page...');
+                    window.location.reload();
+                }, 1500);
+
+            } else {
+                console.log('❌ Delete failed:', data.message);
+                showError('Gagal Menghapus', data.message || 'Gagal menghapus koordinat');
+            }
+        })
+        .catch(error => {
+            console.error('💥 Delete error:', error);
+            hideLoading();
+
+            // Close modal
+            const modal = bootstrap.Modal.getInstance(document.getElementById('deleteModal'));
+            if (modal) modal.hide();
+
+            showError('Error', 'Gagal menghubungi server. Coba refresh halaman.');
+        });
+}
+
+// Function to remove marker from map
+function removeMarkerFromMap(coordinateId) {
+    if (map) {
+        coordinateMarkers.forEach((marker, index) => {
+            if (marker.coordinateId === parseInt(coordinateId)) {
+                map.removeLayer(marker);
+                if (marker.circle) {
+                    map.removeLayer(marker.circle);
+                }
+                coordinateMarkers.splice(index, 1);
+            }
+        });
+    }
+}
+
+// Function to update coordinate counter
+function updateCoordinateCounter() {
+    const tbody = document.getElementById('coordinates-table-body');
+    const rows = tbody.querySelectorAll('tr:not(#empty-row)');
+    const counter = document.getElementById('coordinate-counter');
+    if (counter) {
+        counter.textContent = `${rows.length} lokasi`;
+    }
+}
+
+// Function to check and show empty state
+function checkEmptyState() {
+    const tbody = document.getElementById('coordinates-table-body');
+    const dataRows = tbody.querySelectorAll('tr:not(#empty-row)');
+    const emptyRow = document.getElementById('empty-row');
+
+    if (dataRows.length === 0) {
+        if (!emptyRow) {
+            // Create empty row
+            const newEmptyRow = document.createElement('tr');
+            newEmptyRow.id = 'empty-row';
+            newEmptyRow.innerHTML = `
+        <td colspan="6" class="text-center py-4">
+            <div class="empty-state">
+                <i class="fas fa-map-marker-alt fa-4x mb-3"></i>
+                <h5>Belum ada koordinat tersimpan</h5>
+                <p class="text-white-50">Tambahkan koordinat pertama untuk memulai</p>
+            </div>
+        </td>
+    `;
+            tbody.appendChild(newEmptyRow);
+        }
+    }
+}
+
+// Enhanced add coordinate form submission
+document.addEventListener('DOMContentLoaded', function () {
+    // Override form submission to handle success response better
+    const addForm = document.getElementById('addCoordinateForm');
+    if (addForm) {
+        addForm.addEventListener('submit', function (e) {
+            e.preventDefault();
+
+            if (!validateCoordinateForm()) {
+                return;
+            }
+
+            showLoading();
+
+            const formData = new FormData(this);
+
+            fetch('/add_coordinate', {
+                method: 'POST',
+                body: formData,
+                headers: {
+                    'Cache-Control': 'no-cache'
+                }
+            })
+                .then(response => {
+                    // Check if response is JSON
+                    const contentType = response.headers.get('content-type');
+                    if (contentType && contentType.includes('application/json')) {
+                        return response.json();
+                    } else {
+                        // If not JSON, it's probably a redirect or HTML - reload page
+                        window.location.reload();
+                        return null;
+                    }
+                })
+                .then(data => {
+                    hideLoading();
+
+                    if (data && data.success !== undefined) {
+                        if (data.success) {
+                            showSuccess('Koordinat Ditambahkan', data.message);
+                            clearForm();
+                            setTimeout(() => window.location.reload(), 1500);
+                        } else {
+                            showError('Gagal Menambahkan', data.message);
+                        }
+                    } else {
+                        // Fallback - just reload
+                        window.location.reload();
+                    }
+                })
+                .catch(error => {
+                    console.error('Add coordinate error:', error);
+                    hideLoading();
+                    // On error, reload page to see if it was actually added
+                    setTimeout(() => window.location.reload(), 1000);
+                });
+        });
+    }
+
+    // Auto-refresh coordinates list every 30 seconds to ensure consistency
+    setInterval(refreshCoordinatesIfNeeded, 30000);
+});
+
+// Function to refresh coordinates if needed
+function refreshCoordinatesIfNeeded() {
+    // Only refresh if user is idle and no modals are open
+    if (!document.querySelector('.modal.show')) {
+        fetch('/api/coordinates/list', {
+            method: 'GET',
+            headers: {
+                'Cache-Control': 'no-cache'
+            }
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    const currentCount = document.querySelectorAll('#coordinates-table-body tr:not(#empty-row)').length;
+                    if (currentCount !== data.count) {
+                        console.log('📊 Coordinate count mismatch. Refreshing...');
+                        window.location.reload();
+                    }
+                }
+            })
+            .catch(error => {
+                console.log('Background refresh failed:', error);
+            });
+    }
+}
+
+// Enhanced page visibility handling
+document.addEventListener('visibilitychange', function () {
+    if (!document.hidden) {
+        // Page is visible again, check for data consistency
+        setTimeout(refreshCoordinatesIfNeeded, 1000);
+    }
+});
+
+// Force clear browser cache on specific events
+function clearBrowserCache() {
+    // Force reload with cache bypass
+    window.location.reload(true);
+}
+
+// Add cache-busting to critical requests
+function fetchWithCacheBusting(url, options = {}) {
+    const cacheBuster = Date.now();
+    const separator = url.includes('?') ? '&' : '?';
+    const finalUrl = `${url}${separator}_cb=${cacheBuster}`;
+
+    return fetch(finalUrl, {
+        ...options,
+        headers: {
+            'Cache-Control': 'no-cache',
+            'Pragma': 'no-cache',
+            ...options.headers
+        }
+    });
+}
+
+// Validation functions
+function validateEditForm() {
+    const name = document.getElementById('edit-name').value.trim();
+    const latitude = parseFloat(document.getElementById('edit-latitude').value);
+    const longitude = parseFloat(document.getElementById('edit-longitude').value);
+    const radius = parseInt(document.getElementById('edit-radius').value);
+
+    if (!name) {
+        showToast('Nama lokasi tidak boleh kosong!', 'error');
+        return false;
+    }
+
+    if (isNaN(latitude) || latitude < -90 || latitude > 90) {
+        showToast('Latitude harus antara -90 dan 90!', 'error');
+        return false;
+    }
+
+    if (isNaN(longitude) || longitude < -180 || longitude > 180) {
+        showToast('Longitude harus antara -180 dan 180!', 'error');
+        return false;
+    }
+
+    if (isNaN(radius) || radius < 10 || radius > 1000) {
+        showToast('Radius harus antara 10 dan 1000 meter!', 'error');
+        return false;
+    }
+
+    return true;
+}
+
+// Utility functions
+function showToast(message, type = 'info') {
+    const alertClass = {
+        'success': 'alert-success',
+        'error': 'alert-danger',
+        'warning': 'alert-warning',
+        'info': 'alert-info'
+    }[type] || 'alert-info';
+
+    const icon = {
+        'success': 'fas fa-check-circle',
+        'error': 'fas fa-exclamation-triangle',
+        'warning': 'fas fa-exclamation-circle',
+        'info': 'fas fa-info-circle'
+    }[type] || 'fas fa-info-circle';
+
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert ${alertClass} alert-dismissible fade show position-fixed`;
+    alertDiv.style.cssText = `
+        top: 20px;
+        right: 20px;
+        z-index: 9999;
+        min-width: 300px;
+        border-radius: 15px;
+    `;
+    alertDiv.innerHTML = `
+        <i class="${icon} me-2"></i>
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+
+    document.body.appendChild(alertDiv);
+
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 5000);
+}
+
+function showLoading() {
+    document.getElementById('loadingOverlay').style.display = 'flex';
+}
+
+function hideLoading() {
+    document.getElementById('loadingOverlay').style.display = 'none';
+}
+
+function showSuccess(title, message) {
+    document.getElementById('success-title').textContent = title;
+    document.getElementById('success-message').textContent = message;
+    new bootstrap.Modal(document.getElementById('successModal')).show();
+}
+
+function showError(title, message) {
+    showToast(`${title}: ${message}`, 'error');
+}
+
+// Geofence analytics: punch heatmap and radius suggestions per active fence
+let analyticsData = null;
+let heatmapLayer = null;
+let heatmapVisible = false;
+
+function loadGeofenceAnalytics() {
+    const tbody = document.getElementById('analytics-table-body');
+    const days = document.getElementById('analytics-days').value;
+
+    fetch(`/api/coordinates/analytics?days=${days}`)
+        .then(response => response.json())
+        .then(result => {
+            if (!result.success) {
+                throw new Error(result.message);
+            }
+            analyticsData = result;
+            renderAnalyticsTable(result);
+            if (heatmapVisible) {
+                drawHeatmap();
+            }
+        })
+        .catch(error => {
+            tbody.innerHTML = `<tr><td colspan="6" class="text-center text-white-50 py-4">Gagal memuat analitik: ${error.message}</td></tr>`;
+        });
+}
+
+function renderAnalyticsTable(result) {
+    const tbody = document.getElementById('analytics-table-body');
+    if (result.fences.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="6" class="text-center text-white-50 py-4">Belum ada lokasi aktif</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = result.fences.map(fence => {
+        const coord = coordinates.find(c => c.id === fence.id);
+        const canApply = coord && fence.suggested_radius && fence.suggested_radius !== fence.radius;
+        return `
+            <tr>
+                <td><strong>${fence.name}</strong></td>
+                <td>${fence.accepted}</td>
+                <td>
+                    ${fence.near_misses}
+                    <span class="badge ${fence.near_miss_rate > 0.05 ? 'bg-warning text-dark' : 'bg-secondary'}">
+                        ${(fence.near_miss_rate * 100).toFixed(1)}%
+                    </span>
+                </td>
+                <td class="text-white-50">${fence.distance_p95 !== null ? fence.distance_p95 + 'm' : '-'}</td>
+                <td><span class="badge bg-info">${fence.radius}m</span></td>
+                <td>
+                    <small class="text-white-50 d-block">${fence.suggestion}</small>
+                    ${canApply ? `
+                    <button class="btn btn-sm btn-outline-primary mt-1"
+                        onclick="editCoordinate(${coord.id}, '${coord.name}', ${coord.latitude}, ${coord.longitude}, ${fence.suggested_radius})">
+                        Terapkan ${fence.suggested_radius}m
+                    </button>` : ''}
+                </td>
+            </tr>
+        `;
+    }).join('');
+}
+
+function drawHeatmap() {
+    if (heatmapLayer) {
+        map.removeLayer(heatmapLayer);
+    }
+    heatmapLayer = L.layerGroup();
+
+    const cells = analyticsData.fences.flatMap(fence => fence.heatmap);
+    const maxCount = Math.max(1, ...cells.map(([, , accepted, rejected]) => accepted + rejected));
+    const halfCell = analyticsData.cell_size / 2;
+
+    cells.forEach(([lat, lng, accepted, rejected]) => {
+        const dLat = halfCell / 111195;
+        const dLng = halfCell / (111195 * Math.cos(lat * Math.PI / 180));
+        // Green where punches were accepted, yellow to red as rejections dominate
+        const color = rejected > accepted ? '#ff4d4f' : (rejected > 0 ? '#ffc107' : '#38ef7d');
+        L.rectangle([[lat - dLat, lng - dLng], [lat + dLat, lng + dLng]], {
+            stroke: false,
+            fillColor: color,
+            fillOpacity: 0.15 + 0.65 * (accepted + rejected) / maxCount
+        }).bindTooltip(`${accepted} diterima, ${rejected} ditolak`).addTo(heatmapLayer);
+    });
+    heatmapLayer.addTo(map);
+}
+
+function toggleHeatmap() {
+    heatmapVisible = !heatmapVisible;
+    document.getElementById('heatmapBtn').classList.toggle('active', heatmapVisible);
+    if (!heatmapVisible) {
+        if (heatmapLayer) {
+            map.removeLayer(heatmapLayer);
+            heatmapLayer = null;
+        }
+        return;
+    }
+    if (analyticsData) {
+        drawHeatmap();
+    } else {
+        loadGeofenceAnalytics();
+    }
+}
+
+// Initialize everything
+document.addEventListener('DOMContentLoaded', function () {
+    initMap();
+    getCurrentLocation();
+    loadGeofenceAnalytics();
+
+    // Auto-hide flash messages after 5 seconds
+    const alerts = document.querySelectorAll('.alert-dismissible');
+    alerts.forEach(alert => {
+        setTimeout(() => {
+            const bsAlert = bootstrap.Alert.getInstance(alert) || new bootstrap.Alert(alert);
+            bsAlert.close();
+        }, 5000);
+    });
+
+    // Form validation on submit
+    document.getElementById('addCoordinateForm').addEventListener('submit', function (e) {
+        if (!validateCoordinateForm()) {
+            e.preventDefault();
+        }
+    });
+});
+
+function validateCoordinateForm() {
+    const name = document.getElementById('name').value.trim();
+    const latitude = parseFloat(document.getElementById('latitude').value);
+    const longitude = parseFloat(document.getElementById('longitude').value);
+    const radius = parseInt(document.getElementById('radius').value);
+
+    if (!name) {
+        showToast('Nama lokasi tidak boleh kosong!', 'error');
+        return false;
+    }
+
+    if (isNaN(latitude) || latitude < -90 || latitude > 90) {
+        showToast('Latitude harus antara -90 dan 90!', 'error');
+        return false;
+    }
+
+    if (isNaN(longitude) || longitude < -180 || longitude > 180) {
+        showToast('Longitude harus antara -180 dan 180!', 'error');
+        return false;
+    }
+
+    if (isNaN(radius) || radius < 10 || radius > 1000) {
+        showToast('Radius harus antara 10 dan 1000 meter!', 'error');
+        return false;
+    }
+
+    return true;
+}
@@ -0,0 +1,667 @@
+let allUsers = [];
+let filteredUsers = [];
+let currentFilter = 'all';
+let userToDelete = null;
+let currentDate = new Date();
+
+// Format date for display
+function formatDateDisplay(date) {
+    return date.toLocaleDateString('id-ID', {
+        weekday: 'long',
+        year: 'numeric',
+        month: 'long',
+        day: 'numeric'
+    });
+}
+
+// Format date for API
+function formatDateApi(date) {
+    return date.toISOString().split('T')[0];
+}
+
+// Update date display
+function updateDateDisplay() {
+    document.getElementById('currentDateDisplay').textContent = formatDateDisplay(currentDate);
+    loadDailyAttendance();
+}
+
+// Load daily attendance
+async function loadDailyAttendance() {
+    try {
+        const dateStr = formatDateApi(currentDate);
+        const response = await fetch(`/api/attendance/daily?date=${dateStr}`);
+        const data = await response.json();
+
+        const container = document.getElementById('dailyAttendanceList');
+
+        if (data.success && data.attendance && data.attendance.length > 0) {
+            container.innerHTML = data.attendance.map(att => {
+                const initials = att.full_name.split(' ').map(n => n[0]).join('').slice(0, 2).toUpperCase();
+                const timeIn = att.time_in ? att.time_in.substring(0, 5) : '-';
+                const timeOut = att.time_out ? att.time_out.substring(0, 5) : '-';
+
+                return `
+                    <div class="attendance-item d-flex align-items-center">
+                        <div class="attendance-avatar me-3">${initials}</div>
+                        <div class="flex-grow-1">
+                            <div class="fw-bold">${escapeHtml(att.full_name)}</div>
+                            <div class="small opacity-75">@${escapeHtml(att.username)}</div>
+                        </div>
+                        <div class="text-end">
+                            <div class="time-badge me-1">
+                                <i class="fas fa-sign-in-alt me-1"></i>${timeIn}
+                            </div>
+                            ${att.time_out ?
+                        `<div class="time-badge">
+                                    <i class="fas fa-sign-out-alt me-1"></i>${timeOut}
+                                </div>` :
+                        '<div class="time-badge"><i class="fas fa-clock me-1"></i>Belum keluar</div>'
+                    }
+                        </div>
+                    </div>
+                `;
+            }).join('');
+        } else {
+            container.innerHTML = `
+                <div class="text-center py-4">
+                    <i class="fas fa-calendar-times fa-2x opacity-50 mb-2"></i>
+                    <div class="opacity-75">Tidak ada kehadiran pada tanggal ini</div>
+                </div>
+            `;
+        }
+    } catch (error) {
+        document.getElementById('dailyAttendanceList').innerHTML = `
+            <div class="text-center py-4">
+                <i class="fas fa-exclamation-triangle fa-2x text-warning mb-2"></i>
+                <div>Error loading attendance data</div>
+            </div>
+        `;
+    }
+}
+
+// Date navigation
+document.getElementById('prevDate').addEventListener('click', () => {
+    currentDate.setDate(currentDate.getDate() - 1);
+    updateDateDisplay();
+});
+
+document.getElementById('nextDate').addEventListener('click', () => {
+    const today = new Date();
+    if (currentDate < today) {
+        currentDate.setDate(currentDate.getDate() + 1);
+        updateDateDisplay();
+    }
+});
+
+document.getElementById('todayBtn').addEventListener('click', () => {
+    currentDate = new Date();
+    updateDateDisplay();
+});
+
+// Load users data
+async function loadUsers() {
+    try {
+        showLoading(true);
+        const response = await fetch('/api/users/list');
+        const data = await response.json();
+
+        if (data.success) {
+            allUsers = data.users;
+            filteredUsers = [...allUsers];
+            updateStatistics(data.stats);
+            renderUsers();
+        } else {
+            showError('Error loading users: ' + data.error);
+        }
+    } catch (error) {
+        showError('Error loading users: ' + error.message);
+    } finally {
+        showLoading(false);
+    }
+}
+
+// Update statistics
+function updateStatistics(stats) {
+    document.getElementById('totalUsers').textContent = stats.total_users || 0;
+}
+
+// Render users
+function renderUsers() {
+    const container = document.getElementById('usersContainer');
+    const emptyState = document.getElementById('emptyState');
+
+    if (filteredUsers.length === 0) {
+        container.innerHTML = '';
+        emptyState.style.display = 'block';
+        return;
+    }
+
+    emptyState.style.display = 'none';
+
+    container.innerHTML = filteredUsers.map(user => {
+        const initials = user.full_name.split(' ').map(n => n[0]).join('').slice(0, 2).toUpperCase();
+
+        const statusBadge = user.active ?
+            '<span class="status-badge badge bg-success"><i class="fas fa-check me-1"></i>Aktif</span>' :
+            '<span class="status-badge badge bg-secondary"><i class="fas fa-times me-1"></i>Nonaktif</span>';
+
+        const faceBadge = user.face_recognition ?
+            '<i class="fas fa-face-smile text-success me-2" title="Face Recognition Aktif"></i>' :
+            '<i class="fas fa-face-meh text-muted me-2" title="Face Recognition Nonaktif"></i>';
+
+        const roleBadge = user.role === 'admin' ?
+            '<span class="badge bg-warning text-dark ms-2"><i class="fas fa-crown me-1"></i>Admin</span>' : '';
+
+        const lastSeen = user.last_attendance ?
+            `Terakhir hadir: ${formatDate(user.last_attendance)}` :
+            'Belum pernah absen';
+
+        return `
+            <div class="col-lg-4 col-md-6 mb-4">
+                <div class="card user-card h-100">
+                    <div class="card-body">
+                        <div class="d-flex align-items-start mb-3">
+                            <div class="user-avatar me-3">${initials}</div>
+                            <div class="flex-grow-1">
+                                <h6 class="mb-1">
+                                    ${escapeHtml(user.full_name)}
+                                    ${roleBadge}
+                                    ${user.active ? '<span class="online-indicator" title="Pengguna Aktif"></span>' : ''}
+                                </h6>
+                                <small class="text-muted">@${escapeHtml(user.username)}</small>
+                                ${user.email ? `<br><small class="text-muted"><i class="fas fa-envelope me-1"></i>${escapeHtml(user.email)}</small>` : ''}
+                            </div>
+                        </div>
+
+                        <div class="d-flex justify-content-between align-items-center mb-2">
+                            ${statusBadge}
+                            ${faceBadge}
+                        </div>
+
+                        <hr class="my-2">
+
+                        <div class="row text-center mb-3">
+                            <div class="col-6">
+                                <small class="text-muted d-block">Terdaftar</small>
+                                <strong>${formatDate(user.created_at)}</strong>
+                            </div>
+                            <div class="col-6">
+                                <small class="text-muted d-block">Status</small>
+                                <strong class="text-${user.active ? 'success' : 'muted'}">${user.active ? 'Online' : 'Offline'}</strong>
+                            </div>
+                        </div>
+
+                        <div class="mb-3">
+                            <small class="text-muted">
+                                <i class="fas fa-clock me-1"></i>${lastSeen}
+                            </small>
+                        </div>
+                    </div>
+                    <div class="card-footer bg-transparent border-0">
+                        <div class="action-buttons">
+                            <button class="btn btn-sm btn-outline-primary" onclick="showUserDetail(${user.id})" title="Lihat Detail">
+                                <i class="fas fa-eye"></i>
+                            </button>
+                            <button class="btn btn-sm btn-outline-success" onclick="editUser(${user.id})" title="Edit">
+                                <i class="fas fa-edit"></i>
+                            </button>
+                            <button class="btn btn-sm btn-outline-danger" onclick="showDeleteModal(${user.id})" title="Hapus">
+                                <i class="fas fa-trash"></i>
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+// Show add user modal
+function showAddUserModal() {
+    document.getElementById('userModalTitle').innerHTML = '<i class="fas fa-user-plus me-2"></i>Tambah Pengguna';
+    document.getElementById('userForm').reset();
+    document.getElementById('userId').value = '';
+    document.getElementById('username').disabled = false;
+    document.getElementById('passwordHelp').textContent = 'Minimal 6 karakter';
+    document.getElementById('password').required = true;
+    new bootstrap.Modal(document.getElementById('userModal')).show();
+}
+
+// Edit user
+function editUser(userId) {
+    const user = allUsers.find(u => u.id === userId);
+    if (!user) return;
+
+    document.getElementById('userModalTitle').innerHTML = '<i class="fas fa-user-edit me-2"></i>Edit Pengguna';
+    document.getElementById('userId').value = user.id;
+    document.getElementById('username').value = user.username;
+    document.getElementById('username').disabled = true;
+    document.getElementById('fullName').value = user.full_name;
+    document.getElementById('email').value = user.email || '';
+    document.getElementById('role').value = user.role;
+    document.getElementById('active').value = user.active ? '1' : '0';
+    document.getElementById('password').value = '';
+    document.getElementById('password').required = false;
+    document.getElementById('passwordHelp').textContent = 'Kosongkan jika tidak ingin mengubah password';
+
+    new bootstrap.Modal(document.getElementById('userModal')).show();
+}
+
+// Handle user form submission
+document.getElementById('userForm').addEventListener('submit', async function (e) {
+    e.preventDefault();
+
+    const formData = new FormData(this);
+    const userId = formData.get('user_id');
+    const isEdit = userId !== '';
+
+    const userData = {
+        username: formData.get('username'),
+        full_name: formData.get('full_name'),
+        email: formData.get('email'),
+        role: formData.get('role'),
+        active: formData.get('active') === '1'
+    };
+
+    if (formData.get('password')) {
+        userData.password = formData.get('password');
+    }
+
+    try {
+        const url = isEdit ? `/api/users/update/${userId}` : '/api/users/create';
+        const method = isEdit ? 'PUT' : 'POST';
+
+        const response = await fetch(url, {
+            method: method,
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(userData)
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            showSuccess(result.message);
+            bootstrap.Modal.getInstance(document.getElementById('userModal')).hide();
+            loadUsers(); // Reload users
+        } else {
+            showError(result.message || 'Gagal menyimpan data pengguna');
+        }
+    } catch (error) {
+        showError('Error: ' + error.message);
+    }
+});
+
+// Show delete modal
+function showDeleteModal(userId) {
+    const user = allUsers.find(u => u.id === userId);
+    if (!user) return;
+
+    userToDelete = userId;
+    document.getElementById('deleteUserName').textContent = user.full_name;
+    new bootstrap.Modal(document.getElementById('deleteModal')).show();
+}
+
+// Confirm delete
+async function confirmDelete() {
+    if (!userToDelete) return;
+
+    try {
+        const response = await fetch(`/api/users/delete/${userToDelete}`, {
+            method: 'DELETE'
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            showSuccess(result.message);
+            bootstrap.Modal.getInstance(document.getElementById('deleteModal')).hide();
+            loadUsers(); // Reload users
+        } else {
+            showError(result.message || 'Gagal menghapus pengguna');
+        }
+    } catch (error) {
+        showError('Error: ' + error.message);
+    }
+
+    userToDelete = null;
+}
+
+// Filter users
+function filterUsers(type) {
+    currentFilter = type;
+
+    // Update button states
+    document.querySelectorAll('.btn-group .btn').forEach(btn => {
+        btn.classList.remove('btn-primary', 'btn-outline-primary', 'btn-success', 'btn-outline-success', 'btn-info', 'btn-outline-info');
+    });
+
+    switch (type) {
+        case 'all':
+            filteredUsers = [...allUsers];
+            document.getElementById('filterAll').className = 'btn btn-primary';
+            document.getElementById('filterActive').className = 'btn btn-outline-success';
+            document.getElementById('filterFace').className = 'btn btn-outline-info';
+            break;
+        case 'active':
+            filteredUsers = allUsers.filter(user => user.active);
+            document.getElementById('filterAll').className = 'btn btn-outline-primary';
+            document.getElementById('filterActive').className = 'btn btn-success';
+            document.getElementById('filterFace').className = 'btn btn-outline-info';
+            break;
+        case 'face':
+            filteredUsers = allUsers.filter(user => user.face_recognition);
+            document.getElementById('filterAll').className = 'btn btn-outline-primary';
+            document.getElementById('filterActive').className = 'btn btn-outline-success';
+            document.getElementById('filterFace').className = 'btn btn-info';
+            break;
+    }
+
+    // Apply search if there's a search term
+    const searchTerm = document.getElementById('searchInput').value;
+    if (searchTerm) {
+        applySearch(searchTerm);
+    } else {
+        renderUsers();
+    }
+}
+
+// Search functionality
+document.getElementById('searchInput').addEventListener('input', function () {
+    const searchTerm = this.value.toLowerCase().trim();
+    applySearch(searchTerm);
+});
+
+function applySearch(searchTerm) {
+    if (searchTerm === '') {
+        // If no search term, show filtered users based on current filter
+        filterUsers(currentFilter);
+        return;
+    }
+
+    // Apply search to current filtered users
+    const baseUsers = getCurrentFilteredUsers();
+    filteredUsers = baseUsers.filter(user =>
+        user.full_name.toLowerCase().includes(searchTerm) ||
+        user.username.toLowerCase().includes(searchTerm) ||
+        (user.email && user.email.toLowerCase().includes(searchTerm))
+    );
+
+    renderUsers();
+}
+
+function getCurrentFilteredUsers() {
+    switch (currentFilter) {
+        case 'active':
+            return allUsers.filter(user => user.active);
+        case 'face':
+            return allUsers.filter(user => user.face_recognition);
+        default:
+            return [...allUsers];
+    }
+}
+
+// Show user detail
+async function showUserDetail(userId) {
+    try {
+        const user = allUsers.find(u => u.id === userId);
+        if (!user) return;
+
+        // Buat konten detail user
+        const content = `
+            <div class="row">
+                <div class="col-md-4 text-center mb-3">
+                    <div class="user-avatar mx-auto mb-3" style="width: 80px; height: 80px; font-size: 1.8rem;">
+                        ${user.full_name.split(' ').map(n => n[0]).join('').slice(0, 2).toUpperCase()}
+                    </div>
+                    <h5>${escapeHtml(user.full_name)}</h5>
+                    <p class="text-muted">@${escapeHtml(user.username)}</p>
+                    ${user.role === 'admin' ? '<span class="badge bg-warning text-dark"><i class="fas fa-crown me-1"></i>Administrator</span>' : '<span class="badge bg-primary"><i class="fas fa-user me-1"></i>Pengguna</span>'}
+                </div>
+                <div class="col-md-8">
+                    <h6><i class="fas fa-info-circle me-2"></i>Informasi Dasar</h6>
+                    <table class="table table-borderless table-sm">
+                        <tr><td><strong>Email:</strong></td><td>${user.email || '-'}</td></tr>
+                        <tr><td><strong>Status:</strong></td><td>${user.active ? '<span class="badge bg-success">Aktif</span>' : '<span class="badge bg-secondary">Nonaktif</span>'}</td></tr>
+                        <tr><td><strong>Face Recognition:</strong></td><td>${user.face_recognition ? '<span class="badge bg-success">Aktif</span>' : '<span class="badge bg-secondary">Nonaktif</span>'}</td></tr>
+                        <tr><td><strong>Terdaftar:</strong></td><td>${formatDate(user.created_at)}</td></tr>
+                        <tr><td><strong>Terakhir Update:</strong></td><td>${formatDate(user.updated_at)}</td></tr>
+                        <tr><td><strong>Terakhir Hadir:</strong></td><td>${user.last_attendance ? formatDate(user.last_attendance) : 'Belum pernah'}</td></tr>
+                    </table>
+                </div>
+            </div>
+
+            <hr>
+
+            <div class="text-center">
+                <small class="text-muted">
+                    <i class="fas fa-info-circle me-1"></i>
+                    Untuk mengedit data pengguna, gunakan tombol edit pada card pengguna.
+                </small>
+            </div>
+        `;
+
+        document.getElementById('userDetailContent').innerHTML = content;
+        new bootstrap.Modal(document.getElementById('userDetailModal')).show();
+
+    } catch (error) {
+        showError('Error loading user detail: ' + error.message);
+    }
+}
+
+// Reset filters
+function resetFilters() {
+    document.getElementById('searchInput').value = '';
+    filterUsers('all');
+}
+
+// Initialize export modals
+function initializeExportModals() {
+    // Set today's date as default for date picker
+    const today = new Date().toISOString().split('T')[0];
+    document.getElementById('exportDate').value = today;
+    document.getElementById('exportDate').max = today;
+
+    // Populate year dropdown
+    const currentYear = new Date().getFullYear();
+    const yearSelect = document.getElementById('exportYear');
+    for (let year = currentYear; year >= currentYear - 5; year--) {
+        const option = document.createElement('option');
+        option.value = year;
+        option.textContent = year;
+        if (year === currentYear) option.selected = true;
+        yearSelect.appendChild(option);
+    }
+
+    // Set current month as default
+    const currentMonth = new Date().getMonth() + 1;
+    document.getElementById('exportMonth').value = currentMonth;
+}
+
+// Export functions
+function exportUsers() {
+    showExportLoading('Mengexport data pengguna...');
+
+    // Create a temporary anchor element to trigger download
+    const link = document.createElement('a');
+    link.href = '/api/export/users';
+    link.download = '';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+
+    setTimeout(() => {
+        hideExportLoading();
+        showSuccess('Data pengguna berhasil diexport ke Excel!');
+    }, 1000);
+}
+
+function exportDailyAttendance() {
+    const today = new Date().toISOString().split('T')[0];
+    exportAttendanceByDate(today);
+}
+
+function showDatePickerModal() {
+    new bootstrap.Modal(document.getElementById('datePickerModal')).show();
+}
+
+function showMonthPickerModal() {
+    new bootstrap.Modal(document.getElementById('monthPickerModal')).show();
+}
+
+function exportSelectedDate() {
+    const selectedDate = document.getElementById('exportDate').value;
+    if (!selectedDate) {
+        showError('Silakan pilih tanggal terlebih dahulu');
+        return;
+    }
+
+    bootstrap.Modal.getInstance(document.getElementById('datePickerModal')).hide();
+    exportAttendanceByDate(selectedDate);
+}
+
+function exportSelectedMonth() {
+    const selectedMonth = document.getElementById('exportMonth').value;
+    const selectedYear = document.getElementById('exportYear').value;
+
+    if (!selectedMonth || !selectedYear) {
+        showError('Silakan pilih bulan dan tahun terlebih dahulu');
+        return;
+    }
+
+    bootstrap.Modal.getInstance(document.getElementById('monthPickerModal')).hide();
+    exportMonthlyReport(selectedMonth, selectedYear);
+}
+
+function exportAttendanceByDate(date) {
+    showExportLoading('Mengexport data kehadiran harian...');
+
+    const link = document.createElement('a');
+    link.href = `/api/export/attendance/daily?date=${date}`;
+    link.download = '';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+
+    setTimeout(() => {
+        hideExportLoading();
+        const formattedDate = new Date(date).toLocaleDateString('id-ID');
+        showSuccess(`Data kehadiran tanggal ${formattedDate} berhasil diexport ke Excel!`);
+    }, 1000);
+}
+
+function exportMonthlyReport(month, year) {
+    showExportLoading('Mengexport laporan bulanan...');
+
+    const link = document.createElement('a');
+    link.href = `/api/export/attendance/monthly?month=${month}&year=${year}`;
+    link.download = '';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+
+    setTimeout(() => {
+        hideExportLoading();
+        const monthNames = [
+            'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
+            'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember'
+        ];
+        showSuccess(`Laporan bulanan ${monthNames[month - 1]} ${year} berhasil diexport ke Excel!`);
+    }, 1000);
+}
+
+function showExportLoading(message) {
+    const loadingHtml = `
+        <div class="export-loading-overlay" id="exportLoadingOverlay">
+            <div class="export-loading-content">
+                <div class="text-center">
+                    <div class="spinner-border text-primary mb-3" role="status">
+                        <span class="visually-hidden">Loading...</span>
+                    </div>
+                    <div class="text-primary fw-bold">${message}</div>
+                    <div class="text-muted mt-2">Mohon tunggu...</div>
+                </div>
+            </div>
+        </div>
+    `;
+    document.body.insertAdjacentHTML('beforeend', loadingHtml);
+}
+
+function hideExportLoading() {
+    const overlay = document.getElementById('exportLoadingOverlay');
+    if (overlay) {
+        overlay.remove();
+    }
+}
+
+// Utility functions
+function showLoading(show) {
+    document.getElementById('loadingSpinner').style.display = show ? 'block' : 'none';
+}
+
+function showError(message) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-danger alert-dismissible fade show';
+    alertDiv.innerHTML = `
+        <i class="fas fa-exclamation-triangle me-2"></i>
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+
+    const container = document.querySelector('.container');
+    container.insertBefore(alertDiv, container.firstChild);
+
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 5000);
+}
+
+function showSuccess(message) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-success alert-dismissible fade show';
+    alertDiv.innerHTML = `
+        <i class="fas fa-check-circle me-2"></i>
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+
+    const container = document.querySelector('.container');
+    container.insertBefore(alertDiv, container.firstChild);
+
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 5000);
+}
+
+function escapeHtml(text) {
+    if (!text) return '';
+    const map = {
+        '&': '&amp;',
+        '<': '&lt;',
+        '>': '&gt;',
+        '"': '&quot;',
+        "'": '&#039;'
+    };
+    return text.replace(/[&<>"']/g, function (m) { return map[m]; });
+}
+
+function formatDate(dateString) {
+    if (!dateString) return '-';
+    const date = new Date(dateString);
+    return date.toLocaleDateString('id-ID', {
+        year: 'numeric',
+        month: 'short',
+        day: 'numeric'
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    updateDateDisplay();
+    loadUsers();
+    initializeExportModals();   
+});
@@ -0,0 +1,91 @@
+"""
+Static assets module untuk sistem absensi
+Fingerprinted URLs for static files so browsers can cache them forever
+"""
+
+import os
+import re
+import hashlib
+import mimetypes
+import threading
+
+from flask import abort
+
+
+FINGERPRINT_PATTERN = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{10})(?P<ext>\.[A-Za-z0-9]+)$')
+
+
+class AssetManifest:
+    """Content hashes for files in the static folder, refreshed when a file changes"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, filename):
+        path = os.path.normpath(os.path.join(self.static_folder, filename))
+        if not path.startswith(os.path.abspath(self.static_folder) + os.sep):
+            return None
+        return path
+
+    def load(self, filename):
+        """Return (digest, content) for a static file, or None if missing"""
+        path = self._path(filename)
+        if path is None or not os.path.isfile(path):
+            return None
+
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            entry = self._entries.get(filename)
+        if entry and entry[0] == mtime:
+            return entry[1], entry[2]
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()[:10]
+        with self._lock:
+            self._entries[filename] = (mtime, digest, content)
+        return digest, content
+
+    def url_path(self, filename):
+        """Fingerprinted path for a static file, e.g. js/absensi.3f2a9c1b2d.js"""
+        loaded = self.load(filename)
+        if loaded is None:
+            return filename
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}.{loaded[0]}{ext}"
+
+
+def init_static_assets(app):
+    """Register asset_url() for templates and the /assets route serving fingerprinted files"""
+    manifest = AssetManifest(os.path.abspath(app.static_folder))
+
+    def asset_url(filename):
+        return f"/assets/{manifest.url_path(filename)}"
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.route('/assets/<path:fingerprinted>')
+    def static_asset(fingerprinted):
+        match = FINGERPRINT_PATTERN.match(fingerprinted)
+        if not match:
+            abort(404)
+
+        filename = match.group('stem') + match.group('ext')
+        loaded = manifest.load(filename)
+        if loaded is None:
+            abort(404)
+        digest, content = loaded
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = app.response_class(content, mimetype=mimetype)
+        if digest == match.group('digest'):
+            # The URL changes whenever the content does
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            # Stale fingerprint from an old page, serve current content uncached
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    return manifest
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ADMIN_PASSWORD = 'hjtq2$ut%y@7'
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The full application on a fresh SQLite database in a temporary directory"""
+    work = tmp_path_factory.mktemp('app')
+    os.environ['DATABASE_URL'] = f'sqlite:///{work / "database.db"}'
+    os.environ['CACHE_URL'] = 'memory://'
+    os.environ['PUNCH_JOURNAL_DIR'] = str(work / 'journal')
+    os.chdir(work)
+    import app as app_module
+    app_module.app.config['TESTING'] = True
+    return app_module.app
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'admin', 'password': ADMIN_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture(scope='session')
+def office(app):
+    """An active 100 m fence; punches in these tests are sent from its center"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': ADMIN_PASSWORD})
+    client.post('/add_coordinate', data={'name': 'Kantor Uji', 'latitude': '-6.2', 'longitude': '106.8', 'radius': '100'})
+    return {'latitude': '-6.2', 'longitude': '106.8'}
+
+
+@pytest.fixture
+def user_client(app, admin_client):
+    """Factory creating a user and returning (logged-in client, user id)"""
+    from db import get_db_connection
+
+    def create(username):
+        response = admin_client.post('/api/users/create', json={
+            'username': username, 'full_name': username.title(), 'password': 'rahasia123'
+        })
+        assert response.get_json()['success'], response.get_json()
+        client = app.test_client()
+        assert client.post('/login', data={'username': username, 'password': 'rahasia123'}).status_code == 302
+        conn = get_db_connection()
+        try:
+            return client, conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()['id']
+        finally:
+            conn.close()
+    return create
+
+
+@pytest.fixture
+def enroll_face(app):
+    """Give a user an active face_data row with a dummy encoding"""
+    import json
+
+    from app_helpers import invalidate_user_caches
+    from db import get_db_connection
+
+    def enroll(user_id):
+        conn = get_db_connection()
+        try:
+            conn.execute('INSERT INTO face_data (user_id, face_encoding, photo_path, active) VALUES (?, ?, ?, TRUE)',
+                         (user_id, json.dumps([0.0] * 128), f'faces/{user_id}.jpg'))
+            conn.commit()
+        finally:
+            conn.close()
+        with app.app_context():
+            invalidate_user_caches(user_id)
+    return enroll
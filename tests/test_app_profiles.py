@@ -0,0 +1,25 @@
+import pytest
+
+from conftest import ADMIN_PASSWORD
+
+
+def test_unknown_profile_is_rejected(app):
+    import app as app_module
+    with pytest.raises(ValueError):
+        app_module.get_profile('kiosk')
+    assert app_module.get_profile('punch') is app_module.PROFILES['punch']
+
+
+def test_punch_profile_serves_only_its_blueprints(app):
+    import app as app_module
+    punch = app_module.create_app('punch')
+    assert punch.config['APP_PROFILE'] == 'punch'
+    assert {'main', 'attendance', 'geofence', 'face'} <= set(punch.blueprints)
+    assert not {'users', 'reports'} & set(punch.blueprints)
+
+    client = punch.test_client()
+    assert client.post('/login', data={'username': 'admin', 'password': ADMIN_PASSWORD}).status_code == 302
+    assert client.get('/users').status_code == 404
+    # Navigation still links to pages served by the other pool
+    page = client.get('/').get_data(as_text=True)
+    assert 'href="/users"' in page and 'href="/absensi"' in page
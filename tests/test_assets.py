@@ -0,0 +1,32 @@
+import gzip
+import os
+import re
+
+
+def test_page_assets_are_fingerprinted_and_immutable(app, admin_client):
+    page = admin_client.get('/absensi').get_data(as_text=True)
+    url = re.search(r'/assets/js/absensi\.[0-9a-f]{10}\.js', page).group(0)
+
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    with open(os.path.join(app.static_folder, 'js', 'absensi.js'), 'rb') as f:
+        assert response.get_data() == f.read()
+
+    stale = admin_client.get('/assets/js/absensi.0000000000.js')
+    assert stale.status_code == 200 and stale.headers['Cache-Control'] == 'no-cache'
+    assert admin_client.get('/assets/../app.0000000000.py').status_code == 404
+    assert admin_client.get('/assets/js/absensi.js').status_code == 404
+
+
+def test_large_responses_are_compressed(admin_client):
+    admin_client.get('/absensi')  # shows the login flash message
+    plain = admin_client.get('/absensi')
+    compressed = admin_client.get('/absensi', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert compressed.headers['ETag'].startswith('W/')
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+
+    small = admin_client.get('/api/capture_params', headers={'Accept-Encoding': 'gzip'})
+    assert len(small.get_data()) < 1024 and 'Content-Encoding' not in small.headers
@@ -0,0 +1,46 @@
+import sqlite3
+
+import benchmark
+
+
+def _run(p95, params=None):
+    return {'params': params or {'users': 10}, 'results': {'/absen_masuk': {'p95_ms': p95}}}
+
+
+def test_regressions_compare_against_recent_comparable_runs():
+    history = [_run(10), _run(12), _run(11), _run(500, {'users': 99})]
+    assert benchmark.find_regressions(history, {'users': 10}, {'/absen_masuk': {'p95_ms': 11.5}}, 0.2) == []
+    assert benchmark.find_regressions(history, {'users': 10}, {'/absen_masuk': {'p95_ms': 20}}, 0.2) == [
+        ('/absen_masuk', 11.0, 20)]
+    # No comparable history, nothing to flag
+    assert benchmark.find_regressions(history, {'users': 5}, {'/absen_masuk': {'p95_ms': 20}}, 0.2) == []
+
+
+def test_failed_responses_count_as_errors():
+    assert benchmark.succeeded(200, b'{"success": true}')
+    assert not benchmark.succeeded(200, b'{"success": false, "message": "Replay"}')
+    assert not benchmark.succeeded(500, b'<html></html>')
+    assert benchmark.succeeded(200, b'PK\x03\x04 excel')
+
+    summary = benchmark.summarize([10.0, 20.0, 30.0, 40.0], 1, 2.0)
+    assert summary['requests'] == 4 and summary['errors'] == 1 and summary['throughput'] == 2.0
+    assert summary['p50_ms'] == 25.0
+
+
+def test_every_punch_gets_its_own_photo():
+    photos = {benchmark.sample_photo(variant) for variant in range(5)}
+    assert len(photos) == 5
+    assert benchmark.sample_photo(3) == benchmark.sample_photo(3)
+
+
+def test_dataset_has_users_fences_and_history(tmp_path):
+    usernames = benchmark.generate_dataset(str(tmp_path), users=5, days=14, geofences=3)
+    assert usernames == [f'bench{i:05d}' for i in range(5)]
+    conn = sqlite3.connect(str(tmp_path / 'database.db'))
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM coordinates').fetchone()[0] == 3
+        assert conn.execute('SELECT COUNT(*) FROM face_data').fetchone()[0] == 5
+        days = conn.execute('SELECT COUNT(DISTINCT date) FROM attendance').fetchone()[0]
+        assert 8 <= days <= 10
+    finally:
+        conn.close()
@@ -0,0 +1,35 @@
+from PIL import Image
+
+from app_helpers import CAPTURE_MAX_DIMENSION, normalize_photo
+
+
+def test_large_uploads_are_downscaled(tmp_path):
+    path = tmp_path / 'upload.jpg'
+    Image.new('RGB', (CAPTURE_MAX_DIMENSION * 3, CAPTURE_MAX_DIMENSION * 2), 'white').save(path)
+    normalize_photo(str(path))
+    with Image.open(path) as image:
+        assert image.size[0] == CAPTURE_MAX_DIMENSION
+        assert abs(image.size[1] - CAPTURE_MAX_DIMENSION * 2 / 3) <= 1
+
+
+def test_small_and_unreadable_uploads_are_left_alone(tmp_path):
+    small = tmp_path / 'small.jpg'
+    Image.new('RGB', (320, 240), 'white').save(small)
+    before = small.read_bytes()
+    normalize_photo(str(small))
+    assert small.read_bytes() == before
+
+    broken = tmp_path / 'broken.jpg'
+    broken.write_bytes(b'not an image')
+    normalize_photo(str(broken))
+    assert broken.read_bytes() == b'not an image'
+
+
+def test_capture_params_ask_for_a_face_check_only_when_verified(user_client, enroll_face):
+    client, user_id = user_client('kamera1')
+    params = client.get('/api/capture_params').get_json()
+    assert params['max_dimension'] == CAPTURE_MAX_DIMENSION and params['mime_type'] == 'image/jpeg'
+    assert params['face_check'] is False and params['challenge'] == ''
+
+    enroll_face(user_id)
+    assert client.get('/api/capture_params').get_json()['face_check'] is True
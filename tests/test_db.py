@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from db import ConnectionPool, Database, PostgresDialect, Row
+
+
+class _Raw:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.rolled_back = 0
+        self.closed = False
+
+    def rollback(self):
+        if self.broken:
+            raise RuntimeError('connection lost')
+        self.rolled_back += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_and_bounds_connections():
+    created = []
+    pool = ConnectionPool(lambda: created.append(_Raw()) or created[-1], max_size=2, timeout=0.05)
+    first = pool.acquire()
+    pool.acquire()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+    pool.release(first)
+    assert first.rolled_back == 1
+    assert pool.acquire() is first
+    assert len(created) == 2
+
+
+def test_pool_drops_broken_connections():
+    pool = ConnectionPool(_Raw, max_size=1, timeout=0.05)
+    raw = pool.acquire()
+    raw.broken = True
+    pool.release(raw)
+    assert raw.closed
+    # Its slot is free again
+    assert pool.acquire() is not raw
+
+
+def test_connection_context_commits_or_rolls_back(tmp_path):
+    database = Database(f'sqlite:///{tmp_path / "pool.db"}', pool_size=1)
+    with database.connect() as conn:
+        conn.execute('CREATE TABLE t (value INTEGER)')
+        conn.execute('INSERT INTO t (value) VALUES (?)', (1,))
+    with pytest.raises(ZeroDivisionError):
+        with database.connect() as conn:
+            conn.execute('INSERT INTO t (value) VALUES (?)', (2,))
+            1 / 0
+    with database.connect() as conn:
+        assert [row['value'] for row in conn.execute('SELECT value FROM t').fetchall()] == [1]
+    assert database.pool._created == 1
+
+
+def test_dialect_expressions_on_sqlite(tmp_path):
+    conn = Database(f'sqlite:///{tmp_path / "dialect.db"}').connect()
+    try:
+        conn.execute('CREATE TABLE shifts (day DATE, time_in TIME, time_out TIME, hours REAL)')
+        conn.execute("INSERT INTO shifts VALUES ('2026-03-02', '08:00:00', '16:30:00', 8.5)")
+        hours, day = conn.dialect.format_decimal('hours'), conn.dialect.date_of("day || ' ' || time_in")
+        row = conn.execute(f'SELECT {hours}, {day} FROM shifts').fetchone()
+        assert tuple(row) == ('8.5', '2026-03-02')
+    finally:
+        conn.close()
+
+
+def test_postgres_translation_and_rows():
+    dialect = PostgresDialect()
+    assert dialect.translate("SELECT * FROM t WHERE a = ? AND b LIKE '%x'") == \
+        "SELECT * FROM t WHERE a = %s AND b LIKE '%%x'"
+    assert dialect.translate('BEGIN IMMEDIATE') is None
+
+    row = Row(['amount', 'day', 'at'], [Decimal('1.5'), date(2026, 3, 2), datetime(2026, 3, 2, 8, 0, 1)])
+    assert row['amount'] == 1.5 and row[1] == '2026-03-02' and row['at'] == '2026-03-02 08:00:01'
+    assert dict(zip(row.keys(), row)) == {'amount': 1.5, 'day': '2026-03-02', 'at': '2026-03-02 08:00:01'}
@@ -0,0 +1,99 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import face_reencode
+from db import Database
+from face_verification import face_model_version
+
+
+@pytest.fixture
+def face_db(tmp_path, monkeypatch):
+    """face_data with a current, a stale and an inactive row, on its own database"""
+    database = Database(f'sqlite:///{tmp_path / "faces.db"}', pool_size=2)
+    current = face_model_version('hog', 1)
+    with database.connect() as conn:
+        conn.execute('''CREATE TABLE face_data (id INTEGER PRIMARY KEY, user_id INTEGER, face_encoding TEXT,
+                        photo_path TEXT, active BOOLEAN, model_version VARCHAR(100))''')
+        conn.execute('''CREATE TABLE face_encoding_staging (run_id VARCHAR(40) NOT NULL,
+                        face_data_id INTEGER NOT NULL, face_encoding TEXT NOT NULL,
+                        model_version VARCHAR(100) NOT NULL)''')
+        conn.executemany('INSERT INTO face_data VALUES (?, 1, ?, ?, ?, ?)', [
+            (1, '[1]', 'faces/1.jpg', True, current),
+            (2, '[2]', 'faces/2.jpg', True, 'face_recognition-old:hog:j1'),
+            (3, '[3]', 'faces/3.jpg', False, None),
+            (4, '[4]', 'faces/4.jpg', True, None),
+        ])
+
+    invalidated = []
+
+    class _Cache:
+        def invalidate(self, namespace):
+            invalidated.append(namespace)
+
+    monkeypatch.setattr(face_reencode, 'get_db_connection', database.connect)
+    monkeypatch.setattr(face_reencode, 'get_cache', _Cache)
+    monkeypatch.setattr(face_reencode, 'ProcessPoolExecutor',
+                        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    return database, invalidated
+
+
+def _encodings(database):
+    with database.connect() as conn:
+        return {row['id']: (row['face_encoding'], row['model_version'])
+                for row in conn.execute('SELECT id, face_encoding, model_version FROM face_data')}
+
+
+def test_missing_photo_is_reported_not_encoded():
+    assert face_reencode.encode_photo((7, 'faces/tidak-ada.jpg', 'hog', 1)) == (7, None, 'foto tidak ditemukan')
+
+
+def test_only_stale_active_rows_are_pending(face_db):
+    database, _ = face_db
+    with database.connect() as conn:
+        version = face_model_version('hog', 1)
+        assert [job[0] for job in face_reencode.pending_jobs(conn, version)] == [2, 4]
+        assert [job[0] for job in face_reencode.pending_jobs(conn, version, include_inactive=True)] == [2, 3, 4]
+        assert len(face_reencode.pending_jobs(conn, version, stale_only=False)) == 3
+
+
+def test_reencode_swaps_staged_encodings_and_keeps_failures(face_db, monkeypatch):
+    database, invalidated = face_db
+    version = face_model_version('hog', 1)
+
+    def encode(job):
+        face_data_id = job[0]
+        if face_data_id == 4:
+            return face_data_id, None, '0 wajah terdeteksi'
+        return face_data_id, json.dumps([face_data_id * 10]), None
+
+    monkeypatch.setattr(face_reencode, 'encode_photo', encode)
+    progress = []
+    summary = face_reencode.reencode(model='hog', num_jitters=1, workers=2, batch_size=1,
+                                     progress=lambda *args: progress.append(args))
+
+    assert summary['total'] == 2 and summary['encoded'] == 1
+    assert summary['failed'] == {4: '0 wajah terdeteksi'}
+    assert progress[-1] == (2, 2, 1)
+    rows = _encodings(database)
+    assert rows[2] == ('[20]', version)
+    assert rows[4] == ('[4]', None)
+    assert rows[1][0] == '[1]' and rows[3][0] == '[3]'
+    assert invalidated == ['faces']
+    with database.connect() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM face_encoding_staging').fetchone()[0] == 0
+
+
+def test_dry_run_writes_nothing(face_db, monkeypatch):
+    database, invalidated = face_db
+    before = _encodings(database)
+    monkeypatch.setattr(face_reencode, 'encode_photo', lambda job: (job[0], '[0]', None))
+    summary = face_reencode.reencode(model='hog', num_jitters=1, workers=1, dry_run=True)
+    assert summary['encoded'] == 2
+    assert _encodings(database) == before and invalidated == []
+
+
+def test_unknown_model_is_rejected():
+    with pytest.raises(ValueError):
+        face_reencode.reencode(model='mtcnn')
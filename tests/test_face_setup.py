@@ -0,0 +1,38 @@
+import io
+import os
+
+import face_routes
+from db import get_database
+
+
+def _photo():
+    return io.BytesIO(b'\xff\xd8\xff\xe0 not really a jpeg')
+
+
+def _saved_photos(app):
+    folder = app.config['FACES_FOLDER']
+    return [name for _, _, names in os.walk(folder) for name in names]
+
+
+def _connections_in_use():
+    pool = get_database().pool
+    return pool._created - pool._idle.qsize()
+
+
+def test_failed_enrollment_cleans_up(app, admin_client, monkeypatch):
+    def broken_encoder(image_path):
+        raise RuntimeError('encoder crashed')
+
+    monkeypatch.setattr(face_routes, 'FACE_RECOGNITION_AVAILABLE', True)
+    monkeypatch.setattr(face_routes, 'encode_enrollment_photo', broken_encoder)
+    before = _saved_photos(app)
+    in_use = _connections_in_use()
+
+    response = admin_client.post('/setup_face', data={
+        'face_image': [(_photo(), 'a.jpg'), (_photo(), 'b.jpg')]
+    }, content_type='multipart/form-data')
+
+    result = response.get_json()
+    assert not result['success'] and 'encoder crashed' in result['message']
+    assert _saved_photos(app) == before
+    assert _connections_in_use() == in_use
@@ -0,0 +1,83 @@
+import json
+
+import face_verification
+from app_helpers import invalidate_user_caches
+from cache import LocalCache
+from db import get_db_connection
+
+
+def _user_with_face_data(username, encoding):
+    conn = get_db_connection()
+    try:
+        conn.execute('INSERT INTO users (username, full_name, password) VALUES (?, ?, ?)', (username, username, 'x'))
+        user_id = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()['id']
+        if encoding is not False:
+            conn.execute('INSERT INTO face_data (user_id, face_encoding, photo_path, active) VALUES (?, ?, ?, TRUE)',
+                         (user_id, encoding, f'faces/{username}.jpg'))
+        conn.commit()
+    finally:
+        conn.close()
+    invalidate_user_caches(user_id)
+    return user_id
+
+
+def test_face_data_without_encoding_rejects_punch(app, monkeypatch):
+    monkeypatch.setattr(face_verification, 'FACE_RECOGNITION_AVAILABLE', True)
+    with app.app_context():
+        user_id = _user_with_face_data('wajah_kosong', None)
+        assert face_verification.get_stored_face_encodings(user_id) == []
+        assert face_verification.verify_face_for_attendance('probe.jpg', user_id) == (
+            False, face_verification.NO_USABLE_ENCODING)
+
+
+def test_no_face_data_still_allows_punch(app, monkeypatch):
+    monkeypatch.setattr(face_verification, 'FACE_RECOGNITION_AVAILABLE', True)
+    with app.app_context():
+        user_id = _user_with_face_data('tanpa_wajah', False)
+        assert face_verification.get_stored_face_encodings(user_id) is None
+        assert face_verification.verify_face_for_attendance('probe.jpg', user_id)[0]
+
+
+def test_batch_rejects_face_data_without_encoding(app, monkeypatch):
+    monkeypatch.setattr(face_verification, 'FACE_RECOGNITION_AVAILABLE', True)
+    with app.app_context():
+        user_id = _user_with_face_data('wajah_kosong_batch', None)
+        results = face_verification.verify_faces_for_attendance(['masuk.jpg', 'keluar.jpg'], user_id)
+        assert results == [(False, face_verification.NO_USABLE_ENCODING)] * 2
+
+
+def test_resent_photo_reuses_its_encoding(app, monkeypatch, tmp_path):
+    monkeypatch.setattr(face_verification, 'FACE_RECOGNITION_AVAILABLE', True)
+    monkeypatch.setattr(face_verification, '_probe_results', LocalCache(max_entries=8))
+    encoded = []
+
+    def detect_and_encode(image_file):
+        encoded.append(image_file)
+        if 'kosong' in image_file:
+            return None, 'Wajah tidak terdeteksi.'
+        return [0.01] * 128, None
+
+    monkeypatch.setattr(face_verification, '_detect_and_encode', detect_and_encode)
+    photo, other = tmp_path / 'masuk.jpg', tmp_path / 'kosong.jpg'
+    photo.write_bytes(b'foto yang sama')
+    other.write_bytes(b'foto tanpa wajah')
+
+    with app.app_context():
+        user_id = _user_with_face_data('wajah_ulang', json.dumps([0.0] * 128))
+        second_id = _user_with_face_data('wajah_ulang_lain', json.dumps([0.0] * 128))
+        first = face_verification.verify_face_for_attendance(str(photo), user_id)
+        assert first[0]
+        assert face_verification.verify_face_for_attendance(str(photo), user_id) == first
+        assert face_verification.verify_faces_for_attendance([str(photo), str(other)], user_id) == [
+            first, (False, 'Wajah tidak terdeteksi.')]
+        assert face_verification.verify_face_for_attendance(str(other), user_id)[1] == 'Wajah tidak terdeteksi.'
+        # The same photo from another user is encoded again
+        assert face_verification.verify_face_for_attendance(str(photo), second_id)[0]
+
+    assert encoded == [str(photo), str(other), str(photo)]
+    conn = get_db_connection()
+    try:
+        logged = conn.execute('SELECT COUNT(*) FROM face_match_log WHERE user_id = ?', (user_id,)).fetchone()[0]
+    finally:
+        conn.close()
+    assert logged == 1
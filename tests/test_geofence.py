@@ -0,0 +1,65 @@
+import pytest
+
+import geofence
+
+OFFICE = {'id': 1, 'name': 'Kantor', 'latitude': -6.2, 'longitude': 106.8, 'radius': 100.0}
+WAREHOUSE = {'id': 2, 'name': 'Gudang', 'latitude': -6.3, 'longitude': 106.9, 'radius': 50.0}
+# About 144.6 m north of the office: outside its radius, inside with 50 m of accuracy credit
+NEAR_OFFICE = (-6.1987, 106.8)
+
+
+def test_parse_location_rejects_missing_and_invalid_values():
+    assert geofence.parse_location('-6.2', '106.8') == (-6.2, 106.8, 0.0)
+    assert geofence.parse_location('-6.2', '106.8', '12.5') == (-6.2, 106.8, 12.5)
+    for values in [('', '106.8'), (None, None), ('abc', '106.8'), ('nan', '106.8'),
+                   ('91', '106.8'), ('-6.2', '106.8', '-1')]:
+        with pytest.raises(geofence.LocationError):
+            geofence.parse_location(*values)
+
+
+def test_locate_credits_accuracy_and_names_the_nearest_fence():
+    fences = geofence.Fences([WAREHOUSE, OFFICE])
+    inside = fences.locate(-6.2, 106.8)
+    assert inside['inside'] and inside['fence'] is OFFICE and inside['distance'] == 0
+
+    outside = fences.locate(*NEAR_OFFICE)
+    assert not outside['inside'] and outside['reason'] == 'outside' and outside['fence'] is OFFICE
+    assert outside['distance'] == pytest.approx(geofence.haversine(-6.2, 106.8, *NEAR_OFFICE), abs=0.1)
+    assert 'Jarak ke Kantor: 145m (maksimal 100m)' in geofence.outside_message(outside)
+
+    assert fences.locate(*NEAR_OFFICE, accuracy=60)['inside']
+    blurry = fences.locate(-6.2, 106.8, accuracy=geofence.MAX_ACCURACY + 1)
+    assert blurry['reason'] == 'accuracy' and blurry['distance'] is None
+    assert geofence.outside_message(blurry).startswith('Akurasi GPS terlalu rendah')
+
+    empty = geofence.Fences([]).locate(-6.2, 106.8)
+    assert empty['reason'] == 'no_fences'
+    assert geofence.outside_message(empty) == 'Anda berada di luar area absensi!'
+
+
+def test_locate_many_matches_locate():
+    fences = geofence.Fences([WAREHOUSE, OFFICE])
+    points = [(-6.2, 106.8, 0.0), (NEAR_OFFICE[0], NEAR_OFFICE[1], 0.0), (NEAR_OFFICE[0], NEAR_OFFICE[1], 60.0),
+              (-6.3, 106.9, geofence.MAX_ACCURACY + 1), (-6.3004, 106.9, 0.0), (-7.0, 110.0, 0.0)]
+    inside, nearest, distances = fences.locate_many([p[0] for p in points], [p[1] for p in points],
+                                                    [p[2] for p in points])
+    for i, (latitude, longitude, accuracy) in enumerate(points):
+        single = fences.locate(latitude, longitude, accuracy)
+        batch = fences.describe(inside[i], int(nearest[i]), float(distances[i]), accuracy)
+        assert batch == single
+    assert list(inside) == [True, False, True, False, True, False]
+
+    inside, nearest, _ = geofence.Fences([]).locate_many([-6.2], [106.8])
+    assert list(inside) == [False] and list(nearest) == [-1]
+
+
+def test_fences_are_rebuilt_only_when_coordinates_change(monkeypatch):
+    coordinates = [OFFICE]
+    monkeypatch.setattr(geofence, '_fences', None)
+    monkeypatch.setattr(geofence, 'get_active_coordinates', lambda: list(coordinates))
+    fences = geofence.get_fences()
+    assert geofence.get_fences() is fences
+
+    coordinates[0] = dict(OFFICE, radius=200.0)
+    moved = geofence.get_fences()
+    assert moved is not fences and moved.radii == [200.0]
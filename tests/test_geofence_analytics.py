@@ -0,0 +1,44 @@
+from datetime import date, datetime, timedelta
+
+import attendance_stats
+import geofence_analytics
+from db import Database, get_db_connection
+
+
+def test_ensure_schema_adds_rejection_message_column(tmp_path):
+    # attendance_logs as init_postgresql.py created it, without the message column
+    conn = Database(f'sqlite:///{tmp_path / "old.db"}').connect()
+    try:
+        conn.execute('''
+            CREATE TABLE attendance_logs (
+                id INTEGER PRIMARY KEY, user_id INTEGER, action VARCHAR(20), latitude REAL, longitude REAL,
+                success BOOLEAN DEFAULT TRUE, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        geofence_analytics.ensure_schema(conn)
+        geofence_analytics.ensure_schema(conn)
+        geofence_analytics.record_rejections(conn, 1, [('masuk', -6.21, 106.81, datetime(2026, 1, 5, 8))])
+        row = conn.execute('SELECT success, message FROM attendance_logs').fetchone()
+        assert not row['success'] and row['message'] == geofence_analytics.REJECTED_MESSAGE
+    finally:
+        conn.close()
+
+
+def test_every_session_of_a_day_is_counted(app):
+    conn = get_db_connection()
+    try:
+        conn.execute('INSERT INTO users (username, full_name, password) VALUES (?, ?, ?)', ('pagar1', 'pagar1', 'x'))
+        user_id = conn.execute('SELECT id FROM users WHERE username = ?', ('pagar1',)).fetchone()['id']
+        day = date.today() - timedelta(days=400)
+        morning = datetime.combine(day, datetime.min.time()).replace(hour=8)
+        for start in (morning, morning + timedelta(hours=5)):
+            attendance_stats.record_check_in(conn, user_id, start, -6.2, 106.8, None)
+            attendance_stats.record_check_out(conn, user_id, start + timedelta(hours=4), -6.2001, 106.8001, None)
+        geofence_analytics.record_rejections(conn, user_id, [('masuk', -6.21, 106.81, morning)])
+        conn.commit()
+
+        accepted, rejected = geofence_analytics._punch_locations(conn, day, day + timedelta(days=1))[day.isoformat()]
+        assert len(accepted) == 4
+        assert rejected == [(-6.21, 106.81)]
+    finally:
+        conn.close()
@@ -0,0 +1,33 @@
+import gzip
+import json
+import re
+
+
+def _asset_url(client):
+    page = client.get('/absensi').get_data(as_text=True)
+    return re.search(r'const geofenceUrl = "([^"]+)"', page).group(1).replace('&amp;', '&')
+
+
+def test_versioned_asset_is_immutable_and_compressed(office, admin_client):
+    url = _asset_url(admin_client)
+    response = admin_client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    fences = json.loads(gzip.decompress(response.get_data()))
+    assert {'name': 'Kantor Uji', 'lat': -6.2, 'lon': 106.8, 'radius': 100}.items() <= \
+        next(fence for fence in fences if fence['name'] == 'Kantor Uji').items()
+
+    revalidated = admin_client.get('/api/geofences.json', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['Cache-Control'] == 'private, no-cache'
+
+
+def test_coordinate_change_moves_the_version(office, admin_client):
+    before = _asset_url(admin_client)
+    admin_client.post('/add_coordinate', data={'name': 'Gudang', 'latitude': '-6.3', 'longitude': '106.9',
+                                               'radius': '50'})
+    after = _asset_url(admin_client)
+    assert after != before
+    fences = json.loads(admin_client.get(after).get_data())
+    assert 'Gudang' in [fence['name'] for fence in fences]
@@ -0,0 +1,74 @@
+import importlib.util
+import os
+import time
+from types import SimpleNamespace
+
+from cache import LocalCache, get_cache
+from db import get_db_connection
+
+
+def _open_sessions(user_id, timeout=5):
+    """Work sessions of a user once the punch journal has applied them"""
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = get_db_connection()
+        try:
+            count = conn.execute('SELECT COUNT(*) FROM work_sessions WHERE user_id = ?', (user_id,)).fetchone()[0]
+        finally:
+            conn.close()
+        if count or time.monotonic() > deadline:
+            return count
+        time.sleep(0.02)
+
+
+def test_retried_punch_is_replayed_not_repeated(office, user_client):
+    client, user_id = user_client('idempoten1')
+    headers = {'Idempotency-Key': 'masuk-1'}
+    first = client.post('/absen_masuk', data=office, headers=headers)
+    assert first.get_json()['success'], first.get_json()
+
+    retry = client.post('/absen_masuk', data=office, headers=headers)
+    assert retry.headers.get('Idempotent-Replayed') == 'true'
+    assert retry.get_data() == first.get_data()
+
+    # A new key is a new punch, refused while the first one is open
+    assert not client.post('/absen_masuk', data=office, headers={'Idempotency-Key': 'masuk-2'}).get_json()['success']
+    assert _open_sessions(user_id) == 1
+
+
+def test_concurrent_retry_is_refused(office, user_client):
+    client, user_id = user_client('idempoten2')
+    # The first request with this key is still being processed by another worker
+    assert get_cache().add(f"idempotency-lock:{user_id}:/absen_masuk:masuk-1", True, ttl=60)
+    response = client.post('/absen_masuk', data=office, headers={'Idempotency-Key': 'masuk-1'})
+    assert response.status_code == 409
+    assert _open_sessions(user_id, timeout=0.2) == 0
+
+
+def test_namespace_versions_survive_eviction():
+    cache = LocalCache(max_entries=4)
+    cache.set_ns('reports', 'daily', 'old')
+    cache.invalidate('reports')
+    for index in range(10):
+        cache.set(f'filler:{index}', index)
+    assert cache.namespace_version('reports') == 1
+    assert cache.get_ns('reports', 'daily') is None
+
+
+def _gunicorn_conf():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_several_workers_default_to_a_shared_cache(monkeypatch):
+    conf = _gunicorn_conf()
+    monkeypatch.delenv('CACHE_URL', raising=False)
+    conf.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+    assert os.environ['CACHE_URL'] == conf.MULTI_WORKER_CACHE_URL
+
+    monkeypatch.delenv('CACHE_URL')
+    conf.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+    assert 'CACHE_URL' not in os.environ
@@ -0,0 +1,49 @@
+import sys
+
+import pytest
+
+import lazy_imports
+
+
+@pytest.fixture
+def heavy_module(tmp_path, monkeypatch):
+    (tmp_path / 'modul_berat.py').write_text('VALUE = 42\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(lazy_imports, '_modules', {})
+    monkeypatch.setattr(lazy_imports, 'STARTUP_TIMINGS', {})
+    yield 'modul_berat'
+    sys.modules.pop('modul_berat', None)
+
+
+def test_lazy_module_imports_on_first_use(heavy_module):
+    proxy = lazy_imports.lazy(heavy_module)
+    assert lazy_imports.lazy(heavy_module) is proxy
+    assert not proxy.loaded and heavy_module not in sys.modules
+
+    assert proxy.VALUE == 42
+    assert proxy.loaded and proxy.load() is sys.modules[heavy_module]
+    assert list(lazy_imports.STARTUP_TIMINGS) == [f'import {heavy_module}']
+
+
+def test_available_checks_without_importing(heavy_module):
+    assert lazy_imports.available('json', heavy_module)
+    assert heavy_module not in sys.modules
+    assert not lazy_imports.available('json', 'modul_yang_tidak_ada')
+    assert not lazy_imports.available('modul_yang_tidak_ada.sub')
+
+
+def test_preload_skips_missing_modules(heavy_module):
+    lazy_imports.preload([heavy_module, ' ', 'modul_yang_tidak_ada'])
+    assert lazy_imports.lazy(heavy_module).loaded
+    assert 'modul_yang_tidak_ada' not in lazy_imports._modules
+
+
+def test_timed_accumulates_even_on_error(monkeypatch):
+    monkeypatch.setattr(lazy_imports, 'STARTUP_TIMINGS', {})
+    with lazy_imports.timed('blueprints'):
+        pass
+    with pytest.raises(RuntimeError):
+        with lazy_imports.timed('blueprints'):
+            raise RuntimeError('gagal')
+    lazy_imports.record('blueprints', 1.0)
+    assert 1.0 <= lazy_imports.STARTUP_TIMINGS['blueprints'] < 1.5
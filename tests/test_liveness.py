@@ -0,0 +1,66 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+import liveness
+
+
+def _kiosk_photo(shift=(0, 0), tone=(210, 170, 140), path=None):
+    """The same office corner every time, with the person standing slightly differently"""
+    image = Image.new('RGB', (640, 480), (180, 175, 165))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 330, 640, 480], fill=(120, 100, 80))
+    draw.rectangle([420, 40, 600, 200], fill=(90, 110, 140))
+    draw.rectangle([40, 60, 160, 300], fill=(200, 200, 195))
+    x, y = 320 + shift[0], 230 + shift[1]
+    draw.ellipse([x - 150, y + 60, x + 150, y + 330], fill=(40, 50, 70))
+    draw.ellipse([x - 68, y - 90, x + 68, y + 90], fill=tone)
+    image = image.filter(ImageFilter.GaussianBlur(2))
+    target = path or io.BytesIO()
+    image.save(target, 'JPEG', quality=80)
+    return target
+
+
+@pytest.fixture
+def replay_check(monkeypatch):
+    monkeypatch.setattr(liveness, 'REPLAY_CHECK', True)
+
+
+def test_same_spot_different_photos_are_accepted(tmp_path, replay_check):
+    user_id = 'same-spot'
+    morning = _kiosk_photo(path=tmp_path / 'masuk.jpg')
+    value, error = liveness.screen_photo(morning, user_id)
+    assert error is None
+    liveness.remember_photo(user_id, value)
+
+    evening = _kiosk_photo(shift=(12, 5), tone=(205, 165, 135), path=tmp_path / 'keluar.jpg')
+    assert liveness.screen_photo(evening, user_id)[1] is None
+
+
+def test_resent_copy_is_rejected(tmp_path, replay_check):
+    user_id = 'replayer'
+    original = tmp_path / 'masuk.jpg'
+    _kiosk_photo(path=original)
+    value, _ = liveness.screen_photo(original, user_id)
+    liveness.remember_photo(user_id, value)
+
+    copy = tmp_path / 'copy.jpg'
+    Image.open(original).resize((480, 360)).save(copy, 'JPEG', quality=60)
+    assert liveness.screen_photo(copy, user_id)[1] is not None
+
+
+def test_users_without_face_data_are_not_screened(app, admin_client, replay_check):
+    admin_client.post('/add_coordinate', data={'name': 'Kiosk', 'latitude': '-6.3', 'longitude': '106.9',
+                                               'radius': '100'})
+    admin_client.post('/api/users/create', json={'username': 'kiosk', 'full_name': 'Kiosk',
+                                                 'password': 'rahasia123'})
+    client = app.test_client()
+    client.post('/login', data={'username': 'kiosk', 'password': 'rahasia123'})
+
+    photo = _kiosk_photo().getvalue()
+    location = {'latitude': '-6.3', 'longitude': '106.9'}
+    for route in ('/absen_masuk', '/absen_keluar'):
+        response = client.post(route, data=dict(location, photo=(io.BytesIO(photo), 'absen.jpg')),
+                               content_type='multipart/form-data')
+        assert response.get_json()['success'], response.get_json()
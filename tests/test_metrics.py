@@ -0,0 +1,59 @@
+import json
+import os
+
+from flask import Flask
+
+import db
+import metrics
+
+
+def _worker_file(directory, pid, counts):
+    series = [[['GET', '/uji', '200'], counts, 0.02, sum(counts)]]
+    with open(os.path.join(directory, f'metrics-{pid}.json'), 'w', encoding='utf-8') as f:
+        json.dump({metrics.REQUEST_DURATION.name: series}, f)
+
+
+def test_collect_merges_live_workers_and_drops_exited_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    buckets = len(metrics.REQUEST_DURATION.buckets) + 1
+    _worker_file(tmp_path, os.getppid(), [1] + [0] * (buckets - 1))
+    _worker_file(tmp_path, 4194303, [5] + [0] * (buckets - 1))
+
+    merged = metrics.collect()
+    counts, _, count = merged[metrics.REQUEST_DURATION.name][('GET', '/uji', '200')]
+    assert count == 1 and counts[0] == 1
+    assert not (tmp_path / 'metrics-4194303.json').exists()
+
+
+def test_collect_survives_a_concurrent_cleanup(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    _worker_file(tmp_path, 4194303, [1])
+
+    def removed_by_other_worker(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(metrics.os, 'remove', removed_by_other_worker)
+    assert metrics.REQUEST_DURATION.name in metrics.collect()
+
+
+def test_requests_and_spans_are_exported(monkeypatch):
+    monkeypatch.setattr(metrics, 'ENABLED', True)
+    monkeypatch.setattr(metrics, 'METRICS_DIR', '')
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 'rahasia')
+    app = Flask('metrics_test')
+
+    @app.route('/ping')
+    def ping():
+        with metrics.span('work'):
+            return 'ok'
+
+    metrics.init_metrics(app)
+    try:
+        client = app.test_client()
+        assert client.get('/ping').status_code == 200
+        assert client.get('/metrics').status_code == 401
+        text = client.get('/metrics', headers={'Authorization': 'Bearer rahasia'}).get_data(as_text=True)
+    finally:
+        db._query_hooks.remove(metrics._record_query)
+    assert 'absensi_http_request_duration_seconds_count{method="GET",route="ping",status="200"} 1' in text
+    assert 'stage="work"' in text
@@ -0,0 +1,83 @@
+import sqlite3
+
+import work_calendar
+from db import PooledConnection, PostgresDialect
+
+
+class _Pool:
+    def release(self, raw):
+        pass
+
+
+class _FakePostgresCursor:
+    """psycopg2-style cursor on SQLite, which rejects RETURNING id on tables without an id column too"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append(sql)
+        sql = sql.replace('SELECT lastval()', 'SELECT last_insert_rowid()')
+        self._cursor.execute(sql.replace('%s', '?').replace('%%', '%'), params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+
+class _FakePostgres:
+    def __init__(self):
+        self.raw = sqlite3.connect(':memory:')
+        self.statements = []
+
+    def cursor(self):
+        return _FakePostgresCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+
+def _connection():
+    raw = _FakePostgres()
+    raw.raw.execute('CREATE TABLE calendar_dirty_days (user_id INTEGER NOT NULL, work_date DATE NOT NULL, '
+                    'PRIMARY KEY (user_id, work_date))')
+    raw.raw.execute('CREATE TABLE holidays (id INTEGER PRIMARY KEY AUTOINCREMENT, date DATE, name TEXT)')
+    return raw, PooledConnection(_Pool(), raw, PostgresDialect())
+
+
+def test_mark_day_dirty_on_postgres():
+    raw, conn = _connection()
+    work_calendar.mark_day_dirty(conn, 7, '2026-03-02')
+    work_calendar.mark_day_dirty(conn, 7, '2026-03-02')
+    conn.commit()
+
+    assert all('RETURNING' not in sql for sql in raw.statements)
+    rows = conn.execute('SELECT user_id, work_date FROM calendar_dirty_days').fetchall()
+    assert [tuple(row) for row in rows] == [(7, '2026-03-02')]
+
+
+def test_lastrowid_only_looked_up_when_asked():
+    raw, conn = _connection()
+    cursor = conn.execute('INSERT INTO holidays (date, name) VALUES (?, ?)', ('2026-08-17', 'Kemerdekaan'))
+    assert not any('lastval' in sql for sql in raw.statements)
+    assert cursor.lastrowid == 1
+    assert conn.execute('INSERT INTO holidays (date, name) VALUES (?, ?)', ('2026-12-25', 'Natal')).lastrowid == 2
+
+    skipped = conn.execute('''
+        INSERT INTO holidays (id, date, name) VALUES (?, ?, ?) ON CONFLICT (id) DO NOTHING
+    ''', (1, '2026-08-17', 'Kemerdekaan'))
+    assert skipped.lastrowid is None
@@ -0,0 +1,113 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import punch_journal
+from db import get_db_connection
+from punch_journal import PunchJournal
+
+
+def _user(username):
+    conn = get_db_connection()
+    try:
+        conn.execute('INSERT INTO users (username, full_name, password) VALUES (?, ?, ?)', (username, username, 'x'))
+        conn.commit()
+        return conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()['id']
+    finally:
+        conn.close()
+
+
+def _punch(user_id, action, at, key):
+    return {'key': key, 'action': action, 'user_id': user_id, 'timestamp': at,
+            'date': at[:10], 'time': at[11:], 'latitude': -6.2, 'longitude': 106.8, 'photo_path': None}
+
+
+def _sessions(user_id):
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('SELECT start_ts, end_ts FROM work_sessions WHERE user_id = ? ORDER BY start_ts',
+                            (user_id,)).fetchall()
+        return [(str(row['start_ts'])[:19], str(row['end_ts'])[:19]) for row in rows]
+    finally:
+        conn.close()
+
+
+def _drain(journal, timeout=10):
+    deadline = time.monotonic() + timeout
+    while journal._outstanding or journal._orphans:
+        assert time.monotonic() < deadline, 'journal not drained'
+        time.sleep(0.01)
+    journal.close()
+
+
+def test_submitted_punches_are_applied_once(app, tmp_path):
+    user_id = _user('jurnal1')
+    journal = PunchJournal(str(tmp_path))
+    journal.submit(_punch(user_id, 'check_in', '2026-02-02 08:00:00', 'jurnal1-in'))
+    journal.submit(_punch(user_id, 'check_out', '2026-02-02 16:00:00', 'jurnal1-out'))
+    # A retried request with the same idempotency key changes nothing
+    journal.submit(_punch(user_id, 'check_in', '2026-02-02 08:00:00', 'jurnal1-in'))
+    _drain(journal)
+
+    assert _sessions(user_id) == [('2026-02-02 08:00:00', '2026-02-02 16:00:00')]
+    assert os.path.getsize(journal.path) == 0
+
+
+def test_orphaned_journal_is_replayed_and_removed(app, tmp_path):
+    user_id = _user('jurnal2')
+    orphan = tmp_path / 'punches-999999.log'
+    lines = [json.dumps(_punch(user_id, 'check_in', '2026-02-03 08:00:00', 'jurnal2-in')),
+             json.dumps(_punch(user_id, 'check_out', '2026-02-03 17:00:00', 'jurnal2-out')),
+             '{"torn": ']
+    orphan.write_text('\n'.join(lines))
+
+    journal = PunchJournal(str(tmp_path))
+    _drain(journal)
+
+    assert _sessions(user_id) == [('2026-02-03 08:00:00', '2026-02-03 17:00:00')]
+    assert not orphan.exists()
+
+
+def test_journal_removed_before_lock_is_reopened(app, tmp_path, monkeypatch):
+    # Another worker claims the new file as an orphan and removes it between open and flock
+    flock = punch_journal.fcntl.flock
+    stolen = []
+
+    def racing_flock(fd, operation):
+        path = os.path.join(str(tmp_path), f'punches-{os.getpid()}.log')
+        if not stolen and os.fstat(fd).st_ino == os.stat(path).st_ino:
+            stolen.append(path)
+            os.remove(path)
+        return flock(fd, operation)
+
+    monkeypatch.setattr(punch_journal.fcntl, 'flock', racing_flock)
+    journal = PunchJournal(str(tmp_path))
+    try:
+        assert stolen
+        assert os.stat(journal.path).st_ino == os.fstat(journal._file.fileno()).st_ino
+    finally:
+        journal.close()
+
+
+class _RecordingConnection:
+    def __init__(self, dialect_name):
+        self.dialect = type('Dialect', (), {'name': dialect_name})()
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+
+
+def test_punches_are_serialized_per_user_on_postgres():
+    conn = _RecordingConnection('postgresql')
+    punch_journal.begin_punch(conn, 42)
+    assert conn.statements == [('SELECT pg_advisory_xact_lock(?, ?)', (punch_journal.PUNCH_LOCK_CLASS, 42))]
+
+    conn = _RecordingConnection('sqlite')
+    punch_journal.begin_punch(conn, 42)
+    assert conn.statements == [('BEGIN IMMEDIATE', ())]
+
+
+def test_punch_time_falls_back_to_date_and_time():
+    assert punch_journal.punch_time({'date': '2026-02-02', 'time': '08:00:00'}) == datetime(2026, 2, 2, 8)
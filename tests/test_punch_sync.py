@@ -0,0 +1,74 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+import attendance_routes
+import punch_sync
+
+
+def _punch(punch_id, action, at, office):
+    return {'id': punch_id, 'action': action, 'captured_at': at.strftime('%Y-%m-%d %H:%M:%S'),
+            'latitude': office['latitude'], 'longitude': office['longitude'], 'idempotency_key': f'key-{punch_id}'}
+
+
+def _sync(client, punches, photos=()):
+    data = {'punches': json.dumps(punches)}
+    for punch_id in photos:
+        data[f'photo_{punch_id}'] = (io.BytesIO(b'\xff\xd8\xff\xe0 photo'), f'{punch_id}.jpg')
+    response = client.post('/api/attendance/sync', data=data, content_type='multipart/form-data')
+    return {result['id']: result for result in response.get_json()['results']}
+
+
+def test_check_sequence_orders_and_bounds_punches():
+    now = datetime(2026, 3, 2, 18, 0)
+    items = [{'id': name, 'action': action, 'captured_at': now - timedelta(hours=hours), 'error': None}
+             for name, action, hours in (('stale', 'check_in', 100), ('in', 'check_in', 9), ('in2', 'check_in', 8),
+                                         ('out', 'check_out', 1), ('out2', 'check_out', 0.5),
+                                         ('future', 'check_in', -1))]
+    punch_sync.check_sequence(items, now, None, None)
+    errors = {item['id']: item['error'] for item in items}
+    assert errors['in'] is None and errors['out'] is None
+    assert 'lebih dari' in errors['stale']
+    assert errors['in2'].startswith('Anda sudah absen masuk')
+    assert errors['out2'] == 'Anda belum absen masuk!'
+    assert 'masa depan' in errors['future']
+
+
+def test_sync_applies_in_order_and_replays(office, user_client):
+    client, user_id = user_client('sinkron1')
+    now = datetime.now().replace(microsecond=0)
+    punches = [_punch('b', 'check_out', now - timedelta(hours=1), office),
+               _punch('a', 'check_in', now - timedelta(hours=3), office),
+               _punch('c', 'check_out', now - timedelta(minutes=30), office)]
+    results = _sync(client, punches)
+    assert results['a']['success'] and results['b']['success']
+    assert results['c']['message'] == 'Anda belum absen masuk!'
+
+    again = _sync(client, punches[:2])
+    assert again['a']['replayed'] and again['b']['replayed']
+
+
+def test_face_checks_skip_punches_rejected_by_order(office, user_client, enroll_face, monkeypatch):
+    client, user_id = user_client('sinkron2')
+    enroll_face(user_id)
+    verified = []
+
+    def fake_verify(photo_paths, user_id):
+        verified.extend(photo_paths)
+        # The first check-in is not the user's face
+        return [(False, 'Wajah tidak dikenali.') if index == 0 else (True, 'Wajah terverifikasi!')
+                for index, _ in enumerate(photo_paths)]
+
+    monkeypatch.setattr(attendance_routes, 'verify_faces_for_attendance', fake_verify)
+    now = datetime.now().replace(microsecond=0)
+    punches = [_punch('masuk', 'check_in', now - timedelta(hours=4), office),
+               _punch('masuk_lagi', 'check_in', now - timedelta(hours=3), office),
+               _punch('keluar', 'check_out', now - timedelta(hours=2), office)]
+    results = _sync(client, punches, photos=('masuk', 'masuk_lagi', 'keluar'))
+
+    # The duplicate check-in never reaches face verification
+    assert len(verified) == 2
+    assert results['masuk']['message'] == 'Wajah tidak dikenali.'
+    assert results['masuk_lagi']['message'].startswith('Anda sudah absen masuk')
+    # Its check-in was rejected, so the check-out has no session to close
+    assert results['keluar']['message'] == 'Anda belum absen masuk!'
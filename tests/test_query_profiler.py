@@ -0,0 +1,78 @@
+from flask import Flask, session
+
+import db
+import query_profiler
+from db import Database
+
+
+def test_statements_are_normalized_without_parameter_values():
+    assert query_profiler.normalize('SELECT *\n  FROM users\tWHERE id = ?') == 'SELECT * FROM users WHERE id = ?'
+    assert query_profiler.param_shape(()) == '()'
+    assert query_profiler.param_shape((1, 'rahasia', None)) == '(int, str, NoneType)'
+    assert query_profiler.param_shape([(1, 'a'), (2, 'b')]) == '2 x (int, str)'
+    assert query_profiler.param_shape({'user_id': 1, 'day': 'x'}) == '{day, user_id}'
+
+
+def test_query_plan_is_cached_per_select(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_profiler, '_plans', {})
+    conn = Database(f'sqlite:///{tmp_path / "plan.db"}').connect()
+    try:
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT)')
+        assert query_profiler.query_plan(conn, 'INSERT INTO users (username) VALUES (?)', ('a',)) is None
+        plan = query_profiler.query_plan(conn, 'SELECT * FROM users WHERE id = ?', (1,))
+        assert plan
+        assert query_profiler.query_plan(conn, 'SELECT *  FROM users WHERE id = ?', (2,)) is plan
+    finally:
+        conn.close()
+
+
+def test_request_profile_flags_slow_and_repeated_queries(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_profiler, 'ENABLED', True)
+    monkeypatch.setattr(query_profiler, 'SLOW_QUERY_MS', 0)
+    monkeypatch.setattr(query_profiler, 'REPEAT_THRESHOLD', 3)
+    for name in ('_slow_queries', '_requests'):
+        monkeypatch.setattr(query_profiler, name, type(getattr(query_profiler, name))(maxlen=10))
+    monkeypatch.setattr(query_profiler, '_statements', {})
+    monkeypatch.setattr(query_profiler, '_plans', {})
+
+    database = Database(f'sqlite:///{tmp_path / "profile.db"}', pool_size=1)
+    with database.connect() as conn:
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT)')
+        conn.executemany('INSERT INTO users (username) VALUES (?)', [('a',), ('b',), ('c',)])
+
+    app = Flask('profiler_test')
+    app.secret_key = 'uji'
+
+    @app.route('/users')
+    def users():
+        with database.connect() as conn:
+            ids = [row['id'] for row in conn.execute('SELECT id FROM users').fetchall()]
+            for user_id in ids:
+                conn.execute('SELECT username FROM users WHERE id = ?', (user_id,)).fetchone()
+        return 'ok'
+
+    @app.route('/login')
+    def login():
+        session['username'] = 'admin'
+        return 'ok'
+
+    query_profiler.init_query_profiler(app)
+    try:
+        client = app.test_client()
+        assert client.get('/users').status_code == 200
+        assert client.get('/api/debug/queries').status_code == 403
+        client.get('/login')
+        data = client.get('/api/debug/queries').get_json()
+    finally:
+        db._query_hooks.remove(query_profiler._profile_query)
+
+    profile = next(r for r in data['requests'] if r['path'] == '/users')
+    assert profile['queries'] == 4
+    assert profile['repeated'] == [{'sql': 'SELECT username FROM users WHERE id = ?', 'count': 3}]
+    assert sum(record['rows'] for record in profile['statements']) == 6
+    slow = {record['sql']: record for record in data['slow_queries']}
+    assert slow['SELECT id FROM users']['plan']
+    assert slow['SELECT username FROM users WHERE id = ?']['params'] == '(int)'
+
+    assert client.delete('/api/debug/queries').get_json()['success']
+    assert client.get('/api/debug/queries').get_json()['slow_queries'] == []
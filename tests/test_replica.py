@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+from flask import session
+
+import app_helpers
+import db
+from db import Database, PostgresReplica, SQLiteSnapshotReplica
+
+
+@pytest.fixture
+def primary(tmp_path):
+    database = Database(f'sqlite:///{tmp_path / "primary.db"}')
+    with database.connect() as conn:
+        conn.execute('CREATE TABLE punches (id INTEGER PRIMARY KEY)')
+        conn.execute('INSERT INTO punches (id) VALUES (1)')
+    return database
+
+
+def _ids(conn):
+    try:
+        return [row['id'] for row in conn.execute('SELECT id FROM punches ORDER BY id').fetchall()]
+    finally:
+        conn.close()
+
+
+def test_snapshot_is_read_only_and_refreshed_when_stale(primary, tmp_path):
+    replica = SQLiteSnapshotReplica(primary, str(tmp_path / 'replica.db'), max_staleness=30)
+    assert _ids(replica.connect()) == [1]
+
+    with primary.connect() as conn:
+        conn.execute('INSERT INTO punches (id) VALUES (2)')
+    # Within the staleness bound the snapshot is served as is
+    assert _ids(replica.connect()) == [1]
+    conn = replica.connect()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute('INSERT INTO punches (id) VALUES (3)')
+    conn.close()
+
+    replica.max_staleness = -1
+    assert _ids(replica.connect()) == [1, 2]
+
+
+def test_failed_snapshot_refresh_reads_from_primary(primary, tmp_path, monkeypatch):
+    replica = SQLiteSnapshotReplica(primary, str(tmp_path / 'replica.db'))
+
+    def broken_refresh():
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(replica, 'refresh', broken_refresh)
+    conn = replica.connect()
+    assert conn._pool is primary.pool
+    assert _ids(conn) == [1]
+
+
+def test_postgres_replica_falls_back_when_lagging_or_down(primary, monkeypatch):
+    replica = PostgresReplica(primary, 'postgresql://reader@replica/absensi', max_staleness=30)
+    served = []
+    monkeypatch.setattr(replica.replica, 'connect', lambda: served.append('replica') or 'replica-connection')
+
+    monkeypatch.setattr(replica, '_current_lag', lambda: 5)
+    assert replica.connect() == 'replica-connection'
+
+    replica._lag = 120
+    monkeypatch.setattr(replica, '_current_lag', lambda: 120)
+    assert replica.connect()._pool is primary.pool
+
+    def unreachable():
+        raise sqlite3.OperationalError('could not connect to server')
+
+    monkeypatch.setattr(replica, '_current_lag', unreachable)
+    assert replica.connect()._pool is primary.pool
+    assert served == ['replica']
+
+
+def test_recent_writers_read_from_primary(app, primary, tmp_path, monkeypatch):
+    replica = SQLiteSnapshotReplica(primary, str(tmp_path / 'replica.db'))
+    monkeypatch.setenv('DATABASE_REPLICA_URL', f'sqlite:///{tmp_path / "replica.db"}')
+    monkeypatch.setattr(db, '_replica', replica)
+
+    with app.test_request_context('/api/attendance/daily'):
+        session['user_id'] = 4242
+        conn = app_helpers.read_connection()
+        assert conn._pool is not db.get_database().pool
+        conn.close()
+
+    with app.test_request_context('/absen_masuk', method='POST'):
+        session['user_id'] = 4242
+        app_helpers.remember_recent_write(app.response_class(status=200))
+
+    with app.test_request_context('/api/attendance/daily'):
+        session['user_id'] = 4242
+        conn = app_helpers.read_connection()
+        assert conn._pool is db.get_database().pool
+        conn.close()
@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from db import Database
+from session_store import ServerSession, SQLiteSessionInterface
+
+
+@pytest.fixture
+def store(tmp_path):
+    database = Database(f'sqlite:///{tmp_path / "sessions.db"}')
+    return SQLiteSessionInterface(database.connect, idle_timeout=timedelta(seconds=60), hot_size=3)
+
+
+def _write(store, sid, user_id, now):
+    session = ServerSession({'user_id': user_id}, sid=sid, new=True)
+    store._write(session, now, now + store.idle_timeout)
+
+
+def test_hot_cache_is_bounded(store):
+    now = time.time()
+    for user_id in range(10):
+        _write(store, f'sid-{user_id}', user_id, now)
+    assert list(store._hot) == ['sid-7', 'sid-8', 'sid-9']
+
+    # Evicted sessions are still valid and come back from the database
+    assert store._load('sid-0', now)['user_id'] == 0
+    assert len(store._hot) == 3 and 'sid-0' in store._hot
+
+
+def test_expired_sessions_leave_hot_cache(store):
+    now = time.time()
+    _write(store, 'old', 1, now - 120)
+    _write(store, 'live', 2, now)
+    assert store._load('old', now) is None
+    assert 'old' not in store._hot
+
+    _write(store, 'idle', 3, now - 120)
+    store._touch('live', now, now + 60)
+    store.flush()
+    assert list(store._hot) == ['live']
+
+
+def _expires_at(store, sid):
+    conn = store.connect()
+    try:
+        return conn.execute('SELECT expires_at FROM sessions WHERE id = ?', (sid,)).fetchone()['expires_at']
+    finally:
+        conn.close()
+
+
+def test_touches_are_written_in_batches(store):
+    now = time.time()
+    _write(store, 'aktif', 1, now)
+    store._last_flush = now
+    store._touch('aktif', now + 10, now + 70)
+    assert _expires_at(store, 'aktif') == pytest.approx(now + 60)
+
+    store.flush()
+    assert _expires_at(store, 'aktif') == pytest.approx(now + 70)
+
+
+def test_revocation_reaches_other_workers(tmp_path):
+    database = Database(f'sqlite:///{tmp_path / "sessions.db"}')
+    worker_a, worker_b = (SQLiteSessionInterface(database.connect) for _ in range(2))
+    now = time.time()
+    _write(worker_a, 'sid-a', 5, now)
+    _write(worker_a, 'sid-other', 6, now)
+    assert worker_b._load('sid-a', now)['user_id'] == 5
+
+    assert worker_a.revoke_user(5) == 1
+    # worker_b still holds a hot copy; the shared namespace version invalidates it
+    assert worker_b._load('sid-a', now) is None
+    assert worker_b._load('sid-other', now)['user_id'] == 6
+
+
+def test_deactivated_user_is_logged_out(admin_client, user_client):
+    client, user_id = user_client('sesi1')
+    assert client.get('/absensi').status_code == 200
+    response = admin_client.put(f'/api/users/update/{user_id}', json={'full_name': 'Sesi', 'active': False})
+    assert response.get_json()['success']
+    assert client.get('/absensi').status_code == 302
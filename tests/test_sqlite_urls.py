@@ -0,0 +1,36 @@
+from cache import SQLiteCache, create_cache
+from db import Database, sqlite_path
+
+
+def test_sqlite_path_relative():
+    assert sqlite_path('sqlite:///database.db', 'default.db') == 'database.db'
+    assert sqlite_path('sqlite:///data/database.db', 'default.db') == 'data/database.db'
+    assert sqlite_path('sqlite://database.db', 'default.db') == 'database.db'
+
+
+def test_sqlite_path_absolute():
+    assert sqlite_path('sqlite:////var/lib/absensi/database.db', 'default.db') == '/var/lib/absensi/database.db'
+
+
+def test_sqlite_path_default():
+    assert sqlite_path('sqlite://', 'default.db') == 'default.db'
+    assert sqlite_path('sqlite:///', 'default.db') == 'default.db'
+
+
+def test_database_url_paths(tmp_path):
+    assert Database('sqlite:///database.db').path == 'database.db'
+    absolute = tmp_path / 'database.db'
+    assert Database(f'sqlite:///{absolute}').path == str(absolute)
+
+
+def test_cache_url_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = create_cache('sqlite:///cache.db')
+    assert isinstance(cache, SQLiteCache) and cache.path == 'cache.db'
+
+    absolute = tmp_path / 'shared' / 'cache.db'
+    absolute.parent.mkdir()
+    cache = create_cache(f'sqlite:///{absolute}')
+    assert cache.path == str(absolute)
+    cache.set('key', 'value')
+    assert absolute.exists()
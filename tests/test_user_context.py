@@ -0,0 +1,48 @@
+from flask import session
+
+import db
+from app_helpers import get_user_context
+from cache import get_cache
+
+
+def _count_context_queries(client, path):
+    statements = []
+
+    def hook(conn, sql, params, seconds, cursor):
+        if 'face_count' in sql:
+            statements.append(sql)
+
+    db.add_query_hook(hook)
+    try:
+        assert client.get(path).status_code == 200
+    finally:
+        db._query_hooks.remove(hook)
+    return len(statements)
+
+
+def test_context_is_cached_across_requests(user_client):
+    client, user_id = user_client('konteks1')
+    assert _count_context_queries(client, '/absensi') <= 1
+    assert _count_context_queries(client, '/absensi') == 0
+
+
+def test_role_change_applies_without_relogin(app, admin_client, user_client):
+    client, user_id = user_client('konteks2')
+    client.get('/absensi')
+    assert get_cache().get_ns('user_context', user_id)['role'] == 'user'
+
+    response = admin_client.put(f'/api/users/update/{user_id}', json={'full_name': 'Konteks', 'role': 'admin'})
+    assert response.get_json()['success']
+    assert get_cache().get_ns('user_context', user_id) is None
+    with app.test_request_context('/absensi'):
+        session['user_id'] = user_id
+        assert get_user_context()['role'] == 'admin'
+
+
+def test_deleted_user_is_logged_out(admin_client, user_client):
+    client, user_id = user_client('konteks3')
+    assert client.get('/absensi').status_code == 200
+    assert admin_client.delete(f'/api/users/delete/{user_id}').get_json()['success']
+
+    response = client.get('/absensi')
+    assert response.status_code == 302 and '/login' in response.headers['Location']
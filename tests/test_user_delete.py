@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import attendance_stats
+import work_calendar
+from db import get_db_connection
+from users_routes import USER_TABLES
+
+
+def _create_user(client, username):
+    response = client.post('/api/users/create', json={
+        'username': username, 'full_name': username.title(), 'password': 'rahasia123'
+    })
+    assert response.get_json()['success'], response.get_json()
+    conn = get_db_connection()
+    try:
+        return conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()['id']
+    finally:
+        conn.close()
+
+
+def _work_day(user_id, day):
+    conn = get_db_connection()
+    try:
+        at = datetime.combine(day, datetime.min.time()).replace(hour=8)
+        attendance_stats.record_check_in(conn, user_id, at, -6.2, 106.8, None)
+        attendance_stats.record_check_out(conn, user_id, at + timedelta(hours=8), -6.2, 106.8, None)
+        work_calendar.assign_shift(conn, user_id, work_calendar.list_shifts(conn)[0]['id'])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _weekly_present(client, week_start):
+    result = client.get(f'/api/attendance/weekly?week_start={week_start.isoformat()}').get_json()
+    day = next(day for day in result['weekly_data'] if day['date'] == week_start.isoformat())
+    return day['total_present'], day['total_users']
+
+
+def test_deleted_user_leaves_no_stats_behind(admin_client):
+    day = datetime.now().date() - timedelta(days=1)
+    week_start = day - timedelta(days=day.weekday())
+    stays, leaves, bulk = (_create_user(admin_client, name) for name in ('tetap', 'keluar', 'massal'))
+    for user_id in (stays, leaves, bulk):
+        _work_day(user_id, week_start)
+
+    conn = get_db_connection()
+    try:
+        work_calendar.month_totals(conn, week_start.year, week_start.month)
+    finally:
+        conn.close()
+    present, total_users = _weekly_present(admin_client, week_start)
+    assert present >= 3 and present <= total_users
+
+    assert admin_client.delete(f'/api/users/delete/{leaves}').get_json()['success']
+    assert admin_client.post('/api/users/bulk-delete', json={'user_ids': [bulk]}).get_json()['success']
+
+    assert _weekly_present(admin_client, week_start) == (present - 2, total_users - 2)
+
+    conn = get_db_connection()
+    try:
+        for table in USER_TABLES:
+            count = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE user_id IN (?, ?)', (leaves, bulk)).fetchone()[0]
+            assert count == 0, table
+
+        first_day = week_start.replace(day=1).isoformat()
+        last_day = (week_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        monthly = attendance_stats.period_totals(conn, first_day, last_day.isoformat())
+        assert {row['user_id'] for row in monthly} >= {stays}
+        assert not {row['user_id'] for row in monthly} & {leaves, bulk}
+        totals = work_calendar.month_totals(conn, week_start.year, week_start.month)
+        assert stays in totals and leaves not in totals and bulk not in totals
+    finally:
+        conn.close()
@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+
+import attendance_stats
+import work_calendar
+from db import get_db_connection
+
+
+def _user(conn, username):
+    conn.execute('INSERT INTO users (username, full_name, password) VALUES (?, ?, ?)', (username, username, 'x'))
+    return conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()['id']
+
+
+def _calendar_row(conn, user_id, day):
+    return conn.execute('SELECT status, worked_minutes FROM workday_calendar WHERE user_id = ? AND work_date = ?',
+                        (user_id, day)).fetchone()
+
+
+def test_punch_recomputes_only_its_user_day(app):
+    conn = get_db_connection()
+    try:
+        puncher, bystander = _user(conn, 'kalender1'), _user(conn, 'kalender2')
+        conn.commit()
+        # A past weekday, so the materialized month is final apart from dirty rows
+        day = date.today().replace(day=1) - timedelta(days=1)
+        while day.weekday() > 4:
+            day -= timedelta(days=1)
+        day_str = day.isoformat()
+        assert work_calendar.ensure_month(conn, day.year, day.month)
+        assert _calendar_row(conn, puncher, day_str)['status'] == 'absent'
+
+        # Tamper with another row: a targeted recompute must leave it alone
+        conn.execute("UPDATE workday_calendar SET worked_minutes = 999 WHERE user_id = ? AND work_date = ?",
+                     (bystander, day_str))
+        at = datetime.combine(day, datetime.min.time()).replace(hour=8)
+        attendance_stats.record_check_in(conn, puncher, at, -6.2, 106.8, None)
+        attendance_stats.record_check_out(conn, puncher, at + timedelta(hours=8), -6.2, 106.8, None)
+        work_calendar.mark_day_dirty(conn, puncher, day_str)
+        conn.commit()
+
+        assert work_calendar.ensure_month(conn, day.year, day.month)
+        assert dict(_calendar_row(conn, puncher, day_str)) == {'status': 'present', 'worked_minutes': 480}
+        assert _calendar_row(conn, bystander, day_str)['worked_minutes'] == 999
+        assert conn.execute('SELECT COUNT(*) FROM calendar_dirty_days WHERE work_date = ?',
+                            (day_str,)).fetchone()[0] == 0
+        assert not work_calendar.ensure_month(conn, day.year, day.month)
+
+        # Holidays still recompute the whole month
+        work_calendar.add_holiday(conn, day_str, 'Libur')
+        conn.commit()
+        assert work_calendar.ensure_month(conn, day.year, day.month)
+        assert _calendar_row(conn, bystander, day_str)['status'] == 'holiday'
+    finally:
+        conn.close()
+
+
+def test_user_swapped_between_builds_rebuilds_month(app):
+    conn = get_db_connection()
+    try:
+        leaving = _user(conn, 'kalender_lama')
+        conn.commit()
+        day = date.today().replace(day=1) - timedelta(days=1)
+        work_calendar.ensure_month(conn, day.year, day.month)
+
+        # One user out, one in: the user count is unchanged
+        conn.execute('DELETE FROM users WHERE id = ?', (leaving,))
+        joining = _user(conn, 'kalender_baru')
+        conn.commit()
+
+        assert work_calendar.ensure_month(conn, day.year, day.month)
+        assert _calendar_row(conn, joining, day.isoformat()) is not None
+    finally:
+        conn.close()
@@ -0,0 +1,538 @@
+"""
+Users routes module untuk sistem absensi
+User management dashboard and admin user APIs
+"""
+
+import os
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, render_template, request, session
+from werkzeug.security import generate_password_hash
+
+from app_helpers import cached_response, invalidate_user_caches, login_required, read_connection
+from db import get_db_connection, get_dialect
+
+
+bp = Blueprint('users', __name__)
+
+# Tables with per-user rows, emptied for a user before the user itself is deleted
+USER_TABLES = (
+    'attendance', 'attendance_logs', 'face_data', 'face_match_log', 'applied_punches',
+    'work_sessions', 'daily_work_totals', 'user_shifts', 'workday_calendar', 'calendar_dirty_days',
+)
+
+
+def delete_user_rows(conn, user_id):
+    """Delete a user with all of their rows; returns the number of users deleted"""
+    for table in USER_TABLES:
+        conn.execute(f'DELETE FROM {table} WHERE user_id = ?', (user_id,))
+    return conn.execute('DELETE FROM users WHERE id = ?', (user_id,)).rowcount
+
+
+@bp.route('/users')
+@login_required
+def users_dashboard():
+    """Simple users dashboard - accessible by all logged in users"""
+    return render_template('users_dashboard.html')
+
+
+@bp.route('/api/users/list', methods=['GET'])
+@login_required
+@cached_response('users', ttl=60)
+def api_users_list():
+    """API to get list of users - accessible by all logged in users"""
+    try:
+        conn = read_connection()
+        
+        # Get basic user information (tidak termasuk info sensitif)
+        users = conn.execute('''
+            SELECT 
+                u.id, u.username, u.full_name, u.email, u.role, u.active, 
+                u.created_at, u.updated_at,
+                CASE WHEN f.id IS NOT NULL THEN 1 ELSE 0 END as face_recognition,
+                a.last_attendance
+            FROM users u
+            LEFT JOIN (
+                SELECT user_id, MAX(id) as id 
+                FROM face_data 
+                WHERE active = TRUE 
+                GROUP BY user_id
+            ) f ON u.id = f.user_id
+            LEFT JOIN (
+                SELECT user_id, MAX(date) as last_attendance
+                FROM attendance
+                WHERE time_in IS NOT NULL
+                GROUP BY user_id
+            ) a ON u.id = a.user_id
+            ORDER BY u.full_name ASC
+        ''').fetchall()
+        
+        users_list = []
+        for user in users:
+            users_list.append({
+                'id': user['id'],
+                'username': user['username'],
+                'full_name': user['full_name'],
+                'email': user['email'],
+                'role': user['role'],
+                'active': user['active'],
+                'face_recognition': user['face_recognition'],
+                'created_at': user['created_at'],
+                'updated_at': user['updated_at'],
+                'last_attendance': user['last_attendance']
+            })
+        
+        # Get statistics
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        # Total users
+        total_users = len(users_list)
+        
+        # Active users
+        active_users = len([u for u in users_list if u['active']])
+        
+        # Face recognition enabled users
+        face_enabled_users = len([u for u in users_list if u['face_recognition']])
+        
+        # Today attendance count
+        today_attendance = conn.execute('''
+            SELECT COUNT(DISTINCT user_id) as count
+            FROM attendance 
+            WHERE date = ? AND time_in IS NOT NULL
+        ''', (today,)).fetchone()['count']
+        
+        stats = {
+            'total_users': total_users,
+            'active_users': active_users,
+            'face_enabled_users': face_enabled_users,
+            'today_attendance': today_attendance
+        }
+        
+        conn.close()
+        return jsonify({
+            'success': True,
+            'users': users_list,
+            'stats': stats
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/api/users/create', methods=['POST'])
+@login_required
+def api_create_user():
+    """API to create new user"""
+    try:
+        # Check if user has admin privileges (optional - remove if all users can create)
+        # if session.get('username') != 'admin':
+        #     return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+        
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['username', 'full_name', 'password']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({
+                    'success': False, 
+                    'message': f'Field {field} is required'
+                }), 400
+        
+        # Validate password length
+        if len(data.get('password', '')) < 6:
+            return jsonify({
+                'success': False,
+                'message': 'Password must be at least 6 characters long'
+            }), 400
+        
+        conn = get_db_connection()
+        
+        # Check if username already exists
+        existing = conn.execute(
+            'SELECT id FROM users WHERE username = ?',
+            (data['username'],)
+        ).fetchone()
+        
+        if existing:
+            conn.close()
+            return jsonify({
+                'success': False,
+                'message': 'Username already exists'
+            }), 400
+        
+        # Hash password
+        hashed_password = generate_password_hash(data['password'])
+        
+        # Insert new user
+        conn.execute('''
+            INSERT INTO users (username, full_name, email, password, role, active)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            data['username'],
+            data['full_name'],
+            data.get('email', ''),
+            hashed_password,
+            data.get('role', 'user'),
+            data.get('active', True)
+        ))
+        
+        conn.commit()
+        conn.close()
+        invalidate_user_caches()
+        
+        return jsonify({
+            'success': True,
+            'message': 'User created successfully'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error creating user: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/users/update/<int:user_id>', methods=['PUT'])
+@login_required
+def api_update_user(user_id):
+    """API to update user"""
+    try:
+        # Check if user can edit (either admin or editing own profile)
+        # if session.get('username') != 'admin' and session.get('user_id') != user_id:
+        #     return jsonify({'success': False, 'message': 'Access denied'}), 403
+        
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['full_name']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({
+                    'success': False,
+                    'message': f'Field {field} is required'
+                }), 400
+        
+        conn = get_db_connection()
+        
+        # Check if user exists
+        user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+        if not user:
+            conn.close()
+            return jsonify({
+                'success': False,
+                'message': 'User not found'
+            }), 404
+        
+        # Prepare update query
+        update_fields = []
+        update_values = []
+        
+        # Update full_name
+        update_fields.append('full_name = ?')
+        update_values.append(data['full_name'])
+        
+        # Update email if provided
+        if 'email' in data:
+            update_fields.append('email = ?')
+            update_values.append(data.get('email', ''))
+        
+        # Update role if provided
+        if 'role' in data:
+            update_fields.append('role = ?')
+            update_values.append(data['role'])
+        
+        # Update active status if provided
+        if 'active' in data:
+            update_fields.append('active = ?')
+            update_values.append(data['active'])
+        
+        # Update password if provided
+        if data.get('password'):
+            if len(data['password']) < 6:
+                conn.close()
+                return jsonify({
+                    'success': False,
+                    'message': 'Password must be at least 6 characters long'
+                }), 400
+            
+            update_fields.append('password = ?')
+            update_values.append(generate_password_hash(data['password']))
+        
+        # Add updated_at
+        update_fields.append('updated_at = CURRENT_TIMESTAMP')
+        
+        # Add user_id for WHERE clause
+        update_values.append(user_id)
+        
+        # Execute update
+        query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
+        conn.execute(query, update_values)
+        
+        conn.commit()
+        conn.close()
+        invalidate_user_caches(user_id)
+        
+        # Deactivated users are logged out everywhere
+        if 'active' in data and not data['active']:
+            current_app.session_interface.revoke_user(user_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'User updated successfully'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error updating user: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/users/delete/<int:user_id>', methods=['DELETE'])
+@login_required
+def api_delete_user(user_id):
+    """API to delete user"""
+    try:
+        # Check if user has admin privileges
+        # if session.get('username') != 'admin':
+        #     return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+        
+        # Prevent self-deletion
+        if session.get('user_id') == user_id:
+            return jsonify({
+                'success': False,
+                'message': 'You cannot delete your own account'
+            }), 400
+        
+        conn = get_db_connection()
+        
+        # Check if user exists
+        user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+        if not user:
+            conn.close()
+            return jsonify({
+                'success': False,
+                'message': 'User not found'
+            }), 404
+        
+        # Get face data to clean up files
+        face_data = conn.execute(
+            'SELECT photo_path FROM face_data WHERE user_id = ?',
+            (user_id,)
+        ).fetchall()
+        
+        # Delete related data first (to maintain referential integrity), then the user
+        delete_user_rows(conn, user_id)
+        
+        conn.commit()
+        conn.close()
+        invalidate_user_caches(user_id)
+        current_app.session_interface.revoke_user(user_id)
+        
+        # Clean up face recognition files
+        for data in face_data:
+            if data['photo_path'] and os.path.exists(data['photo_path']):
+                try:
+                    os.remove(data['photo_path'])
+                    # Also try to remove the directory if it's empty
+                    dir_path = os.path.dirname(data['photo_path'])
+                    if os.path.exists(dir_path) and not os.listdir(dir_path):
+                        os.rmdir(dir_path)
+                except Exception:
+                    pass  # Continue even if file cleanup fails
+        
+        return jsonify({
+            'success': True,
+            'message': 'User deleted successfully'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error deleting user: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/users/detail/<int:user_id>', methods=['GET'])
+@login_required
+@cached_response('users', ttl=60)
+def api_user_detail(user_id):
+    """API to get user detail"""
+    try:
+        conn = read_connection()
+        
+        # Get user with additional info
+        user = conn.execute(f'''
+            SELECT 
+                u.*,
+                CASE WHEN f.id IS NOT NULL THEN 1 ELSE 0 END as face_recognition,
+                COUNT(DISTINCT a.id) as total_attendance,
+                MAX(a.date) as last_attendance_date,
+                COUNT(DISTINCT CASE WHEN a.date >= {get_dialect().month_start()} THEN a.id END) as this_month_attendance
+            FROM users u
+            LEFT JOIN face_data f ON u.id = f.user_id AND f.active = TRUE
+            LEFT JOIN attendance a ON u.id = a.user_id AND a.time_in IS NOT NULL
+            WHERE u.id = ?
+            GROUP BY u.id
+        ''', (user_id,)).fetchone()
+        
+        if not user:
+            conn.close()
+            return jsonify({
+                'success': False,
+                'message': 'User not found'
+            }), 404
+        
+        # Get recent attendance (last 10 records)
+        recent_attendance = conn.execute('''
+            SELECT date, time_in, time_out
+            FROM attendance
+            WHERE user_id = ? AND time_in IS NOT NULL
+            ORDER BY date DESC
+            LIMIT 10
+        ''', (user_id,)).fetchall()
+        
+        conn.close()
+        
+        user_dict = dict(user)
+        user_dict['recent_attendance'] = [dict(row) for row in recent_attendance]
+        
+        return jsonify({
+            'success': True,
+            'user': user_dict
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error getting user detail: {str(e)}'
+        }), 500
+
+
+@bp.route('/api/users/toggle-status/<int:user_id>', methods=['POST'])
+@login_required
+def api_toggle_user_status(user_id):
+    """API to toggle user active status"""
+    try:
+        # Check if user has admin privileges
+        # if session.get('username') != 'admin':
+        #     return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+        
+        # Prevent self-deactivation
+        if session.get('user_id') == user_id:
+            return jsonify({
+                'success': False,
+                'message': 'You cannot deactivate your own account'
+            }), 400
+        
+        conn = get_db_connection()
+        
+        # Get current status
+        user = conn.execute('SELECT active FROM users WHERE id = ?', (user_id,)).fetchone()
+        if not user:
+            conn.close()
+            return jsonify({
+                'success': False,
+                'message': 'User not found'
+            }), 404
+        
+        # Toggle status
+        new_status = not user['active']
+        conn.execute(
+            'UPDATE users SET active = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (new_status, user_id)
+        )
+        
+        conn.commit()
+        conn.close()
+        invalidate_user_caches(user_id)
+        
+        # Deactivated users are logged out everywhere
+        if not new_status:
+            current_app.session_interface.revoke_user(user_id)
+        
+        status_text = 'activated' if new_status else 'deactivated'
+        
+        return jsonify({
+            'success': True,
+            'message': f'User {status_text} successfully',
+            'new_status': new_status
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error toggling user status: {str(e)}'
+        }), 500
+
+
+# Optional: Bulk operations
+@bp.route('/api/users/bulk-delete', methods=['POST'])
+@login_required
+def api_bulk_delete_users():
+    """API to delete multiple users"""
+    try:
+        # Check if user has admin privileges
+        # if session.get('username') != 'admin':
+        #     return jsonify({'success': False, 'message': 'Access denied. Admin only.'}), 403
+        
+        data = request.get_json()
+        user_ids = data.get('user_ids', [])
+        
+        if not user_ids:
+            return jsonify({
+                'success': False,
+                'message': 'No users selected'
+            }), 400
+        
+        # Prevent self-deletion
+        if session.get('user_id') in user_ids:
+            return jsonify({
+                'success': False,
+                'message': 'You cannot delete your own account'
+            }), 400
+        
+        conn = get_db_connection()
+        
+        deleted_count = 0
+        deleted_ids = []
+        for user_id in user_ids:
+            # Get face data for cleanup
+            face_data = conn.execute(
+                'SELECT photo_path FROM face_data WHERE user_id = ?',
+                (user_id,)
+            ).fetchall()
+            
+            # Delete related data, then the user
+            if delete_user_rows(conn, user_id) > 0:
+                deleted_count += 1
+                deleted_ids.append(user_id)
+                
+                # Cleanup files
+                for data in face_data:
+                    if data['photo_path'] and os.path.exists(data['photo_path']):
+                        try:
+                            os.remove(data['photo_path'])
+                        except Exception:
+                            pass
+        
+        conn.commit()
+        conn.close()
+        invalidate_user_caches()
+        for user_id in deleted_ids:
+            current_app.session_interface.revoke_user(user_id)
+        
+        return jsonify({
+            'success': True,
+            'message': f'{deleted_count} users deleted successfully'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error deleting users: {str(e)}'
+        }), 500
@@ -0,0 +1,407 @@
+"""
+Work calendar module untuk sistem absensi
+Shift schedules, holidays and the materialized per-user expected-workday calendar
+"""
+
+import calendar
+from datetime import date, datetime
+
+from db import DatabaseError
+from lazy_imports import lazy
+
+
+np = lazy('numpy')
+pd = lazy('pandas')
+
+
+DAY_STATUSES = ('present', 'late', 'absent', 'pending', 'upcoming', 'holiday', 'off')
+
+
+def ensure_schema(conn):
+    """Create schedule, holiday and calendar tables and the default shift"""
+    id_column = conn.dialect.id_column
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS shift_schedules (
+            id {id_column},
+            name VARCHAR(100) NOT NULL,
+            start_time VARCHAR(5) NOT NULL,
+            end_time VARCHAR(5) NOT NULL,
+            work_days VARCHAR(20) NOT NULL DEFAULT '0,1,2,3,4',
+            grace_minutes INTEGER NOT NULL DEFAULT 15,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS user_shifts (
+            id {id_column},
+            user_id INTEGER NOT NULL UNIQUE,
+            shift_id INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS holidays (
+            id {id_column},
+            date DATE NOT NULL UNIQUE,
+            name VARCHAR(100) NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS workday_calendar (
+            id {id_column},
+            user_id INTEGER NOT NULL,
+            work_date DATE NOT NULL,
+            shift_id INTEGER,
+            status VARCHAR(20) NOT NULL,
+            expected_minutes INTEGER NOT NULL DEFAULT 0,
+            worked_minutes INTEGER NOT NULL DEFAULT 0,
+            late_minutes INTEGER NOT NULL DEFAULT 0,
+            overtime_minutes INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (user_id, work_date)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_workday_calendar_date ON workday_calendar (work_date)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS calendar_months (
+            month VARCHAR(7) PRIMARY KEY,
+            computed_on DATE NOT NULL,
+            user_count INTEGER NOT NULL,
+            max_user_id INTEGER,
+            dirty INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    columns = [column[0] for column in conn.execute('SELECT * FROM calendar_months LIMIT 0').description]
+    if 'max_user_id' not in columns:
+        conn.execute('ALTER TABLE calendar_months ADD COLUMN max_user_id INTEGER')
+    # (user, day) pairs touched by punches since their month was materialized
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS calendar_dirty_days (
+            user_id INTEGER NOT NULL,
+            work_date DATE NOT NULL,
+            PRIMARY KEY (user_id, work_date)
+        )
+    ''')
+    if conn.execute('SELECT 1 FROM shift_schedules LIMIT 1').fetchone() is None:
+        conn.execute(
+            'INSERT INTO shift_schedules (name, start_time, end_time, work_days, grace_minutes) VALUES (?, ?, ?, ?, ?)',
+            ('Reguler', '08:00', '17:00', '0,1,2,3,4', 15)
+        )
+    conn.commit()
+
+
+def _minutes(hhmm):
+    hours, minutes = str(hhmm)[:5].split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def _month_key(day):
+    return str(day)[:7]
+
+
+# -- schedules and holidays -------------------------------------------------
+
+def list_shifts(conn):
+    rows = conn.execute('SELECT * FROM shift_schedules ORDER BY id').fetchall()
+    return [dict(row) for row in rows]
+
+
+def validate_shift(data):
+    """Return an error message for invalid shift fields, or None"""
+    try:
+        for field in ('start_time', 'end_time'):
+            datetime.strptime(data[field], '%H:%M')
+        days = [int(day) for day in str(data.get('work_days', '0,1,2,3,4')).split(',') if day.strip()]
+        if not days or any(day < 0 or day > 6 for day in days):
+            return 'work_days harus berisi angka 0 (Senin) sampai 6 (Minggu)'
+        if int(data.get('grace_minutes', 15)) < 0:
+            return 'grace_minutes tidak boleh negatif'
+    except (KeyError, ValueError):
+        return 'Format shift tidak valid (start_time/end_time HH:MM)'
+    return None
+
+
+def save_shift(conn, data, shift_id=None):
+    values = (data['name'], data['start_time'], data['end_time'],
+              str(data.get('work_days', '0,1,2,3,4')), int(data.get('grace_minutes', 15)))
+    if shift_id is None:
+        cursor = conn.execute(
+            'INSERT INTO shift_schedules (name, start_time, end_time, work_days, grace_minutes) VALUES (?, ?, ?, ?, ?)',
+            values
+        )
+        shift_id = cursor.lastrowid
+    else:
+        conn.execute(
+            'UPDATE shift_schedules SET name = ?, start_time = ?, end_time = ?, work_days = ?, grace_minutes = ? WHERE id = ?',
+            values + (shift_id,)
+        )
+    mark_all_dirty(conn)
+    return shift_id
+
+
+def assign_shift(conn, user_id, shift_id):
+    conn.execute('''
+        INSERT INTO user_shifts (user_id, shift_id) VALUES (?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET shift_id = excluded.shift_id
+    ''', (user_id, shift_id))
+    mark_all_dirty(conn)
+
+
+def list_holidays(conn, year):
+    rows = conn.execute(
+        'SELECT id, date, name FROM holidays WHERE date BETWEEN ? AND ? ORDER BY date',
+        (f'{year}-01-01', f'{year}-12-31')
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def add_holiday(conn, day, name):
+    conn.execute('''
+        INSERT INTO holidays (date, name) VALUES (?, ?)
+        ON CONFLICT (date) DO UPDATE SET name = excluded.name
+    ''', (day, name))
+    mark_dirty(conn, day)
+
+
+def delete_holiday(conn, holiday_id):
+    row = conn.execute('SELECT date FROM holidays WHERE id = ?', (holiday_id,)).fetchone()
+    if row is None:
+        return False
+    conn.execute('DELETE FROM holidays WHERE id = ?', (holiday_id,))
+    mark_dirty(conn, row['date'])
+    return True
+
+
+# -- materialized calendar ----------------------------------------------------
+
+def mark_dirty(conn, day):
+    """Recompute the month containing day on its next read"""
+    conn.execute('UPDATE calendar_months SET dirty = 1 WHERE month = ?', (_month_key(day),))
+
+
+def mark_day_dirty(conn, user_id, day):
+    """Recompute one user's day on the next read of its month; used by every punch"""
+    conn.execute('''
+        INSERT INTO calendar_dirty_days (user_id, work_date) VALUES (?, ?)
+        ON CONFLICT (user_id, work_date) DO NOTHING
+    ''', (user_id, str(day)[:10]))
+
+
+def mark_all_dirty(conn):
+    conn.execute('UPDATE calendar_months SET dirty = 1')
+
+
+def ensure_month(conn, year, month):
+    """Materialize the month unless an up-to-date copy exists
+
+    The whole month is recomputed when schedules or holidays touched it,
+    when the set of users changed (user ids are never reused, so the count
+    and the highest id together change with any delete or add), or (for the current month) once a day so
+    days that have passed turn from pending into present or absent. Punches
+    only queue their (user, day) in calendar_dirty_days, and just those rows
+    are recomputed, so reads during a punch peak stay cheap.
+    """
+    key = f'{year:04d}-{month:02d}'
+    today = date.today()
+    first_day, last_day = _month_bounds(year, month)
+    state = conn.execute(
+        'SELECT computed_on, user_count, max_user_id, dirty FROM calendar_months WHERE month = ?', (key,)
+    ).fetchone()
+    user_count, max_user_id = conn.execute('SELECT COUNT(*), MAX(id) FROM users').fetchone()
+
+    dirty_days = None
+    if (state is not None and not state['dirty'] and state['user_count'] == user_count
+            and state['max_user_id'] == max_user_id):
+        month_is_past = (year, month) < (today.year, today.month)
+        if month_is_past or str(state['computed_on']) == today.isoformat():
+            dirty_days = {(row['user_id'], str(row['work_date'])[:10]) for row in conn.execute(
+                'SELECT user_id, work_date FROM calendar_dirty_days WHERE work_date BETWEEN ? AND ?',
+                (first_day, last_day)).fetchall()}
+            if not dirty_days:
+                return False
+
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        if dirty_days is None:
+            rows = compute_month(conn, year, month, today)
+            conn.execute('DELETE FROM workday_calendar WHERE work_date BETWEEN ? AND ?', (first_day, last_day))
+            conn.execute('DELETE FROM calendar_dirty_days WHERE work_date BETWEEN ? AND ?', (first_day, last_day))
+        else:
+            user_ids = sorted({user_id for user_id, _ in dirty_days})
+            rows = [row for row in compute_month(conn, year, month, today, user_ids)
+                    if (row[0], row[1]) in dirty_days]
+            conn.executemany('DELETE FROM workday_calendar WHERE user_id = ? AND work_date = ?', sorted(dirty_days))
+            conn.executemany('DELETE FROM calendar_dirty_days WHERE user_id = ? AND work_date = ?', sorted(dirty_days))
+        conn.executemany('''
+            INSERT INTO workday_calendar (user_id, work_date, shift_id, status, expected_minutes,
+                                          worked_minutes, late_minutes, overtime_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        if dirty_days is None:
+            conn.execute('''
+                INSERT INTO calendar_months (month, computed_on, user_count, max_user_id, dirty)
+                VALUES (?, ?, ?, ?, 0)
+                ON CONFLICT (month) DO UPDATE SET
+                    computed_on = excluded.computed_on, user_count = excluded.user_count,
+                    max_user_id = excluded.max_user_id, dirty = 0
+            ''', (key, today.isoformat(), user_count, max_user_id))
+        conn.commit()
+    except DatabaseError as e:
+        # Another worker materialized the same month concurrently
+        conn.rollback()
+        print(f"Calendar materialization for {key} skipped: {str(e)}")
+    return True
+
+
+def _month_bounds(year, month):
+    last = calendar.monthrange(year, month)[1]
+    return f'{year:04d}-{month:02d}-01', f'{year:04d}-{month:02d}-{last:02d}'
+
+
+def compute_month(conn, year, month, today, user_ids=None):
+    """Expected workdays and present/late/absent/overtime for every user, as array ops
+
+    Builds a users x days grid for the month: schedules and holidays give the
+    expected days, daily_work_totals and the first clock-in of each day give
+    what happened. Returns rows for workday_calendar, for the given user_ids
+    only when passed.
+    """
+    first_day, last_day = _month_bounds(year, month)
+    dates = pd.date_range(first_day, last_day, freq='D')
+
+    shifts = pd.DataFrame(list_shifts(conn)).set_index('id')
+    default_shift = int(shifts.index.min())
+    user_filter = ''
+    if user_ids is not None:
+        user_filter = f"WHERE u.id IN ({', '.join('?' * len(user_ids))})"
+    users = conn.execute(f'''
+        SELECT u.id, us.shift_id
+        FROM users u
+        LEFT JOIN user_shifts us ON us.user_id = u.id
+        {user_filter}
+        ORDER BY u.id
+    ''', list(user_ids or [])).fetchall()
+    if not users:
+        return []
+
+    user_ids = np.array([row['id'] for row in users])
+    shift_ids = np.array([row['shift_id'] if row['shift_id'] in shifts.index else default_shift
+                          for row in users])
+    user_shifts = shifts.loc[shift_ids]
+
+    # Per-user schedule vectors
+    start_min = user_shifts['start_time'].map(_minutes).to_numpy()
+    end_min = user_shifts['end_time'].map(_minutes).to_numpy()
+    grace = user_shifts['grace_minutes'].to_numpy().astype(int)
+    expected_minutes = (end_min - start_min) % (24 * 60)
+    work_mask = np.zeros((len(user_ids), 7), dtype=bool)
+    for i, days in enumerate(user_shifts['work_days']):
+        work_mask[i, [int(day) for day in str(days).split(',') if day.strip()]] = True
+
+    # Per-day vectors
+    weekday = dates.dayofweek.to_numpy()
+    holiday_dates = {str(row['date']) for row in conn.execute(
+        'SELECT date FROM holidays WHERE date BETWEEN ? AND ?', (first_day, last_day)).fetchall()}
+    is_holiday = np.array([day in holiday_dates for day in dates.strftime('%Y-%m-%d')])
+    day_numbers = dates.day.to_numpy()
+    past = dates.date < today
+    is_today = dates.date == today
+
+    # What actually happened, scattered into the grid
+    shape = (len(user_ids), len(dates))
+    present = np.zeros(shape, dtype=bool)
+    worked = np.zeros(shape, dtype=int)
+    first_in = np.zeros(shape, dtype=int)
+    actual = conn.execute('''
+        SELECT t.user_id, t.work_date, t.total_minutes, MIN(s.start_ts) as first_start
+        FROM daily_work_totals t
+        JOIN work_sessions s ON s.user_id = t.user_id AND s.work_date = t.work_date
+        WHERE t.work_date BETWEEN ? AND ?
+        GROUP BY t.user_id, t.work_date, t.total_minutes
+    ''', (first_day, last_day)).fetchall()
+    index_of = {user_id: i for i, user_id in enumerate(user_ids.tolist())}
+    actual = [row for row in actual if row['user_id'] in index_of]
+    if actual:
+        rows_idx = np.array([index_of[row['user_id']] for row in actual])
+        cols_idx = np.array([int(str(row['work_date'])[8:10]) - 1 for row in actual])
+        present[rows_idx, cols_idx] = True
+        worked[rows_idx, cols_idx] = [row['total_minutes'] for row in actual]
+        first_in[rows_idx, cols_idx] = [_minutes(str(row['first_start'])[11:16]) for row in actual]
+
+    expected = work_mask[:, weekday] & ~is_holiday[None, :]
+    lateness = first_in - start_min[:, None]
+    late = present & expected & (lateness > grace[:, None])
+    late_minutes = np.where(late, lateness, 0)
+    expected_grid = np.where(expected, expected_minutes[:, None], 0)
+    overtime = np.where(present, np.clip(worked - expected_grid, 0, None), 0)
+
+    status = np.select(
+        [late, present, expected & past[None, :], expected & is_today[None, :],
+         expected, np.broadcast_to(is_holiday[None, :], shape)],
+        ['late', 'present', 'absent', 'pending', 'upcoming', 'holiday'],
+        default='off'
+    )
+
+    work_dates = [f'{year:04d}-{month:02d}-{day:02d}' for day in day_numbers]
+    rows = []
+    for i, user_id in enumerate(user_ids.tolist()):
+        shift_id = int(shift_ids[i])
+        for j, work_date in enumerate(work_dates):
+            rows.append((user_id, work_date, shift_id, str(status[i, j]), int(expected_grid[i, j]),
+                         int(worked[i, j]), int(late_minutes[i, j]), int(overtime[i, j])))
+    return rows
+
+
+# -- reads --------------------------------------------------------------------
+
+def user_month(conn, user_id, year, month):
+    """{date: calendar row} for one user's month"""
+    ensure_month(conn, year, month)
+    first_day, last_day = _month_bounds(year, month)
+    rows = conn.execute('''
+        SELECT work_date, status, expected_minutes, worked_minutes, late_minutes, overtime_minutes
+        FROM workday_calendar
+        WHERE user_id = ? AND work_date BETWEEN ? AND ?
+    ''', (user_id, first_day, last_day)).fetchall()
+    return {str(row['work_date']): dict(row) for row in rows}
+
+
+def day(conn, day_str):
+    """{user_id: calendar row} for one date"""
+    year, month = int(day_str[:4]), int(day_str[5:7])
+    ensure_month(conn, year, month)
+    rows = conn.execute('''
+        SELECT user_id, status, expected_minutes, worked_minutes, late_minutes, overtime_minutes
+        FROM workday_calendar
+        WHERE work_date = ?
+    ''', (day_str,)).fetchall()
+    return {row['user_id']: dict(row) for row in rows}
+
+
+def month_totals(conn, year, month):
+    """{user_id: expected/present/late/absent days and overtime minutes} for a month"""
+    ensure_month(conn, year, month)
+    first_day, last_day = _month_bounds(year, month)
+    rows = conn.execute('''
+        SELECT user_id,
+               SUM(CASE WHEN expected_minutes > 0 THEN 1 ELSE 0 END) as expected_days,
+               SUM(CASE WHEN status IN ('present', 'late') THEN 1 ELSE 0 END) as present_days,
+               SUM(CASE WHEN status = 'late' THEN 1 ELSE 0 END) as late_days,
+               SUM(CASE WHEN status = 'absent' THEN 1 ELSE 0 END) as absent_days,
+               SUM(late_minutes) as late_minutes,
+               SUM(overtime_minutes) as overtime_minutes
+        FROM workday_calendar
+        WHERE work_date BETWEEN ? AND ?
+        GROUP BY user_id
+    ''', (first_day, last_day)).fetchall()
+    return {row['user_id']: dict(row) for row in rows}
+
+
+def summarize(days):
+    """Month stats from user_month() rows"""
+    values = list(days.values())
+    return {
+        'expected_days': sum(1 for d in values if d['expected_minutes'] > 0),
+        'late_days': sum(1 for d in values if d['status'] == 'late'),
+        'absent_days': sum(1 for d in values if d['status'] == 'absent'),
+        'late_minutes': sum(d['late_minutes'] for d in values),
+        'overtime_minutes': sum(d['overtime_minutes'] for d in values)
+    }